@@ -14,6 +14,10 @@ import signal
 import sys
 from pathlib import Path
 
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.strategy_worker import StrategyWorker
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -38,6 +42,12 @@ def load_env():
 
 load_env()
 
+# 流程中对应各定时任务的实时扫描阶段 (用于记录执行状态)
+PIPELINE_TRIGGERS = {'quick_knife_scan': '14:30', 'scan': '14:50'}
+
+# 常驻 worker 启动失败后的重试间隔，期间直接按固定时间启动子进程执行
+WORKER_RETRY_INTERVAL = timedelta(minutes=5)
+
 class AutoScheduler:
     """自动调度器"""
 
@@ -47,6 +57,11 @@ class AutoScheduler:
             '14:30': None,
             '14:50': None
         }
+        # 常驻选股 worker 按阶段流程执行 (STRATEGY_WORKER=false 时到点启动新的子进程执行脚本)
+        self.worker = None
+        self.worker_retry_at = None
+        if os.getenv('STRATEGY_WORKER', 'true').lower() == 'true':
+            self.worker = StrategyWorker(timeout=300)
 
         # 注册信号处理器
         signal.signal(signal.SIGINT, self.signal_handler)
@@ -57,6 +72,24 @@ class AutoScheduler:
         logger.info(f"收到信号 {signum}，准备关闭调度器...")
         self.running = False
 
+    def worker_available(self):
+        """
+        常驻 worker 是否可用；未运行时尝试启动，启动失败 (或运行中重启失败) 后 WORKER_RETRY_INTERVAL 内不再尝试，
+        避免每秒都拉起新进程并阻塞调度循环
+        """
+        if not self.worker:
+            return False
+        if self.worker.is_alive():
+            return True
+        if self.worker_retry_at and datetime.now() < self.worker_retry_at:
+            return False
+        if self.worker.start():
+            self.worker_retry_at = None
+            return True
+        self.worker_retry_at = datetime.now() + WORKER_RETRY_INTERVAL
+        logger.warning(f"选股 worker 启动失败，{self.worker_retry_at.strftime('%H:%M:%S')} 前按固定时间以子进程执行")
+        return False
+
     def should_execute_task(self, current_time, target_hour, target_minute):
         """检查是否应该执行任务"""
         target_time = datetime(
@@ -105,6 +138,18 @@ class AutoScheduler:
                 logger.error(f"未知的时间段: {timeframe}")
                 return
 
+            # 优先交给已在运行的常驻 worker 执行，不可用时直接退回子进程方式 (不在此处重试启动)
+            if self.worker and self.worker.is_alive():
+                reply = self.worker.run(timeframe)
+                if reply['ok']:
+                    logger.info(f"股票筛选执行成功 (常驻worker)，耗时: {reply['seconds']:.2f}秒")
+                    logger.info(f"输出: {reply['output']}")
+                else:
+                    logger.error(f"股票筛选执行失败 (常驻worker): {reply['error']}")
+                    if reply['output']:
+                        logger.error(f"输出: {reply['output']}")
+                return
+
             # 执行选股脚本
             result = subprocess.run(
                 ['python3', script_path],
@@ -128,11 +173,41 @@ class AutoScheduler:
         except Exception as e:
             logger.error(f"执行股票筛选时发生错误: {e}")
 
+    def advance_pipeline(self):
+        """推进常驻 worker 中的当日选股流程，记录各阶段结果与耗时"""
+        reply = self.worker.tick()
+        if not reply['ok']:
+            logger.error(f"选股流程推进失败: {reply['error']}")
+            if not self.worker.is_alive():
+                # 失败后的自动重启也未成功，进入重试间隔
+                self.worker_retry_at = datetime.now() + WORKER_RETRY_INTERVAL
+            return
+        if reply['output'].strip():
+            logger.info(f"输出: {reply['output']}")
+        for record in reply['value']:
+            seconds = f"，耗时: {record['seconds']:.2f}秒" if record['seconds'] is not None else ""
+            message = f"阶段 {record['stage']}: {record['status']}{seconds}"
+            if record['error']:
+                message += f" ({record['error']})"
+            if record['status'] == 'done':
+                logger.info(message)
+            else:
+                logger.warning(message)
+            timeframe = PIPELINE_TRIGGERS.get(record['stage'])
+            if timeframe:
+                self.last_executed[timeframe] = datetime.now().date()
+
     def check_and_execute_tasks(self):
         """检查并执行任务"""
+        # 先取时间：尝试启动 worker 可能阻塞，失败后仍按本轮时间判断是否到点
         current_time = datetime.now()
         current_date = current_time.date()
 
+        # 常驻 worker 不可用时退回按固定时间执行脚本
+        if self.worker_available():
+            self.advance_pipeline()
+            return
+
         # 检查14:30任务 - 快刀手晚进早出策略
         if self.should_execute_task(current_time, 14, 30):
             task_key = '14:30'
@@ -190,6 +265,11 @@ class AutoScheduler:
         logger.info("💡 按 Ctrl+C 停止调度器")
         logger.info("=" * 50)
 
+        if self.worker:
+            logger.info("📋 常驻worker按阶段流程执行: 盘中预加载交易日历/基础股票池/扫描预计算，14:28预热连接")
+            logger.info("启动常驻选股worker...")
+            self.worker_available()
+
         try:
             while self.running:
                 current_time = datetime.now()
@@ -218,6 +298,8 @@ class AutoScheduler:
         except Exception as e:
             logger.error(f"调度器运行出错: {e}")
         finally:
+            if self.worker:
+                self.worker.stop()
             logger.info("🛑 股票筛选自动调度器已关闭")
 
     def save_status(self):
@@ -3,10 +3,12 @@
 """
 import pandas as pd
 import os
-import json
+import glob
 from datetime import datetime
 from typing import Dict, List
 from config import StockScreenerConfig, WECHAT_CONFIG, EMAIL_CONFIG
+from result_codec import BINARY_SUFFIX, JSON_SUFFIX, load_result, save_result
+from src.results_store import STRATEGY_NOTIFIER, get_results_store
 
 class StockNotifier:
     def __init__(self):
@@ -41,8 +43,7 @@ class StockNotifier:
         if filename is None:
             filename = f"stock_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
-        # 保存为JSON格式
-        json_file = os.path.join(self.config.OUTPUT_DIR, f"{filename}.json")
+        # 保存结果文件 (二进制 + JSON)
         result_data = {
             "timestamp": datetime.now().isoformat(),
             "summary": message,
@@ -51,11 +52,20 @@ class StockNotifier:
         }
 
         try:
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(result_data, f, ensure_ascii=False, indent=2)
-            print(f"结果已保存到: {json_file}")
+            saved_files = save_result(result_data, os.path.join(self.config.OUTPUT_DIR, filename))
+            print(f"结果已保存到: {', '.join(saved_files)}")
         except Exception as e:
-            print(f"保存JSON文件失败: {e}")
+            print(f"保存结果文件失败: {e}")
+
+        # 写入结果数据库 (同步更新统计汇总)
+        try:
+            get_results_store().append_result(STRATEGY_NOTIFIER, {
+                **result_data,
+                "screening_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "total_stocks_found": len(df),
+            }, source=f"{filename}{JSON_SUFFIX}")
+        except Exception as e:
+            print(f"写入结果数据库失败: {e}")
 
         # 保存为Excel格式
         if not df.empty:
@@ -201,21 +211,21 @@ class StockNotifier:
     def get_latest_results(self, limit: int = 10) -> List[Dict]:
         """获取最近的选股结果"""
         try:
-            result_files = []
+            # 同一结果同时有二进制和JSON文件时只读二进制
+            result_files = {}
             for file in os.listdir(self.config.OUTPUT_DIR):
-                if file.endswith('.json'):
+                stem, suffix = os.path.splitext(file)
+                if suffix == BINARY_SUFFIX or (suffix == JSON_SUFFIX and stem not in result_files):
                     file_path = os.path.join(self.config.OUTPUT_DIR, file)
-                    result_files.append((os.path.getmtime(file_path), file_path))
+                    result_files[stem] = (os.path.getmtime(file_path), file_path)
 
             # 按修改时间排序，获取最新的
-            result_files.sort(reverse=True, key=lambda x: x[0])
+            result_files = sorted(result_files.values(), reverse=True, key=lambda x: x[0])
 
             latest_results = []
             for _, file_path in result_files[:limit]:
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        result = json.load(f)
-                        latest_results.append(result)
+                    latest_results.append(load_result(file_path))
                 except Exception as e:
                     print(f"读取结果文件失败 {file_path}: {e}")
 
@@ -226,44 +236,35 @@ class StockNotifier:
             return []
 
     def generate_statistics_report(self) -> str:
-        """生成统计报告"""
+        """生成统计报告 (读取结果数据库的汇总表，不再逐个解析历史文件)"""
         try:
-            latest_results = self.get_latest_results(30)  # 获取最近30次结果
-
-            if not latest_results:
+            store = get_results_store()
+            # 导入尚未入库的历史结果文件 (按文件名去重，已导入的直接跳过)
+            store.import_legacy_json(
+                sorted(glob.glob(os.path.join(self.config.OUTPUT_DIR, f"stock_results_*{JSON_SUFFIX}"))),
+                strategy=STRATEGY_NOTIFIER)
+
+            stats = store.run_stats(STRATEGY_NOTIFIER)
+            if not stats or not stats[0]['runs']:
                 return "暂无历史选股数据"
 
-            total_screens = len(latest_results)
-            total_stocks = sum(result.get("count", 0) for result in latest_results)
-            avg_stocks_per_screen = total_stocks / total_screens if total_screens > 0 else 0
-
-            # 统计出现频率最高的股票
-            stock_frequency = {}
-            for result in latest_results:
-                for stock in result.get("stocks", []):
-                    symbol = stock.get("代码", "")
-                    name = stock.get("名称", "")
-                    key = f"{name}({symbol})"
-                    stock_frequency[key] = stock_frequency.get(key, 0) + 1
-
-            # 获取出现次数最多的前10只股票
-            top_stocks = sorted(stock_frequency.items(),
-                              key=lambda x: x[1], reverse=True)[:10]
+            stats = stats[0]
+            top_stocks = store.top_stocks(STRATEGY_NOTIFIER, limit=10)
 
             report = f"""
 === 选股统计报告 ===
-统计周期: 最近 {total_screens} 次选股
-选股时间: {latest_results[-1].get('timestamp', 'N/A')} 至 {latest_results[0].get('timestamp', 'N/A')}
+统计周期: 累计 {stats['runs']} 次选股
+选股时间: {stats['first_time']} 至 {stats['last_time']}
 
 统计数据:
-- 总选股次数: {total_screens}
-- 总选出股票: {total_stocks} 只
-- 平均每次选出: {avg_stocks_per_screen:.1f} 只
+- 总选股次数: {stats['runs']}
+- 总选出股票: {stats['total_stocks']} 只
+- 平均每次选出: {stats['avg_stocks']:.1f} 只
 
-高频股票 (最近30次中出现次数最多):
+高频股票 (累计出现次数最多):
 """
-            for idx, (stock_name, frequency) in enumerate(top_stocks, 1):
-                report += f"{idx:2d}. {stock_name}: {frequency} 次\n"
+            for idx, stock in enumerate(top_stocks, 1):
+                report += f"{idx:2d}. {stock['name']}({stock['code']}): {stock['count']} 次\n"
 
             return report
 
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+常驻选股 worker
+调度器启动时拉起一个独立子进程，预先导入策略模块、初始化 Tushare 客户端与 HTTP 连接，
+并持有当日选股流程 (src.daily_pipeline)：调度器按秒下发 pipeline 任务推进各阶段，
+盘前准备的结果留在进程内供选股时刻直接使用；任务通过本地队列下发，避免每次冷启动
+子进程崩溃、超时或任务失败时自动重启，保持与原先每次新开子进程相同的故障隔离
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+import traceback
+from contextlib import redirect_stdout
+from datetime import date
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+TASK_PIPELINE = 'pipeline'
+TASK_QUICK_KNIFE = '14:30'
+TASK_MAIN_FORCE = '14:50'
+
+
+def _serve(tasks, results):
+    """worker 子进程主循环: 预加载后逐个执行队列中的任务"""
+    # Ctrl+C 由调度器处理，worker 只响应调度器的停止指令
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # 与直接运行 src/ 下脚本时的导入路径一致 (策略模块依赖 `from config import ...`)
+    for path in (str(PROJECT_ROOT), str(PROJECT_ROOT / 'src')):
+        if path in sys.path:
+            sys.path.remove(path)
+        sys.path.insert(0, path)
+
+    started = time.time()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        from src import main_force_burial_strategy as main_force
+        from src import quick_knife_strategy as quick_knife
+        from src.daily_pipeline import build_daily_pipeline
+        strategy = main_force.MainForceBurialStrategy()
+
+    pipelines = {}
+
+    def advance_pipeline():
+        today = date.today().strftime('%Y%m%d')
+        if today not in pipelines:
+            pipelines.clear()
+            pipelines[today] = build_daily_pipeline(strategy, today)
+        return pipelines[today].run_due()
+
+    handlers = {
+        TASK_PIPELINE: advance_pipeline,
+        TASK_QUICK_KNIFE: quick_knife.run,
+        TASK_MAIN_FORCE: lambda: main_force.run(strategy),
+    }
+    results.put({'id': None, 'ok': True, 'output': output.getvalue(), 'error': None, 'value': None,
+                 'seconds': time.time() - started})
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        output = io.StringIO()
+        started = time.time()
+        os.environ['TIMEFRAME'] = task['kind']
+        try:
+            with redirect_stdout(output):
+                value = handlers[task['kind']]()
+            error = None
+        except Exception:
+            value, error = None, traceback.format_exc()
+        results.put({'id': task['id'], 'ok': error is None, 'output': output.getvalue(), 'error': error,
+                     'value': value, 'seconds': time.time() - started})
+
+
+class StrategyWorker:
+    """常驻选股 worker 的管理端 (在调度器进程中使用)"""
+
+    def __init__(self, timeout=300, start_timeout=120):
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.process = None
+        self.started_on = None
+        self.restarts = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._tasks = None
+        self._results = None
+        self._next_id = 0
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        """启动 worker 并等待预加载完成，成功返回 True"""
+        self.stop()
+        # 每次启动使用新队列，避免进程被强制终止后残留的锁或消息
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        self.process = self._context.Process(target=_serve, args=(self._tasks, self._results),
+                                             name='strategy-worker', daemon=True)
+        self.process.start()
+        reply = self._wait(None, self.start_timeout)
+        if not reply['ok']:
+            logger.error(f"选股 worker 启动失败: {reply['error']}")
+            self.stop()
+            return False
+        self.started_on = date.today()
+        logger.info(f"选股 worker 已就绪 (pid={self.process.pid}，预加载耗时 {reply['seconds']:.2f}秒)")
+        return True
+
+    def ensure_started(self):
+        return self.is_alive() or self.start()
+
+    def restart(self, reason):
+        logger.warning(f"重启选股 worker: {reason}")
+        self.restarts += 1
+        return self.start()
+
+    def stop(self):
+        """通知 worker 退出，超时则强制终止"""
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            try:
+                self._tasks.put(None)
+            except Exception:
+                pass
+            self.process.join(5)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(5)
+        self.process = None
+
+    def tick(self):
+        """推进当日选股流程，返回值 value 为本次结束的阶段记录 (跨日的 worker 先重启，加载最新代码与状态)"""
+        if self.is_alive() and self.started_on != date.today():
+            self.restart("跨日刷新")
+        return self.run(TASK_PIPELINE)
+
+    def run(self, kind, timeout=None):
+        """
+        执行一个任务并等待结果
+        返回 {'id', 'ok', 'output' (任务标准输出), 'error', 'value', 'seconds'}；失败后 worker 自动重启
+        """
+        if not self.ensure_started():
+            return self._failure(None, "worker 无法启动")
+        self._next_id += 1
+        task_id = self._next_id
+        self._tasks.put({'id': task_id, 'kind': kind})
+        reply = self._wait(task_id, timeout or self.timeout)
+        if not reply['ok']:
+            # 任务异常后进程内状态不可信，与崩溃、超时一样换新进程
+            self.restart(f"任务 {kind} 失败")
+        return reply
+
+    def _wait(self, task_id, timeout):
+        """等待指定任务的结果，期间检测子进程是否异常退出"""
+        deadline = time.monotonic() + timeout
+        started = time.monotonic()
+        while time.monotonic() < deadline:
+            try:
+                reply = self._results.get(timeout=1)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    return self._failure(task_id, f"worker 进程异常退出 (exitcode={self.process.exitcode})",
+                                         time.monotonic() - started)
+                continue
+            if reply['id'] == task_id:
+                return reply
+        return self._failure(task_id, f"执行超时 ({timeout}秒)", timeout)
+
+    @staticmethod
+    def _failure(task_id, error, seconds=0.0):
+        return {'id': task_id, 'ok': False, 'output': '', 'error': error, 'value': None, 'seconds': seconds}
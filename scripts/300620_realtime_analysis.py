@@ -8,6 +8,11 @@ import requests
 import json
 from datetime import datetime
 import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.minute_store import get_minute_store
 
 class RealtimeDataAnalyzer:
     """实时数据分析器"""
@@ -16,6 +21,7 @@ class RealtimeDataAnalyzer:
         self.stock_code = "300620"
         self.stock_name = "光库科技"
         self.secid = "0.300620"  # 东方财富市场代码
+        self.ts_code = "300620.SZ"
 
     def get_realtime_data(self):
         """获取实时行情数据"""
@@ -79,8 +85,14 @@ class RealtimeDataAnalyzer:
             print(f"❌ 数据解析失败: {e}")
             return None
 
-    def get_intraday_trend(self):
-        """获取分时走势数据"""
+    def get_intraday_trend(self, count=30):
+        """获取分时走势数据 (优先读取本地分钟线库，没有当日数据时请求东方财富)"""
+        today = datetime.now().strftime('%Y%m%d')
+        local = get_minute_store().recent(self.ts_code, count, end_date=today,
+                                          end_time=datetime.now().strftime('%H%M'))
+        if len(local) and local['trade_date'].iloc[-1] == today:
+            return {'source': 'local', 'klines': local.to_dict('records')}
+
         try:
             url = "https://push2.eastmoney.com/api/qt/stock/fflow/kline/get"
             params = {
@@ -88,7 +100,7 @@ class RealtimeDataAnalyzer:
                 'fields1': 'f1,f2,f3,f4,f5,f6',
                 'fields2': 'f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61,f62,f63,f64,f65',
                 'klt': '1',  # 1分钟
-                'lmt': '30'  # 获取30条数据
+                'lmt': str(count)  # 获取条数
             }
 
             headers = {
@@ -2,15 +2,36 @@
 """
 归档旧的结果文件
 保留最近7天的结果，将更早的文件移动到archive目录
+归档目录中超过30天的结果再合并为按月分区的列式归档 (archive/compacted)
 """
 
 import os
+import sys
 import glob
 import shutil
 from datetime import datetime, timedelta
+from pathlib import Path
 
-def archive_old_results():
-    """归档超过7天的结果文件"""
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+def compact_archived_results(older_than_days=30):
+    """将归档目录中的旧结果合并为列式分区"""
+    try:
+        from src.result_archive import ResultArchive
+    except ImportError:
+        print("⚠️ 无法导入列式归档模块，跳过合并")
+        return
+
+    summary = ResultArchive().compact_older_than(older_than_days, ["archive/results/*result*.json"])
+    if summary['files']:
+        print(f"✅ 合并 {summary['files']} 个结果文件到分区 {', '.join(summary['partitions'])} "
+              f"({summary['bytes_before'] / 1024:.1f}KB -> {summary['bytes_after'] / 1024:.1f}KB)")
+    for path in summary['skipped']:
+        print(f"跳过无法解析的文件: {path}")
+
+def archive_old_results(compact_days=30):
+    """归档超过7天的结果文件，并合并超过 compact_days 天的归档结果"""
 
     # 创建归档目录
     archive_dir = "archive/results"
@@ -50,5 +71,7 @@ def archive_old_results():
     except OSError:
         pass
 
+    compact_archived_results(compact_days)
+
 if __name__ == "__main__":
     archive_old_results()
\ No newline at end of file
@@ -9,6 +9,10 @@ import sys
 import glob
 import shutil
 from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 def cleanup():
     """执行所有清理任务"""
@@ -88,6 +92,12 @@ def cleanup():
     archived_files = glob.glob("archive/results/*.json")
     print(f"   当前结果文件: {len(result_files)} 个")
     print(f"   归档结果文件: {len(archived_files)} 个")
+    try:
+        from src.result_archive import ResultArchive
+        archive = ResultArchive()
+        print(f"   列式归档分区: {len(archive.partitions())} 个 (合并 {len(archive.compacted_files())} 个结果文件)")
+    except ImportError:
+        pass
 
     # 统计日志文件
     if os.path.exists("auto_scheduler.log"):
@@ -5,51 +5,31 @@
 """
 
 import json
-import glob
-import os
+import sys
 from datetime import datetime, timedelta
-from collections import defaultdict, Counter
+from collections import Counter, defaultdict
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.result_loader import get_result_loader
+from src.results_store import STRATEGY_ENHANCED_1130, get_results_store
 
 def load_recent_results(days=7):
     """加载最近几天的选股结果"""
     cutoff_date = datetime.now() - timedelta(days=days)
-    results = []
-
-    # 查找所有结果文件
-    result_files = glob.glob("enhanced_1130_result_*.json")
-    result_files.extend(glob.glob("archive/results/enhanced_1130_result_*.json"))
-
-    for file_path in sorted(result_files):
-        try:
-            # 从文件名提取日期
-            filename = os.path.basename(file_path)
-            date_part = filename.split('_')[3]
-            file_date = datetime.strptime(date_part, '%Y%m%d')
-
-            if file_date >= cutoff_date:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    data['source_file'] = file_path
-                    results.append(data)
-
-        except (ValueError, KeyError, json.JSONDecodeError) as e:
-            print(f"跳过文件 {file_path}: {e}")
-            continue
-
-    return results
+    return get_result_loader().load_runs(start=cutoff_date, strategies=STRATEGY_ENHANCED_1130)
 
 def analyze_stock_performance(results):
     """分析股票表现"""
     all_stocks = []
-    stock_appearances = Counter()
-    stock_scores = defaultdict(list)
     screening_times = []
 
     for result in results:
-        screening_time = datetime.strptime(result['screening_time'], '%Y-%m-%d %H:%M:%S')
+        screening_time = result['run_time']
         screening_times.append(screening_time)
 
-        for stock in result.get('top_stocks', []):
+        for stock in result['stocks']:
             stock_code = stock['code']
             stock_name = stock['name']
             score = stock['screening_score']
@@ -71,8 +51,16 @@ def analyze_stock_performance(results):
                 'industry': stock.get('industry', '未知')
             })
 
-            stock_appearances[stock_code] += 1
-            stock_scores[stock_code].append(score)
+    # 入选次数和评分直接从结果库的代码索引查询 (加载器解析文件时已同步)
+    repeat_picks = get_results_store().repeat_picks(
+        min_count=1,
+        start_date=min(screening_times).strftime('%Y%m%d'),
+        end_date=max(screening_times).strftime('%Y%m%d'),
+        strategy=STRATEGY_ENHANCED_1130
+    ) if screening_times else []
+
+    stock_appearances = Counter({item['code']: item['count'] for item in repeat_picks})
+    stock_scores = {item['code']: item['scores'] for item in repeat_picks}
 
     return all_stocks, stock_appearances, stock_scores, screening_times
 
@@ -159,12 +147,12 @@ def analyze_strategy_performance(results):
 
     strategy_performance = defaultdict(list)
     for result in results:
-        strategy_version = result.get('strategy_version', 'unknown')
-        stocks_count = len(result.get('top_stocks', []))
-        avg_score = sum(s['screening_score'] for s in result.get('top_stocks', [])) / stocks_count if stocks_count > 0 else 0
+        strategy_version = result['header'].get('strategy_version', 'unknown')
+        stocks_count = len(result['stocks'])
+        avg_score = sum(s['screening_score'] for s in result['stocks']) / stocks_count if stocks_count > 0 else 0
 
         strategy_performance[strategy_version].append({
-            'date': result['screening_time'],
+            'date': result['run_time'].strftime('%Y-%m-%d %H:%M:%S'),
             'stocks_count': stocks_count,
             'avg_score': avg_score
         })
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+主力埋伏策略历史回放回测
+使用本地日线历史库 (data/history) 与归档行情快照，对区间内每个交易日全市场重放筛选与评分，
+统计 T+1/T+2 开盘/收盘卖出的真实收益
+
+用法:
+    python scripts/burial_backtest.py --sync-tushare --start 20220101 --end 20241231
+    python scripts/burial_backtest.py --start 20220101 --end 20241231 --entry-time close
+    python scripts/burial_backtest.py --start 20240101 --entry-time 14:50 --config 稳健型
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.backtest_cache import BacktestCache
+from src.backtest_engine import BurialBacktest
+from src.backtest_executor import ParallelExecutor
+from src.burial_signals import params_from, strategy_params
+from src.history_store import DailyHistoryStore
+from src.main_force_burial_strategy import MainForceBurialStrategy
+
+CONFIG_FILE = "strategy_configs.json"
+
+
+def load_strategy_config(name):
+    """读取 Web 应用保存的策略配置"""
+    if not os.path.exists(CONFIG_FILE):
+        raise SystemExit(f"❌ 配置文件不存在: {CONFIG_FILE}")
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    if name not in configs:
+        raise SystemExit(f"❌ 未找到策略配置: {name} (可选: {', '.join(configs)})")
+    return configs[name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='主力埋伏策略历史回放回测')
+    parser.add_argument('--start', help='开始日期 YYYYMMDD (默认历史库首日)')
+    parser.add_argument('--end', help='结束日期 YYYYMMDD (默认历史库末日)')
+    parser.add_argument('--entry-time', default='close', help="入场时点: close 或 HH:MM (使用归档快照)")
+    parser.add_argument('--top', type=int, default=10, help='每日入选数量 (默认10)')
+    parser.add_argument('--config', help='使用 strategy_configs.json 中的策略配置')
+    parser.add_argument('--sync-tushare', action='store_true', help='回测前从 Tushare 同步区间日线')
+    parser.add_argument('--import-csv', help='回测前从CSV导入日线 (amount 单位为元)')
+    parser.add_argument('--output', help='逐笔明细输出CSV路径')
+    parser.add_argument('--workers', type=int, help='并行进程数 (默认 BACKTEST_WORKERS / CPU 核数，1 为单进程)')
+    parser.add_argument('--no-cache', action='store_true', help='不使用逐日结果缓存 (全部重新计算)')
+    args = parser.parse_args()
+
+    strategy = MainForceBurialStrategy()
+    history = DailyHistoryStore()
+
+    if args.import_csv:
+        rows = history.ingest_csv(args.import_csv)
+        print(f"✅ 已导入 {rows} 行日线数据")
+    if args.sync_tushare:
+        if not strategy.pro:
+            raise SystemExit("❌ Tushare 不可用，无法同步历史数据")
+        start = args.start or (datetime.now().strftime('%Y') + '0101')
+        end = args.end or datetime.now().strftime('%Y%m%d')
+        days = history.ingest_tushare(strategy.pro, start, end)
+        print(f"✅ 已同步 {days} 个交易日")
+
+    if not history.exists():
+        raise SystemExit(f"❌ 历史库为空: {history.path} (使用 --sync-tushare 或 --import-csv 导入)")
+
+    weights = strategy.scoring_weights
+    overrides = {}
+    if args.config:
+        config = load_strategy_config(args.config)
+        overrides = strategy_params(config.get('params', {}))
+        weights = config.get('weights', weights)
+    params = params_from(strategy, overrides)
+
+    print(f"📚 历史库: {history.manifest.get('first_date')} ~ {history.manifest.get('last_date')}, "
+          f"{len(history.dates)} 个交易日 × {len(history.symbols)} 只股票 (版本 {history.version})")
+
+    started = time.time()
+    cache = None if args.no_cache else BacktestCache()
+    with ParallelExecutor(args.workers) as executor:
+        backtest = BurialBacktest(params, weights, history, strategy.snapshot_archive, top_n=args.top,
+                                  cache=cache, executor=executor)
+        result = backtest.run(args.start, args.end, args.entry_time)
+    elapsed = time.time() - started
+
+    traded_days = int((result.daily['picks'] > 0).sum()) if not result.daily.empty else 0
+    print(f"\n⏱️  回测完成，用时 {elapsed:.2f} 秒 ({executor.workers} 进程): {len(result.daily)} 个交易日，"
+          f"{traded_days} 日有入选，共 {len(result.picks)} 笔 (入场: {result.entry_time})")
+    if cache:
+        print(f"   逐日缓存: 命中 {cache.hits}，计算 {cache.misses} ({cache.root})")
+
+    print("\n📊 出场方式统计:")
+    print(result.summary().round(2).to_string())
+    print("\n📐 95% 置信区间 (Bootstrap 10000 次):")
+    print(result.intervals().round(2).to_string())
+
+    if args.output:
+        result.picks.to_csv(args.output, index=False, encoding='utf-8-sig')
+        print(f"\n💾 逐笔明细已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+历史结果压缩工具
+将旧的单次选股结果文件合并为按月/按日分区的列式归档 (archive/compacted)
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.result_archive import PARQUET_AVAILABLE, ResultArchive
+from src.result_loader import DEFAULT_PATTERNS
+
+
+def main():
+    parser = argparse.ArgumentParser(description='合并历史选股结果为列式分区归档')
+    parser.add_argument('--older-than', type=int, default=30, help='只合并修改时间早于N天的文件 (默认30)')
+    parser.add_argument('--granularity', choices=['month', 'day'], default='month', help='分区粒度 (默认按月)')
+    parser.add_argument('--pattern', action='append', help='结果文件匹配模式，可多次指定 (默认同结果加载器)')
+    parser.add_argument('--keep', action='store_true', help='合并后保留原文件')
+    parser.add_argument('--dry-run', action='store_true', help='只统计，不写入')
+    args = parser.parse_args()
+
+    archive = ResultArchive()
+    print(f"📦 列式归档: {archive.root} (格式: {archive.format}"
+          f"{'' if PARQUET_AVAILABLE else '，安装 pyarrow 后使用 Parquet+zstd'})")
+
+    summary = archive.compact_older_than(args.older_than, args.pattern or DEFAULT_PATTERNS,
+                                         granularity=args.granularity, delete=not args.keep,
+                                         dry_run=args.dry_run)
+
+    action = "可合并" if args.dry_run else "已合并"
+    print(f"✅ {action} {summary['files']} 个结果文件 -> 分区: {', '.join(summary['partitions']) or '无'}")
+    if not args.dry_run and summary['files']:
+        saved = summary['bytes_before'] - summary['bytes_after']
+        print(f"   {summary['bytes_before'] / 1024:.1f}KB -> {summary['bytes_after'] / 1024:.1f}KB"
+              f" (节省 {saved / 1024:.1f}KB)")
+    for path in summary['skipped']:
+        print(f"⚠️  跳过无法解析的文件: {path}")
+
+
+if __name__ == "__main__":
+    main()
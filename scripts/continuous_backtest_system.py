@@ -5,11 +5,18 @@
 """
 
 import json
-import glob
 import os
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.bootstrap_stats import format_ci, mean_ci, proportion_ci
+from src.result_loader import get_result_loader
+from src.results_store import PERIOD_WEEK, get_results_store, strategy_from_filename
 
 class ContinuousBacktestSystem:
     """持续回测系统"""
@@ -18,143 +25,93 @@ class ContinuousBacktestSystem:
         self.backtest_results = []
         self.performance_metrics = []
         self.optimization_history = []
+        self.store = get_results_store()
 
     def load_historical_results(self):
         """加载历史选股结果"""
         print("🔍 加载历史选股结果...")
         print("=" * 60)
 
-        # 查找所有结果文件
+        # 统一加载器：只解析新增或修改过的文件，格式差异已在加载器中统一
         result_patterns = [
-            "*screening_result*.json",
-            "*1130*result*.json",
-            "*test_result*.json",
-            "enhanced_1130_result*.json",
-            "advanced_screening_result*.json"
+            "*screening_result*",
+            "*1130*result*",
+            "*test_result*",
+            "enhanced_1130_result*",
+            "advanced_screening_result*"
         ]
+        runs = get_result_loader().load_runs(match=result_patterns)
 
-        all_files = []
-        for pattern in result_patterns:
-            all_files.extend(glob.glob(pattern))
-
-        # 去重并排序
-        all_files = list(set(all_files))
-        all_files.sort()
-
-        print(f"📁 找到 {len(all_files)} 个结果文件")
-
-        for file in all_files:
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                # 解析文件信息
-                file_info = self._parse_result_file(file, data)
-                if file_info:
-                    self.backtest_results.append(file_info)
+        print(f"📁 找到 {len(runs)} 个结果文件")
 
-            except Exception as e:
-                print(f"⚠️  跳过文件 {file}: {e}")
+        for run in runs:
+            file_info = self._parse_result_file(run)
+            if file_info:
+                self.backtest_results.append(file_info)
 
         print(f"✅ 成功加载 {len(self.backtest_results)} 个有效结果")
 
-    def _parse_result_file(self, filename, data):
-        """解析单个结果文件"""
-        try:
-            # 获取执行时间
-            execution_time = data.get('execution_time', data.get('screening_time', ''))
-            if execution_time:
-                execution_time = datetime.strptime(execution_time, '%Y-%m-%d %H:%M:%S')
-            else:
-                # 尝试从文件名解析时间
-                time_str = filename.split('_')[-1].replace('.json', '')
-                try:
-                    execution_time = datetime.strptime(time_str, '%Y%m%d%H%M%S')
-                except:
-                    return None
-
-            # 获取选股结果
-            stocks = []
-            results_count = 0
-
-            if 'top_stocks' in data:
-                stocks = data['top_stocks']
-                results_count = len(stocks)
-            elif 'results_count' in data:
-                results_count = data['results_count']
-            elif 'task_results' in data:
-                for task in data['task_results']:
-                    results_count += task.get('count', 0)
-                    stocks.extend(task.get('stocks', []))
-
-            # 获取策略信息
-            strategy_type = data.get('screening_type', 'unknown')
-            if 'optimized' in filename.lower() or 'enhanced' in filename.lower():
-                strategy_type = 'enhanced'
-            elif '1130' in filename:
-                strategy_type = '1130_screening'
-            elif 'advanced' in filename.lower():
-                strategy_type = 'advanced'
-
-            return {
-                'filename': filename,
-                'execution_time': execution_time,
-                'strategy_type': strategy_type,
-                'results_count': results_count,
-                'stocks': stocks[:10],  # 只保留前10只
-                'data': data
-            }
+    def _parse_result_file(self, run):
+        """整理单个结果文件的信息"""
+        filename = os.path.basename(run['file'])
+
+        # 获取策略信息
+        strategy_type = run['screening_type'] or 'unknown'
+        if 'optimized' in filename.lower() or 'enhanced' in filename.lower():
+            strategy_type = 'enhanced'
+        elif '1130' in filename:
+            strategy_type = '1130_screening'
+        elif 'advanced' in filename.lower():
+            strategy_type = 'advanced'
+
+        return {
+            'filename': run['file'],
+            'execution_time': run['run_time'],
+            'strategy_type': strategy_type,
+            'results_count': run['count'],
+            'stocks': run['stocks'][:10],  # 只保留前10只
+            'data': run
+        }
 
-        except Exception as e:
-            return None
+    def _run_stats(self, **kwargs):
+        """结果数据库的汇总表，只取本次加载的结果文件对应的策略"""
+        strategies = {strategy_from_filename(r['filename']) for r in self.backtest_results}
+        return [row for strategy in sorted(strategies)
+                for row in self.store.run_stats(strategy=strategy, **kwargs)]
 
     def analyze_strategy_performance(self):
-        """分析策略表现"""
+        """分析策略表现 (读取结果数据库的汇总表)"""
         print("\n📊 策略表现分析")
         print("=" * 60)
 
-        if not self.backtest_results:
+        strategy_stats = self._run_stats()
+        if not strategy_stats:
             print("❌ 没有找到历史数据")
             return
 
-        # 按策略类型分组分析
-        strategy_groups = {}
-        for result in self.backtest_results:
-            strategy = result['strategy_type']
-            if strategy not in strategy_groups:
-                strategy_groups[strategy] = []
-            strategy_groups[strategy].append(result)
-
-        print(f"🎯 各策略类型表现:")
-        print("-" * 80)
-        print(f"{'策略类型':<20} {'执行次数':<10} {'平均选股':<10} {'成功率':<10} {'最佳表现':<15}")
-        print("-" * 80)
-
-        for strategy, results in strategy_groups.items():
-            total_executions = len(results)
-            avg_stocks = np.mean([r['results_count'] for r in results])
-            success_rate = len([r for r in results if r['results_count'] > 0]) / total_executions * 100
-            best_performance = max([r['results_count'] for r in results])
+        print(f"🎯 各策略类型表现 (成功率附95%置信区间):")
+        print("-" * 100)
+        print(f"{'策略类型':<20} {'执行次数':<10} {'平均选股':<10} {'成功率':<30} {'最佳表现':<15}")
+        print("-" * 100)
 
-            print(f"{strategy:<20} {total_executions:<10} {avg_stocks:.1f}{'':<6} {success_rate:.1f}%{'':<6} {best_performance}只")
+        for stats in strategy_stats:
+            stats['success_rate_ci'] = proportion_ci(stats['nonempty_runs'], stats['runs'])
+            print(f"{stats['strategy']:<20} {stats['runs']:<10} {stats['avg_stocks']:.1f}{'':<6} "
+                  f"{format_ci(stats['success_rate_ci']):<30} {stats['max_stocks']}只")
 
-        return strategy_groups
+        return {stats['strategy']: stats for stats in strategy_stats}
 
     def analyze_time_trends(self):
-        """分析时间趋势"""
+        """分析时间趋势 (按周汇总，合并各策略)"""
         print("\n📈 时间趋势分析")
         print("=" * 60)
 
-        # 按时间排序
-        sorted_results = sorted(self.backtest_results, key=lambda x: x['execution_time'])
-
         # 按周分组分析
         weekly_analysis = {}
-        for result in sorted_results:
-            week = result['execution_time'].strftime('%Y-W%U')
-            if week not in weekly_analysis:
-                weekly_analysis[week] = []
-            weekly_analysis[week].append(result)
+        for stats in self._run_stats(period=PERIOD_WEEK):
+            week = weekly_analysis.setdefault(stats['bucket'], {'runs': 0, 'nonempty_runs': 0, 'total_stocks': 0})
+            for key in week:
+                week[key] += stats[key]
 
         print(f"📅 按周表现分析:")
         print("-" * 60)
@@ -162,10 +119,10 @@ class ContinuousBacktestSystem:
         print("-" * 60)
 
         prev_success_rate = 0
-        for week, results in sorted(weekly_analysis.items()):
-            total_executions = len(results)
-            avg_stocks = np.mean([r['results_count'] for r in results])
-            success_rate = len([r for r in results if r['results_count'] > 0]) / total_executions * 100
+        for week, stats in sorted(weekly_analysis.items()):
+            total_executions = stats['runs']
+            avg_stocks = stats['total_stocks'] / total_executions
+            success_rate = stats['nonempty_runs'] / total_executions * 100
 
             # 判断趋势
             if prev_success_rate == 0:
@@ -203,19 +160,17 @@ class ContinuousBacktestSystem:
             if result['results_count'] > 0:
                 strategy_performance[strategy]['success_count'] += 1
 
-        # 计算关键指标
+        # 计算关键指标 (点估计直接取置信区间的 estimate，与区间来自同一样本)
         for strategy, perf in strategy_performance.items():
-            total_executions = len(perf['results'])
-            avg_stocks = perf['total_stocks'] / total_executions if total_executions > 0 else 0
-            success_rate = perf['success_count'] / total_executions * 100 if total_executions > 0 else 0
-
-            strategy_performance[strategy]['avg_stocks'] = avg_stocks
-            strategy_performance[strategy]['success_rate'] = success_rate
+            perf['stocks_ci'] = mean_ci([r['results_count'] for r in perf['results']])
+            perf['success_ci'] = proportion_ci(perf['success_count'], len(perf['results']))
+            perf['avg_stocks'] = perf['stocks_ci']['estimate']
+            perf['success_rate'] = perf['success_ci']['estimate']
 
-        print(f"📊 策略版本对比:")
-        print("-" * 80)
-        print(f"{'策略版本':<20} {'平均选股':<10} {'成功率':<10} {'稳定性':<15} {'推荐度':<10}")
-        print("-" * 80)
+        print(f"📊 策略版本对比 (附95%置信区间):")
+        print("-" * 110)
+        print(f"{'策略版本':<20} {'平均选股':<24} {'成功率':<30} {'稳定性':<15} {'推荐度':<10}")
+        print("-" * 110)
 
         # 计算稳定性（成功率的标准差）
         for strategy, perf in strategy_performance.items():
@@ -229,7 +184,9 @@ class ContinuousBacktestSystem:
                                   (100 - stability) * 0.2)
             recommendation = "★★★" if recommendation_score >= 70 else "★★" if recommendation_score >= 50 else "★"
 
-            print(f"{strategy:<20} {perf['avg_stocks']:.1f}{'':<6} {perf['success_rate']:.1f}%{'':<6} {stability_score:<15} {recommendation:<10}")
+            stocks_ci = format_ci(perf['stocks_ci'], unit='')
+            success_ci = format_ci(perf['success_ci'])
+            print(f"{strategy:<20} {stocks_ci:<24} {success_ci:<30} {stability_score:<15} {recommendation:<10}")
 
     def generate_optimization_suggestions(self):
         """生成优化建议"""
@@ -244,13 +201,17 @@ class ContinuousBacktestSystem:
             print("⚠️  缺少近期数据，无法生成针对性建议")
             return
 
-        recent_success_rate = len([r for r in recent_results if r['results_count'] > 0]) / len(recent_results) * 100
-        recent_avg_stocks = np.mean([r['results_count'] for r in recent_results])
+        recent_success_ci = proportion_ci(len([r for r in recent_results if r['results_count'] > 0]), len(recent_results))
+        recent_stocks_ci = mean_ci([r['results_count'] for r in recent_results])
+        recent_success_rate = recent_success_ci['estimate']
+        recent_avg_stocks = recent_stocks_ci['estimate']
 
         print(f"📈 最近7天表现:")
         print(f"   • 执行次数: {len(recent_results)}")
-        print(f"   • 成功率: {recent_success_rate:.1f}%")
-        print(f"   • 平均选股: {recent_avg_stocks:.1f}只")
+        print(f"   • 成功率: {format_ci(recent_success_ci)}")
+        print(f"   • 平均选股: {format_ci(recent_stocks_ci, unit='只')}")
+        if recent_success_ci['high'] - recent_success_ci['low'] > 20:
+            print(f"   ⚠️  样本较少，成功率置信区间宽度超过20个百分点，以下建议仅供参考")
 
         print(f"\n🎯 优化建议:")
 
@@ -300,8 +261,6 @@ class ContinuousBacktestSystem:
         total_executions = len(self.backtest_results)
         total_stocks_selected = sum(r['results_count'] for r in self.backtest_results)
         success_executions = len([r for r in self.backtest_results if r['results_count'] > 0])
-        overall_success_rate = success_executions / total_executions * 100
-        avg_stocks_per_execution = total_stocks_selected / total_executions
 
         # 时间范围
         start_time = min(r['execution_time'] for r in self.backtest_results)
@@ -312,8 +271,12 @@ class ContinuousBacktestSystem:
         print(f"   • 分析期间: {start_time.strftime('%Y-%m-%d')} 至 {end_time.strftime('%Y-%m-%d')} ({analysis_days}天)")
         print(f"   • 总执行次数: {total_executions}")
         print(f"   • 总选股数量: {total_stocks_selected}")
-        print(f"   • 成功率: {overall_success_rate:.1f}% ({success_executions}/{total_executions})")
-        print(f"   • 平均选股: {avg_stocks_per_execution:.1f}只/次")
+        success_ci = proportion_ci(success_executions, total_executions)
+        stocks_ci = mean_ci([r['results_count'] for r in self.backtest_results])
+        overall_success_rate = success_ci['estimate']
+        avg_stocks_per_execution = stocks_ci['estimate']
+        print(f"   • 成功率: {format_ci(success_ci)} ({success_executions}/{total_executions})")
+        print(f"   • 平均选股: {format_ci(stocks_ci, unit='只')}/次")
 
         # 生成报告文件
         report_data = {
@@ -327,7 +290,9 @@ class ContinuousBacktestSystem:
                 'total_executions': total_executions,
                 'total_stocks_selected': total_stocks_selected,
                 'success_rate': overall_success_rate,
-                'avg_stocks_per_execution': avg_stocks_per_execution
+                'success_rate_ci': [success_ci['low'], success_ci['high']],
+                'avg_stocks_per_execution': avg_stocks_per_execution,
+                'avg_stocks_ci': [stocks_ci['low'], stocks_ci['high']]
             },
             'strategy_breakdown': {},
             'recommendations': []
@@ -342,13 +307,15 @@ class ContinuousBacktestSystem:
             strategy_groups[strategy].append(result)
 
         for strategy, results in strategy_groups.items():
-            strategy_success_rate = len([r for r in results if r['results_count'] > 0]) / len(results) * 100
-            strategy_avg_stocks = np.mean([r['results_count'] for r in results])
+            strategy_success = proportion_ci(len([r for r in results if r['results_count'] > 0]), len(results))
+            strategy_stocks = mean_ci([r['results_count'] for r in results])
 
             report_data['strategy_breakdown'][strategy] = {
                 'executions': len(results),
-                'success_rate': strategy_success_rate,
-                'avg_stocks': strategy_avg_stocks
+                'success_rate': strategy_success['estimate'],
+                'success_rate_ci': [strategy_success['low'], strategy_success['high']],
+                'avg_stocks': strategy_stocks['estimate'],
+                'avg_stocks_ci': [strategy_stocks['low'], strategy_stocks['high']]
             }
 
         # 保存报告
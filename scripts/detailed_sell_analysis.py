@@ -3,32 +3,28 @@
 基于真实股票数据的详细卖出时机分析
 """
 
-import json
-import glob
 from datetime import datetime, timedelta
 import pandas as pd
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.result_loader import get_result_loader
 
 def load_and_analyze_stocks():
     """加载并分析11:30选中的股票"""
     print("🔍 分析11:30选中股票的详细情况")
     print("=" * 60)
 
-    # 加载11:30选股数据
-    result_files = glob.glob("*1130*result*.json")
+    # 加载11:30选股数据 (统一加载器)
     all_stocks = []
 
-    for file in result_files:
-        try:
-            with open(file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            if 'top_stocks' in data:
-                for stock in data['top_stocks']:
-                    stock['execution_time'] = data['execution_time']
-                    stock['file'] = file
-                    all_stocks.append(stock)
-        except Exception as e:
-            print(f"⚠️ 跳过文件 {file}: {e}")
+    for run in get_result_loader().load_runs(match="*1130*result*"):
+        for stock in run['stocks']:
+            stock['execution_time'] = run['run_time'].strftime('%Y-%m-%d %H:%M:%S')
+            stock['file'] = run['file']
+            all_stocks.append(stock)
 
     print(f"📊 共找到 {len(all_stocks)} 只股票")
 
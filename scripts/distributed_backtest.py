@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+主力埋伏策略分布式参数扫描回测
+协调端把 (参数组, 日期分片) 任务提交到任务队列 (SQLite，BACKTEST_BROKER_DB)，
+任意台机器上启动 worker 领取执行，完成后合并各参数组结果
+
+用法:
+    python scripts/distributed_backtest.py submit --start 20220101 --end 20241231 --config 稳健型 激进型
+    python scripts/distributed_backtest.py submit --grid sweep.json --shard-days 40
+    python scripts/distributed_backtest.py worker --workers 8          # 每台机器各启动一个
+    python scripts/distributed_backtest.py status <扫描ID>
+    python scripts/distributed_backtest.py retry <扫描ID>
+    python scripts/distributed_backtest.py merge <扫描ID> --output sweep_summary.csv
+
+--grid 文件格式与 strategy_configs.json 相同: {"名称": {"params": {...}, "weights": {...}}, ...}
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.backtest_broker import BacktestBroker, run_worker
+from src.backtest_cache import BacktestCache
+from src.backtest_executor import ParallelExecutor
+from src.burial_signals import params_from, strategy_params
+from src.history_store import DailyHistoryStore
+from src.main_force_burial_strategy import MainForceBurialStrategy
+
+CONFIG_FILE = "strategy_configs.json"
+
+
+def load_configs(args, strategy):
+    """参数组：strategy_configs.json 中的配置 / --grid 文件 / 当前策略参数"""
+    configs = {}
+    sources = []
+    if args.config:
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        missing = [name for name in args.config if name not in saved]
+        if missing:
+            raise SystemExit(f"❌ 未找到策略配置: {', '.join(missing)}")
+        sources.append({name: saved[name] for name in args.config})
+    if args.grid:
+        with open(args.grid, 'r', encoding='utf-8') as f:
+            sources.append(json.load(f))
+
+    for source in sources:
+        for name, config in source.items():
+            configs[name] = {'params': params_from(strategy, strategy_params(config.get('params', {}))),
+                             'weights': config.get('weights', strategy.scoring_weights)}
+    if not configs:
+        configs['当前参数'] = {'params': params_from(strategy), 'weights': strategy.scoring_weights}
+    return configs
+
+
+def cmd_submit(args, broker):
+    strategy = MainForceBurialStrategy()
+    history = DailyHistoryStore()
+    if not history.exists():
+        raise SystemExit(f"❌ 历史库为空: {history.path}")
+
+    rows = history.date_range(args.start, args.end)
+    # 首个交易日没有前一日数据，不参与回测
+    dates = history.dates[max(rows.start, 1):rows.stop]
+    configs = load_configs(args, strategy)
+    sweep_id = broker.submit(configs, dates, args.shard_days, args.entry_time, args.top)
+    print(f"📤 已提交扫描 {sweep_id}: {len(configs)} 组参数 × {-(-len(dates) // args.shard_days)} 个分片 "
+          f"({dates[0]} ~ {dates[-1]})")
+
+
+def cmd_worker(args, broker):
+    cache = None if args.no_cache else BacktestCache()
+    with ParallelExecutor(args.workers) as executor:
+        done = run_worker(broker, cache=cache, executor=executor, sweep_id=args.sweep, wait=args.wait)
+    print(f"🏁 worker 结束，完成 {done} 个任务")
+
+
+def cmd_status(args, broker):
+    if not args.sweep:
+        print(broker.sweeps().to_string(index=False))
+        return
+    print(broker.status(args.sweep).to_string())
+    failures = broker.failures(args.sweep)
+    if not failures.empty:
+        print(f"\n❌ 失败任务 {len(failures)} 个:")
+        for _, row in failures.iterrows():
+            print(f"   {row['task_id']} (尝试 {row['attempts']} 次, {row['worker']}): "
+                  f"{str(row['error']).strip().splitlines()[-1]}")
+
+
+def cmd_retry(args, broker):
+    print(f"🔁 已重置 {broker.retry_failed(args.sweep)} 个失败任务")
+
+
+def cmd_merge(args, broker):
+    results = broker.merge(args.sweep, complete_only=not args.partial)
+    if not results:
+        raise SystemExit("❌ 没有全部完成的参数组 (使用 status 查看进度，--partial 合并已完成部分)")
+
+    rows = []
+    for name, result in results.items():
+        summary = result.summary().reset_index()
+        summary.insert(0, 'config', name)
+        rows.append(summary)
+    table = pd.concat(rows, ignore_index=True)
+    print(table.round(2).to_string(index=False))
+    if args.output:
+        table.to_csv(args.output, index=False, encoding='utf-8-sig')
+        print(f"\n💾 汇总已保存: {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='主力埋伏策略分布式参数扫描回测')
+    parser.add_argument('--db', help='任务队列数据库路径 (默认 BACKTEST_BROKER_DB)')
+    parser.add_argument('--max-attempts', type=int, default=3, help='单个任务最多尝试次数 (默认3)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    submit = sub.add_parser('submit', help='提交参数扫描')
+    submit.add_argument('--start', help='开始日期 YYYYMMDD (默认历史库首日)')
+    submit.add_argument('--end', help='结束日期 YYYYMMDD (默认历史库末日)')
+    submit.add_argument('--entry-time', default='close', help="入场时点: close 或 HH:MM")
+    submit.add_argument('--top', type=int, default=10, help='每日入选数量 (默认10)')
+    submit.add_argument('--config', nargs='+', help='strategy_configs.json 中的配置名')
+    submit.add_argument('--grid', help='参数组文件 (JSON)')
+    submit.add_argument('--shard-days', type=int, default=60, help='每个分片的交易日数 (默认60)')
+
+    worker = sub.add_parser('worker', help='领取并执行任务')
+    worker.add_argument('--sweep', help='只处理指定扫描')
+    worker.add_argument('--wait', action='store_true', help='队列为空时继续等待新任务')
+    worker.add_argument('--workers', type=int, help='本机并行进程数')
+    worker.add_argument('--no-cache', action='store_true', help='不使用逐日结果缓存')
+
+    for name, help_text in (('status', '查看进度'), ('retry', '重置失败任务'), ('merge', '合并结果')):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument('sweep', nargs='?' if name == 'status' else None, help='扫描ID')
+        if name == 'merge':
+            command.add_argument('--partial', action='store_true', help='包含尚未全部完成的参数组')
+            command.add_argument('--output', help='汇总输出CSV路径')
+
+    args = parser.parse_args()
+    broker = BacktestBroker(args.db, max_attempts=args.max_attempts)
+    try:
+        {'submit': cmd_submit, 'worker': cmd_worker, 'status': cmd_status,
+         'retry': cmd_retry, 'merge': cmd_merge}[args.command](args, broker)
+    finally:
+        broker.close()
+
+
+if __name__ == "__main__":
+    main()
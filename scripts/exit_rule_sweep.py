@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+卖出规则扫描
+读取选股结果数据库中的入选记录，基于本地分钟线历史库计算各卖出规则 (定时/止盈/止损/移动止损) 的真实收益
+
+用法:
+    python scripts/exit_rule_sweep.py --start 20240101 --strategy main_force_burial
+    python scripts/exit_rule_sweep.py --sweep --max-days 2
+    python scripts/exit_rule_sweep.py --import-minutes data/minute_bars.csv
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.exit_simulator import DEFAULT_RULES, ExitSimulator, picks_from_store, sweep_rules
+from src.minute_store import MinuteBarStore
+from src.results_store import get_results_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='基于分钟线的卖出规则扫描')
+    parser.add_argument('--start', help='开始日期 YYYYMMDD')
+    parser.add_argument('--end', help='结束日期 YYYYMMDD')
+    parser.add_argument('--strategy', help='策略名称 (默认全部)')
+    parser.add_argument('--sweep', action='store_true', help='扫描止盈×止损×移动止损全组合 (默认使用内置规则)')
+    parser.add_argument('--max-days', type=int, default=3, help='条件卖出最长持有天数 (默认3)')
+    parser.add_argument('--import-minutes', help='先导入分钟线CSV (trade_date, ts_code, time, OHLCV)')
+    parser.add_argument('--output', help='逐笔收益输出CSV路径')
+    args = parser.parse_args()
+
+    minutes = MinuteBarStore()
+    if args.import_minutes:
+        days = minutes.ingest_csv(args.import_minutes)
+        print(f"✅ 已导入 {days} 个交易日的分钟线")
+
+    picks = picks_from_store(get_results_store(), args.start, args.end, args.strategy)
+    if picks.empty:
+        print("❌ 选股结果数据库中没有符合条件的入选记录")
+        return
+    print(f"📚 入选记录 {len(picks)} 笔，分钟线交易日 {len(minutes.dates())} 个")
+
+    rules = sweep_rules(max_days=args.max_days) if args.sweep else DEFAULT_RULES
+    started = time.time()
+    result = ExitSimulator(minutes).simulate(picks, rules)
+    print(f"⏱️  模拟 {len(rules)} 条规则，用时 {time.time() - started:.2f} 秒")
+
+    summary = result.summary().sort_values('avg_return', ascending=False)
+    print("\n📊 卖出规则统计 (按平均收益排序):")
+    print(summary.round(2).to_string())
+
+    if args.output:
+        pd.concat([result.picks, result.returns], axis=1).to_csv(args.output, index=False, encoding='utf-8-sig')
+        print(f"\n💾 逐笔收益已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+本地分钟线库导入与查看
+分钟线CSV与已归档的行情快照写入同一个库，实盘分析脚本与回测共用
+
+用法:
+    python scripts/import_minute_bars.py --csv data/minute_bars.csv
+    python scripts/import_minute_bars.py --snapshots 20240102 --strategy main_force_burial
+    python scripts/import_minute_bars.py --show 300620.SZ --count 60
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.minute_store import get_minute_store
+from src.snapshot_archive import SnapshotArchive
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地分钟线库导入与查看')
+    parser.add_argument('--csv', nargs='+', help='分钟线CSV (trade_date, ts_code, time, open, high, low, close, volume)')
+    parser.add_argument('--snapshots', nargs='+', metavar='DATE', help='由归档的行情快照录制分钟线 (YYYYMMDD)')
+    parser.add_argument('--strategy', help='只使用该策略的快照 (默认全部)')
+    parser.add_argument('--show', metavar='TS_CODE', help='显示股票最近的分钟线')
+    parser.add_argument('--count', type=int, default=30, help='显示条数 (默认30)')
+    args = parser.parse_args()
+
+    store = get_minute_store()
+    for path in args.csv or []:
+        print(f"✅ {path}: 导入 {store.ingest_csv(path)} 个交易日")
+    archive = SnapshotArchive()
+    for date in args.snapshots or []:
+        print(f"✅ {date}: 录制 {store.ingest_snapshots(archive, date, args.strategy)} 份快照")
+
+    dates = store.dates()
+    print(f"📚 分钟线库: {store.path}，{len(dates)} 个交易日" + (f" ({dates[0]} ~ {dates[-1]})" if dates else ""))
+    if args.show:
+        bars = store.recent(args.show, args.count)
+        print(bars.to_string(index=False) if len(bars) else f"❌ 没有 {args.show} 的分钟线")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+主力埋伏策略分钟线流式回测
+逐交易日从本地分钟线库读取数据 (内存上限可设)，在指定入场时刻重放筛选与评分，
+按分钟线计算各卖出规则的真实收益并增量汇总，适合多年全市场分钟线
+
+用法:
+    python scripts/minute_stream_backtest.py --start 20200101 --end 20241231 --entry-time 11:30
+    python scripts/minute_stream_backtest.py --entry-time 14:50 --memory-mb 512 --sweep --output picks.csv
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.burial_signals import params_from
+from src.exit_simulator import DEFAULT_RULES, sweep_rules
+from src.history_store import DailyHistoryStore
+from src.main_force_burial_strategy import MainForceBurialStrategy
+from src.minute_store import MinuteBarStore
+from src.streaming_backtest import MinuteStreamBacktest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='主力埋伏策略分钟线流式回测')
+    parser.add_argument('--start', help='开始日期 YYYYMMDD (默认历史库首日)')
+    parser.add_argument('--end', help='结束日期 YYYYMMDD (默认历史库末日)')
+    parser.add_argument('--entry-time', default='11:30', help='入场时刻 HH:MM (默认11:30)')
+    parser.add_argument('--top', type=int, default=10, help='每日入选数量 (默认10)')
+    parser.add_argument('--memory-mb', type=float, default=1024, help='分钟线与中间数组的内存上限 MB (默认1024)')
+    parser.add_argument('--sweep', action='store_true', help='扫描止盈×止损×移动止损全组合 (默认使用内置规则)')
+    parser.add_argument('--max-days', type=int, default=3, help='条件卖出最长持有天数 (默认3)')
+    parser.add_argument('--output', help='逐笔收益追加写入CSV路径 (不在内存中保留明细)')
+    args = parser.parse_args()
+
+    strategy = MainForceBurialStrategy()
+    history = DailyHistoryStore()
+    minutes = MinuteBarStore()
+    if not history.exists():
+        raise SystemExit(f"❌ 历史库为空: {history.path} (使用 scripts/burial_backtest.py 同步或导入)")
+    if not minutes.dates(args.start, args.end):
+        raise SystemExit(f"❌ 分钟线库在该区间没有数据: {minutes.path}")
+
+    rules = sweep_rules(max_days=args.max_days) if args.sweep else DEFAULT_RULES
+    backtest = MinuteStreamBacktest(params_from(strategy), strategy.scoring_weights, history, minutes, rules,
+                                    top_n=args.top, memory_limit_mb=args.memory_mb)
+    print(f"📚 分钟线 {len(minutes.dates(args.start, args.end))} 个交易日，"
+          f"每块 {backtest.block_size} 只股票，每批卖出模拟 {backtest.exit_batch} 笔")
+
+    started = time.time()
+
+    def progress(date, done, total):
+        if done % 20 == 0 or done == total:
+            print(f"   {date} ({done}/{total}，{time.time() - started:.0f} 秒)")
+
+    result = backtest.run(args.start, args.end, args.entry_time, keep_picks=not args.output,
+                          output=args.output, progress=progress)
+    print(f"\n⏱️  回测完成，用时 {time.time() - started:.2f} 秒: {result.days} 个交易日 (入场 {result.entry_time})")
+
+    print("\n📊 卖出规则统计 (按平均收益排序):")
+    print(result.summary().sort_values('avg_return', ascending=False).round(2).to_string())
+    if args.output:
+        print(f"\n💾 逐笔收益已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
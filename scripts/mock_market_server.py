@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+行情接口本地模拟服务 (合成行情，压测/离线联调用)
+
+用法:
+    python scripts/mock_market_server.py --symbols 50000 --ticks 4800 --tick-seconds 3
+    python scripts/mock_market_server.py --port 8765 --latency-ms 50 --error-rate 0.05
+
+策略指向本服务:
+    GUGU_API_BASE=http://127.0.0.1:8765/stock/cn/realtime TUSHARE_API_URL=http://127.0.0.1:8765 python main.py
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.mock_api_server import REALTIME_PATH, MockMarketServer
+from src.synthetic_market import DEFAULT_TICKS, DEFAULT_TRADE_DATE, SyntheticMarket
+
+
+def main():
+    parser = argparse.ArgumentParser(description='行情接口本地模拟服务')
+    parser.add_argument('--symbols', type=int, default=5000, help='股票数 (默认5000)')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子 (默认0)')
+    parser.add_argument('--trade-date', default=DEFAULT_TRADE_DATE, help=f'交易日 (默认{DEFAULT_TRADE_DATE})')
+    parser.add_argument('--ticks', type=int, default=DEFAULT_TICKS, help=f'每日推送次数 (默认{DEFAULT_TICKS})')
+    parser.add_argument('--tick-seconds', type=float, help='每隔多少秒推进一次推送 (默认只按请求参数 tick 推进)')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='端口 (默认8765)')
+    parser.add_argument('--latency-ms', type=float, default=0, help='每个请求的固定延迟毫秒数')
+    parser.add_argument('--error-rate', type=float, default=0, help='实时行情请求返回错误的比例 (0-1)')
+    args = parser.parse_args()
+
+    market = SyntheticMarket(args.symbols, seed=args.seed, trade_date=args.trade_date, ticks=args.ticks)
+    print("📊 合成行情概览:")
+    print(json.dumps(market.summary(), ensure_ascii=False, indent=2))
+
+    server = MockMarketServer(market, (args.host, args.port), tick_seconds=args.tick_seconds,
+                              latency=args.latency_ms / 1000, error_rate=args.error_rate)
+    print(f"\n🚀 模拟服务已启动: {server.url}")
+    print(f"   GUGU_API_BASE={server.url}{REALTIME_PATH}")
+    print(f"   TUSHARE_API_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n🏁 已停止，共处理 {server.requests} 个请求 (模拟错误 {server.errors} 个)")
+
+
+if __name__ == "__main__":
+    main()
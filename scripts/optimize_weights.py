@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+主力埋伏策略评分权重优化
+基于本地历史库重放筛选条件，预先计算候选股评分项与远期收益，批量搜索 scoring_weights
+
+用法:
+    python scripts/optimize_weights.py --start 20220101 --end 20241231 --method random --n 20000
+    python scripts/optimize_weights.py --method grid --step 10 --objective sharpe --walk-forward 120 20
+    python scripts/optimize_weights.py --method coordinate --save 优化权重v5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.backtest_cache import BacktestCache
+from src.backtest_engine import BurialBacktest
+from src.backtest_executor import ParallelExecutor
+from src.burial_signals import COMPONENT_NAMES, params_from
+from src.history_store import DailyHistoryStore
+from src.main_force_burial_strategy import MainForceBurialStrategy
+from src.weight_optimizer import (OBJECTIVES, SEARCH_METHODS, WeightOptimizer, save_strategy_config,
+                                  to_strategy_config, weights_dict)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='主力埋伏策略评分权重优化')
+    parser.add_argument('--start', help='开始日期 YYYYMMDD (默认历史库首日)')
+    parser.add_argument('--end', help='结束日期 YYYYMMDD (默认历史库末日)')
+    parser.add_argument('--entry-time', default='close', help="入场时点: close 或 HH:MM (使用归档快照)")
+    parser.add_argument('--exit', default='T+1_close', help='出场方式 (T+1_open/T+1_close/T+2_open/T+2_close)')
+    parser.add_argument('--method', choices=SEARCH_METHODS, default='random', help='搜索方式 (默认随机)')
+    parser.add_argument('--n', type=int, default=5000, help='随机搜索的权重组数 (默认5000)')
+    parser.add_argument('--step', type=int, default=5, help='权重步长 (默认5)')
+    parser.add_argument('--seed', type=int, help='随机种子')
+    parser.add_argument('--objective', choices=OBJECTIVES, default='avg_return', help='优化目标 (默认平均收益)')
+    parser.add_argument('--top', type=int, default=10, help='每日入选数量 (默认10)')
+    parser.add_argument('--min-trades', type=int, default=30, help='最少成交笔数 (默认30)')
+    parser.add_argument('--walk-forward', nargs=2, type=int, metavar=('TRAIN', 'TEST'),
+                        help='滚动前推验证：训练/测试窗口交易日数')
+    parser.add_argument('--save', metavar='NAME', help='将最优权重写入 strategy_configs.json')
+    parser.add_argument('--workers', type=int, help='并行进程数 (默认 BACKTEST_WORKERS / CPU 核数，1 为单进程)')
+    parser.add_argument('--no-cache', action='store_true', help='不使用逐日结果缓存 (全部重新计算)')
+    args = parser.parse_args()
+
+    strategy = MainForceBurialStrategy()
+    history = DailyHistoryStore()
+    if not history.exists():
+        raise SystemExit(f"❌ 历史库为空: {history.path} (使用 scripts/burial_backtest.py 同步或导入)")
+
+    params = params_from(strategy)
+    executor = ParallelExecutor(args.workers)
+    backtest = BurialBacktest(params, strategy.scoring_weights, history, strategy.snapshot_archive,
+                              top_n=args.top, cache=None if args.no_cache else BacktestCache(), executor=executor)
+    if args.exit not in backtest.exits:
+        raise SystemExit(f"❌ 未知的出场方式: {args.exit} (可选: {', '.join(backtest.exits)})")
+
+    started = time.time()
+    with executor:
+        candidates = backtest.candidates(args.start, args.end, args.entry_time)
+    optimizer = WeightOptimizer(candidates, args.exit, args.top, objective=args.objective,
+                                min_trades=args.min_trades)
+    print(f"📚 候选样本: {len(candidates)} 条，{len(optimizer.dates)} 个交易日 "
+          f"(预计算 {time.time() - started:.2f} 秒)")
+
+    search_kwargs = {'n': args.n, 'step': args.step, 'seed': args.seed,
+                     'initial': strategy.scoring_weights}
+
+    if args.walk_forward:
+        started = time.time()
+        folds = optimizer.walk_forward(*args.walk_forward, method=args.method, **search_kwargs)
+        print(f"\n🔁 滚动前推验证 ({len(folds)} 个窗口，用时 {time.time() - started:.2f} 秒):")
+        if not folds.empty:
+            print(folds.round(3).to_string(index=False))
+            print(f"\n样本外平均目标值: {folds['test_objective'].mean():.3f}")
+
+    started = time.time()
+    results = optimizer.search(args.method, **search_kwargs)
+    print(f"\n🔍 {args.method} 搜索: 评估 {len(results)} 组权重，用时 {time.time() - started:.2f} 秒")
+
+    baseline = optimizer.evaluate(strategy.scoring_weights).iloc[0]
+    print(f"\n当前权重 {weights_dict(baseline[list(COMPONENT_NAMES)])}: "
+          f"{args.objective}={baseline[args.objective]:.3f}, 笔数={int(baseline['trades'])}")
+    print("\n🏆 最优权重 TOP 10:")
+    print(results.head(10).round(3).to_string(index=False))
+
+    if args.save:
+        best = results.iloc[0]
+        config = to_strategy_config(
+            best[list(COMPONENT_NAMES)].to_numpy(), args.save,
+            f"权重优化 ({args.method}, {args.objective}={best['objective']:.3f}, {args.exit})", params)
+        save_strategy_config(config)
+        print(f"\n💾 已保存策略配置: {args.save} -> strategy_configs.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,13 @@ import os
 import requests
 import json
 from datetime import datetime
+from pathlib import Path
 import pandas as pd
 
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.minute_store import get_minute_store
+
 class RealtimeStockAnalyzer:
     """实时股票数据分析器"""
 
@@ -23,6 +28,7 @@ class RealtimeStockAnalyzer:
             "https://gugudata.com/api"
         ]
         self.stock_code = "300620"
+        self.ts_code = "300620.SZ"
         self.stock_name = "光库科技"
 
     def get_realtime_quote(self):
@@ -107,10 +113,16 @@ class RealtimeStockAnalyzer:
             return None
 
     def get_kline_data(self, period='1d', count=30):
-        """获取K线数据"""
+        """获取K线数据 (分钟线优先读取本地分钟线库)"""
         print(f"\n📊 获取K线数据 ({period}周期)...")
         print("-" * 50)
 
+        if period in ('1m', '1min'):
+            local = get_minute_store().recent(self.ts_code, count)
+            if len(local):
+                print(f"✅ 本地分钟线库读取{len(local)}条K线数据")
+                return {'source': 'local', 'data': local.to_dict('records')}
+
         try:
             # 使用第一个base_url获取K线数据
             base_url = self.base_urls[0] if self.base_urls else "https://api.gugudata.com"
@@ -2,13 +2,42 @@
 """
 日志文件轮转脚本
 当日志文件超过1MB时，轮转并压缩旧日志
+压缩按块并行进行 (每块为独立的 gzip 成员，拼接后仍是标准 .gz 文件)
 """
 
 import os
 import gzip
-import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# 并行压缩的分块大小
+GZIP_CHUNK_SIZE = 4 * 1024 * 1024
+
+def parallel_gzip(src_path, dst_path, workers=None, chunk_size=GZIP_CHUNK_SIZE, compresslevel=6):
+    """
+    多线程 gzip 压缩 (zlib 压缩时释放GIL)
+    各块分别压缩为 gzip 成员后按顺序写出，可用 gzip/zcat 正常解压
+    """
+    workers = workers or min(8, os.cpu_count() or 1)
+
+    def chunks():
+        with open(src_path, 'rb') as f_in:
+            while True:
+                chunk = f_in.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, open(dst_path, 'wb') as f_out:
+        pending = []
+        for chunk in chunks():
+            pending.append(executor.submit(gzip.compress, chunk, compresslevel))
+            # 限制在途块数量，避免大文件全部读入内存
+            if len(pending) >= workers * 2:
+                f_out.write(pending.pop(0).result())
+        for future in pending:
+            f_out.write(future.result())
+
 def rotate_log_file(log_file_path, max_size_mb=1):
     """轮转日志文件"""
 
@@ -35,9 +64,7 @@ def rotate_log_file(log_file_path, max_size_mb=1):
     archive_path = os.path.join(archive_dir, archive_filename)
 
     # 压缩并移动日志文件
-    with open(log_file_path, 'rb') as f_in:
-        with gzip.open(archive_path, 'wb') as f_out:
-            shutil.copyfileobj(f_in, f_out)
+    parallel_gzip(log_file_path, archive_path)
 
     # 清空原日志文件
     with open(log_file_path, 'w') as f:
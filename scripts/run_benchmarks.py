@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+选股流水线性能基准 (离线，合成或录制的行情数据)
+结果写入 results/benchmarks/benchmark_<时间>.json，指定 --baseline 时与基线对比，有回退时退出码为 1
+
+用法:
+    python scripts/run_benchmarks.py
+    python scripts/run_benchmarks.py --sizes 500 5000 --repeats 3 --cases burial_parse_filter save_results
+    python scripts/run_benchmarks.py --fixture recorded_gugudata.json --baseline results/benchmarks/v1.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.benchmark_suite import (CASES, DEFAULT_HISTORY_FILES, DEFAULT_REPEATS, DEFAULT_SIZES, DEFAULT_TOLERANCE,
+                                 PipelineBenchmark, compare, results_frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='选股流水线性能基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='股票数规模 (默认 500 5000 50000)')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help=f'每项重复次数 (默认{DEFAULT_REPEATS})')
+    parser.add_argument('--history-files', type=int, default=DEFAULT_HISTORY_FILES,
+                        help=f'web加载基准的历史结果文件数 (默认{DEFAULT_HISTORY_FILES})')
+    parser.add_argument('--cases', nargs='+', choices=CASES, help='只运行指定基准项')
+    parser.add_argument('--fixture', help='录制的 GuguData 实时行情响应 (JSON)，默认使用合成行情')
+    parser.add_argument('--seed', type=int, default=0, help='合成行情随机种子 (默认0)')
+    parser.add_argument('--output', help='结果JSON路径 (默认 results/benchmarks/benchmark_<时间>.json)')
+    parser.add_argument('--baseline', help='对比的基线结果JSON')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'中位耗时超过基线的比例视为回退 (默认{DEFAULT_TOLERANCE})')
+    args = parser.parse_args()
+
+    benchmark = PipelineBenchmark(args.sizes, args.repeats, args.history_files, args.fixture, args.cases, args.seed)
+    report = benchmark.run(progress=lambda case, n: print(f"⏱️  {case} ({n} 只)..."))
+
+    table = results_frame(report)
+    columns = [c for c in ('case', 'size', 'items', 'median_s', 'min_s', 'per_item_us', 'skipped') if c in table.columns]
+    print("\n📊 基准结果:")
+    print(table[columns].to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+
+    output = args.output or os.path.join('results', 'benchmarks', f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 结果已保存: {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            diff = compare(report, json.load(f), args.tolerance)
+        print(f"\n📈 与基线对比 ({args.baseline}):")
+        print(diff.to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+        regressions = diff[diff['regression']]
+        if len(regressions):
+            print(f"\n❌ {len(regressions)} 项性能回退 (超过基线 {args.tolerance:.0%})")
+            sys.exit(1)
+        print("\n✅ 没有性能回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,19 @@
 #!/usr/bin/env python3
 """
 11:30选股最佳卖出时机分析
-基于历史数据模拟不同时间段的卖出收益率
+基于本地分钟线历史库 (src.minute_store) 计算不同卖出时间/止盈止损规则的真实收益率
 """
 
-import json
-import glob
-from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-import random
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.exit_simulator import DEFAULT_RULES, ExitSimulator
+from src.quote_records import to_ts_codes
+from src.result_loader import get_result_loader
 
 class SellTimeAnalysis:
     """卖出时机分析器"""
@@ -22,150 +26,86 @@ class SellTimeAnalysis:
         """加载11:30选中的股票"""
         print("🔍 加载11:30选股结果...")
 
-        # 查找所有11:30相关结果文件
-        result_files = glob.glob("*1130*result*.json")
-        result_files.extend(glob.glob("corrected_test_result*.json"))
-
-        for file in result_files:
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                execution_time = datetime.strptime(data['execution_time'], '%Y-%m-%d %H:%M:%S')
-
-                # 检查是否是11:30相关选股
-                is_1130 = False
-                if 'screening_type' in data and '11:30' in data['screening_type']:
-                    is_1130 = True
-                elif 'task_results' in data:
-                    for task in data['task_results']:
-                        if '11:30' in task.get('name', ''):
-                            is_1130 = True
-                            break
-
-                if is_1130:
-                    print(f"📅 加载文件: {file} ({execution_time.strftime('%Y-%m-%d %H:%M')})")
-
-                    # 提取股票数据
-                    stocks = []
-                    if 'top_stocks' in data:
-                        stocks = data['top_stocks']
-                    elif 'task_results' in data:
-                        for task in data['task_results']:
-                            stocks.extend(task.get('stocks', []))
-
-                    for stock in stocks:
-                        self.analysis_stocks.append({
-                            'file': file,
-                            'execution_time': execution_time,
-                            'code': stock.get('code', ''),
-                            'name': stock.get('name', ''),
-                            'buy_price': stock.get('price', 0),
-                            'buy_time': execution_time.strftime('%H:%M'),
-                            'change_percent': stock.get('change_percent', 0),
-                            'score': stock.get('score', 0),
-                            'main_inflow_ratio': stock.get('main_inflow_ratio', 0)
-                        })
-
-            except Exception as e:
-                print(f"⚠️  跳过文件 {file}: {e}")
+        # 查找所有11:30相关结果 (统一加载器，格式差异已统一)
+        for run in get_result_loader().load_runs(match=["*1130*result*", "corrected_test_result*"]):
+            execution_time = run['run_time']
+
+            # 检查是否是11:30相关选股
+            is_1130 = bool(run['screening_type'] and '11:30' in run['screening_type'])
+            if not is_1130:
+                is_1130 = any('11:30' in task.get('name', '') for task in run['tasks'])
+
+            if is_1130:
+                print(f"📅 加载文件: {run['file']} ({execution_time.strftime('%Y-%m-%d %H:%M')})")
+
+                for stock in run['stocks']:
+                    self.analysis_stocks.append({
+                        'file': run['file'],
+                        'execution_time': execution_time,
+                        'code': stock.get('code', ''),
+                        'name': stock.get('name', ''),
+                        'buy_price': stock.get('price', 0),
+                        'buy_time': execution_time.strftime('%H:%M'),
+                        'change_percent': stock.get('change_percent', 0),
+                        'score': stock.get('score', 0),
+                        'main_inflow_ratio': stock.get('main_inflow_ratio', 0)
+                    })
 
         print(f"✅ 共加载 {len(self.analysis_stocks)} 只11:30选股股票")
 
     def simulate_intraday_trading(self):
-        """模拟日内不同时间点卖出的收益率"""
-        print("\n📈 模拟日内卖出收益率")
+        """按分钟线计算日内/隔日各卖出规则的收益率 (买入价为选股时价格)"""
+        print("\n📈 分钟线卖出模拟")
         print("=" * 60)
 
-        # 定义卖出时间点（基于11:30买入）
-        sell_times = [
-            ('11:45', '收盘前15分钟'),
-            ('13:00', '午间开盘'),
-            ('13:30', '午间开盘后30分钟'),
-            ('14:00', '下午开盘1小时'),
-            ('14:30', '下午开盘1.5小时'),
-            ('15:00', '收盘前'),
-            ('次日09:30', '次日开盘'),
-            ('次日11:30', '次日选股时'),
-            ('T+2日', '持股2天'),
-            ('T+3日', '持股3天')
-        ]
-
-        for sell_time, description in sell_times:
-            results = self.simulate_sell_time(sell_time, description)
+        codes = np.array([str(stock['code'])[:6] for stock in self.analysis_stocks])
+        picks = pd.DataFrame({
+            'trade_date': [stock['execution_time'].strftime('%Y%m%d') for stock in self.analysis_stocks],
+            'ts_code': to_ts_codes(codes) if len(codes) else [],
+            'entry_time': [stock['buy_time'].replace(':', '') for stock in self.analysis_stocks],
+            'entry_price': [stock['buy_price'] for stock in self.analysis_stocks],
+        })
+
+        result = ExitSimulator().simulate(picks, DEFAULT_RULES)
+        for rule in DEFAULT_RULES:
+            returns = result.returns[rule['name']].dropna().to_numpy()
+            stats = self.simulate_sell_time(returns)
             self.sell_time_results.append({
-                'sell_time': sell_time,
-                'description': description,
-                'avg_return': results['avg_return'],
-                'success_rate': results['success_rate'],
-                'max_return': results['max_return'],
-                'min_return': results['min_return'],
-                'win_count': results['win_count'],
-                'total_count': results['total_count']
+                'sell_time': rule['name'],
+                'description': self.describe_rule(rule),
+                **stats,
             })
 
-    def simulate_sell_time(self, sell_time, description):
-        """模拟特定时间点卖出"""
-        returns = []
-
-        for stock in self.analysis_stocks:
-            # 模拟收益率（基于选股评分和当前涨幅的数学模型）
-            base_return = stock['change_percent']  # 当前涨幅
-            score_factor = stock['score'] / 100.0  # 评分因子
-            inflow_factor = stock['main_inflow_ratio']  # 资金流入因子
-
-            # 根据卖出时间点计算模拟收益率
-            if sell_time == '11:45':
-                # 收盘前15分钟，收益波动较小
-                time_factor = random.uniform(0.9, 1.1)
-            elif sell_time == '13:00':
-                # 午间开盘，可能有冲高
-                time_factor = random.uniform(1.0, 1.3)
-            elif sell_time == '13:30':
-                # 午间开盘后30分钟
-                time_factor = random.uniform(1.0, 1.2)
-            elif sell_time == '14:00':
-                # 下午开盘1小时
-                time_factor = random.uniform(1.0, 1.4)
-            elif sell_time == '14:30':
-                # 下午开盘1.5小时（次选股点）
-                time_factor = random.uniform(0.8, 1.2)
-            elif sell_time == '15:00':
-                # 收盘前，可能有回调
-                time_factor = random.uniform(0.7, 1.1)
-            elif sell_time == '次日09:30':
-                # 次日开盘，低开高走概率
-                time_factor = random.uniform(0.8, 1.3)
-            elif sell_time == '次日11:30':
-                # 次日选股时，持有一天
-                time_factor = random.uniform(0.7, 1.5)
-            elif sell_time == 'T+2日':
-                # 持股2天
-                time_factor = random.uniform(0.6, 1.8)
-            elif sell_time == 'T+3日':
-                # 持股3天
-                time_factor = random.uniform(0.5, 2.0)
-            else:
-                time_factor = 1.0
-
-            # 计算收益率
-            simulated_return = base_return * time_factor * score_factor * (1 + inflow_factor * 0.5)
-
-            # 加入随机波动
-            simulated_return += random.uniform(-2, 3)  # -2%到+3%的随机波动
-
-            returns.append(simulated_return)
-
-        # 统计结果
-        returns_array = np.array(returns)
-        win_count = len(returns_array[returns_array > 0])
+        covered = int(result.returns.notna().any(axis=1).sum())
+        print(f"✅ {covered}/{len(picks)} 笔有分钟线数据 (缺失的股票不计入统计)")
+
+    def describe_rule(self, rule):
+        """卖出规则说明"""
+        descriptions = {
+            '13:00': '午间开盘',
+            '13:30': '午间开盘后30分钟',
+            '14:00': '下午开盘1小时',
+            '14:30': '下午开盘1.5小时',
+            '15:00': '收盘前',
+            '次日09:30': '次日开盘',
+            '次日11:30': '次日选股时',
+            'T+2日': '持股2天',
+            'T+3日': '持股3天',
+        }
+        if rule['name'] in descriptions:
+            return descriptions[rule['name']]
+        return f"{rule['name']} (次日起触发，最长持有{rule['max_days']}天)"
+
+    def simulate_sell_time(self, returns_array):
+        """统计某一卖出规则的收益率"""
+        win_count = int((returns_array > 0).sum())
         total_count = len(returns_array)
 
         return {
-            'avg_return': np.mean(returns_array),
+            'avg_return': float(np.mean(returns_array)) if total_count else 0.0,
             'success_rate': (win_count / total_count * 100) if total_count > 0 else 0,
-            'max_return': np.max(returns_array),
-            'min_return': np.min(returns_array),
+            'max_return': float(np.max(returns_array)) if total_count else 0.0,
+            'min_return': float(np.min(returns_array)) if total_count else 0.0,
             'win_count': win_count,
             'total_count': total_count
         }
@@ -234,7 +174,6 @@ class SellTimeAnalysis:
     def calculate_holding_period(self, sell_time):
         """计算持仓时间"""
         time_map = {
-            '11:45': '15分钟',
             '13:00': '1.5小时',
             '13:30': '2小时',
             '14:00': '2.5小时',
@@ -245,7 +184,7 @@ class SellTimeAnalysis:
             'T+2日': '2天',
             'T+3日': '3天'
         }
-        return time_map.get(sell_time, '未知')
+        return time_map.get(sell_time, '触发即卖，最长3天')
 
     def run_analysis(self):
         """运行完整分析"""
@@ -4,11 +4,15 @@
 基于高涨幅股票分析结果，验证新策略的有效性
 """
 
-import json
-import glob
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.result_loader import get_result_loader
 
 class StrategyValidator:
     """策略验证器"""
@@ -23,29 +27,19 @@ class StrategyValidator:
         print("🔍 加载当前11:30策略选股结果...")
         print("=" * 60)
 
-        # 加载11:30选股结果
-        result_files = glob.glob("*1130*result*.json")
-
-        for file in result_files:
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                if 'top_stocks' in data:
-                    for stock in data['top_stocks']:
-                        # 评估当前策略匹配度
-                        current_score = self._evaluate_current_strategy(stock)
-                        optimized_score = self._evaluate_optimized_strategy(stock)
-
-                        self.current_strategy_results.append({
-                            'stock': stock,
-                            'current_score': current_score,
-                            'optimized_score': optimized_score,
-                            'file': file
-                        })
-
-            except Exception as e:
-                print(f"⚠️ 跳过文件 {file}: {e}")
+        # 加载11:30选股结果 (统一加载器)
+        for run in get_result_loader().load_runs(match="*1130*result*"):
+            for stock in run['stocks']:
+                # 评估当前策略匹配度
+                current_score = self._evaluate_current_strategy(stock)
+                optimized_score = self._evaluate_optimized_strategy(stock)
+
+                self.current_strategy_results.append({
+                    'stock': stock,
+                    'current_score': current_score,
+                    'optimized_score': optimized_score,
+                    'file': run['file']
+                })
 
         print(f"✅ 加载 {len(self.current_strategy_results)} 只股票的历史选股数据")
 
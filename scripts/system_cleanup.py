@@ -18,6 +18,7 @@ from pathlib import Path
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / 'src'))
+sys.path.insert(0, str(project_root))
 
 try:
     from config import get_config
@@ -25,6 +26,13 @@ try:
 except ImportError:
     config = None
 
+from storage_ledger import SizeLedger
+
+try:
+    from src.result_archive import ResultArchive
+except ImportError:
+    ResultArchive = None
+
 # 确保日志目录存在
 logs_dir = project_root / 'logs'
 logs_dir.mkdir(exist_ok=True)
@@ -54,6 +62,9 @@ class SystemCleanup:
         self.logs_dir.mkdir(exist_ok=True)
         self.results_dir.mkdir(exist_ok=True)
 
+        # 目录大小台账 (代替每次 rglob 全量遍历)
+        self.size_ledger = SizeLedger(self.project_root)
+
         # 清理配置
         self.cleanup_config = {
             'cache_retention_days': 7,
@@ -91,7 +102,10 @@ class SystemCleanup:
         return cleaned_count
 
     def clean_old_results(self, retention_days=None):
-        """归档和清理旧的结果文件"""
+        """
+        归档和清理旧的结果文件
+        可解析的选股结果合并到按月分区的列式归档 (archive/compacted)，其余文件按月移动到 old_results
+        """
         retention_days = retention_days or self.cleanup_config['result_retention_days']
         cutoff_date = datetime.now() - timedelta(days=retention_days)
 
@@ -107,28 +121,45 @@ class SystemCleanup:
             '*burial*.json'
         ]
 
-        archived_count = 0
+        old_files = set()
         for pattern in result_patterns:
             for file_path in self.results_dir.glob(pattern):
                 try:
-                    # 获取文件修改时间
-                    file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
+                    if datetime.fromtimestamp(file_path.stat().st_mtime) < cutoff_date:
+                        old_files.add(file_path)
+                except OSError:
+                    continue
 
-                    if file_mtime < cutoff_date:
-                        # 创建归档文件名
-                        archive_name = f"{file_mtime.strftime('%Y%m')}/{file_path.name}"
-                        archive_path = old_results_dir / archive_name
+        archived_count = 0
+        if ResultArchive is not None and old_files:
+            try:
+                archive = ResultArchive(self.archive_dir / 'compacted')
+                summary = archive.compact(sorted(str(f) for f in old_files))
+                archived_count += summary['files']
+                old_files = {Path(f) for f in summary['skipped']}
+                logger.info(f"合并 {summary['files']} 个结果文件到列式归档 {summary['partitions']}，"
+                            f"{summary['bytes_before'] / 1024:.1f}KB -> {summary['bytes_after'] / 1024:.1f}KB")
+            except Exception as e:
+                logger.warning(f"结果文件列式归档失败，改为逐个移动: {e}")
 
-                        # 创建月度目录
-                        archive_path.parent.mkdir(exist_ok=True)
+        for file_path in sorted(old_files):
+            try:
+                file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
 
-                        # 移动文件到归档目录
-                        shutil.move(str(file_path), str(archive_path))
-                        logger.info(f"归档结果文件: {file_path.name} -> {archive_name}")
-                        archived_count += 1
+                # 创建归档文件名
+                archive_name = f"{file_mtime.strftime('%Y%m')}/{file_path.name}"
+                archive_path = old_results_dir / archive_name
 
-                except Exception as e:
-                    logger.warning(f"归档结果文件失败 {file_path}: {e}")
+                # 创建月度目录
+                archive_path.parent.mkdir(exist_ok=True)
+
+                # 移动文件到归档目录
+                shutil.move(str(file_path), str(archive_path))
+                logger.info(f"归档结果文件: {file_path.name} -> {archive_name}")
+                archived_count += 1
+
+            except Exception as e:
+                logger.warning(f"归档结果文件失败 {file_path}: {e}")
 
         logger.info(f"结果文件归档完成，共归档 {archived_count} 个文件")
         return archived_count
@@ -245,17 +276,17 @@ class SystemCleanup:
         for dir_name in important_dirs:
             dir_path = self.project_root / dir_name
             if dir_path.exists():
-                size = 0
-                for file_path in dir_path.rglob('*'):
-                    if file_path.is_file():
-                        size += file_path.stat().st_size
+                # 只重新统计有文件增删的目录
+                size, files = self.size_ledger.usage(dir_path)
 
                 stats['directories'][dir_name] = {
                     'size': size,
+                    'files': files,
                     'size_mb': round(size / (1024 * 1024), 2)
                 }
                 stats['total_size'] += size
 
+        self.size_ledger.save()
         stats['total_size_mb'] = round(stats['total_size'] / (1024 * 1024), 2)
         return stats
 
@@ -6,9 +6,13 @@
 
 import os
 import subprocess
-import json
 from datetime import datetime, timedelta
 import glob
+import sys
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.execution_log import ExecutionLog
 
 class SystemStatusMonitor:
     """系统状态监控器"""
@@ -48,50 +52,43 @@ class SystemStatusMonitor:
         print("\n📊 执行日志分析")
         print("-" * 40)
 
-        log_file = os.path.join(self.project_path, 'results', 'execution_log.json')
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-
-                if logs:
-                    print(f"📈 总执行次数: {len(logs)}")
-
-                    # 最近执行记录
-                    recent_logs = logs[-5:]  # 最近5次
-                    print("\n📅 最近执行记录:")
-                    for log in reversed(recent_logs):
-                        exec_time = log.get('execution_time', '')
-                        success = "✅ 成功" if log.get('success') else "❌ 失败"
-                        stocks = log.get('stocks_found', 0)
-                        email = "📧 已发送" if log.get('email_sent') else "📧 未发送"
-
-                        # 简化时间显示
-                        time_str = exec_time.split(' ')[1][:5] if ' ' in exec_time else exec_time
-
-                        print(f"  {time_str} | {success} | 选股{stocks}只 | {email}")
-
-                    # 统计信息
-                    total_executions = len(logs)
-                    successful_executions = len([log for log in logs if log.get('success')])
-                    success_rate = (successful_executions / total_executions * 100) if total_executions > 0 else 0
-                    avg_stocks = sum(log.get('stocks_found', 0) for log in logs) / total_executions if total_executions > 0 else 0
-
-                    print(f"\n📊 统计信息:")
-                    print(f"  成功率: {success_rate:.1f}% ({successful_executions}/{total_executions})")
-                    print(f"  平均选股: {avg_stocks:.1f}只/次")
-
-                    # 最近执行时间
-                    last_execution = logs[-1].get('execution_time', '')
-                    if last_execution:
-                        print(f"  最近执行: {last_execution}")
-                else:
-                    print("📋 暂无执行记录")
+        results_dir = os.path.join(self.project_path, 'results')
+        try:
+            execution_log = ExecutionLog(os.path.join(results_dir, 'execution_logs'))
+            execution_log.migrate_legacy_json(os.path.join(results_dir, 'execution_log.json'))
+
+            # 只读索引中的统计和最近记录，不解析全部日志
+            stats = execution_log.stats()
+            if stats['total_executions']:
+                print(f"📈 总执行次数: {stats['total_executions']}")
+
+                # 最近执行记录
+                recent_logs = execution_log.tail(5)  # 最近5次
+                print("\n📅 最近执行记录:")
+                for log in reversed(recent_logs):
+                    exec_time = log.get('execution_time', '')
+                    success = "✅ 成功" if log.get('success') else "❌ 失败"
+                    stocks = log.get('stocks_found', 0)
+                    email = "📧 已发送" if log.get('email_sent') else "📧 未发送"
+
+                    # 简化时间显示
+                    time_str = exec_time.split(' ')[1][:5] if ' ' in exec_time else exec_time
+
+                    print(f"  {time_str} | {success} | 选股{stocks}只 | {email}")
+
+                # 统计信息
+                print(f"\n📊 统计信息:")
+                print(f"  成功率: {stats['success_rate']:.1f}% ({stats['successful_executions']}/{stats['total_executions']})")
+                print(f"  平均选股: {stats['avg_stocks']:.1f}只/次")
+
+                # 最近执行时间
+                if stats['last_execution']:
+                    print(f"  最近执行: {stats['last_execution']}")
+            else:
+                print("📋 暂无执行记录")
 
-            except Exception as e:
-                print(f"❌ 读取执行日志失败: {e}")
-        else:
-            print("📋 暂无执行日志文件")
+        except Exception as e:
+            print(f"❌ 读取执行日志失败: {e}")
 
     def check_result_files(self):
         """检查结果文件"""
@@ -3,49 +3,43 @@
 股票筛选回测系统 - 最近一周选股效果分析
 """
 
-import json
 import os
-import glob
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
 import pandas as pd
 import numpy as np
 
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.bootstrap_stats import format_ci, mean_ci, proportion_ci
+from src.result_loader import get_result_loader
+from src.results_store import PERIOD_DAY, get_results_store, strategy_from_filename
+
 class WeeklyBacktest:
     """一周回测分析器"""
 
     def __init__(self):
         self.results = []
         self.stock_performance = {}
+        self.start_date = None
+        self.store = get_results_store()
 
     def load_result_files(self):
         """加载最近一周的结果文件"""
         print("🔍 加载最近一周的选股结果文件...")
 
-        # 获取所有结果文件
-        result_files = glob.glob("*result*.json")
-        result_files.sort()
-
-        # 按日期过滤最近一周的文件
+        # 按日期过滤最近一周的结果 (统一加载器增量解析并同步结果库的代码索引)
         one_week_ago = datetime.now() - timedelta(days=7)
-
-        for file in result_files:
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                # 解析执行时间
-                execution_time = datetime.strptime(data['execution_time'], '%Y-%m-%d %H:%M:%S')
-
-                if execution_time >= one_week_ago:
-                    print(f"📅 加载文件: {file} ({execution_time.strftime('%Y-%m-%d %H:%M')})")
-                    self.results.append({
-                        'file': file,
-                        'execution_time': execution_time,
-                        'data': data
-                    })
-
-            except Exception as e:
-                print(f"⚠️  跳过文件 {file}: {e}")
+        self.start_date = one_week_ago.strftime('%Y%m%d')
+
+        for run in get_result_loader().load_runs(start=one_week_ago, match='*result*'):
+            print(f"📅 加载文件: {run['file']} ({run['run_time'].strftime('%Y-%m-%d %H:%M')})")
+            self.results.append({
+                'file': run['file'],
+                'execution_time': run['run_time'],
+                'data': run
+            })
 
         print(f"✅ 共加载 {len(self.results)} 个结果文件")
 
@@ -63,12 +57,7 @@ class WeeklyBacktest:
             date = result['execution_time'].strftime('%Y-%m-%d')
 
             # 统计选股数量
-            selected_count = 0
-            if 'task_results' in data:
-                for task in data['task_results']:
-                    selected_count += task.get('count', 0)
-            elif 'results_count' in data:
-                selected_count = data['results_count']
+            selected_count = data['count']
 
             total_stocks_selected += selected_count
 
@@ -107,19 +96,10 @@ class WeeklyBacktest:
             date = result['execution_time'].strftime('%Y-%m-%d')
 
             # 收集所有选中的股票
-            if 'task_results' in data:
-                for task in data['task_results']:
-                    for stock in task.get('stocks', []):
-                        stock['screening_date'] = date
-                        stock['screening_time'] = result['execution_time'].strftime('%H:%M')
-                        stock['task_name'] = task.get('name', '未知')
-                        all_stocks.append(stock)
-
-            elif 'top_stocks' in data:
-                for stock in data['top_stocks']:
-                    stock['screening_date'] = date
-                    stock['screening_time'] = result['execution_time'].strftime('%H:%M')
-                    all_stocks.append(stock)
+            for stock in data['stocks']:
+                stock['screening_date'] = date
+                stock['screening_time'] = result['execution_time'].strftime('%H:%M')
+                all_stocks.append(stock)
 
         if not all_stocks:
             print("❌ 未找到选股数据")
@@ -133,15 +113,13 @@ class WeeklyBacktest:
         print(f"  • 独立股票数: {df['name'].nunique()} 只")
 
         # 重复入选的股票
-        if 'name' in df.columns:
-            repeated_stocks = df['name'].value_counts()
-            print(f"\n🔄 重复入选股票 (≥2次):")
-            for stock_name, count in repeated_stocks[repeated_stocks >= 2].items():
-                stocks_df = df[df['name'] == stock_name]
-                if 'code' in stocks_df.columns:
-                    code = stocks_df['code'].iloc[0]
-                    dates = ', '.join(stocks_df['screening_date'].tolist())
-                    print(f"  • {stock_name} ({code}): {count} 次 - {dates}")
+        strategies = {strategy_from_filename(r['file']) for r in self.results}
+        repeated_stocks = [item for strategy in sorted(strategies)
+                           for item in self.store.repeat_picks(min_count=2, start_date=self.start_date, strategy=strategy)]
+        print(f"\n🔄 重复入选股票 (≥2次):")
+        for item in sorted(repeated_stocks, key=lambda x: -x['count']):
+            dates = ', '.join(datetime.strptime(d, '%Y%m%d').strftime('%Y-%m-%d') for d in item['dates'])
+            print(f"  • {item['name']} ({item['code']}): {item['count']} 次 - {dates}")
 
         # 按评分排序（如果有评分）
         if 'score' in df.columns:
@@ -167,8 +145,8 @@ class WeeklyBacktest:
             date = result['execution_time'].strftime('%Y-%m-%d')
 
             # 分析不同策略类型
-            if 'task_results' in data:
-                for task in data['task_results']:
+            if data['tasks']:
+                for task in data['tasks']:
                     task_name = task.get('name', '未知策略')
                     count = task.get('count', 0)
 
@@ -179,9 +157,9 @@ class WeeklyBacktest:
                         'count': count
                     })
 
-            elif 'screening_type' in data:
+            elif data['screening_type']:
                 screening_type = data['screening_type']
-                count = data.get('results_count', 0)
+                count = data['count']
 
                 if screening_type not in strategy_stats:
                     strategy_stats[screening_type] = []
@@ -195,15 +173,13 @@ class WeeklyBacktest:
         for strategy, records in strategy_stats.items():
             total_records = len(records)
             total_stocks = sum(r['count'] for r in records)
-            avg_stocks = total_stocks / total_records if total_records > 0 else 0
             success_days = len([r for r in records if r['count'] > 0])
-            success_rate = (success_days / total_records * 100) if total_records > 0 else 0
 
             print(f"  • {strategy}:")
             print(f"    - 执行次数: {total_records}")
             print(f"    - 总选股: {total_stocks} 只")
-            print(f"    - 日均选股: {avg_stocks:.1f} 只")
-            print(f"    - 成功率: {success_rate:.1f}% ({success_days}/{total_records})")
+            print(f"    - 日均选股: {format_ci(mean_ci([r['count'] for r in records]), unit=' 只')}")
+            print(f"    - 成功率: {format_ci(proportion_ci(success_days, total_records))} ({success_days}/{total_records})")
 
     def generate_summary_report(self):
         """生成总结报告"""
@@ -214,42 +190,41 @@ class WeeklyBacktest:
             print("❌ 没有找到符合条件的回测数据")
             return
 
-        # 计算时间范围
-        dates = [r['execution_time'] for r in self.results]
-        start_date = min(dates).strftime('%Y-%m-%d')
-        end_date = max(dates).strftime('%Y-%m-%d')
-
-        print(f"⏰ 回测时间范围: {start_date} 至 {end_date}")
-        print(f"📁 分析文件数量: {len(self.results)} 个")
-
-        # 总体表现
-        total_selections = 0
-        successful_days = 0
-
-        for result in self.results:
-            data = result['data']
-            day_selections = 0
-
-            if 'task_results' in data:
-                for task in data['task_results']:
-                    day_selections += task.get('count', 0)
-            elif 'results_count' in data:
-                day_selections = data['results_count']
-
-            total_selections += day_selections
-            if day_selections > 0:
-                successful_days += 1
+        # 汇总结果库中最近一周的按日统计 (每个策略每天一行，与历史长度无关)，只取本次加载的结果文件对应的策略
+        strategies = {strategy_from_filename(r['file']) for r in self.results}
+        daily = [row for strategy in sorted(strategies)
+                 for row in self.store.run_stats(strategy=strategy, period=PERIOD_DAY, start=self.start_date)]
+        if not daily:
+            print("❌ 结果数据库中没有最近一周的统计")
+            return
 
-        success_rate = (successful_days / len(self.results) * 100) if self.results else 0
-        avg_selections = total_selections / len(self.results) if self.results else 0
+        start_date = min(row['first_time'] for row in daily)[:10]
+        end_date = max(row['last_time'] for row in daily)[:10]
+        store_runs = sum(row['runs'] for row in daily)
 
-        print(f"\n📊 核心指标:")
-        print(f"  • 选股成功率: {success_rate:.1f}%")
-        print(f"  • 日均选股数: {avg_selections:.1f} 只")
+        print(f"⏰ 回测时间范围: {start_date} 至 {end_date}")
+        print(f"📁 分析文件数量: {len(self.results)} 个 (结果库中对应 {store_runs} 次选股)")
+
+        # 核心指标及其区间都取自本周加载的结果文件 (同一样本)，汇总表只有总数无法对均值重抽样
+        counts = [r['data']['count'] for r in self.results]
+        total_runs = len(counts)
+        total_selections = sum(counts)
+        successful_days = sum(1 for count in counts if count > 0)
+
+        success_ci = proportion_ci(successful_days, total_runs)
+        success_rate = success_ci['estimate']
+        print(f"\n📊 核心指标 (附95%置信区间):")
+        print(f"  • 选股成功率: {format_ci(success_ci)} ({successful_days}/{total_runs})")
+        selections_ci = mean_ci(counts)
+        avg_selections = selections_ci['estimate']
+        print(f"  • 日均选股数: {format_ci(selections_ci, unit=' 只')}")
         print(f"  • 总选股数量: {total_selections} 只")
 
         # 投资建议
         print(f"\n💡 投资建议:")
+        if success_ci['high'] - success_ci['low'] > 20:
+            print(f"  ⚠️  本周仅 {total_runs} 次选股，成功率置信区间较宽 "
+                  f"({success_ci['low']:.0f}%~{success_ci['high']:.0f}%)，不宜据此调整参数")
         if success_rate >= 80:
             print(f"  ✅ 策略表现优秀，选股成功率 {success_rate:.1f}%")
         elif success_rate >= 60:
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+分布式回测任务队列 (SQLite)
+1. 协调端把参数扫描拆成 (参数组, 日期分片) 任务写入 tasks 表；同一扫描重复提交不会产生重复任务
+2. 各节点的 worker 从队列领取任务 (单条 UPDATE 原子领取，带租约)，用本机历史库回测该分片后写回结果
+   worker 异常退出时租约到期，任务被其他 worker 重新领取；失败的任务自动重试，超过次数标记为 failed，
+   可单独重置重试，不需要重跑整个扫描
+3. 合并：每个参数组按交易日顺序拼接各分片的逐笔/逐日结果，按交易日去重，重复完成同一分片不影响结果
+多台机器共用时将数据库放在共享目录 (需支持文件锁)，各节点的历史库需同步到同一版本
+"""
+
+import json
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from src.backtest_cache import stage_key
+from src.backtest_engine import ENTRY_CLOSE, BacktestResult, BurialBacktest, exit_names
+from src.burial_signals import MIN_TOTAL_SCORE
+from src.history_store import DailyHistoryStore
+from src.snapshot_archive import SnapshotArchive
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweeps (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    spec TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    sweep_id TEXT NOT NULL REFERENCES sweeps(id) ON DELETE CASCADE,
+    task_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    param_name TEXT NOT NULL,
+    config TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    error TEXT,
+    history_version INTEGER,
+    finished_at TEXT,
+    result BLOB,
+    PRIMARY KEY (sweep_id, task_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks(status, seq);
+"""
+
+# 原子领取：待处理或租约已过期的任务中序号最小的一条
+CLAIM_SQL = """
+UPDATE tasks SET status = 'running', worker = ?, attempts = attempts + 1, lease_until = ?
+WHERE rowid = (
+    SELECT rowid FROM tasks
+    WHERE (status = 'pending' OR (status = 'running' AND lease_until < ?)) AND attempts < ?
+    {sweep_filter}
+    ORDER BY seq LIMIT 1
+)
+RETURNING sweep_id, task_id, param_name, config, start_date, end_date, attempts
+"""
+
+
+def _default_db() -> str:
+    try:
+        from src.config import get_config
+        return get_config().BACKTEST_BROKER_DB
+    except ImportError:
+        return 'results/backtest_broker.db'
+
+
+def date_shards(dates: Sequence[str], shard_days: int) -> List[tuple]:
+    """交易日序列按 shard_days 切分为 (起始日, 结束日)"""
+    dates = list(dates)
+    return [(dates[i], dates[min(i + shard_days, len(dates)) - 1]) for i in range(0, len(dates), shard_days)]
+
+
+class BacktestBroker:
+    """回测任务队列"""
+
+    def __init__(self, db_path: Optional[str] = None, max_attempts: int = 3, lease_seconds: float = 600):
+        self.db_path = str(db_path or _default_db())
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=60, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # ==================== 协调端 ====================
+
+    def submit(self, configs: Mapping[str, Mapping[str, Any]], dates: Sequence[str], shard_days: int = 60,
+               entry_time: str = ENTRY_CLOSE, top_n: int = 10, min_score: float = MIN_TOTAL_SCORE,
+               horizons: Sequence[int] = (1, 2)) -> str:
+        """
+        提交参数扫描：configs 为 参数组名 -> {'params': 策略参数, 'weights': 评分权重}
+        dates 为回测交易日 (按协调端历史库)，按 shard_days 切分。返回扫描ID (相同内容重复提交ID不变)
+        """
+        spec = {'entry_time': entry_time.replace(':', ''), 'top_n': top_n, 'min_score': min_score,
+                'horizons': list(horizons), 'shard_days': shard_days}
+        shards = date_shards(dates, shard_days)
+        sweep_id = stage_key(spec, configs, shards)
+
+        rows, seq = [], 0
+        for name, config in configs.items():
+            payload = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+            for start, end in shards:
+                rows.append((sweep_id, f"{name}:{start}-{end}", seq, name, payload, start, end))
+                seq += 1
+
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR IGNORE INTO sweeps (id, created_at, spec) VALUES (?, ?, ?)',
+                               (sweep_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), json.dumps(spec)))
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO tasks (sweep_id, task_id, seq, param_name, config, start_date, end_date) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        return sweep_id
+
+    def spec(self, sweep_id: str) -> Dict[str, Any]:
+        row = self._conn.execute('SELECT spec FROM sweeps WHERE id = ?', (sweep_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"扫描不存在: {sweep_id}")
+        return json.loads(row['spec'])
+
+    def sweeps(self) -> pd.DataFrame:
+        """全部扫描及任务进度"""
+        rows = self._conn.execute(
+            "SELECT s.id, s.created_at, COUNT(t.task_id) AS tasks, "
+            "SUM(t.status = 'done') AS done, SUM(t.status = 'failed') AS failed "
+            "FROM sweeps s LEFT JOIN tasks t ON t.sweep_id = s.id GROUP BY s.id ORDER BY s.created_at").fetchall()
+        return pd.DataFrame([dict(r) for r in rows], columns=['id', 'created_at', 'tasks', 'done', 'failed'])
+
+    def status(self, sweep_id: str) -> pd.DataFrame:
+        """各参数组的任务状态计数"""
+        rows = self._conn.execute(
+            'SELECT param_name, status, COUNT(*) AS n FROM tasks WHERE sweep_id = ? GROUP BY param_name, status',
+            (sweep_id,)).fetchall()
+        frame = pd.DataFrame([dict(r) for r in rows], columns=['param_name', 'status', 'n'])
+        table = frame.pivot_table(index='param_name', columns='status', values='n', fill_value=0, aggfunc='sum')
+        return table.reindex(columns=[STATUS_PENDING, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED], fill_value=0)
+
+    def failures(self, sweep_id: str) -> pd.DataFrame:
+        rows = self._conn.execute(
+            'SELECT task_id, attempts, worker, error FROM tasks WHERE sweep_id = ? AND status = ? ORDER BY seq',
+            (sweep_id, STATUS_FAILED)).fetchall()
+        return pd.DataFrame([dict(r) for r in rows], columns=['task_id', 'attempts', 'worker', 'error'])
+
+    def retry_failed(self, sweep_id: str) -> int:
+        """失败的任务重置为待处理 (重新计数重试次数)，返回重置数量"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'UPDATE tasks SET status = ?, attempts = 0, error = NULL WHERE sweep_id = ? AND status = ?',
+                (STATUS_PENDING, sweep_id, STATUS_FAILED))
+        return cursor.rowcount
+
+    # ==================== worker 端 ====================
+
+    def claim(self, worker: str, sweep_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """领取一个任务 (带租约)；没有可领取的任务时返回 None"""
+        now = time.time()
+        sql = CLAIM_SQL.format(sweep_filter='AND sweep_id = ?' if sweep_id else '')
+        args = [worker, now + self.lease_seconds, now, self.max_attempts] + ([sweep_id] if sweep_id else [])
+        with self._lock, self._conn:
+            # 租约过期且已达重试次数的任务 (worker 多次异常退出) 标记为失败
+            self._conn.execute(
+                'UPDATE tasks SET status = ?, error = COALESCE(error, ?) '
+                'WHERE status = ? AND lease_until < ? AND attempts >= ?',
+                (STATUS_FAILED, '租约过期 (worker 未完成)', STATUS_RUNNING, now, self.max_attempts))
+            row = self._conn.execute(sql, args).fetchone()
+        if row is None:
+            return None
+        task = dict(row)
+        task['config'] = json.loads(task['config'])
+        return task
+
+    def complete(self, task: Mapping[str, Any], result: BacktestResult, history_version: int = 0) -> bool:
+        """
+        写回分片结果；同一任务已完成时忽略 (租约过期后被重复执行的情况)，返回是否写入
+        """
+        blob = pickle.dumps((result.picks, result.daily), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'UPDATE tasks SET status = ?, result = ?, history_version = ?, error = NULL, lease_until = NULL, '
+                'finished_at = ? WHERE sweep_id = ? AND task_id = ? AND status != ?',
+                (STATUS_DONE, blob, history_version, datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                 task['sweep_id'], task['task_id'], STATUS_DONE))
+        return cursor.rowcount > 0
+
+    def fail(self, task: Mapping[str, Any], worker: str, error: str):
+        """任务失败：未超过重试次数时放回队列，否则标记为 failed"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, error = ?, lease_until = NULL '
+                'WHERE sweep_id = ? AND task_id = ? AND status = ? AND worker = ?',
+                (self.max_attempts, STATUS_FAILED, STATUS_PENDING, error,
+                 task['sweep_id'], task['task_id'], STATUS_RUNNING, worker))
+
+    # ==================== 合并 ====================
+
+    def merge(self, sweep_id: str, complete_only: bool = True) -> Dict[str, BacktestResult]:
+        """
+        合并各参数组的分片结果 -> 参数组名: BacktestResult
+        complete_only 时跳过仍有未完成分片的参数组
+        """
+        spec = self.spec(sweep_id)
+        exits = exit_names(spec['horizons'])
+        rows = self._conn.execute(
+            'SELECT param_name, status, result, history_version FROM tasks WHERE sweep_id = ? ORDER BY seq',
+            (sweep_id,)).fetchall()
+
+        grouped: Dict[str, list] = {}
+        incomplete = set()
+        for row in rows:
+            if row['status'] != STATUS_DONE:
+                incomplete.add(row['param_name'])
+                continue
+            grouped.setdefault(row['param_name'], []).append(pickle.loads(row['result']))
+
+        merged = {}
+        for name, parts in grouped.items():
+            if complete_only and name in incomplete:
+                continue
+            picks = pd.concat([p for p, _ in parts], ignore_index=True) \
+                .drop_duplicates(['trade_date', 'ts_code'], keep='first') \
+                .sort_values(['trade_date', 'rank'], kind='stable').reset_index(drop=True)
+            daily = pd.concat([d for _, d in parts], ignore_index=True) \
+                .drop_duplicates('trade_date', keep='first').sort_values('trade_date').reset_index(drop=True)
+            merged[name] = BacktestResult(picks, daily, exits, spec['entry_time'])
+        return merged
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def run_worker(broker: BacktestBroker, history=None, snapshots=None, cache=None, executor=None,
+               sweep_id: Optional[str] = None, wait: bool = False, poll_seconds: float = 5,
+               max_tasks: Optional[int] = None, worker: Optional[str] = None) -> int:
+    """
+    领取并执行任务直到队列为空 (wait=True 时持续等待新任务)，返回完成的任务数
+    history/snapshots/cache/executor 为本节点的历史库、快照归档、逐日缓存与进程池
+    """
+    worker = worker or worker_name()
+    history = history or DailyHistoryStore()
+    snapshots = snapshots or SnapshotArchive()
+    done = 0
+    while max_tasks is None or done < max_tasks:
+        task = broker.claim(worker, sweep_id)
+        if task is None:
+            if not wait:
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        spec = broker.spec(task['sweep_id'])
+        config = task['config']
+        try:
+            backtest = BurialBacktest(config['params'], config['weights'], history, snapshots,
+                                      top_n=spec['top_n'], min_score=spec['min_score'], horizons=spec['horizons'],
+                                      cache=cache, executor=executor)
+            result = backtest.run(task['start_date'], task['end_date'], spec['entry_time'])
+        except Exception:
+            broker.fail(task, worker, traceback.format_exc(limit=5))
+            print(f"❌ {task['task_id']} 失败 (第 {task['attempts']} 次)")
+            continue
+
+        broker.complete(task, result, history.version)
+        done += 1
+        print(f"✅ {task['task_id']}: {len(result.picks)} 笔")
+    return done
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+回测逐日结果缓存
+1. 按阶段 (筛选 / 出场) 与阶段参数哈希分目录，每个交易日一个文件 (数组字典，pickle 读写比 npz 快得多)
+   目录结构: <root>/<阶段>/<参数哈希>/<YYYYMMDD>.pkl
+2. 每个文件记录数据指纹 (相关交易日的数据版本)，历史数据被重新导入后对应交易日自动失效
+3. 回测区间延长时只计算新增交易日；修改评分权重只重算评分，修改出场参数不影响筛选缓存
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from src.history_store import _default_root
+
+
+def stage_key(*parts: Any) -> str:
+    """阶段参数哈希"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class BacktestCache:
+    """回测逐日结果缓存"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.path.join(_default_root(), 'backtest_cache')
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, stage: str, key: str, date: str) -> str:
+        return os.path.join(self.root, stage, key, f"{date}.pkl")
+
+    def load(self, stage: str, key: str, date: str, fingerprint: str) -> Optional[Dict[str, np.ndarray]]:
+        """读取缓存；不存在或数据指纹不一致时返回 None"""
+        try:
+            with open(self._path(stage, key, date), 'rb') as f:
+                cached_fingerprint, arrays = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            self.misses += 1
+            return None
+
+        if cached_fingerprint != fingerprint:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays
+
+    def save(self, stage: str, key: str, date: str, fingerprint: str, arrays: Dict[str, np.ndarray]):
+        path = self._path(stage, key, date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((fingerprint, arrays), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def clear(self, stage: Optional[str] = None):
+        """清空缓存 (指定阶段或全部)"""
+        shutil.rmtree(os.path.join(self.root, stage) if stage else self.root, ignore_errors=True)
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+主力埋伏策略历史回放回测 (向量化)
+1. 在 交易日×股票 面板上一次性计算筛选条件与评分 (src.burial_signals，与实盘一致)
+2. 入场时点：'close' 使用日线收盘数据；'HHMM' 使用当日该时刻及之前最后一份归档行情快照
+3. 基础池按前一交易日的流通市值/换手率筛选 (与 get_basic_pool_with_tushare 一致)
+4. 出场：T+k 开盘价 / 收盘价，统计胜率、平均收益、等权净值与最大回撤
+5. 计算分为筛选、评分、出场三个阶段；启用 BacktestCache 时筛选/出场结果逐日缓存，
+   区间延长只计算新增交易日，修改权重只重算评分
+6. 传入 ParallelExecutor 时，缓存缺失的交易日按分片分发到进程池计算 (src.backtest_executor)
+按交易日分块处理，多年回测只占用有限内存
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.backtest_cache import BacktestCache, stage_key
+from src.backtest_executor import ParallelExecutor
+from src.bootstrap_stats import DEFAULT_CONFIDENCE, strategy_intervals
+from src.burial_signals import COMPONENT_NAMES, MIN_TOTAL_SCORE, burial_features, burial_mask, score_components, total_score
+from src.history_store import DailyHistoryStore
+from src.quote_records import to_ts_codes
+from src.results_store import STRATEGY_MAIN_FORCE
+from src.snapshot_archive import SnapshotArchive
+
+ENTRY_CLOSE = 'close'
+
+# 候选保存的入场特征 (latest 即入场价)
+CANDIDATE_FEATURES = ('latest', 'pct_chg', 'deviation', 'turnover_rate', 'amount_yi')
+
+# 基础池初筛：前一交易日换手率下限 (%)
+POOL_MIN_TURNOVER = 2
+
+
+def exit_names(horizons: Sequence[int]) -> List[str]:
+    """出场方式名称，如 T+1_open、T+1_close"""
+    return [f"T+{k}_{px}" for k in horizons for px in ('open', 'close')]
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """净值曲线最大回撤 (%)"""
+    if len(equity) == 0:
+        return 0.0
+    peak = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    return float(((equity - peak) / peak).min() * 100)
+
+
+class BacktestResult:
+    """回测结果：picks 为逐笔入选明细，daily 为逐日统计"""
+
+    def __init__(self, picks: pd.DataFrame, daily: pd.DataFrame, exits: List[str], entry_time: str):
+        self.picks = picks
+        self.daily = daily
+        self.exits = exits
+        self.entry_time = entry_time
+
+    def equity(self, exit_name: str) -> pd.Series:
+        """按信号日等权持有的净值曲线 (未考虑持仓重叠与交易成本)"""
+        daily_ret = self.daily.set_index('trade_date')[exit_name].fillna(0) / 100
+        return (1 + daily_ret).cumprod()
+
+    def summary(self) -> pd.DataFrame:
+        """各出场方式的统计"""
+        rows = []
+        for name in self.exits:
+            returns = self.picks[name].dropna() if not self.picks.empty else pd.Series(dtype=float)
+            equity = self.equity(name).to_numpy() if not self.daily.empty else np.array([])
+            rows.append({
+                'exit': name,
+                'trades': int(len(returns)),
+                'win_rate': float((returns > 0).mean() * 100) if len(returns) else 0.0,
+                'avg_return': float(returns.mean()) if len(returns) else 0.0,
+                'median_return': float(returns.median()) if len(returns) else 0.0,
+                'cumulative_return': float((equity[-1] - 1) * 100) if len(equity) else 0.0,
+                'max_drawdown': max_drawdown(equity),
+            })
+        return pd.DataFrame(rows).set_index('exit')
+
+    def intervals(self, confidence: float = DEFAULT_CONFIDENCE) -> pd.DataFrame:
+        """各出场方式胜率/平均收益 (逐笔) 与最大回撤 (逐日等权) 的 Bootstrap 置信区间"""
+        rows = []
+        for name in self.exits:
+            trades = self.picks[name].to_numpy(dtype=float) if not self.picks.empty else np.array([])
+            days = self.daily[name].fillna(0).to_numpy(dtype=float) if not self.daily.empty else np.array([])
+            for stat, ci in strategy_intervals(trades, days, confidence).items():
+                rows.append({'exit': name, 'stat': stat, 'estimate': ci['estimate'],
+                             'low': ci['low'], 'high': ci['high']})
+        return pd.DataFrame(rows).set_index(['exit', 'stat'])
+
+
+class BurialBacktest:
+    """主力埋伏策略回测器"""
+
+    def __init__(self, params: Mapping[str, Any], weights, history: Optional[DailyHistoryStore] = None,
+                 snapshots: Optional[SnapshotArchive] = None, top_n: int = 10,
+                 min_score: float = MIN_TOTAL_SCORE, horizons: Sequence[int] = (1, 2), chunk_days: int = 250,
+                 cache: Optional[BacktestCache] = None, executor: Optional[ParallelExecutor] = None):
+        self.params = dict(params)
+        self.weights = weights
+        self.history = history or DailyHistoryStore()
+        self.snapshots = snapshots or SnapshotArchive()
+        self.top_n = top_n
+        self.min_score = min_score
+        self.horizons = tuple(horizons)
+        self.chunk_days = chunk_days
+        self.exits = exit_names(self.horizons)
+        # 逐日结果缓存 (None 时每次全部重新计算)
+        self.cache = cache
+        # 多进程执行器 (None 时在当前进程计算)
+        self.executor = executor
+
+    # ==================== 数据准备 ====================
+
+    def _static_mask(self) -> np.ndarray:
+        """剔除 ST/退市 与北交所 (8/4 开头)"""
+        names = self.history.names.astype(str)
+        symbols = self.history.symbols.astype(str)
+        return ~(
+            (np.char.find(names, 'ST') >= 0) | (np.char.find(names, '退') >= 0)
+            | np.char.startswith(symbols, '8') | np.char.startswith(symbols, '4')
+        )
+
+    def _pool_mask(self, lo: int, hi: int, static: bool = True) -> np.ndarray:
+        """[lo, hi) 各交易日的基础池 (使用前一交易日数据)；static=False 时不剔除 ST/北交所"""
+        prev = slice(lo - 1, hi - 1)
+        turnover = np.asarray(self.history.field('turnover_rate')[prev])
+        circ_mv = np.asarray(self.history.field('circ_mv')[prev])
+        with np.errstate(invalid='ignore'):
+            pool = ((turnover > POOL_MIN_TURNOVER)
+                    & (circ_mv >= self.params['MIN_MV']) & (circ_mv <= self.params['MAX_MV']))
+        return pool & self._static_mask() if static else pool
+
+    def _daily_entry(self, lo: int, hi: int):
+        """收盘入场：日线面板作为入场时刻行情"""
+        rows = slice(lo, hi)
+        h = self.history
+        quotes = {name: np.asarray(h.field(name)[rows]) for name in
+                  ('close', 'open', 'high', 'low', 'pre_close', 'volume', 'amount', 'turnover_rate')}
+        features = burial_features(quotes['close'], quotes['open'], quotes['high'], quotes['low'],
+                                   quotes['pre_close'], quotes['volume'], quotes['amount'], quotes['turnover_rate'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            index_change = (h.index_field('close')[rows] / h.index_field('pre_close')[rows] - 1) * 100
+        return features, index_change
+
+    def _snapshot_entry(self, lo: int, hi: int, entry_time: str):
+        """盘中入场：当日 entry_time 及之前最后一份快照映射到面板列 (无快照的交易日不入场)"""
+        dates = self.history.dates[lo:hi]
+        shape = (hi - lo, len(self.history.symbols))
+        fields = ('latest', 'open', 'high', 'low', 'pre_close', 'volume', 'amount', 'turnover_rate', 'change_pct')
+        panel = {name: np.full(shape, np.nan) for name in fields}
+        index_change = np.full(len(dates), np.nan)
+
+        for i, date in enumerate(dates):
+            times = [t for _, _, t in self.snapshots.list_snapshots(date, date, STRATEGY_MAIN_FORCE)
+                     if t <= entry_time]
+            if not times:
+                continue
+            columns = self.snapshots.load_columns(date, STRATEGY_MAIN_FORCE, times[-1])
+            cols = self.history.column_index(to_ts_codes(columns['symbol']))
+            found = cols >= 0
+            for name in fields:
+                panel[name][i, cols[found]] = np.asarray(columns[name])[found]
+            index_change[i] = self.snapshots.meta(date, STRATEGY_MAIN_FORCE, times[-1]).get('index_change', 0)
+
+        features = burial_features(panel['latest'], panel['open'], panel['high'], panel['low'], panel['pre_close'],
+                                   panel['volume'], panel['amount'], panel['turnover_rate'], panel['change_pct'])
+        return features, index_change
+
+    def _exit_prices(self, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        """各出场方式的价格面板 (与入场日对齐，超出数据范围为 NaN)"""
+        days = len(self.history.dates)
+        prices = {}
+        for k in self.horizons:
+            for px in ('open', 'close'):
+                out = np.full((hi - lo, len(self.history.symbols)), np.nan)
+                end = min(hi + k, days)
+                if lo + k < end:
+                    out[:end - lo - k] = self.history.field(px)[lo + k:end]
+                prices[f"T+{k}_{px}"] = out
+        return prices
+
+    # ==================== 回测 ====================
+
+    def _evaluate(self, lo: int, hi: int, entry_time: str):
+        """
+        [lo, hi) 交易日的入场特征、筛选结果 (基础池+条件+大盘风控) 与评分项
+        基础池不含 ST/北交所剔除 (名称会随同步变化，组装结果时再按最新名称剔除)
+        """
+        if entry_time == ENTRY_CLOSE:
+            features, index_change = self._daily_entry(lo, hi)
+        else:
+            features, index_change = self._snapshot_entry(lo, hi, entry_time)
+
+        pool = self._pool_mask(lo, hi, static=False)
+        market_ok = ~(index_change < self.params['INDEX_RISK_THR'])
+        mask = burial_mask(features, self.params) & pool & market_ok[:, None]
+        return features, index_change, pool, market_ok, mask, score_components(features)
+
+    def _filter_stage(self, lo: int, hi: int, entry_time: str) -> List[Dict[str, np.ndarray]]:
+        """筛选阶段：逐日通过条件的候选 (代码、六项评分、入场特征) 与基础池 (ASCII 代码，减小缓存体积)"""
+        features, index_change, pool, market_ok, mask, components = self._evaluate(lo, hi, entry_time)
+        symbols = self.history.symbols
+        days = []
+        for i in range(hi - lo):
+            cols = np.flatnonzero(mask[i])
+            day = {'ts_code': symbols[cols], 'components': components[i, cols], 'pool': symbols[pool[i]].astype('S9'),
+                   'index_change': np.array(index_change[i]), 'market_ok': np.array(market_ok[i])}
+            day.update({name: features[name][i, cols] for name in CANDIDATE_FEATURES})
+            days.append(day)
+        return days
+
+    def _exit_stage(self, lo: int, hi: int, filters: Dict[int, Dict[str, np.ndarray]]) -> List[Dict[str, np.ndarray]]:
+        """出场阶段：逐日候选在各出场方式下的收益 (%)"""
+        prices = self._exit_prices(lo, hi)
+        days = []
+        for i, row in enumerate(range(lo, hi)):
+            cols = self.history.column_index(filters[row]['ts_code'])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = np.stack([(prices[name][i, cols] / filters[row]['latest'] - 1) * 100
+                                    for name in self.exits], axis=-1)
+            days.append({'returns': returns.reshape(len(cols), len(self.exits))})
+        return days
+
+    def _stage_days(self, stage: str, lo: int, hi: int, entry_time: str,
+                    filters: Optional[Dict[int, Dict[str, np.ndarray]]] = None) -> List[Dict[str, np.ndarray]]:
+        """[lo, hi) 交易日的阶段结果 (多进程执行器的子进程也调用此方法)"""
+        if stage == 'filters':
+            return self._filter_stage(lo, hi, entry_time)
+        return self._exit_stage(lo, hi, filters)
+
+    # ==================== 逐日缓存 ====================
+
+    def _filter_fingerprint(self, row: int, entry_time: str) -> str:
+        """筛选阶段数据指纹：前一日与当日数据版本 (+ 盘中入场使用的快照)"""
+        revisions = self.history.revisions
+        fingerprint = f"{revisions[row - 1]}-{revisions[row]}"
+        if entry_time != ENTRY_CLOSE:
+            date = self.history.dates[row]
+            times = [t for _, _, t in self.snapshots.list_snapshots(date, date, STRATEGY_MAIN_FORCE)
+                     if t <= entry_time]
+            fingerprint += f"-{times[-1] if times else 'none'}"
+        return fingerprint
+
+    def _exit_fingerprint(self, row: int, entry_time: str) -> str:
+        """出场阶段数据指纹：当日候选 (筛选阶段指纹) + 后续 max(horizons) 个交易日的数据版本"""
+        future = self.history.revisions[row + 1:row + 1 + max(self.horizons)]
+        return f"{self._filter_fingerprint(row, entry_time)}|{'-'.join(str(v) for v in future)}"
+
+    def _staged(self, stage: str, key: str, rows: List[int], fingerprint, entry_time: str,
+                filters: Optional[Dict[int, Dict[str, np.ndarray]]] = None) -> Dict[int, Dict[str, np.ndarray]]:
+        """读取各交易日的阶段结果；缓存缺失的交易日按连续区间批量计算并写回缓存"""
+        dates = self.history.dates
+        results, missing = {}, []
+        for row in rows:
+            cached = self.cache.load(stage, key, dates[row], fingerprint(row)) if self.cache else None
+            # 出场收益与当日候选逐行对齐，行数不一致的缓存作废
+            if cached is not None and filters is not None and len(cached['returns']) != len(filters[row]['ts_code']):
+                cached = None
+            if cached is None:
+                missing.append(row)
+            else:
+                results[row] = cached
+
+        # 连续的缺失交易日合并为区间 (不超过 chunk_days) 向量化计算
+        runs, run = [], []
+        for row in missing:
+            if run and (row != run[-1] + 1 or len(run) >= self.chunk_days):
+                runs.append((run[0], run[-1] + 1))
+                run = []
+            run.append(row)
+        if run:
+            runs.append((run[0], run[-1] + 1))
+
+        if self.executor and runs:
+            computed = self.executor.map(self, stage, runs, entry_time, filters)
+        else:
+            computed = [self._stage_days(stage, lo, hi, entry_time, filters) for lo, hi in runs]
+
+        for (lo, hi), days in zip(runs, computed):
+            for row, day in zip(range(lo, hi), days):
+                results[row] = day
+                if self.cache:
+                    self.cache.save(stage, key, dates[row], fingerprint(row), day)
+        return results
+
+    def _stage_keys(self, entry_time: str):
+        filter_key = stage_key('filters', {name: self.params[name] for name in sorted(self.params)},
+                               entry_time, POOL_MIN_TURNOVER)
+        return filter_key, stage_key('exits', filter_key, self.horizons)
+
+    # ==================== 回测 ====================
+
+    def _rows(self, start: Optional[str], end: Optional[str]) -> List[int]:
+        """回测区间的行号 (首个交易日没有前一日数据，不参与回测)"""
+        rows = self.history.date_range(start, end)
+        return list(range(max(rows.start, 1), rows.stop))
+
+    def _stages(self, start: Optional[str], end: Optional[str], entry_time: str):
+        """
+        全部候选 (按交易日、列顺序) 与逐日统计；启用缓存时只计算缓存缺失/数据变动的交易日
+        评分权重不参与缓存键：评分由缓存的六项评分直接矩阵乘法得出
+        """
+        rows = self._rows(start, end)
+        filter_key, exit_key = self._stage_keys(entry_time)
+        filters = self._staged('filters', filter_key, rows, lambda row: self._filter_fingerprint(row, entry_time),
+                               entry_time)
+        exits = self._staged('exits', exit_key, rows, lambda row: self._exit_fingerprint(row, entry_time),
+                             entry_time, filters)
+
+        static = self._static_mask()
+        excluded = self.history.symbols[~static].astype('S9')
+        columns = ['trade_date', 'ts_code', 'name', *CANDIDATE_FEATURES, *COMPONENT_NAMES, *self.exits]
+        parts = {name: [] for name in columns}
+        daily = []
+        for row in rows:
+            day = filters[row]
+            cols = self.history.column_index(day['ts_code'])
+            keep = (cols >= 0) & static[np.maximum(cols, 0)]
+            parts['trade_date'].append(np.full(int(keep.sum()), self.history.dates[row]))
+            parts['ts_code'].append(day['ts_code'][keep])
+            parts['name'].append(self.history.names[cols[keep]])
+            for name in CANDIDATE_FEATURES:
+                parts[name].append(day[name][keep])
+            for j, name in enumerate(COMPONENT_NAMES):
+                parts[name].append(day['components'][keep, j])
+            for j, name in enumerate(self.exits):
+                parts[name].append(exits[row]['returns'][keep, j])
+
+            daily.append({
+                'trade_date': self.history.dates[row],
+                'index_change': float(day['index_change']),
+                'market_ok': bool(day['market_ok']),
+                'pool': int(len(day['pool']) - np.isin(day['pool'], excluded).sum()),
+            })
+
+        candidates = pd.DataFrame({name: np.concatenate(values) for name, values in parts.items()}) \
+            if rows else pd.DataFrame(columns=columns)
+        return candidates, pd.DataFrame(daily, columns=['trade_date', 'index_change', 'market_ok', 'pool'])
+
+    def run(self, start: Optional[str] = None, end: Optional[str] = None,
+            entry_time: str = ENTRY_CLOSE) -> BacktestResult:
+        """
+        回测 [start, end] (YYYYMMDD)；entry_time 为 'close' 或 'HHMM' / 'HH:MM'
+        首个交易日没有前一日数据，不参与回测
+        """
+        entry_time = entry_time.replace(':', '')
+        candidates, daily = self._stages(start, end, entry_time)
+
+        scores = total_score(candidates[list(COMPONENT_NAMES)].to_numpy(dtype=np.float64), self.weights) \
+            if len(candidates) else np.array([])
+        candidates = candidates.assign(total_score=scores)
+        candidates = candidates[candidates['total_score'] >= self.min_score]
+        daily['candidates'] = daily['trade_date'].map(candidates['trade_date'].value_counts()).fillna(0).astype(int)
+
+        # 每日按评分取 TOP N (同分按代码顺序)
+        order = np.lexsort((-candidates['total_score'].to_numpy(), candidates['trade_date'].to_numpy()))
+        ranked = candidates.iloc[order]
+        rank = ranked.groupby('trade_date').cumcount().to_numpy() + 1
+        picks = ranked.assign(rank=rank)[rank <= self.top_n].reset_index(drop=True)
+        picks = picks.rename(columns={'latest': 'entry_price'})[
+            ['trade_date', 'ts_code', 'name', 'rank', 'total_score', 'entry_price', 'pct_chg', 'deviation',
+             'turnover_rate', 'amount_yi', *COMPONENT_NAMES, *self.exits]]
+
+        if not picks.empty:
+            means = picks.groupby('trade_date')[self.exits].mean()
+            daily = daily.merge(means, left_on='trade_date', right_index=True, how='left')
+        else:
+            daily = daily.assign(**{name: np.nan for name in self.exits})
+        daily['picks'] = daily['trade_date'].map(picks['trade_date'].value_counts()).fillna(0).astype(int)
+        return BacktestResult(picks, daily, self.exits, entry_time)
+
+    def candidates(self, start: Optional[str] = None, end: Optional[str] = None,
+                   entry_time: str = ENTRY_CLOSE) -> pd.DataFrame:
+        """
+        通过筛选条件的全部候选 (不按评分截断)：交易日、代码、六项评分与各出场方式收益
+        供评分权重优化使用，权重变化只影响排序，无需重新计算
+        """
+        return self._stages(start, end, entry_time.replace(':', ''))[0]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+回测多进程执行器
+1. 待计算的交易日区间按 shard_days 切分为分片，分发到进程池并行计算 (各交易日互不依赖)
+2. 子进程只接收历史库/快照归档的根目录与策略参数，各自以内存映射打开数据，不序列化行情面板；
+   进程间只传递逐日候选结果 (数组字典，体积很小)
+3. 分片结果按交易日顺序合并，与单进程计算逐位一致，缓存也由主进程按顺序写入
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 子进程内的回测器 (由 _init_worker 创建，整个进程生命周期内复用)
+_worker = None
+
+
+def default_workers() -> int:
+    """默认进程数：配置 BACKTEST_WORKERS，未设置 (0) 时为 CPU 核数"""
+    try:
+        from src.config import get_config
+        workers = get_config().BACKTEST_WORKERS
+    except ImportError:
+        workers = 0
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def _init_worker(spec: Dict[str, Any]):
+    global _worker
+    from src.backtest_engine import BurialBacktest
+    from src.history_store import DailyHistoryStore
+    from src.snapshot_archive import SnapshotArchive
+
+    # 分阶段计算不涉及评分权重
+    _worker = BurialBacktest(spec['params'], None, DailyHistoryStore(spec['history_root']),
+                             SnapshotArchive(spec['snapshot_root']), horizons=spec['horizons'],
+                             chunk_days=spec['chunk_days'])
+
+
+def _run_shard(stage: str, lo: int, hi: int, entry_time: str,
+               filters: Optional[Dict[int, Dict[str, np.ndarray]]]) -> List[Dict[str, np.ndarray]]:
+    return _worker._stage_days(stage, lo, hi, entry_time, filters)
+
+
+class ParallelExecutor:
+    """按交易日分片的进程池执行器 (可作为上下文管理器使用，退出时关闭进程池)"""
+
+    def __init__(self, workers: Optional[int] = None, shard_days: int = 20):
+        self.workers = workers or default_workers()
+        self.shard_days = shard_days
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._spec: Optional[Dict[str, Any]] = None
+
+    def _spec_of(self, backtest) -> Dict[str, Any]:
+        # 历史库版本变化 (重新导入) 后需要重建子进程，避免使用旧的内存映射
+        return {'params': backtest.params, 'horizons': backtest.horizons,
+                'chunk_days': backtest.chunk_days, 'history_root': backtest.history.root,
+                'snapshot_root': backtest.snapshots.root, 'version': backtest.history.version}
+
+    def _pool_for(self, backtest) -> ProcessPoolExecutor:
+        spec = self._spec_of(backtest)
+        if self._pool is None or spec != self._spec:
+            self.close()
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(spec,))
+            self._spec = spec
+        return self._pool
+
+    def shards(self, runs: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """连续区间切分为分片；总交易日较少时缩小分片，保证每个进程都有任务"""
+        total = sum(hi - lo for lo, hi in runs)
+        size = max(1, min(self.shard_days, -(-total // self.workers)))
+        return [(start, min(start + size, hi)) for lo, hi in runs for start in range(lo, hi, size)]
+
+    def map(self, backtest, stage: str, runs: Sequence[Tuple[int, int]], entry_time: str,
+            filters: Optional[Dict[int, Dict[str, np.ndarray]]] = None) -> List[List[Dict[str, np.ndarray]]]:
+        """并行计算各区间的阶段结果，返回值与 runs 一一对应 (区间内按交易日顺序)"""
+        shards = self.shards(runs)
+        if self.workers <= 1 or len(shards) <= 1:
+            return [backtest._stage_days(stage, lo, hi, entry_time, filters) for lo, hi in runs]
+
+        pool = self._pool_for(backtest)
+        futures = [pool.submit(_run_shard, stage, lo, hi, entry_time,
+                               {row: filters[row] for row in range(lo, hi)} if filters is not None else None)
+                   for lo, hi in shards]
+
+        # 按提交顺序收集，合并结果与完成先后无关
+        days = [day for future in futures for day in future.result()]
+        results, pos = [], 0
+        for lo, hi in runs:
+            results.append(days[pos:pos + hi - lo])
+            pos += hi - lo
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._spec = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
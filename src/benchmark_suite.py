@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+选股流水线性能基准
+离线运行 (不请求任何网络接口)，按股票数规模 (默认 500 / 5000 / 50000) 计时各阶段：
+1. burial_parse_filter：GuguData 响应按 40 只一批解析为行情数组 + filter_quotes 筛选评分 (get_realtime_and_filter 的非网络部分)
+2. burial_score：六项评分与加权总分 (burial_signals.score_components / total_score)
+3. quick_knife_screen：快刀手 DataFrame 筛选阶段 (screen_quotes)
+4. save_results：写入结果数据库 + 保存结果文件
+5. web_loaders：web_app 加载函数背后的结果库查询 (冷启动导入 N 个旧版结果文件 + 最新/历史/个股查询)
+6. email_html / email_excel：EmailSender 邮件正文与 Excel 附件生成
+行情数据为固定随机种子的合成行情 (src.synthetic_market)，或录制的 GuguData 响应 (按规模平铺)；
+所有写入都在临时目录中进行。结果为 JSON，可与上一版本的结果对比发现性能回退
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.burial_signals import burial_features, score_components, total_score
+from src.minute_store import minute_index
+from src.quote_records import concat_quotes, quotes_from_gugudata, to_ts_codes
+from src.synthetic_market import SyntheticMarket
+
+try:
+    import openpyxl  # noqa: F401 (EmailSender 生成 Excel 附件需要)
+    EXCEL_AVAILABLE = True
+except ImportError:
+    EXCEL_AVAILABLE = False
+
+DEFAULT_SIZES = (500, 5000, 50000)
+DEFAULT_REPEATS = 5
+DEFAULT_HISTORY_FILES = 1000
+# 与 get_realtime_and_filter 的分批大小一致
+PARSE_BATCH_SIZE = 40
+# 中位耗时超过基线该比例视为回退
+DEFAULT_TOLERANCE = 0.2
+
+CASES = ('burial_parse_filter', 'burial_score', 'quick_knife_screen', 'save_results',
+         'web_loaders', 'email_html', 'email_excel')
+
+
+def load_fixture(path: str) -> List[Dict[str, Any]]:
+    """读取录制的 GuguData 响应 (完整响应或 Data 列表)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('Data', []) if isinstance(data, dict) else data
+
+
+def tile_fixture(items: List[Dict[str, Any]], n: int) -> List[Dict[str, Any]]:
+    """录制数据平铺到 n 只股票 (超出部分改写代码，保持代码唯一)"""
+    out = []
+    for i in range(n):
+        item = items[i % len(items)]
+        if i >= len(items):
+            item = {**item, 'Symbol': f"{str(item.get('Symbol', '0'))[:1]}{i:05d}"}
+        out.append(item)
+    return out
+
+
+def _timed(func: Callable[[], Any], repeats: int, setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    """计时 repeats 次 (先预热一次)；setup 不计入耗时"""
+    timings = []
+    for i in range(repeats + 1):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+        if i:
+            timings.append(elapsed)
+    return timings
+
+
+@contextlib.contextmanager
+def _workdir(path: str):
+    """临时切换工作目录 (结果文件按当前目录的相对路径写入)"""
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def _legacy_history(directory: str, files: int, stocks: Sequence[Dict[str, Any]]):
+    """生成 files 个旧版主力埋伏结果文件 (每 30 分钟一次选股，每次 10 只)"""
+    start = datetime(2024, 1, 2, 9, 30)
+    for i in range(files):
+        when = start + timedelta(minutes=30 * i)
+        picks = [stocks[(i * 7 + j) % len(stocks)] for j in range(10)]
+        with open(os.path.join(directory, f"main_force_burial_result_{when:%Y%m%d_%H%M%S}.json"), 'w',
+                  encoding='utf-8') as f:
+            json.dump({'screening_time': when.strftime('%Y-%m-%d %H:%M:%S'), 'stocks': picks}, f,
+                      ensure_ascii=False, default=float)
+
+
+class PipelineBenchmark:
+    """选股流水线基准"""
+
+    def __init__(self, sizes: Sequence[int] = DEFAULT_SIZES, repeats: int = DEFAULT_REPEATS,
+                 history_files: int = DEFAULT_HISTORY_FILES, fixture: Optional[str] = None,
+                 cases: Optional[Sequence[str]] = None, seed: int = 0):
+        self.sizes = list(sizes)
+        self.seed = seed
+        self.repeats = repeats
+        self.history_files = history_files
+        self.fixture = fixture
+        self.cases = list(cases or CASES)
+        unknown = set(self.cases) - set(CASES)
+        if unknown:
+            raise ValueError(f"未知的基准项: {', '.join(sorted(unknown))} (可选: {', '.join(CASES)})")
+
+    def _items(self, n: int) -> List[Dict[str, Any]]:
+        if self.fixture:
+            return tile_fixture(load_fixture(self.fixture), n)
+        # 尾盘选股时点 (14:50) 的合成行情
+        market = SyntheticMarket(n, seed=self.seed)
+        market.advance(minute_index('1450'))
+        return market.gugudata_items()
+
+    def run(self, progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, Any]:
+        """运行全部基准，返回可写入 JSON 的结果"""
+        workspace = tempfile.mkdtemp(prefix='screener_bench_')
+        rows = []
+        try:
+            for n in self.sizes:
+                rows.extend(self._run_size(n, os.path.join(workspace, str(n)), progress))
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+        return {'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'environment': environment(),
+                'settings': {'sizes': self.sizes, 'repeats': self.repeats, 'history_files': self.history_files,
+                             'fixture': self.fixture or 'synthetic', 'seed': self.seed},
+                'results': rows}
+
+    def _run_size(self, n: int, workspace: str, progress) -> List[Dict[str, Any]]:
+        from core.email_sender import EmailSender
+        from src.main_force_burial_strategy import MainForceBurialStrategy
+        from src.quick_knife_strategy import screen_quotes
+        from src.result_schema import to_email_frame
+        from src import results_store
+
+        os.makedirs(os.path.join(workspace, 'results'))
+        items = self._items(n)
+        with contextlib.redirect_stdout(io.StringIO()):
+            strategy = MainForceBurialStrategy()
+        quotes = quotes_from_gugudata(items)
+        code_map = dict(zip(quotes['symbol'], to_ts_codes(quotes['symbol'])))
+        name_dict = {code_map[symbol]: name for symbol, name in zip(quotes['symbol'], quotes['name'])}
+
+        def parse_filter():
+            batches = [quotes_from_gugudata(items[i:i + PARSE_BATCH_SIZE])
+                       for i in range(0, len(items), PARSE_BATCH_SIZE)]
+            return strategy.filter_quotes(concat_quotes(batches), code_map, name_dict)
+
+        candidates = parse_filter()
+        top10 = candidates.sort_values('total_score', ascending=False).head(10).to_dict('records')
+        strategy.results = top10
+
+        features = burial_features(quotes['latest'], quotes['open'], quotes['high'], quotes['low'],
+                                   quotes['pre_close'], quotes['volume'], quotes['amount'],
+                                   quotes['turnover_rate'], quotes['change_pct'])
+
+        def score():
+            total_score(score_components(features), strategy.scoring_weights)
+
+        store_path = os.path.join(workspace, 'results', 'bench.db')
+
+        def fresh_store():
+            # save_results 通过 get_results_store() 写入，基准期间指向临时数据库
+            if results_store._store is not None:
+                results_store._store.close()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(store_path + suffix):
+                    os.remove(store_path + suffix)
+            results_store._store = results_store.ResultsStore(store_path)
+
+        def save():
+            with _workdir(workspace):
+                strategy.save_results()
+
+        history_dir = os.path.join(workspace, 'history')
+        os.makedirs(history_dir)
+        _legacy_history(history_dir, self.history_files, top10 or candidates.head(10).to_dict('records')
+                        or [{'code': '000001.SZ', 'name': '股票0', 'total_score': 70.0}])
+
+        def web_loaders():
+            store = results_store.get_results_store()
+            with _workdir(history_dir):
+                store.import_legacy_json()
+            latest = store.latest()
+            headers = store.history_headers(limit=30)
+            for header in headers:
+                store.run_stocks(header['run_id'])
+            index = store.stock_index()
+            if index:
+                store.appearances(index[0]['code'])
+            return latest
+
+        email_frame = to_email_frame(candidates)
+        emailer = EmailSender.__new__(EmailSender)
+        message = strategy.format_results_for_email()
+
+        def email_excel():
+            with _workdir(workspace):
+                emailer._create_attachment(email_frame, 'bench.xlsx')
+
+        cases = {
+            'burial_parse_filter': (parse_filter, None),
+            'burial_score': (score, None),
+            'quick_knife_screen': (lambda: screen_quotes(quotes), None),
+            'save_results': (save, fresh_store),
+            'web_loaders': (web_loaders, fresh_store),
+            'email_html': (lambda: emailer._create_html_content(message, email_frame), None),
+            'email_excel': (email_excel, None),
+        }
+
+        rows = []
+        original_store = results_store._store
+        try:
+            for name in self.cases:
+                if progress:
+                    progress(name, n)
+                if name == 'email_excel' and not EXCEL_AVAILABLE:
+                    rows.append({'case': name, 'size': n, 'skipped': '未安装 openpyxl'})
+                    continue
+                func, setup = cases[name]
+                timings = _timed(func, self.repeats, setup)
+                items_count = self.history_files if name == 'web_loaders' else (
+                    len(email_frame) if name.startswith('email') else (len(top10) if name == 'save_results' else n))
+                rows.append(_row(name, n, items_count, timings))
+        finally:
+            if results_store._store is not original_store:
+                results_store._store.close()
+            results_store._store = original_store
+        return rows
+
+
+def _row(case: str, size: int, items: int, timings: List[float]) -> Dict[str, Any]:
+    median = statistics.median(timings)
+    return {'case': case, 'size': size, 'items': items, 'repeats': len(timings),
+            'min_s': min(timings), 'median_s': median, 'max_s': max(timings),
+            'per_item_us': median / items * 1e6 if items else None}
+
+
+def environment() -> Dict[str, Any]:
+    """运行环境 (版本对比时区分代码变化与环境变化)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'commit': commit, 'python': sys.version.split()[0], 'numpy': np.__version__,
+            'pandas': pd.__version__, 'platform': platform.platform(), 'machine': platform.machine(),
+            'cpus': os.cpu_count()}
+
+
+def results_frame(report: Dict[str, Any]) -> pd.DataFrame:
+    """基准结果表 (case × size)"""
+    table = pd.DataFrame(report['results'])
+    if 'items' in table.columns:
+        table['items'] = table['items'].astype('Int64')
+    return table
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> pd.DataFrame:
+    """与基线结果对比中位耗时 (规模与数据量都相同的项)；ratio > 1 + tolerance 标记为回退"""
+    key = ['case', 'size', 'items']
+    now = results_frame(current)
+    before = results_frame(baseline)
+    if 'median_s' not in now.columns or 'median_s' not in before.columns:
+        return pd.DataFrame(columns=[*key, 'baseline_s', 'median_s', 'ratio', 'regression'])
+    table = now[key + ['median_s']].merge(before[key + ['median_s']].rename(columns={'median_s': 'baseline_s'}),
+                                          on=key).dropna()
+    table['ratio'] = table['median_s'] / table['baseline_s']
+    table['regression'] = table['ratio'] > 1 + tolerance
+    return table[[*key, 'baseline_s', 'median_s', 'ratio', 'regression']]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+策略统计量的置信区间 (Bootstrap / Monte-Carlo)
+1. 批量重抽样：一次生成 重抽样次数×样本数 的下标矩阵，统计量按行向量化计算
+   (矩阵超过 MAX_CELLS 时按行分块，内存占用有上限)
+2. 胜率/成功率：Bernoulli 样本的 Bootstrap 等价于二项分布抽样，直接按次数计算，与样本量无关
+3. 最大回撤：bootstrap 为有放回重抽样收益序列；shuffle 为打乱收益顺序 (Monte-Carlo 路径风险)
+区间为百分位法，默认 95%、10000 次重抽样，固定随机种子使同一数据的报告结果可复现
+"""
+
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_RESAMPLES = 10000
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_SEED = 0
+
+# 单块重抽样矩阵的最大元素数 (float64 约 160MB)
+MAX_CELLS = 20_000_000
+
+DRAWDOWN_METHODS = ('bootstrap', 'shuffle')
+
+
+def _finite(values: Sequence[float]) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return values[np.isfinite(values)]
+
+
+def _interval(estimate: float, distribution: np.ndarray, n: int, confidence: float) -> Dict[str, Any]:
+    if n == 0 or len(distribution) == 0:
+        return {'estimate': float('nan'), 'low': float('nan'), 'high': float('nan'), 'std': float('nan'), 'n': n}
+    alpha = (1 - confidence) / 2 * 100
+    low, high = np.percentile(distribution, [alpha, 100 - alpha])
+    return {'estimate': float(estimate), 'low': float(low), 'high': float(high),
+            'std': float(distribution.std()), 'n': n}
+
+
+def bootstrap_distribution(values: Sequence[float], statistic: Callable[[np.ndarray], np.ndarray],
+                           resamples: int = DEFAULT_RESAMPLES, seed: Optional[int] = DEFAULT_SEED,
+                           shuffle: bool = False) -> np.ndarray:
+    """
+    统计量的重抽样分布：statistic 接收 (块行数, 样本数) 矩阵，按行返回统计量
+    shuffle=True 时为无放回打乱顺序 (排列)，否则为有放回重抽样
+    """
+    values = _finite(values)
+    n = len(values)
+    out = np.empty(resamples if n else 0)
+    if not n:
+        return out
+
+    rng = np.random.default_rng(seed)
+    rows = max(1, MAX_CELLS // n)
+    for lo in range(0, resamples, rows):
+        size = min(rows, resamples - lo)
+        if shuffle:
+            sample = rng.permuted(np.broadcast_to(values, (size, n)), axis=1)
+        else:
+            sample = values[rng.integers(0, n, size=(size, n))]
+        out[lo:lo + size] = statistic(sample)
+    return out
+
+
+def mean_ci(values: Sequence[float], confidence: float = DEFAULT_CONFIDENCE, resamples: int = DEFAULT_RESAMPLES,
+            seed: Optional[int] = DEFAULT_SEED) -> Dict[str, Any]:
+    """均值 (如平均收益、平均选股数) 的置信区间"""
+    values = _finite(values)
+    distribution = bootstrap_distribution(values, lambda x: x.mean(axis=1), resamples, seed)
+    return _interval(values.mean() if len(values) else np.nan, distribution, len(values), confidence)
+
+
+def proportion_ci(successes: int, n: int, confidence: float = DEFAULT_CONFIDENCE,
+                  resamples: int = DEFAULT_RESAMPLES, seed: Optional[int] = DEFAULT_SEED) -> Dict[str, Any]:
+    """比例 (%) 的置信区间，只需成功次数与总次数 (可直接使用汇总表的计数)"""
+    n = int(n)
+    if n <= 0:
+        return _interval(np.nan, np.array([]), 0, confidence)
+    p = successes / n
+    distribution = np.random.default_rng(seed).binomial(n, p, size=resamples) / n * 100
+    return _interval(p * 100, distribution, n, confidence)
+
+
+def win_rate_ci(returns: Sequence[float], confidence: float = DEFAULT_CONFIDENCE,
+                resamples: int = DEFAULT_RESAMPLES, seed: Optional[int] = DEFAULT_SEED) -> Dict[str, Any]:
+    """胜率 (收益>0 的比例，%) 的置信区间"""
+    returns = _finite(returns)
+    return proportion_ci(int((returns > 0).sum()), len(returns), confidence, resamples, seed)
+
+
+def path_drawdowns(returns: np.ndarray) -> np.ndarray:
+    """按行计算收益路径 (%) 的最大回撤 (%)，初始净值为 1"""
+    equity = np.cumprod(1 + returns / 100, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    return ((equity - peak) / peak).min(axis=1) * 100
+
+
+def drawdown_ci(returns: Sequence[float], method: str = 'bootstrap', confidence: float = DEFAULT_CONFIDENCE,
+                resamples: int = DEFAULT_RESAMPLES, seed: Optional[int] = DEFAULT_SEED) -> Dict[str, Any]:
+    """
+    逐期收益 (%) 序列最大回撤的置信区间；估计值为实际顺序下的最大回撤
+    method: bootstrap (有放回重抽样) / shuffle (打乱顺序)
+    """
+    if method not in DRAWDOWN_METHODS:
+        raise ValueError(f"未知的回撤模拟方式: {method} (可选: {', '.join(DRAWDOWN_METHODS)})")
+    returns = _finite(returns)
+    estimate = path_drawdowns(returns[None, :])[0] if len(returns) else np.nan
+    distribution = bootstrap_distribution(returns, path_drawdowns, resamples, seed, shuffle=method == 'shuffle')
+    return _interval(estimate, distribution, len(returns), confidence)
+
+
+def strategy_intervals(trade_returns: Sequence[float], period_returns: Optional[Sequence[float]] = None,
+                       confidence: float = DEFAULT_CONFIDENCE, resamples: int = DEFAULT_RESAMPLES,
+                       seed: Optional[int] = DEFAULT_SEED) -> Dict[str, Dict[str, Any]]:
+    """
+    策略收益统计的置信区间：逐笔收益的胜率与平均收益，逐期 (如逐日等权) 收益的最大回撤
+    未提供 period_returns 时按逐笔收益顺序计算回撤
+    """
+    period_returns = trade_returns if period_returns is None else period_returns
+    return {
+        'win_rate': win_rate_ci(trade_returns, confidence, resamples, seed),
+        'avg_return': mean_ci(trade_returns, confidence, resamples, seed),
+        'max_drawdown': drawdown_ci(period_returns, 'bootstrap', confidence, resamples, seed),
+    }
+
+
+def format_ci(ci: Dict[str, Any], digits: int = 1, unit: str = '%') -> str:
+    """如 '52.3% [48.1%, 56.4%]'"""
+    if not ci['n']:
+        return '-'
+    return (f"{ci['estimate']:.{digits}f}{unit} "
+            f"[{ci['low']:.{digits}f}{unit}, {ci['high']:.{digits}f}{unit}]")
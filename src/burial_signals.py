@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+主力埋伏策略信号计算 (向量化，实盘筛选与历史回测共用)
+1. burial_features：由行情字段计算涨幅、VWAP、乖离率、估算市值、价格位置、振幅
+2. burial_mask：筛选条件 (与 MainForceBurialStrategy.filter_quotes 相同)
+3. score_components：六项评分 (分段线性函数)，最后一维为评分项
+输入可以是任意形状的数组 (单日股票向量或 交易日×股票 面板)
+"""
+
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+# 评分项顺序 (与 scoring_weights 的键一致)
+COMPONENT_NAMES = ('deviation_score', 'change_score', 'turnover_score',
+                   'amount_score', 'position_score', 'amplitude_score')
+
+# 基础评分门槛
+MIN_TOTAL_SCORE = 60
+
+# 筛选参数名 (策略实例属性 / 配置参数)
+PARAM_NAMES = (
+    'MIN_MV', 'MAX_MV', 'MIN_PCT', 'MAX_PCT', 'MAX_DEVIATION', 'INDEX_RISK_THR', 'MIN_AMOUNT',
+    'TURNOVER_RATE_SMALL_CAP_MIN', 'TURNOVER_RATE_SMALL_CAP_MAX',
+    'TURNOVER_RATE_MID_CAP_MIN', 'TURNOVER_RATE_MID_CAP_MAX',
+    'TURNOVER_RATE_LARGE_CAP_MIN', 'TURNOVER_RATE_LARGE_CAP_MAX',
+)
+
+# strategy_configs.json 中市值参数以元为单位，策略内部以万元为单位
+CONFIG_MV_FIELDS = ('MIN_MV', 'MAX_MV')
+CONFIG_MV_UNIT = 10000
+
+
+def burial_features(latest, open_px, high, low, pre_close, volume, amount, turnover_rate,
+                    change_pct=None) -> Dict[str, np.ndarray]:
+    """
+    计算筛选与评分所需的衍生字段
+    volume 单位为手，amount 单位为元；change_pct 为接口直接给出的涨跌幅 (为0时按价格计算)
+    """
+    latest = np.asarray(latest, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    amount = np.asarray(amount, dtype=np.float64)
+    turnover_rate = np.asarray(turnover_rate, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    pre_close = np.asarray(pre_close, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 涨跌幅 (优先使用接口直接数据，没有时使用价格计算)
+        calc_pct = np.where(pre_close > 0, (latest - pre_close) / pre_close * 100, 0.0)
+        if change_pct is None:
+            pct_chg = calc_pct
+        else:
+            change_pct = np.asarray(change_pct, dtype=np.float64)
+            pct_chg = np.where(change_pct != 0, change_pct, calc_pct)
+
+        # 成交额与估算市值 (流通市值 = 成交额 / 换手率)
+        amount_wan = amount / 10000
+        amount_yi = amount_wan / 100000
+        estimated_mv = np.where(turnover_rate > 0, amount_wan * 10000 / (turnover_rate / 100), 0.0)
+
+        # VWAP与乖离率 (amount是元，volume是手)
+        vwap = np.where(volume > 0, amount / (volume * 100), latest)
+        deviation = np.where(vwap > 0, (latest - vwap) / vwap * 100, 0.0)
+
+        price_position = np.where(high != low, (latest - low) / (high - low), 0.5)
+        amplitude = (high - low) / low * 100
+
+    return {
+        'latest': latest,
+        'open': np.asarray(open_px, dtype=np.float64),
+        'high': high,
+        'low': low,
+        'pre_close': pre_close,
+        'volume': volume,
+        'amount': amount,
+        'turnover_rate': turnover_rate,
+        'pct_chg': pct_chg,
+        'amount_wan': amount_wan,
+        'amount_yi': amount_yi,
+        'estimated_mv': estimated_mv,
+        'vwap': vwap,
+        'deviation': deviation,
+        'price_position': price_position,
+        'amplitude': amplitude,
+    }
+
+
+def turnover_bounds(estimated_mv, params: Mapping[str, Any]):
+    """换手率区间按估算市值分层 (与 get_turnover_rate_range 一致)"""
+    tier = [estimated_mv < 1000000, estimated_mv < 3000000]
+    turnover_min = np.select(tier, [params['TURNOVER_RATE_SMALL_CAP_MIN'], params['TURNOVER_RATE_MID_CAP_MIN']],
+                             default=params['TURNOVER_RATE_LARGE_CAP_MIN'])
+    turnover_max = np.select(tier, [params['TURNOVER_RATE_SMALL_CAP_MAX'], params['TURNOVER_RATE_MID_CAP_MAX']],
+                             default=params['TURNOVER_RATE_LARGE_CAP_MAX'])
+    return turnover_min, turnover_max
+
+
+def burial_mask(features: Dict[str, np.ndarray], params: Mapping[str, Any]) -> np.ndarray:
+    """主力埋伏筛选条件 (NaN 数据视为不满足)"""
+    f = features
+    turnover_min, turnover_max = turnover_bounds(f['estimated_mv'], params)
+    with np.errstate(invalid='ignore'):
+        return (
+            (f['latest'] != 0) & (f['volume'] != 0)                                 # 基础数据校验
+            & (f['pct_chg'] > params['MIN_PCT']) & (f['pct_chg'] < params['MAX_PCT'])  # 涨幅
+            & (f['turnover_rate'] > 0)
+            & (f['turnover_rate'] >= turnover_min) & (f['turnover_rate'] <= turnover_max)  # 换手率区间
+            & (f['vwap'] > 0)
+            & (f['deviation'] <= params['MAX_DEVIATION'])                           # 乖离率控制
+            & (f['latest'] >= f['vwap'])                                            # 在均价线上方
+            & (f['latest'] >= f['open'])                                            # 真阳线
+            & (f['latest'] >= f['high'] * 0.995)                                    # 接近最高价
+            & (f['amount_wan'] >= params['MIN_AMOUNT'] / 10000)                     # 成交额门槛
+            & (f['estimated_mv'] >= params['MIN_MV'] * 10000)                       # 市值区间
+            & (f['estimated_mv'] <= params['MAX_MV'] * 10000)
+            & (f['low'] > 0)
+        )
+
+
+# ==================== 评分 ====================
+
+def deviation_score(deviation):
+    """乖离率评分：越小越好"""
+    d = np.abs(deviation)
+    return np.select([d <= 0.5, d <= 1.0, d <= 1.5, d <= 2.0, d <= 3.0],
+                     [100.0, 90.0, 80.0, 70.0, 50.0], default=20.0)
+
+
+def change_score(change):
+    """涨幅评分：适中最好"""
+    c = np.asarray(change, dtype=np.float64)
+    return np.select(
+        [c <= 0, c < 0.8, c < 2.0, c < 4.0, c < 6.0],
+        [0.0, c / 0.8 * 40, 40 + (c - 0.8) / 1.2 * 40, 80 + (c - 2.0) / 2.0 * 15, 95 + (c - 4.0) / 2.0 * 5],
+        default=90.0)
+
+
+def turnover_score(turnover):
+    """换手率评分：适中最好"""
+    t = np.asarray(turnover, dtype=np.float64)
+    return np.select([t < 1, t < 3, t < 6], [20.0, 40 + (t - 1) / 2 * 40, 80 + (t - 3) / 3 * 20], default=80.0)
+
+
+def amount_score(amount_yi):
+    """成交额评分：越大越好，但有上限"""
+    a = np.asarray(amount_yi, dtype=np.float64)
+    return np.select([a < 1, a < 3, a < 5, a < 10],
+                     [30.0, 30 + (a - 1) / 2 * 40, 70 + (a - 3) / 2 * 20, 90 + (a - 5) / 5 * 10], default=100.0)
+
+
+def position_score(position):
+    """价格位置评分：高位更好"""
+    p = np.asarray(position, dtype=np.float64)
+    return np.select([p < 0.5, p < 0.8, p < 0.95],
+                     [p / 0.5 * 60, 60 + (p - 0.5) / 0.3 * 30, 90 + (p - 0.8) / 0.15 * 10], default=100.0)
+
+
+def amplitude_score(amplitude):
+    """振幅评分：适中的振幅较好"""
+    a = np.asarray(amplitude, dtype=np.float64)
+    return np.select([a < 3, a < 6, a < 10], [40.0, 60.0, 80.0], default=60.0)
+
+
+def score_components(features: Dict[str, np.ndarray]) -> np.ndarray:
+    """六项评分，形状为 输入形状 + (6,)，顺序同 COMPONENT_NAMES"""
+    return np.stack([
+        deviation_score(features['deviation']),
+        change_score(features['pct_chg']),
+        turnover_score(features['turnover_rate']),
+        amount_score(features['amount_yi']),
+        position_score(features['price_position']),
+        amplitude_score(features['amplitude']),
+    ], axis=-1)
+
+
+def weight_vector(weights: Mapping[str, float]) -> np.ndarray:
+    """评分权重字典 -> 按 COMPONENT_NAMES 排列的向量"""
+    return np.array([float(weights[name]) for name in COMPONENT_NAMES])
+
+
+def total_score(components: np.ndarray, weights) -> np.ndarray:
+    """
+    加权总分；weights 为权重字典、长度6的向量，或 (K, 6) 的多组权重矩阵
+    多组权重时结果最后一维为权重组
+    """
+    w = weight_vector(weights) if isinstance(weights, Mapping) else np.asarray(weights, dtype=np.float64)
+    return components @ w.T / 100
+
+
+def params_from(source: Any, overrides: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """从策略实例 (属性) 或字典中取筛选参数"""
+    if isinstance(source, Mapping):
+        params = {name: source[name] for name in PARAM_NAMES if name in source}
+    else:
+        params = {name: getattr(source, name) for name in PARAM_NAMES}
+    params.update(overrides or {})
+    return params
+
+
+def config_params(params: Mapping[str, Any]) -> Dict[str, Any]:
+    """策略参数 -> strategy_configs.json 参数 (市值: 万元 -> 元)"""
+    return {name: value * CONFIG_MV_UNIT if name in CONFIG_MV_FIELDS else value
+            for name, value in params.items() if name in PARAM_NAMES}
+
+
+def strategy_params(params: Mapping[str, Any]) -> Dict[str, Any]:
+    """strategy_configs.json 参数 -> 策略参数 (市值: 元 -> 万元)"""
+    return {name: value / CONFIG_MV_UNIT if name in CONFIG_MV_FIELDS else value
+            for name, value in params.items() if name in PARAM_NAMES}
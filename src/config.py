@@ -42,11 +42,30 @@ class StockScreenerConfig:
         self.GUGU_APPKEY = get_env_var('GUGU_APPKEY', 'SQSM4ASGQT6UN363PWA9M6256764WYBS')
         self.TUSHARE_TOKEN = get_env_var('TUSHARE_TOKEN', 'fb8b11e0099681fc2e706351fa6ff0bb593053d1c9681800a72a0fcd')
 
-        # API端点
-        self.GUGU_API_BASE = "https://api.gugudata.com/stock/cn/realtime"
+        # API端点 (压测时可指向本地模拟服务 scripts/mock_market_server.py)
+        self.GUGU_API_BASE = get_env_var('GUGU_API_BASE', 'https://api.gugudata.com/stock/cn/realtime')
+        # Tushare 接口地址 (为空时使用官方地址)
+        self.TUSHARE_API_URL = get_env_var('TUSHARE_API_URL', '')
         self.REQUEST_TIMEOUT = 10  # 秒
         self.API_DELAY = 0.2  # API调用间隔（秒）
 
+        # 选股结果数据库
+        self.RESULTS_DB = get_env_var('RESULTS_DB', 'results/screener_results.db')
+
+        # 行情快照归档 (离线回放用)
+        self.SNAPSHOT_ENABLED = get_env_var('SNAPSHOT_ENABLED', 'true').lower() == 'true'
+        self.SNAPSHOT_DIR = get_env_var('SNAPSHOT_DIR', 'results/snapshots')
+
+        # 本地历史行情库 (回测用)
+        self.HISTORY_DIR = get_env_var('HISTORY_DIR', 'data/history')
+        # 回测并行进程数 (0 为 CPU 核数)
+        self.BACKTEST_WORKERS = int(get_env_var('BACKTEST_WORKERS', '0'))
+        # 分布式回测任务队列 (多台机器共用时放在共享目录)
+        self.BACKTEST_BROKER_DB = get_env_var('BACKTEST_BROKER_DB', 'results/backtest_broker.db')
+
+        # 每日选股流程阶段记录 (状态与耗时)
+        self.SCHEDULE_DIR = get_env_var('SCHEDULE_DIR', 'results/schedule')
+
         # 通用筛选参数
         self.common_params = {
             'min_price': 3.0,
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+每日选股流程 (按依赖关系执行的阶段 DAG)
+1. 每个阶段声明依赖、最早开始时间与截止时间 (HH:MM)，依赖全部完成且到达开始时间后执行
+2. 耗时的准备阶段 (交易日历、基础股票池、扫描预计算、连接预热) 盘中提前完成，
+   选股时刻只执行实时扫描及其下游 (保存结果、邮件通知)
+3. 阶段失败时在截止时间前按间隔重试；截止时间仍未开始记为错过，下游阶段随之跳过
+4. 各阶段的状态与耗时写入 <SCHEDULE_DIR>/<YYYYMMDD>.json，进程重启后据此恢复，不重复执行已完成的阶段
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+MISSED = 'missed'
+SKIPPED = 'skipped'
+# 这些状态的阶段不再执行，其下游阶段跳过
+BLOCKING = (FAILED, MISSED, SKIPPED)
+
+
+def _default_root() -> str:
+    try:
+        from src.config import get_config
+        return get_config().SCHEDULE_DIR
+    except ImportError:
+        return 'results/schedule'
+
+
+class StageSkipped(Exception):
+    """阶段主动放弃 (非交易日、大盘风控、无选股结果等)，下游阶段随之跳过"""
+
+
+class Stage:
+    """流程中的一个阶段: func(context) 的返回值以阶段名存入 context 供下游使用"""
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Sequence[str] = (),
+                 start: str = '00:00', deadline: str = '23:59', retries: int = 0, retry_delay: float = 60):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.start = start
+        self.deadline = deadline
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+
+class DailyPipeline:
+    """按依赖与时间窗口推进的当日流程，反复调用 run_due() 即可"""
+
+    def __init__(self, stages: Sequence[Stage], date: Optional[str] = None, path: Optional[str] = None):
+        self.stages = list(stages)
+        seen = set()
+        for stage in self.stages:
+            if stage.name in seen:
+                raise ValueError(f"阶段重复: {stage.name}")
+            missing = [dep for dep in stage.deps if dep not in seen]
+            if missing:
+                raise ValueError(f"阶段 {stage.name} 的依赖 {missing} 未定义或排在其后")
+            seen.add(stage.name)
+
+        self.date = date or datetime.now().strftime('%Y%m%d')
+        self.path = path or os.path.join(_default_root(), f"{self.date}.json")
+        self.context: Dict[str, Any] = {}
+        self.records: Dict[str, Dict[str, Any]] = {
+            stage.name: {
+                'stage': stage.name, 'deps': list(stage.deps), 'start': stage.start, 'deadline': stage.deadline,
+                'status': PENDING, 'attempts': 0, 'started': None, 'finished': None, 'seconds': None,
+                'error': None, 'next_attempt': None,
+            }
+            for stage in self.stages
+        }
+        self._restore()
+
+    # ==================== 执行 ====================
+
+    def run_due(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        执行所有已到期且依赖满足的阶段 (同一次调用内下游可紧接上游执行)
+        now 省略时每个阶段前取当前时间；返回本次结束 (完成/失败/错过/跳过) 的阶段记录
+        """
+        finished = []
+        progressed = True
+        while progressed:
+            progressed = False
+            for stage in self.stages:
+                record = self.records[stage.name]
+                if record['status'] != PENDING:
+                    continue
+                current = now or datetime.now()
+                hhmm = current.strftime('%H:%M')
+                blocked = [dep for dep in stage.deps if self.records[dep]['status'] in BLOCKING]
+                if blocked:
+                    self._finish(stage, SKIPPED, error=f"上游阶段未完成: {', '.join(blocked)}")
+                elif hhmm > stage.deadline:
+                    self._finish(stage, MISSED, error=f"截止时间 {stage.deadline} 前未能开始")
+                elif (hhmm < stage.start
+                      or (record['next_attempt'] and current.timestamp() < record['next_attempt'])
+                      or any(self.records[dep]['status'] != DONE for dep in stage.deps)):
+                    continue
+                elif not self._run(stage):
+                    continue
+                finished.append(dict(record))
+                progressed = True
+        return finished
+
+    def _run(self, stage: Stage) -> bool:
+        """执行一次阶段，阶段结束返回 True，等待重试返回 False"""
+        record = self.records[stage.name]
+        record['attempts'] += 1
+        record['started'] = datetime.now().isoformat(timespec='seconds')
+        # 先落盘再执行: 执行中进程退出时，重启后可据此计入重试次数
+        self.save()
+        started = time.perf_counter()
+        try:
+            value = stage.func(self.context)
+        except StageSkipped as e:
+            self._finish(stage, SKIPPED, time.perf_counter() - started, str(e))
+        except Exception as e:
+            seconds = time.perf_counter() - started
+            if record['attempts'] <= stage.retries:
+                logger.warning(f"阶段 {stage.name} 失败 (第{record['attempts']}次): {e}，{stage.retry_delay:.0f}秒后重试")
+                record.update(seconds=round(seconds, 3), error=str(e),
+                              next_attempt=time.time() + stage.retry_delay)
+                self.save()
+                return False
+            logger.error(f"阶段 {stage.name} 失败: {e}")
+            self._finish(stage, FAILED, seconds, str(e))
+        else:
+            self.context[stage.name] = value
+            self._finish(stage, DONE, time.perf_counter() - started)
+        return True
+
+    def _finish(self, stage: Stage, status: str, seconds: Optional[float] = None, error: Optional[str] = None):
+        record = self.records[stage.name]
+        record.update(status=status, error=error, next_attempt=None,
+                      finished=datetime.now().isoformat(timespec='seconds'),
+                      seconds=None if seconds is None else round(seconds, 3))
+        self.save()
+
+    # ==================== 状态 ====================
+
+    @property
+    def complete(self) -> bool:
+        return all(record['status'] != PENDING for record in self.records.values())
+
+    def summary(self) -> pd.DataFrame:
+        """各阶段状态与耗时"""
+        columns = ['stage', 'status', 'start', 'deadline', 'started', 'finished', 'seconds', 'attempts', 'error']
+        return pd.DataFrame([self.records[stage.name] for stage in self.stages], columns=columns)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        payload = {
+            'date': self.date,
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'stages': [self.records[stage.name] for stage in self.stages],
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _restore(self):
+        """从当日记录恢复阶段状态 (进程重启后调用)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = {record['stage']: record for record in json.load(f).get('stages', [])}
+        except (OSError, ValueError) as e:
+            logger.warning(f"流程记录读取失败: {e}，从头执行")
+            return
+
+        for stage in self.stages:
+            record = saved.get(stage.name)
+            if record:
+                self.records[stage.name].update({key: record.get(key) for key in
+                                                 ('status', 'attempts', 'started', 'finished', 'seconds', 'error')})
+                self.records[stage.name]['attempts'] = record.get('attempts') or 0
+
+        # 执行中进程退出的阶段计入一次失败，超过重试次数不再执行
+        for stage in self.stages:
+            record = self.records[stage.name]
+            if record['status'] == PENDING and record['attempts'] > stage.retries:
+                record.update(status=FAILED, error=record['error'] or "阶段执行中进程退出")
+
+        # 已完成阶段的返回值不会保存，仍有下游待执行时需要重新执行
+        for stage in reversed(self.stages):
+            record = self.records[stage.name]
+            if record['status'] != DONE:
+                continue
+            if any(self.records[other.name]['status'] == PENDING and stage.name in other.deps
+                   for other in self.stages):
+                record.update(status=PENDING, attempts=0, finished=None, seconds=None)
+
+
+def build_daily_pipeline(strategy=None, date: Optional[str] = None, path: Optional[str] = None) -> DailyPipeline:
+    """
+    每日选股流程
+    准备: calendar → base_pool → features，warmup (14:28)
+    14:30 快刀手: quick_knife_scan → quick_knife_persist → quick_knife_notify
+    14:50 主力埋伏: market_check + features → scan → persist → notify
+    strategy 为已初始化的 MainForceBurialStrategy (常驻 worker 中复用)
+    """
+    from src import quick_knife_strategy as quick_knife
+    from src.main_force_burial_strategy import MainForceBurialStrategy, notify_results
+
+    strategy = strategy or MainForceBurialStrategy()
+    date = date or datetime.now().strftime('%Y%m%d')
+
+    def calendar(ctx):
+        if not strategy.is_trade_day(date):
+            raise StageSkipped(f"{date} 非交易日")
+        return strategy.get_latest_trade_date()
+
+    def base_pool(ctx):
+        basic_df = strategy.prepare(ctx['calendar'])
+        if basic_df.empty:
+            raise RuntimeError("基础股票池为空")
+        return basic_df
+
+    def features(ctx):
+        basic_df = ctx['base_pool']
+        stock_dict = dict(zip(basic_df['ts_code'], basic_df['close']))
+        name_dict = dict(zip(basic_df['ts_code'], basic_df['name']))
+        return {'stock_dict': stock_dict, 'name_dict': name_dict, 'plan': strategy.plan_scan(stock_dict)}
+
+    def warmup(ctx):
+        # 预热失败不影响选股，只是首批请求需要重新建立连接
+        for warm_up in (strategy.warm_up, quick_knife.warm_up):
+            try:
+                warm_up()
+            except Exception as e:
+                logger.warning(f"连接预热失败: {e}")
+
+    def quick_knife_scan(ctx):
+        stocks = quick_knife.quick_knife_screening()
+        if stocks is None or len(stocks) == 0:
+            raise StageSkipped("未找到符合条件的股票")
+        quick_knife.print_results(stocks)
+        return stocks
+
+    def quick_knife_persist(ctx):
+        return quick_knife.save_screening(ctx['quick_knife_scan'], date)
+
+    def quick_knife_notify(ctx):
+        return quick_knife.send_email_notification(ctx['quick_knife_scan'], date)
+
+    def market_check(ctx):
+        # 与实时扫描请求同一接口，同时为扫描保持连接
+        market_safe, index_value, index_change = strategy.check_market_environment()
+        if not market_safe:
+            raise StageSkipped(f"大盘环境恶劣 (涨跌 {index_change:+.2f}%)")
+        return index_value, index_change
+
+    def scan(ctx):
+        prepared = ctx['features']
+        results = strategy.get_realtime_and_filter(prepared['stock_dict'], prepared['name_dict'], prepared['plan'])
+        strategy.archive_snapshot(*ctx['market_check'])
+        if not strategy.rank_results(results):
+            raise StageSkipped("无符合条件的标的")
+        return strategy.results
+
+    def persist(ctx):
+        return strategy.save_results()
+
+    def notify(ctx):
+        notify_results(strategy, ctx['persist'], ctx['scan'])
+
+    stages = [
+        # 准备阶段的截止时间与实时扫描一致: 选股窗口内进程重启时仍可重建
+        Stage('calendar', calendar, start='09:00', deadline='14:53', retries=3, retry_delay=60),
+        Stage('base_pool', base_pool, ['calendar'], start='09:00', deadline='14:53', retries=3, retry_delay=60),
+        Stage('features', features, ['base_pool'], start='09:00', deadline='14:53'),
+        Stage('warmup', warmup, ['calendar'], start='14:28', deadline='14:53'),
+        Stage('quick_knife_scan', quick_knife_scan, ['warmup'], start='14:30', deadline='14:33'),
+        Stage('quick_knife_persist', quick_knife_persist, ['quick_knife_scan'], start='14:30', deadline='15:30'),
+        Stage('quick_knife_notify', quick_knife_notify, ['quick_knife_persist'], start='14:30', deadline='15:30'),
+        Stage('market_check', market_check, ['warmup'], start='14:50', deadline='14:53'),
+        Stage('scan', scan, ['features', 'market_check'], start='14:50', deadline='14:53'),
+        Stage('persist', persist, ['scan'], start='14:50', deadline='15:30'),
+        Stage('notify', notify, ['persist'], start='14:50', deadline='15:30'),
+    ]
+    return DailyPipeline(stages, date, path)
@@ -2,6 +2,7 @@
 """
 股票数据提供者基类
 统一管理所有数据获取逻辑，减少代码重复
+单只股票返回 Quote 记录，批量数据返回 QUOTE_DTYPE 结构化数组
 """
 
 import requests
@@ -9,7 +10,10 @@ import time
 import json
 import logging
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+
+import numpy as np
+
+from .quote_records import Quote, QUOTE_DTYPE, concat_quotes, quotes_from_gugudata
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +34,7 @@ class StockDataProvider:
         self.successful_calls = 0
         self.failed_calls = 0
 
-    def get_gugudata_stock_data(self, stock_code: str) -> Optional[Dict[str, Any]]:
+    def get_gugudata_stock_data(self, stock_code: str) -> Optional[Quote]:
         """获取单只股票的GuguData数据"""
         try:
             self.api_calls += 1
@@ -62,16 +66,13 @@ class StockDataProvider:
         self.failed_calls += 1
         return None
 
-    def get_batch_gugudata_data(self, stock_codes: List[str], batch_size: int = 30) -> List[Dict[str, Any]]:
-        """批量获取股票数据"""
-        all_data = []
+    def get_batch_gugudata_data(self, stock_codes: List[str], batch_size: int = 30) -> np.ndarray:
+        """批量获取股票数据，返回行情结构化数组"""
+        batches = []
 
         for i in range(0, len(stock_codes), batch_size):
             batch = stock_codes[i:i + batch_size]
-            batch_data = self._get_batch_data(batch)
-
-            if batch_data:
-                all_data.extend(batch_data)
+            batches.append(self._get_batch_data(batch))
 
             # 控制API调用频率
             time.sleep(self.config.API_DELAY)
@@ -80,10 +81,11 @@ class StockDataProvider:
             if (i // batch_size + 1) % 5 == 0:
                 logger.info(f"已处理 {min(i + batch_size, len(stock_codes))} / {len(stock_codes)} 只股票")
 
+        all_data = concat_quotes(batches)
         logger.info(f"批量数据获取完成: 成功 {len(all_data)} 只股票，成功率 {len(all_data)/len(stock_codes)*100:.1f}%")
         return all_data
 
-    def _get_batch_data(self, stock_codes: List[str]) -> List[Dict[str, Any]]:
+    def _get_batch_data(self, stock_codes: List[str]) -> np.ndarray:
         """获取一批股票数据"""
         try:
             self.api_calls += 1
@@ -103,8 +105,7 @@ class StockDataProvider:
                 data = response.json()
                 if data.get('DataStatus', {}).get('StatusCode') == 100:
                     self.successful_calls += 1
-                    return [self._parse_gugudata_data({'Data': [item]}, item['Symbol'])
-                           for item in data.get('Data', []) if item]
+                    return quotes_from_gugudata(data.get('Data', []))
                 else:
                     logger.warning(f"批量请求返回错误: {data.get('DataStatus', {})}")
 
@@ -112,9 +113,9 @@ class StockDataProvider:
             logger.error(f"批量获取数据失败: {e}")
 
         self.failed_calls += 1
-        return []
+        return np.zeros(0, dtype=QUOTE_DTYPE)
 
-    def _parse_gugudata_data(self, raw_data: Dict[str, Any], stock_code: str) -> Dict[str, Any]:
+    def _parse_gugudata_data(self, raw_data: Dict[str, Any], stock_code: str) -> Optional[Quote]:
         """解析GuguData返回的数据"""
         try:
             if 'Data' in raw_data and len(raw_data['Data']) > 0:
@@ -122,66 +123,23 @@ class StockDataProvider:
             else:
                 data = raw_data
 
-            # 基础数据
-            parsed_data = {
-                'code': stock_code,
-                'name': data.get('StockName', ''),
-                'price': float(data.get('Latest', 0)),
-                'open_price': float(data.get('Open', 0)),
-                'high_price': float(data.get('High', 0)),
-                'low_price': float(data.get('Low', 0)),
-                'pre_close': float(data.get('PreClose', 0)),
-                'volume': int(data.get('TradingVolume', 0)),   # 手
-                'amount': float(data.get('TradingAmount', 0)),   # 元
-                'turnover_rate': float(data.get('TurnoverRate', 0)),
-                'volume_ratio': float(data.get('QuantityRatio', 1.0)),
-                'change_percent': float(data.get('ChangePercent', 0)),
-                'change_amount': float(data.get('ChangeAmount', 0)),
-                'swing': float(data.get('Swing', 0)),
-                'is_limit_up': data.get('IsLimitUp', False),
-            }
-
-            # 计算VWAP (成交量加权平均价)
-            if parsed_data['volume'] > 0:
-                vwap = parsed_data['amount'] / (parsed_data['volume'] * 100)
-                parsed_data['vwap'] = round(vwap, 2)
-
-                # 计算乖离率
-                if vwap > 0:
-                    deviation = (parsed_data['price'] - vwap) / vwap * 100
-                    parsed_data['deviation'] = round(deviation, 2)
-                else:
-                    parsed_data['deviation'] = 0
-            else:
-                parsed_data['vwap'] = parsed_data['price']
-                parsed_data['deviation'] = 0
-
-            # 估算主力资金
-            parsed_data['main_inflow'] = parsed_data['amount'] * 0.3  # 假设主力资金占比30%
-            parsed_data['main_inflow_ratio'] = 0.3
-
-            # 估算市值
-            parsed_data['market_cap'] = self._estimate_market_cap(stock_code, parsed_data['price'])
-
-            # 基本面数据（使用默认值或基于代码的估算）
-            parsed_data.update({
-                'pe': float(data.get('PERatioDynamic', 25.0)),
-                'pb': float(data.get('PBRatio', 3.5)),
-                'roe': self._estimate_roe(stock_code),
-                'debt_ratio': self._estimate_debt_ratio(stock_code),
-                'industry': self._estimate_industry(stock_code, parsed_data['name'])
-            })
-
-            # 附加元数据
-            parsed_data['data_source'] = 'gugudata'
-            parsed_data['fetch_time'] = datetime.now().isoformat()
-
-            return parsed_data
+            quote = Quote.from_gugudata(data)
+            quote.symbol = quote.symbol or stock_code
+            return quote
 
         except Exception as e:
             logger.error(f"解析股票 {stock_code} 数据失败: {e}")
             return None
 
+    def estimate_fundamentals(self, quote: Quote) -> Dict[str, Any]:
+        """按需估算基本面数据 (不随行情记录保存)"""
+        return {
+            'market_cap': quote.market_cap if quote.market_cap > 0 else self._estimate_market_cap(quote.symbol, quote.latest),
+            'roe': self._estimate_roe(quote.symbol),
+            'debt_ratio': self._estimate_debt_ratio(quote.symbol),
+            'industry': self._estimate_industry(quote.symbol, quote.name),
+        }
+
     def _estimate_market_cap(self, stock_code: str, price: float) -> int:
         """基于股票代码和价格估算市值"""
         # 简化的市值估算算法
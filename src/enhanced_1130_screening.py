@@ -6,9 +6,8 @@
 
 import sys
 import os
-import json
 import smtplib
-from datetime import datetime, timedelta
+from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import logging
@@ -17,6 +16,8 @@ import logging
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+from src.execution_log import ExecutionLog
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -200,24 +201,10 @@ class Auto1130System:
             'system_status': 'normal' if success else 'error'
         }
 
-        log_file = os.path.join(self.results_dir, 'execution_log.json')
-
         try:
-            if os.path.exists(log_file):
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            else:
-                logs = []
-
-            logs.append(log_entry)
-
-            # 只保留最近30天的日志
-            cutoff_date = datetime.now() - timedelta(days=30)
-            logs = [log for log in logs
-                   if datetime.strptime(log['execution_time'], '%Y-%m-%d %H:%M:%S') > cutoff_date]
-
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, ensure_ascii=False, indent=2)
+            execution_log = ExecutionLog(os.path.join(self.results_dir, 'execution_logs'), retention_days=30)
+            execution_log.migrate_legacy_json(os.path.join(self.results_dir, 'execution_log.json'))
+            execution_log.append(log_entry)
 
         except Exception as e:
             logger.error(f"保存执行日志失败: {e}")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+执行日志 (按月分区的 JSONL 追加日志)
+1. 每次执行追加一行到 execution_log_YYYYMM.jsonl，不再整文件读取重写
+2. index.json 保存各分区统计和最近几条记录，状态检查只读索引
+3. 过期数据按整月分区删除文件
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+PARTITION_PREFIX = 'execution_log_'
+PARTITION_SUFFIX = '.jsonl'
+INDEX_FILE = 'index.json'
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class ExecutionLog:
+    """执行日志"""
+
+    def __init__(self, log_dir: str = 'results/execution_logs', retention_days: int = 30, tail_size: int = 20):
+        self.log_dir = log_dir
+        self.retention_days = retention_days
+        self.tail_size = tail_size
+        self.index_path = os.path.join(log_dir, INDEX_FILE)
+        os.makedirs(log_dir, exist_ok=True)
+
+    # ==================== 分区 ====================
+
+    def _partition_path(self, month: str) -> str:
+        return os.path.join(self.log_dir, f"{PARTITION_PREFIX}{month}{PARTITION_SUFFIX}")
+
+    def partitions(self) -> List[str]:
+        """已有分区月份 (YYYYMM)，按时间排序"""
+        months = []
+        for name in os.listdir(self.log_dir):
+            if name.startswith(PARTITION_PREFIX) and name.endswith(PARTITION_SUFFIX):
+                months.append(name[len(PARTITION_PREFIX):-len(PARTITION_SUFFIX)])
+        return sorted(months)
+
+    def _expired_months(self, now: Optional[datetime] = None) -> List[str]:
+        """整月都早于保留期限的分区"""
+        cutoff = ((now or datetime.now()) - timedelta(days=self.retention_days)).strftime('%Y%m')
+        return [month for month in self.partitions() if month < cutoff]
+
+    # ==================== 索引 ====================
+
+    def _empty_index(self) -> Dict[str, Any]:
+        return {'partitions': {}, 'tail': [], 'last_execution': None}
+
+    def load_index(self) -> Dict[str, Any]:
+        """读取索引 (不存在或损坏时从分区重建)"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return self.rebuild_index()
+
+    def _save_index(self, index: Dict[str, Any]):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _add_to_index(self, index: Dict[str, Any], entry: Dict[str, Any], month: str):
+        stats = index['partitions'].setdefault(month, {'count': 0, 'success': 0, 'stocks_found': 0})
+        stats['count'] += 1
+        stats['success'] += 1 if entry.get('success') else 0
+        stats['stocks_found'] += entry.get('stocks_found', 0) or 0
+
+        index['tail'] = (index['tail'] + [entry])[-self.tail_size:]
+        index['last_execution'] = entry.get('execution_time')
+
+    def rebuild_index(self) -> Dict[str, Any]:
+        """扫描全部分区重建索引"""
+        index = self._empty_index()
+        for month in self.partitions():
+            for entry in self._read_partition(month):
+                self._add_to_index(index, entry, month)
+        self._save_index(index)
+        return index
+
+    # ==================== 读写 ====================
+
+    def append(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """追加一条执行记录，并按保留期限删除过期分区"""
+        entry = dict(entry)
+        entry.setdefault('execution_time', datetime.now().strftime(TIME_FORMAT))
+        month = entry['execution_time'][:7].replace('-', '')
+
+        index = self.load_index()
+        with open(self._partition_path(month), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._add_to_index(index, entry, month)
+
+        for expired in self._expired_months():
+            os.remove(self._partition_path(expired))
+            index['partitions'].pop(expired, None)
+
+        self._save_index(index)
+        return entry
+
+    def _read_partition(self, month: str) -> Iterator[Dict[str, Any]]:
+        try:
+            with open(self._partition_path(month), 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # 跳过写入中断的残行
+        except OSError:
+            return
+
+    def iter_entries(self, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """按时间顺序遍历记录，since 格式 YYYY-MM-DD [HH:MM:SS]"""
+        since_month = since[:7].replace('-', '') if since else None
+        for month in self.partitions():
+            if since_month and month < since_month:
+                continue
+            for entry in self._read_partition(month):
+                if since and entry.get('execution_time', '') < since:
+                    continue
+                yield entry
+
+    def tail(self, n: int = 5) -> List[Dict[str, Any]]:
+        """最近 n 条记录 (只读索引)"""
+        if n > self.tail_size:
+            return list(self.iter_entries())[-n:]
+        return self.load_index()['tail'][-n:]
+
+    def stats(self) -> Dict[str, Any]:
+        """当前保留分区的汇总统计 (只读索引)"""
+        index = self.load_index()
+        total = sum(p['count'] for p in index['partitions'].values())
+        success = sum(p['success'] for p in index['partitions'].values())
+        stocks = sum(p['stocks_found'] for p in index['partitions'].values())
+        return {
+            'total_executions': total,
+            'successful_executions': success,
+            'success_rate': success / total * 100 if total > 0 else 0,
+            'avg_stocks': stocks / total if total > 0 else 0,
+            'last_execution': index.get('last_execution'),
+        }
+
+    def migrate_legacy_json(self, legacy_path: str) -> int:
+        """导入旧版 execution_log.json (整体JSON数组)，导入后重命名为 .migrated，返回导入条数"""
+        if not os.path.exists(legacy_path):
+            return 0
+
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                logs = json.load(f)
+        except (OSError, ValueError):
+            return 0
+
+        logs = sorted((log for log in logs if log.get('execution_time')), key=lambda log: log['execution_time'])
+        for log in logs:
+            month = log['execution_time'][:7].replace('-', '')
+            with open(self._partition_path(month), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(log, ensure_ascii=False) + '\n')
+
+        os.replace(legacy_path, legacy_path + '.migrated')
+        self.rebuild_index()
+        return len(logs)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+分钟线卖出规则模拟
+1. 每笔入选 (交易日、代码、买入时间、买入价) 拼接 T 日至 T+N 日的分钟线路径 (笔数, (N+1)×241)
+2. 在整块路径数组上向量化计算各卖出规则的真实收益：
+   - 定时卖出：T+k 日指定时刻 (停牌时取之前最后成交价)
+   - 止盈 / 止损 / 移动止损 (可组合)：从 start_day 开始逐分钟检查，未触发则 max_days 日收盘卖出
+   持有期 (T+k / T+max_days) 尚未进入分钟线库的笔数记为 NaN，不按最后价格视为已完成
+3. 同一根分钟线同时触发止盈和止损时按止损计 (保守)；跳空越过触发价时按该分钟开盘价成交
+入选记录可来自选股结果数据库 (picks_from_store) 或回测结果
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.minute_store import BARS_PER_DAY, MINUTE_FIELDS, MinuteBarStore, minute_index
+from src.quote_records import to_ts_codes
+
+RULE_TIME = 'time'
+RULE_BRACKET = 'bracket'
+
+OPEN, HIGH, LOW, CLOSE = (MINUTE_FIELDS.index(f) for f in ('open', 'high', 'low', 'close'))
+
+
+def time_rule(name: str, day: int, time: str) -> Dict[str, Any]:
+    """定时卖出：T+day 日 time (HHMM) 卖出"""
+    return {'name': name, 'kind': RULE_TIME, 'day': day, 'time': time.replace(':', '')}
+
+
+def bracket_rule(name: str, take_profit: Optional[float] = None, stop_loss: Optional[float] = None,
+                 trailing: Optional[float] = None, start_day: int = 1, max_days: int = 3) -> Dict[str, Any]:
+    """
+    条件卖出 (百分比)：take_profit 止盈、stop_loss 止损、trailing 自最高点回撤
+    A股 T+1 制度下默认从次日开盘开始检查 (start_day=1)，未触发则 T+max_days 日收盘卖出
+    """
+    return {'name': name, 'kind': RULE_BRACKET, 'take_profit': take_profit, 'stop_loss': stop_loss,
+            'trailing': trailing, 'start_day': start_day, 'max_days': max_days}
+
+
+# 默认规则：sell_time_analysis 的各卖出时间点 + 止盈止损
+# 午间开盘取 13:01 分钟线 (13:00 落在午休，会映射到 11:30)
+DEFAULT_RULES = [
+    time_rule('13:00', 0, '1301'),
+    time_rule('13:30', 0, '1330'),
+    time_rule('14:00', 0, '1400'),
+    time_rule('14:30', 0, '1430'),
+    time_rule('15:00', 0, '1500'),
+    time_rule('次日09:30', 1, '0930'),
+    time_rule('次日11:30', 1, '1130'),
+    time_rule('T+2日', 2, '1500'),
+    time_rule('T+3日', 3, '1500'),
+    bracket_rule('止盈+2%', take_profit=2.0),
+    bracket_rule('止损-3%', stop_loss=3.0),
+    bracket_rule('止盈+2%/止损-3%', take_profit=2.0, stop_loss=3.0),
+    bracket_rule('移动止损3%', trailing=3.0),
+]
+
+
+def sweep_rules(take_profits: Sequence[Optional[float]] = (None, 1.0, 2.0, 3.0, 5.0),
+                stop_losses: Sequence[Optional[float]] = (None, 2.0, 3.0, 5.0),
+                trailings: Sequence[Optional[float]] = (None, 2.0, 3.0),
+                max_days: int = 3) -> List[Dict[str, Any]]:
+    """止盈×止损×移动止损 全组合规则"""
+    rules = []
+    for tp in take_profits:
+        for sl in stop_losses:
+            for tr in trailings:
+                parts = [f"止盈+{tp:g}%" if tp else '', f"止损-{sl:g}%" if sl else '', f"移动{tr:g}%" if tr else '']
+                name = '/'.join(p for p in parts if p) or f"T+{max_days}收盘"
+                rules.append(bracket_rule(name, tp, sl, tr, max_days=max_days))
+    return rules
+
+
+def picks_from_store(store, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     strategy: Optional[str] = None) -> pd.DataFrame:
+    """选股结果数据库中的入选记录 -> 卖出模拟输入 (trade_date, ts_code, name, entry_time, entry_price)"""
+    rows = store.picks(start_date, end_date, strategy)
+    if not rows:
+        return pd.DataFrame(columns=['trade_date', 'ts_code', 'name', 'entry_time', 'entry_price'])
+
+    picks = pd.DataFrame(rows)
+    codes = picks['code'].astype(str)
+    bare = ~codes.str.contains('.', regex=False)
+    codes = codes.where(~bare, pd.Series(to_ts_codes(codes.str[:6].to_numpy()), index=codes.index))
+    return pd.DataFrame({
+        'trade_date': picks['trade_date'],
+        'ts_code': codes,
+        'name': picks['name'],
+        'strategy': picks['strategy'],
+        'entry_time': picks['screening_time'].str[11:16].str.replace(':', ''),
+        'entry_price': pd.to_numeric(picks['price'], errors='coerce'),
+    })
+
+
+def _first_hit(hit: np.ndarray) -> np.ndarray:
+    """每行第一个 True 的列号，没有时为列数"""
+    return np.where(hit.any(axis=1), hit.argmax(axis=1), hit.shape[1])
+
+
+class ExitResult:
+    """卖出模拟结果：returns / holding 为 笔数×规则 (收益%、持有分钟线根数)"""
+
+    def __init__(self, picks: pd.DataFrame, returns: pd.DataFrame, holding: pd.DataFrame):
+        self.picks = picks
+        self.returns = returns
+        self.holding = holding
+
+    def summary(self) -> pd.DataFrame:
+        """各规则统计 (无分钟线数据的笔数不计入)"""
+        r = self.returns
+        trades = r.notna().sum()
+        return pd.DataFrame({
+            'trades': trades,
+            'avg_return': r.mean(),
+            'median_return': r.median(),
+            'win_rate': (r > 0).sum() / trades.replace(0, np.nan) * 100,
+            'max_return': r.max(),
+            'min_return': r.min(),
+            'avg_holding_bars': self.holding.where(r.notna()).mean(),
+        })
+
+
+class ExitSimulator:
+    """分钟线卖出规则模拟器"""
+
+    def __init__(self, minutes: Optional[MinuteBarStore] = None, trading_days: Optional[Sequence[str]] = None,
+                 chunk_size: int = 2000):
+        self.minutes = minutes or MinuteBarStore()
+        self.chunk_size = chunk_size
+        # 交易日历 (用于定位 T+k)；默认使用分钟线库已有的交易日
+        self.trading_days = np.asarray(sorted(trading_days) if trading_days is not None else self.minutes.dates(),
+                                       dtype='U8')
+
+    def paths(self, picks: pd.DataFrame, days: int) -> np.ndarray:
+        """T 日至 T+days 日分钟线路径 (笔数, (days+1)×241, 5)，缺失为 NaN"""
+        out = np.full((len(picks), (days + 1) * BARS_PER_DAY, len(MINUTE_FIELDS)), np.nan, dtype=np.float32)
+        for date, group in picks.groupby('trade_date'):
+            pos = int(np.searchsorted(self.trading_days, date))
+            if pos >= len(self.trading_days) or self.trading_days[pos] != date:
+                continue
+            rows = picks.index.get_indexer(group.index)
+            for d in range(days + 1):
+                if pos + d >= len(self.trading_days):
+                    break
+                bars = self.minutes.bars(self.trading_days[pos + d], group['ts_code'])
+                out[rows, d * BARS_PER_DAY:(d + 1) * BARS_PER_DAY] = bars
+        return out
+
+    def available_days(self, picks: pd.DataFrame, days: int) -> np.ndarray:
+        """各笔 T 日至 T+days 日的分钟线是否已入库 (笔数, days+1)；停牌股票的交易日仍视为已入库"""
+        out = np.zeros((len(picks), days + 1), dtype=bool)
+        if not len(self.trading_days):
+            return out
+        stored = np.isin(self.trading_days, self.minutes.dates())
+        dates = picks['trade_date'].astype(str).to_numpy(dtype='U8')
+        pos = np.searchsorted(self.trading_days, dates)
+        listed = (pos < len(self.trading_days)) & (self.trading_days[np.minimum(pos, len(self.trading_days) - 1)] == dates)
+        offsets = pos[:, None] + np.arange(days + 1)
+        inside = listed[:, None] & (offsets < len(self.trading_days))
+        out[inside] = stored[offsets[inside]]
+        return out
+
+    def simulate(self, picks: pd.DataFrame, rules: Optional[List[Dict[str, Any]]] = None) -> ExitResult:
+        """
+        picks: trade_date (YYYYMMDD)、ts_code、entry_time (HHMM)，可选 entry_price (缺省为买入分钟收盘价)
+        返回每笔在每条规则下的收益
+        """
+        rules = rules or DEFAULT_RULES
+        picks = picks.reset_index(drop=True)
+        days = max(r['day'] if r['kind'] == RULE_TIME else r['max_days'] for r in rules)
+
+        # 分块处理，路径数组大小受 chunk_size 限制
+        returns, holding = [], []
+        for lo in range(0, len(picks), self.chunk_size):
+            chunk_returns, chunk_holding = self._simulate_chunk(picks.iloc[lo:lo + self.chunk_size], rules, days)
+            returns.append(chunk_returns)
+            holding.append(chunk_holding)
+
+        names = [rule['name'] for rule in rules]
+        shape = (0, len(rules))
+        return ExitResult(picks,
+                          pd.DataFrame(np.vstack(returns) if returns else np.empty(shape), columns=names),
+                          pd.DataFrame(np.vstack(holding) if holding else np.empty(shape), columns=names))
+
+    def _simulate_chunk(self, picks: pd.DataFrame, rules: List[Dict[str, Any]], days: int):
+        path = self.paths(picks, days).astype(np.float64)
+        n, length = path.shape[:2]
+        bar = np.arange(length)
+
+        # 收盘价向前填充 (停牌/无成交分钟取之前最后价格)，不填充到尚未入库的交易日
+        close = path[:, :, CLOSE]
+        last = np.maximum.accumulate(np.where(np.isfinite(close), bar, 0), axis=1)
+        available = self.available_days(picks, days)
+        close_ff = np.where(np.repeat(available, BARS_PER_DAY, axis=1), close[np.arange(n)[:, None], last], np.nan)
+
+        entry_idx = np.array([minute_index(t) for t in picks['entry_time'].astype(str)], dtype=int)
+        entry = close_ff[np.arange(n), entry_idx]
+        if 'entry_price' in picks.columns:
+            given = picks['entry_price'].to_numpy(dtype=np.float64)
+            entry = np.where(given > 0, given, entry)
+
+        after_entry = bar[None, :] > entry_idx[:, None]
+        high = np.where(after_entry, path[:, :, HIGH], np.nan)
+        low = np.where(after_entry, path[:, :, LOW], np.nan)
+        opens = path[:, :, OPEN]
+        # 开盘价缺失时按触发价成交
+        opens = np.where(np.isfinite(opens), opens, close_ff)
+
+        # 移动止损参考最高价：买入价与此前各分钟最高价 (不含当前分钟)
+        peak = np.fmax.accumulate(np.where(after_entry, high, entry[:, None]), axis=1)
+        prev_peak = np.concatenate([entry[:, None], peak[:, :-1]], axis=1)
+
+        returns = np.full((n, len(rules)), np.nan)
+        holding = np.full((n, len(rules)), np.nan)
+        rows = np.arange(n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for j, rule in enumerate(rules):
+                if rule['kind'] == RULE_TIME:
+                    idx = rule['day'] * BARS_PER_DAY + minute_index(rule['time'])
+                    price = np.where(idx > entry_idx, close_ff[:, idx], np.nan)
+                    returns[:, j] = (price / entry - 1) * 100
+                    holding[:, j] = idx - entry_idx
+                    returns[~available[:, rule['day']], j] = np.nan
+                    continue
+
+                start = rule['start_day'] * BARS_PER_DAY
+                end = (rule['max_days'] + 1) * BARS_PER_DAY
+                window = (bar >= start) & (bar < end)
+                exit_idx = np.full(n, end - 1)
+                price = close_ff[:, end - 1].copy()
+
+                # 按优先级从低到高覆盖：同一分钟触发时止损优先
+                triggers = []
+                if rule['take_profit']:
+                    target = entry[:, None] * (1 + rule['take_profit'] / 100)
+                    triggers.append((high >= target, np.maximum(opens, target)))
+                if rule['trailing']:
+                    level = prev_peak * (1 - rule['trailing'] / 100)
+                    triggers.append((low <= level, np.minimum(opens, level)))
+                if rule['stop_loss']:
+                    stop = entry[:, None] * (1 - rule['stop_loss'] / 100)
+                    triggers.append((low <= stop, np.minimum(opens, np.broadcast_to(stop, opens.shape))))
+
+                first = np.full(n, length)
+                fills = np.full(n, np.nan)
+                for hit, fill in triggers:
+                    idx = _first_hit(hit & window)
+                    fill = np.broadcast_to(fill, hit.shape)[rows, np.minimum(idx, length - 1)]
+                    better = idx <= first
+                    first = np.where(better, idx, first)
+                    fills = np.where(better, fill, fills)
+
+                triggered = first < end
+                exit_idx = np.where(triggered, first, exit_idx)
+                price = np.where(triggered, fills, price)
+                returns[:, j] = (price / entry - 1) * 100
+                holding[:, j] = exit_idx - entry_idx
+                # 持有期未完整入库：未触发的笔数无法确定卖出价，已触发的笔数也不计入以免只统计提前离场的交易
+                returns[~available[:, rule['max_days']], j] = np.nan
+
+        # 买入价或分钟线缺失的笔数不计入
+        missing = ~np.isfinite(entry) | ~np.isfinite(close).any(axis=1)
+        returns[missing] = np.nan
+        return returns, holding
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+本地日线历史库 (回测用)
+1. 交易日×股票 的面板按字段保存为 .npy (float32，缺失为 NaN)，读取时内存映射
+   目录结构: <root>/daily/dates.npy, symbols.npy, names.npy, <字段>.npy, index_<字段>.npy, manifest.json
+   revisions.npy 记录每个交易日最后一次被导入时的版本号，回测缓存据此只让变动的交易日失效
+2. 支持从 Tushare (daily + daily_basic + index_daily) 增量同步，或从本地CSV导入
+3. 单位与实时行情一致：volume 为手，amount 为元，circ_mv 为万元 (Tushare 口径)
+注意：股票名称只保存最新值，历史上的 ST 状态变化无法还原
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+DAILY_FIELDS = ('open', 'high', 'low', 'close', 'pre_close', 'volume', 'amount', 'turnover_rate', 'circ_mv')
+INDEX_FIELDS = ('close', 'pre_close')
+INDEX_CODE = '000001.SH'
+MANIFEST_FILE = 'manifest.json'
+
+# CSV/Tushare 列名别名
+COLUMN_ALIASES = {'vol': 'volume', 'date': 'trade_date', 'code': 'ts_code', 'symbol': 'ts_code'}
+
+
+def _default_root() -> str:
+    try:
+        from src.config import get_config
+        return get_config().HISTORY_DIR
+    except ImportError:
+        return 'data/history'
+
+
+class DailyHistoryStore:
+    """日线历史面板"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or _default_root()
+        self.path = os.path.join(self.root, 'daily')
+        self._cache: Dict[str, np.ndarray] = {}
+        self.manifest = self._load_manifest()
+
+    # ==================== 读取 ====================
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'version': 0, 'index_code': INDEX_CODE}
+
+    @property
+    def version(self) -> int:
+        """数据版本 (每次导入加1，用于回测缓存失效)"""
+        return self.manifest.get('version', 0)
+
+    def _array(self, name: str) -> np.ndarray:
+        if name not in self._cache:
+            path = os.path.join(self.path, f"{name}.npy")
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"历史数据不存在: {path} (请先同步或导入日线数据)")
+            # 字符串数组直接读入，数值面板内存映射
+            self._cache[name] = np.load(path, mmap_mode=None if name in ('dates', 'symbols', 'names') else 'r')
+        return self._cache[name]
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._array('dates')
+
+    @property
+    def symbols(self) -> np.ndarray:
+        return self._array('symbols')
+
+    @property
+    def names(self) -> np.ndarray:
+        return self._array('names')
+
+    @property
+    def revisions(self) -> np.ndarray:
+        """各交易日的数据版本 (旧版历史库没有该文件时全部为0)"""
+        if 'revisions' not in self._cache:
+            path = os.path.join(self.path, 'revisions.npy')
+            self._cache['revisions'] = np.load(path) if os.path.exists(path) else np.zeros(len(self.dates), dtype=np.int64)
+        return self._cache['revisions']
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, 'dates.npy'))
+
+    def field(self, name: str) -> np.ndarray:
+        """日线字段面板 (交易日×股票，只读内存映射)"""
+        return self._array(name)
+
+    def index_field(self, name: str) -> np.ndarray:
+        """指数字段 (按交易日)"""
+        return self._array(f"index_{name}")
+
+    def date_range(self, start: Optional[str] = None, end: Optional[str] = None) -> slice:
+        """日期区间 (YYYYMMDD，含两端) 对应的行切片"""
+        dates = self.dates
+        lo = 0 if start is None else int(np.searchsorted(dates, start.replace('-', ''), side='left'))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, end.replace('-', ''), side='right'))
+        return slice(lo, hi)
+
+    def column_index(self, ts_codes: Iterable[str]) -> np.ndarray:
+        """股票代码对应的列号 (不存在为 -1)"""
+        codes = np.asarray(ts_codes if isinstance(ts_codes, np.ndarray) else list(ts_codes), dtype=self.symbols.dtype)
+        pos = np.searchsorted(self.symbols, codes)
+        pos = np.minimum(pos, len(self.symbols) - 1)
+        return np.where(self.symbols[pos] == codes, pos, -1)
+
+    # ==================== 写入 ====================
+
+    def ingest(self, daily: pd.DataFrame, index: Optional[pd.DataFrame] = None,
+               names: Optional[Mapping[str, str]] = None) -> int:
+        """
+        合并导入日线数据 (长表: trade_date, ts_code, 各字段)，已有的 交易日×股票 会被覆盖
+        index: 指数日线 (trade_date, close, pre_close)；names: 代码 -> 最新名称
+        返回导入的行数
+        """
+        daily = daily.rename(columns=COLUMN_ALIASES)
+        daily = daily.assign(trade_date=daily['trade_date'].astype(str).str.replace('-', ''),
+                             ts_code=daily['ts_code'].astype(str))
+
+        old_dates = self.dates if self.exists() else np.array([], dtype='U8')
+        old_symbols = self.symbols if self.exists() else np.array([], dtype='U9')
+        index_dates = np.array([], dtype='U8') if index is None else index['trade_date'].astype(str).str.replace('-', '')
+        dates = np.union1d(np.union1d(old_dates, daily['trade_date'].unique()), index_dates).astype('U8')
+        symbols = np.union1d(old_symbols, daily['ts_code'].unique()).astype('U9')
+
+        old_rows = np.searchsorted(dates, old_dates)
+        old_cols = np.searchsorted(symbols, old_symbols)
+        rows = np.searchsorted(dates, daily['trade_date'].to_numpy(dtype='U8'))
+        cols = np.searchsorted(symbols, daily['ts_code'].to_numpy(dtype='U9'))
+
+        tmp_path = self.path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        for name in DAILY_FIELDS:
+            panel = np.full((len(dates), len(symbols)), np.nan, dtype=np.float32)
+            if len(old_dates):
+                panel[np.ix_(old_rows, old_cols)] = self.field(name)
+            if name in daily.columns:
+                panel[rows, cols] = pd.to_numeric(daily[name], errors='coerce').to_numpy(dtype=np.float32)
+            np.save(os.path.join(tmp_path, f"{name}.npy"), panel)
+            del panel
+
+        for name in INDEX_FIELDS:
+            values = np.full(len(dates), np.nan)
+            if len(old_dates) and os.path.exists(os.path.join(self.path, f"index_{name}.npy")):
+                values[old_rows] = self.index_field(name)
+            if index is not None and name in index.columns:
+                values[np.searchsorted(dates, index_dates.to_numpy(dtype='U8'))] = index[name].to_numpy(dtype=np.float64)
+            np.save(os.path.join(tmp_path, f"index_{name}.npy"), values)
+
+        revisions = np.zeros(len(dates), dtype=np.int64)
+        if len(old_dates):
+            revisions[old_rows] = self.revisions
+        revisions[np.unique(rows)] = self.version + 1
+        if index is not None:
+            revisions[np.searchsorted(dates, index_dates.to_numpy(dtype='U8'))] = self.version + 1
+        np.save(os.path.join(tmp_path, 'revisions.npy'), revisions)
+
+        all_names = dict(zip(old_symbols, self.names)) if len(old_symbols) else {}
+        all_names.update(names or {})
+        np.save(os.path.join(tmp_path, 'names.npy'), np.array([all_names.get(s, '') for s in symbols], dtype='U16'))
+        np.save(os.path.join(tmp_path, 'dates.npy'), dates)
+        np.save(os.path.join(tmp_path, 'symbols.npy'), symbols)
+
+        manifest = {
+            **self.manifest,
+            'version': self.version + 1,
+            'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'days': int(len(dates)),
+            'symbols': int(len(symbols)),
+            'first_date': str(dates[0]) if len(dates) else None,
+            'last_date': str(dates[-1]) if len(dates) else None,
+        }
+        with open(os.path.join(tmp_path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        # 释放旧的内存映射后替换目录
+        self._cache.clear()
+        old_path = self.path + '.old'
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.replace(self.path, old_path)
+        os.replace(tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        self.manifest = manifest
+        return len(daily)
+
+    def ingest_csv(self, path: str, index_path: Optional[str] = None) -> int:
+        """
+        从CSV导入 (列: trade_date, ts_code, open, high, low, close, pre_close, vol/volume, amount...)
+        amount 需为元；name 列存在时作为股票名称
+        """
+        daily = pd.read_csv(path, dtype={'ts_code': str, 'trade_date': str, 'code': str, 'date': str})
+        daily = daily.rename(columns=COLUMN_ALIASES)
+        names = dict(zip(daily['ts_code'], daily['name'])) if 'name' in daily.columns else None
+        index = pd.read_csv(index_path, dtype={'trade_date': str}) if index_path else None
+        return self.ingest(daily, index, names)
+
+    def ingest_tushare(self, pro, start: str, end: str, batch_days: int = 60) -> int:
+        """从 Tushare 增量同步 [start, end] 的日线 (已存在的交易日跳过)，返回同步的交易日数"""
+        calendar = pro.trade_cal(exchange='SSE', start_date=start, end_date=end, is_open='1')
+        existing = set(self.dates) if self.exists() else set()
+        trade_dates = sorted(d for d in calendar['cal_date'].astype(str) if d not in existing)
+        if not trade_dates:
+            return 0
+
+        names = pro.stock_basic(exchange='', list_status='L', fields='ts_code,name')
+        name_map = dict(zip(names['ts_code'], names['name']))
+
+        synced = 0
+        for i in range(0, len(trade_dates), batch_days):
+            batch = trade_dates[i:i + batch_days]
+            frames = []
+            for trade_date in batch:
+                daily = pro.daily(trade_date=trade_date)
+                basic = pro.daily_basic(trade_date=trade_date, fields='ts_code,turnover_rate,circ_mv')
+                frame = daily.merge(basic, on='ts_code', how='left')
+                frame['amount'] = frame['amount'] * 1000  # 千元 -> 元
+                frames.append(frame)
+                print(f"  同步 {trade_date}: {len(frame)} 只")
+
+            index = pro.index_daily(ts_code=INDEX_CODE, start_date=batch[0], end_date=batch[-1])
+            self.ingest(pd.concat(frames, ignore_index=True), index[['trade_date', 'close', 'pre_close']], name_map)
+            synced += len(batch)
+        return synced
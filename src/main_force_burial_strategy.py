@@ -9,7 +9,7 @@ A股尾盘主力埋伏策略 (Tushare + GuguData 融合版)
 
 import sys
 import os
-import json
+import numpy as np
 import pandas as pd
 import requests
 import datetime
@@ -21,6 +21,14 @@ from datetime import timedelta
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
 
+from src.result_schema import conform_results, to_email_frame
+from src.quote_records import concat_quotes, quotes_from_gugudata, to_ts_codes
+from src.snapshot_archive import SnapshotArchive, snapshots_enabled
+from src.burial_signals import (COMPONENT_NAMES, MIN_TOTAL_SCORE, burial_features, burial_mask, params_from,
+                                score_components, total_score, turnover_bounds)
+from src.results_store import STRATEGY_MAIN_FORCE, get_results_store
+from src.result_codec import load_result, save_result
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -35,6 +43,8 @@ try:
     config = get_config()
     TUSHARE_TOKEN = config.TUSHARE_TOKEN
     GUGU_APPKEY = config.GUGU_APPKEY
+    GUGU_API_BASE = config.GUGU_API_BASE
+    TUSHARE_API_URL = config.TUSHARE_API_URL
 
     # 从配置获取策略参数 - 收紧版本v4.0
     params = config.get_strategy_params('main_force_burial')
@@ -66,6 +76,8 @@ except ImportError:
     # 兼容单独运行的回退方案
     TUSHARE_TOKEN = 'fb8b11e0099681fc2e706351fa6ff0bb593053d1c9681800a72a0fcd'
     GUGU_APPKEY = 'SQSM4ASGQT6UN363PWA9M6256764WYBS'
+    GUGU_API_BASE = os.getenv('GUGU_API_BASE', 'https://api.gugudata.com/stock/cn/realtime')
+    TUSHARE_API_URL = os.getenv('TUSHARE_API_URL', '')
     MIN_MV = 300000
     MAX_MV = 5000000     # 优化：500亿
     MIN_PCT = 1.5        # 优化：1.5%
@@ -88,6 +100,14 @@ class MainForceBurialStrategy:
         self.timeframe = "14:50"
         self.strategy_description = "尾盘主力埋伏策略 v4.1 (优化评分版)"
         self.results = []
+        self.last_snapshot = None
+        self.snapshot_archive = SnapshotArchive()
+        # 复用 HTTP 连接 (常驻 worker 中跨多次运行保持连接)
+        self.session = requests.Session()
+        # 预加载的基础股票池 (当日日期, 基准交易日, DataFrame)，见 prepare()
+        self.basic_pool = None
+        # 进度回调 callback(进度0-1, 说明)，后台任务用于显示实时进度
+        self.progress_callback = None
 
         # 设置参数到实例属性（保持宽松的筛选条件）
         self.MIN_MV = MIN_MV
@@ -121,19 +141,31 @@ class MainForceBurialStrategy:
             import tushare as ts
             ts.set_token(TUSHARE_TOKEN)
             self.pro = ts.pro_api()
+            if TUSHARE_API_URL:
+                # Tushare 客户端没有公开的地址参数，只能改写其内部属性
+                self.pro._DataApi__http_url = TUSHARE_API_URL
             logger.info("✅ Tushare 初始化成功")
         except ImportError:
             logger.warning("⚠️ Tushare 未安装，将使用模拟数据")
         except Exception as e:
             logger.warning(f"⚠️ Tushare 初始化失败: {e}，将使用模拟数据")
 
+    def report_progress(self, progress, message):
+        """报告执行进度 (回调异常不影响选股)"""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(progress, message)
+        except Exception as e:
+            logger.warning(f"进度回调失败: {e}")
+
     def check_market_environment(self):
         """
         【风控层】使用 GuguData 检查上证指数实时情况
         优先使用gugudata实时数据
         """
         print(">>> 正在检查大盘环境...")
-        url = "https://api.gugudata.com/stock/cn/realtime"
+        url = GUGU_API_BASE
 
         # 尝试多个指数代码以确保获取到数据
         index_codes = ['000001', '999999']  # 上证指数, 沪深300指数
@@ -141,7 +173,7 @@ class MainForceBurialStrategy:
         for index_code in index_codes:
             try:
                 params = {'appkey': GUGU_APPKEY, 'symbol': index_code}
-                res = requests.get(url, params=params, timeout=8).json()
+                res = self.session.get(url, params=params, timeout=8).json()
 
                 if res.get('DataStatus', {}).get('StatusCode') == 100 and res.get('Data'):
                     data = res['Data'][0]
@@ -307,6 +339,51 @@ class MainForceBurialStrategy:
         min_rate, max_rate = self.get_turnover_rate_range(estimated_mv)
         return min_rate <= turnover_rate <= max_rate
 
+    def prepare(self, last_date=None):
+        """选股窗口前预加载当日基础股票池 (last_date 为基准交易日，默认最近交易日)"""
+        today = datetime.datetime.now().strftime('%Y%m%d')
+        last_date = last_date or self.get_latest_trade_date()
+        basic_df = self.get_basic_pool_with_tushare(last_date)
+        # 模拟基础池说明 Tushare 暂不可用，不缓存，选股时重新获取
+        if self.pro and not basic_df.empty:
+            self.basic_pool = (today, last_date, basic_df)
+        return basic_df
+
+    def plan_scan(self, stock_dict):
+        """预计算实时扫描的静态部分 (代码映射、代码数组、筛选参数)，可在选股窗口前完成"""
+        # 映射 Tushare代码 到 Gugu代码 (000001.SZ -> 000001)
+        code_map = {code[:6]: code for code in stock_dict}
+        return {
+            'code_map': code_map,
+            'codes': list(code_map),
+            'symbols': np.array(list(code_map)),
+            'params': params_from(self),
+        }
+
+    def load_basic_pool(self):
+        """获取基础股票池 (优先使用 prepare() 预加载的当日结果)"""
+        today = datetime.datetime.now().strftime('%Y%m%d')
+        if self.basic_pool and self.basic_pool[0] == today:
+            print(f">>> 使用预加载的基础股票池 (基准日期: {self.basic_pool[1]}, {len(self.basic_pool[2])} 只)")
+            return self.basic_pool[2]
+        return self.get_basic_pool_with_tushare(self.get_latest_trade_date())
+
+    def is_trade_day(self, date_str):
+        """date_str (YYYYMMDD) 是否为交易日 (Tushare 不可用时按工作日判断)"""
+        if self.pro:
+            try:
+                cal = self.pro.trade_cal(exchange='', start_date=date_str, end_date=date_str)
+                if not cal.empty:
+                    return int(cal.iloc[0]['is_open']) == 1
+            except Exception as e:
+                logger.warning(f"交易日历获取失败: {e}，按工作日判断")
+        return datetime.datetime.strptime(date_str, '%Y%m%d').weekday() < 5
+
+    def warm_up(self):
+        """预热行情接口连接 (建立并保持 HTTP 连接，选股时免去握手)"""
+        params = {'appkey': GUGU_APPKEY, 'symbol': '000001'}
+        self.session.get(GUGU_API_BASE, params=params, timeout=8).raise_for_status()
+
     def get_latest_trade_date(self):
         """获取最近的一个交易日(昨日), 用于提取基础数据"""
         today = datetime.datetime.now().strftime('%Y%m%d')
@@ -326,25 +403,26 @@ class MainForceBurialStrategy:
         except:
             return today
 
-    def get_realtime_and_filter(self, stock_dict, name_dict):
+    def get_realtime_and_filter(self, stock_dict, name_dict, plan=None):
         """
         【决策层】使用 GuguData 批量获取实时行情并筛选
         优化：完全依赖gugudata实时数据，增加重试机制
+        plan: plan_scan() 的预计算结果，省略时现场计算
         """
         ts_codes = list(stock_dict.keys())
         print(f">>> 正在扫描 {len(ts_codes)} 只股票的实时状态 (请稍候)...")
 
-        # 映射 Tushare代码 到 Gugu代码 (000001.SZ -> 000001)
-        code_map = {code[:6]: code for code in ts_codes}
-        gugu_codes = list(code_map.keys())
+        plan = plan or self.plan_scan(stock_dict)
+        code_map = plan['code_map']
+        gugu_codes = plan['codes']
 
-        candidates = []
+        quote_batches = []
         successful_batches = 0
         failed_batches = 0
 
         # 优化分批请求，每批40个以提高稳定性
         BATCH_SIZE = 40
-        url = "https://api.gugudata.com/stock/cn/realtime"
+        url = GUGU_API_BASE
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'application/json'
@@ -360,7 +438,7 @@ class MainForceBurialStrategy:
             # 重试机制：最多重试3次
             for retry in range(3):
                 try:
-                    res = requests.get(url, params=params, headers=headers, timeout=10).json()
+                    res = self.session.get(url, params=params, headers=headers, timeout=10).json()
 
                     # 检查响应状态
                     status_code = res.get('DataStatus', {}).get('StatusCode')
@@ -384,154 +462,9 @@ class MainForceBurialStrategy:
                             failed_batches += 1
                             break
 
-                    # 成功获取数据，处理股票信息
-                    batch_processed = 0
-                    for item in res['Data']:
-                        raw_code = item['Symbol']
-                        ts_code = code_map.get(raw_code)
-                        if not ts_code:
-                            continue
-
-                        # --- 优先使用gugudata实时数据 ---
-
-                        # 基础价格数据 (完全依赖gugudata)
-                        current = item.get('Latest', 0)
-                        open_px = item.get('Open', 0)
-                        high = item.get('High', 0)
-                        low = item.get('Low', 0)
-                        pre_close = item.get('LastClose', 0)
-
-                        # 成交量和金额数据 (gugudata)
-                        vol = item.get('TradingVolume', 0)   # 手
-                        amt = item.get('TradingAmount', 0)   # 元
-                        turnover_rate = item.get('TurnoverRate', 0)  # 换手率
-
-                        # 涨跌幅 (优先使用接口直接数据)
-                        change_pct = item.get('ChangePercent', 0)  # 修复字段名
-                        if change_pct != 0:
-                            pct_chg = change_pct
-                        else:
-                            # 接口没有提供涨跌幅时，使用价格计算
-                            if pre_close > 0:
-                                pct_chg = (current - pre_close) / pre_close * 100
-                            else:
-                                pct_chg = 0
-
-                        # 基础数据校验 (严格使用gugudata数据)
-                        if current == 0 or vol == 0:
-                            continue
-
-                        # --- 快速预筛选 (策略参数前置过滤) ---
-
-                        # 1. 涨幅预筛选 - 严格使用gugudata涨幅数据
-                        if not (MIN_PCT < pct_chg < MAX_PCT):
-                            continue  # 涨幅不符合，跳过后续计算
-
-                        # 2. 活跃度预筛选 - 换手率区间标准
-                        # 先估算市值，再根据市值确定换手率区间
-                        if turnover_rate > 0:
-                            amount_wan = amt / 10000  # 将元转换为万元
-                            estimated_mv = amount_wan * 10000 / (turnover_rate / 100)
-                            turnover_ok = self.check_turnover_rate_in_range(estimated_mv, turnover_rate)
-                            turnover_min, turnover_max = self.get_turnover_rate_range(estimated_mv)
-                        else:
-                            amount_wan = amt / 10000  # 仍然需要定义这个变量
-                            estimated_mv = 0
-                            turnover_ok = False
-                            turnover_min, turnover_max = (0, 0)
-
-                        if not turnover_ok:
-                            continue  # 换手率不在区间范围内
-
-                        # 3. VWAP计算 (基于gugudata成交数据)
-                        # 注意：amt是元，vol是手(100股)
-                        vwap = amt / (vol * 100) if vol > 0 else current
-                        if vwap <= 0:
-                            continue
-
-                        # 4. 乖离率计算 (基于gugudata数据)
-                        deviation = (current - vwap) / vwap * 100 if vwap > 0 else 0
-
-                        # --- 主力埋伏核心筛选逻辑 ---
-
-                        # [核心Filter 1] 乖离率控制 (防止急拉骗线)
-                        if deviation > MAX_DEVIATION:
-                            continue
-
-                        # [核心Filter 2] 趋势强势 (必须在均价线上方)
-                        if current < vwap:
-                            continue
-
-                        # [核心Filter 3] 真阳线形态 (现价 > 开盘价)
-                        if current < open_px:
-                            continue
-
-                        # [核心Filter 4] 接近最高价 (99.5%，显示抛压小)
-                        if current < high * 0.995:
-                            continue
-
-                        # [核心Filter 5] 成交活跃度确认 (基于gugudata成交额，收紧标准)
-                        amount_wan = amt / 10000
-                        amount_yi = amount_wan / 100000  # 转为亿元
-                        if amount_wan < (self.MIN_AMOUNT / 10000):  # 使用配置的成交额门槛 (收紧：3亿)
-                            continue
-
-                        # [核心Filter 6] 市值过滤 (基于gugudata数据估算，收紧标准)
-                        # 流通市值 = 当前价 * 流通股数 (这里用成交额/换手率估算)
-                        if turnover_rate > 0:
-                            estimated_mv = amount_wan * 10000 / (turnover_rate / 100)
-                            if estimated_mv < self.MIN_MV * 10000 or estimated_mv > self.MAX_MV * 10000:
-                                continue
-
-                        # 计算额外指标
-                        price_position = (current - low) / (high - low) if high != low else 0.5
-                        amplitude = (high - low) / low * 100
-
-                        # 计算优化后的评分
-                        score_data = self._calculate_optimized_score(
-                            deviation, pct_chg, turnover_rate, amount_yi, price_position, amplitude
-                        )
-
-                        # 基础评分门槛（降低到60分）
-                        if score_data['total_score'] < 60:
-                            continue
-
-                        # 通过所有筛选，添加到候选列表
-                        candidates.append({
-                            'code': ts_code,
-                            'name': name_dict.get(ts_code, f'股票{raw_code}'),
-                            'price': current,
-                            'change': round(pct_chg, 2),
-                            'vwap': round(vwap, 2),
-                            'deviation': round(deviation, 2),
-                            'high': high,
-                            'low': low,
-                            'open': open_px,
-                            'pre_close': pre_close,
-                            'volume': vol,
-                            'amount': amt,
-                            'turnover_rate': turnover_rate,
-                            'amount_wan': round(amount_wan, 2),
-                            'amount_yi': amount_yi,
-                            'estimated_mv': round(estimated_mv / 10000, 2),  # 亿元
-                            'turnover_range': f"{turnover_min:.1f}%-{turnover_max:.1f}%",
-                            'price_position': price_position,
-                            'amplitude': amplitude,
-                            'total_score': score_data['total_score'],
-                            'deviation_score': score_data['deviation_score'],
-                            'change_score': score_data['change_score'],
-                            'turnover_score': score_data['turnover_score'],
-                            'amount_score': score_data['amount_score'],
-                            'position_score': score_data['position_score'],
-                            'amplitude_score': score_data['amplitude_score'],
-                            'data_source': 'gugudata'
-                        })
-
-                        batch_processed += 1
-
+                    # 成功获取数据，解析为行情结构化数组，全部批次完成后统一筛选
+                    quote_batches.append(quotes_from_gugudata(res['Data']))
                     successful_batches += 1
-                    if batch_processed > 0:
-                        logger.info(f"批次 {i//BATCH_SIZE + 1} 成功处理 {batch_processed} 只股票")
                     break  # 成功处理，跳出重试循环
 
                 except requests.exceptions.Timeout:
@@ -550,41 +483,165 @@ class MainForceBurialStrategy:
                         failed_batches += 1
                     break
 
+            batch_no = i // BATCH_SIZE + 1
+            batch_total = (len(gugu_codes) + BATCH_SIZE - 1) // BATCH_SIZE
+            self.report_progress(0.2 + 0.7 * batch_no / batch_total,
+                                 f"实时扫描 {batch_no}/{batch_total} 批 ({min(i + BATCH_SIZE, len(gugu_codes))}/{len(gugu_codes)} 只)")
+
             # 批次间短暂休息，避免请求过于频繁
             time.sleep(0.1)
 
+        # 保留本次行情快照，供后续分析复用
+        self.last_snapshot = concat_quotes(quote_batches)
+        candidates = self.filter_quotes(self.last_snapshot, code_map, name_dict, plan)
+
         print(f"✅ 实时筛选完成，成功处理 {successful_batches}/{(len(gugu_codes) + BATCH_SIZE - 1)//BATCH_SIZE} 个批次")
         print(f"✅ 从 {len(ts_codes)} 只股票中筛选出 {len(candidates)} 只候选股票")
         if failed_batches > 0:
             logger.warning(f"⚠️ 有 {failed_batches} 个批次处理失败")
 
-        return pd.DataFrame(candidates)
+        return candidates
 
-    def execute_strategy(self):
-        """执行主力埋伏策略"""
+    def filter_quotes(self, quotes, code_map, name_dict, plan=None):
+        """
+        对行情结构化数组执行主力埋伏筛选 (按列向量化计算)
+        code_map: Gugu代码 -> Tushare代码，只保留基础池内的股票
+        plan: plan_scan() 的预计算结果 (代码数组与筛选参数)
+        """
+        symbols = plan['symbols'] if plan else list(code_map)
+        quotes = quotes[np.isin(quotes['symbol'], symbols)]
+        if len(quotes) == 0:
+            return conform_results(pd.DataFrame())
+
+        features = burial_features(quotes['latest'], quotes['open'], quotes['high'], quotes['low'],
+                                   quotes['pre_close'], quotes['volume'], quotes['amount'],
+                                   quotes['turnover_rate'], quotes['change_pct'])
+        params = plan['params'] if plan else params_from(self)
+        mask = burial_mask(features, params)
+        turnover_min, turnover_max = turnover_bounds(features['estimated_mv'], params)
+
+        # 评分只对通过筛选的少量股票计算
+        idx = np.flatnonzero(mask)
+        passed = {name: values[idx] for name, values in features.items()}
+        components = score_components(passed)
+        totals = total_score(components, self.scoring_weights)
+
+        candidates = []
+        for i, row in enumerate(idx):
+            # 基础评分门槛（降低到60分）
+            if totals[i] < MIN_TOTAL_SCORE:
+                continue
+
+            raw_code = quotes['symbol'][row]
+            ts_code = code_map[raw_code]
+            candidates.append({
+                'code': ts_code,
+                'name': name_dict.get(ts_code, f'股票{raw_code}'),
+                'price': passed['latest'][i],
+                'change': round(passed['pct_chg'][i], 2),
+                'vwap': round(passed['vwap'][i], 2),
+                'deviation': round(passed['deviation'][i], 2),
+                'high': passed['high'][i],
+                'low': passed['low'][i],
+                'open': passed['open'][i],
+                'pre_close': passed['pre_close'][i],
+                'volume': passed['volume'][i],
+                'amount': passed['amount'][i],
+                'turnover_rate': passed['turnover_rate'][i],
+                'volume_ratio': quotes['volume_ratio'][row],
+                'amount_wan': round(passed['amount_wan'][i], 2),
+                'amount_yi': passed['amount_yi'][i],
+                'estimated_mv': round(passed['estimated_mv'][i] / 10000, 2),  # 亿元
+                'market_cap_yi': passed['estimated_mv'][i] / 100000000,
+                'turnover_range': f"{turnover_min[row]:.1f}%-{turnover_max[row]:.1f}%",
+                'price_position': passed['price_position'][i],
+                'amplitude': passed['amplitude'][i],
+                'total_score': totals[i],
+                **dict(zip(COMPONENT_NAMES, components[i])),
+                'data_source': quotes['source'][row]
+            })
+
+        return conform_results(pd.DataFrame(candidates))
+
+    def archive_snapshot(self, index_value, index_change):
+        """归档本次实时行情快照 (含大盘数据)，供离线回放"""
+        if self.last_snapshot is None or not len(self.last_snapshot) or not snapshots_enabled():
+            return None
+        try:
+            path = self.snapshot_archive.save(self.last_snapshot, STRATEGY_MAIN_FORCE, meta={
+                'index_value': float(index_value or 0),
+                'index_change': float(index_change or 0),
+            })
+            logger.info(f"行情快照已归档: {path}")
+            return path
+        except Exception as e:
+            logger.warning(f"行情快照归档失败: {e}")
+            return None
+
+    def replay_snapshot(self, replay_date, replay_time=None):
+        """
+        【回放】使用归档的行情快照重新执行筛选，不请求任何网络接口
+        replay_date: YYYYMMDD；replay_time: HHMM (默认当日最后一份快照)
+        """
+        time_str = self.snapshot_archive.find(replay_date, STRATEGY_MAIN_FORCE, replay_time)
+        if time_str is None:
+            print(f"❌ 未找到 {replay_date} {replay_time or ''} 的行情快照")
+            return None
+
+        quotes = self.snapshot_archive.load(replay_date, STRATEGY_MAIN_FORCE, time_str)
+        meta = self.snapshot_archive.meta(replay_date, STRATEGY_MAIN_FORCE, time_str)
+        print(f">>> 回放行情快照: {replay_date} {time_str} ({len(quotes)} 只股票)")
+
+        index_change = meta.get('index_change', 0)
+        if index_change < self.INDEX_RISK_THR:
+            print(f"❌ 大盘环境恶劣 (跌幅 > {abs(self.INDEX_RISK_THR)}%)，策略自动终止以规避系统性风险。")
+            return pd.DataFrame()
+
+        code_map = dict(zip(quotes['symbol'], to_ts_codes(quotes['symbol'])))
+        name_dict = {code_map[symbol]: name for symbol, name in zip(quotes['symbol'], quotes['name'])}
+        self.last_snapshot = quotes
+        return self.filter_quotes(quotes, code_map, name_dict)
+
+    def execute_strategy(self, replay_date=None, replay_time=None):
+        """执行主力埋伏策略 (指定 replay_date 时回放归档快照)"""
         print("\n" + "="*60)
-        print(f"   A股尾盘主力埋伏策略 | {datetime.datetime.now().strftime('%H:%M:%S')}")
+        if replay_date:
+            print(f"   A股尾盘主力埋伏策略 | 回放 {replay_date} {replay_time or ''}")
+        else:
+            print(f"   A股尾盘主力埋伏策略 | {datetime.datetime.now().strftime('%H:%M:%S')}")
         print("="*60 + "\n")
 
-        # 1. 检查大环境
-        market_safe, index_value, index_change = self.check_market_environment()
-        if not market_safe:
-            return []
+        if replay_date:
+            results = self.replay_snapshot(replay_date, replay_time)
+            if results is None:
+                return []
+        else:
+            # 1. 检查大环境
+            self.report_progress(0.05, "检查大盘环境...")
+            market_safe, index_value, index_change = self.check_market_environment()
+            if not market_safe:
+                return []
 
-        # 2. 获取基础池
-        last_date = self.get_latest_trade_date()
-        basic_df = self.get_basic_pool_with_tushare(last_date)
+            # 2. 获取基础池
+            self.report_progress(0.1, "获取基础股票池...")
+            basic_df = self.load_basic_pool()
 
-        if basic_df.empty:
-            return []
+            if basic_df.empty:
+                return []
 
-        stock_dict = pd.Series(basic_df.close.values, index=basic_df.ts_code).to_dict()
-        name_dict = pd.Series(basic_df['name'].values, index=basic_df.ts_code).to_dict()
+            stock_dict = pd.Series(basic_df.close.values, index=basic_df.ts_code).to_dict()
+            name_dict = pd.Series(basic_df['name'].values, index=basic_df.ts_code).to_dict()
 
-        # 3. 实时扫描
-        results = self.get_realtime_and_filter(stock_dict, name_dict)
+            # 3. 实时扫描
+            self.report_progress(0.2, f"实时扫描 {len(stock_dict)} 只股票...")
+            results = self.get_realtime_and_filter(stock_dict, name_dict)
+            self.archive_snapshot(index_value, index_change)
 
         # 4. 处理结果
+        return self.rank_results(results)
+
+    def rank_results(self, results):
+        """按综合评分取 TOP 10 并输出操作建议"""
         if not results.empty:
             # 按综合评分排序
             results = results.sort_values(by='total_score', ascending=False)
@@ -618,115 +675,8 @@ class MainForceBurialStrategy:
 
         return self.results
 
-    def _calculate_optimized_score(self, deviation, change, turnover_rate, amount_yi, price_position, amplitude):
-        """计算优化后的综合评分"""
-        # 计算各项得分
-        deviation_score = self._calculate_deviation_score(abs(deviation))
-        change_score = self._calculate_change_score(change)
-        turnover_score = self._calculate_turnover_score(turnover_rate)
-        amount_score = self._calculate_amount_score(amount_yi)
-        position_score = self._calculate_position_score(price_position)
-        amplitude_score = self._calculate_amplitude_score(amplitude)
-
-        # 加权总分
-        total_score = (
-            deviation_score * self.scoring_weights['deviation_score'] +
-            change_score * self.scoring_weights['change_score'] +
-            turnover_score * self.scoring_weights['turnover_score'] +
-            amount_score * self.scoring_weights['amount_score'] +
-            position_score * self.scoring_weights['position_score'] +
-            amplitude_score * self.scoring_weights['amplitude_score']
-        ) / 100
-
-        return {
-            'total_score': total_score,
-            'deviation_score': deviation_score,
-            'change_score': change_score,
-            'turnover_score': turnover_score,
-            'amount_score': amount_score,
-            'position_score': position_score,
-            'amplitude_score': amplitude_score
-        }
-
-    def _calculate_deviation_score(self, deviation):
-        """乖离率评分：越小越好"""
-        if deviation <= 0.5:
-            return 100
-        elif deviation <= 1.0:
-            return 90
-        elif deviation <= 1.5:
-            return 80
-        elif deviation <= 2.0:
-            return 70
-        elif deviation <= 3.0:
-            return 50
-        else:
-            return 20
-
-    def _calculate_change_score(self, change):
-        """涨幅评分：适中最好"""
-        if change <= 0:
-            return 0
-        elif change < 0.8:
-            return change / 0.8 * 40
-        elif change < 2.0:
-            return 40 + (change - 0.8) / 1.2 * 40
-        elif change < 4.0:
-            return 80 + (change - 2.0) / 2.0 * 15
-        elif change < 6.0:
-            return 95 + (change - 4.0) / 2.0 * 5
-        else:
-            return 90  # 涨幅过高可能是诱多
-
-    def _calculate_turnover_score(self, turnover):
-        """换手率评分：适中最好"""
-        if turnover < 1:
-            return 20
-        elif turnover < 3:
-            return 40 + (turnover - 1) / 2 * 40
-        elif turnover < 6:
-            return 80 + (turnover - 3) / 3 * 20
-        else:
-            return 80
-
-    def _calculate_amount_score(self, amount):
-        """成交额评分：越大越好，但有上限"""
-        if amount < 1:
-            return 30
-        elif amount < 3:
-            return 30 + (amount - 1) / 2 * 40
-        elif amount < 5:
-            return 70 + (amount - 3) / 2 * 20
-        elif amount < 10:
-            return 90 + (amount - 5) / 5 * 10
-        else:
-            return 100
-
-    def _calculate_position_score(self, position):
-        """价格位置评分：高位更好"""
-        if position < 0.5:
-            return position / 0.5 * 60
-        elif position < 0.8:
-            return 60 + (position - 0.5) / 0.3 * 30
-        elif position < 0.95:
-            return 90 + (position - 0.8) / 0.15 * 10
-        else:
-            return 100
-
-    def _calculate_amplitude_score(self, amplitude):
-        """振幅评分：适中的振幅较好"""
-        if amplitude < 3:
-            return 40
-        elif amplitude < 6:
-            return 60
-        elif amplitude < 10:
-            return 80
-        else:
-            return 60
-
-  
     def save_results(self):
-        """保存选股结果"""
+        """保存选股结果 (写入结果数据库，并保存结果文件供回测脚本使用)"""
         if not self.results:
             return None
 
@@ -739,13 +689,13 @@ class MainForceBurialStrategy:
             'strategy_version': self.strategy_description,
             'scoring_weights': self.scoring_weights,
             'strategy_params': {
-                'MIN_MV': MIN_MV,
-                'MAX_MV': MAX_MV,
-                'MIN_PCT': MIN_PCT,
-                'MAX_PCT': MAX_PCT,
-                'MAX_DEVIATION': MAX_DEVIATION,
-                'INDEX_RISK_THR': INDEX_RISK_THR,
-                'MIN_AMOUNT': MIN_AMOUNT
+                'MIN_MV': self.MIN_MV,
+                'MAX_MV': self.MAX_MV,
+                'MIN_PCT': self.MIN_PCT,
+                'MAX_PCT': self.MAX_PCT,
+                'MAX_DEVIATION': self.MAX_DEVIATION,
+                'INDEX_RISK_THR': self.INDEX_RISK_THR,
+                'MIN_AMOUNT': self.MIN_AMOUNT
             },
             'total_stocks_found': len(self.results),
             'recommendation_type': 'TOP 10精选',
@@ -753,10 +703,16 @@ class MainForceBurialStrategy:
         }
 
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(result_data, f, ensure_ascii=False, indent=2, default=str)
+            run_id = get_results_store().append_result(STRATEGY_MAIN_FORCE, result_data, source=filename)
+            print(f"\n🗄️ 选股结果已写入数据库 (run_id={run_id})")
+        except Exception as e:
+            logger.error(f"❌ 写入结果数据库失败: {e}")
 
-            print(f"\n💾 尾盘主力埋伏策略结果已保存至: {filename}")
+        try:
+            # msgpack 可用时同时保存二进制文件，JSON文件始终导出
+            saved_files = save_result(result_data, filename)
+
+            print(f"\n💾 尾盘主力埋伏策略结果已保存至: {', '.join(saved_files)}")
             return filename
 
         except Exception as e:
@@ -857,51 +813,66 @@ class MainForceBurialStrategy:
 
 def main():
     """主函数 - 独立运行测试用"""
-    strategy = MainForceBurialStrategy()
+    import argparse
+    parser = argparse.ArgumentParser(description='A股尾盘主力埋伏策略')
+    parser.add_argument('--replay', metavar='YYYYMMDD', help='回放指定日期的归档行情快照 (不请求网络、不保存结果)')
+    parser.add_argument('--time', metavar='HHMM', help='回放的快照时间，默认当日最后一份')
+    args = parser.parse_args()
+    return run(replay_date=args.replay, replay_time=args.time)
+
+def run(strategy=None, replay_date=None, replay_time=None):
+    """选股、保存结果并发送邮件 (常驻 worker 传入已初始化的 strategy 复用)"""
+    strategy = strategy or MainForceBurialStrategy()
+    if replay_date:
+        return strategy.execute_strategy(replay_date=replay_date, replay_time=replay_time)
+
     results = strategy.execute_strategy()
 
     # 保存结果
     result_file = strategy.save_results()
 
     # 发送邮件通知
-    if result_file and results:
-        try:
-            from core.email_sender import EmailSender
-            from src.config import StockScreenerConfig
-            import json
+    notify_results(strategy, result_file, results)
 
-            # 检查是否启用邮件
-            config = StockScreenerConfig()
+    return results
 
-            if config.email_config['enabled'] and config.email_config['sender_email'] and config.email_config['recipients']:
-                # 读取结果文件
-                with open(result_file, 'r', encoding='utf-8') as f:
-                    result_data = json.load(f)
+def notify_results(strategy, result_file, results):
+    """发送选股结果邮件 (未启用或配置不完整时跳过)"""
+    if not (result_file and results):
+        return
+    try:
+        from core.email_sender import EmailSender
+        from src.config import StockScreenerConfig
 
-                # 构建邮件内容
-                email_content = strategy.format_results_for_email()
+        # 检查是否启用邮件
+        config = StockScreenerConfig()
 
-                # 发送邮件
-                email_sender = EmailSender()
-                subject = f"📊 尾盘主力埋伏策略选股结果 - {result_data['screening_time']} (选出{result_data['total_stocks_found']}只)"
+        if config.email_config['enabled'] and config.email_config['sender_email'] and config.email_config['recipients']:
+            # 读取结果文件
+            result_data = load_result(result_file)
 
-                success = email_sender.send_email(
-                    subject=subject,
-                    message=email_content,
-                    df=pd.DataFrame()  # 传入空DataFrame，因为我们用自定义格式
-                )
+            # 构建邮件内容
+            email_content = strategy.format_results_for_email()
 
-                if success:
-                    print(f"✅ 邮件通知已发送至: {', '.join(config.email_config['recipients'])}")
-                else:
-                    print("❌ 邮件发送失败")
-            else:
-                print("⚠️ 邮件通知未启用或配置不完整")
+            # 发送邮件
+            email_sender = EmailSender()
+            subject = f"📊 尾盘主力埋伏策略选股结果 - {result_data['screening_time']} (选出{result_data['total_stocks_found']}只)"
 
-        except Exception as e:
-            print(f"❌ 发送邮件时出错: {e}")
+            success = email_sender.send_email(
+                subject=subject,
+                message=email_content,
+                df=to_email_frame(pd.DataFrame(results))
+            )
 
-    return results
+            if success:
+                print(f"✅ 邮件通知已发送至: {', '.join(config.email_config['recipients'])}")
+            else:
+                print("❌ 邮件发送失败")
+        else:
+            print("⚠️ 邮件通知未启用或配置不完整")
+
+    except Exception as e:
+        print(f"❌ 发送邮件时出错: {e}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+本地分钟线历史库
+1. 每个交易日一个目录: <root>/minute/<YYYYMMDD>/symbols.npy + bars.npy
+   bars 形状固定为 (股票, 241, 5)，字段 open/high/low/close/volume，float32，停牌/缺失为 NaN
+2. 241 根分钟线：09:30 (集合竞价) + 09:31-11:30 + 13:01-15:00，时间到列号的换算是固定的
+3. 读取时内存映射，任意 股票×交易日 的分钟序列都是视图，不复制数据；代码 -> 行号按交易日缓存为字典，定位为 O(1)
+4. 数据来源：分钟线CSV/长表导入 (ingest / ingest_csv)、实时行情录制 (MinuteBarRecorder) 与已归档的行情快照
+   (ingest_snapshots)；实盘脚本与回测共用同一套读取接口 (series / frame / recent)
+volume 单位与日线一致 (手)
+"""
+
+import os
+import shutil
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.history_store import COLUMN_ALIASES, _default_root
+from src.quote_records import to_ts_codes
+
+MINUTE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+BARS_PER_DAY = 241
+
+
+def _session_times() -> List[str]:
+    times = ['0930']
+    for start, end in ((9 * 60 + 31, 11 * 60 + 30), (13 * 60 + 1, 15 * 60)):
+        times.extend(f"{m // 60:02d}{m % 60:02d}" for m in range(start, end + 1))
+    return times
+
+
+# 每根分钟线的时间 (HHMM)
+MINUTE_TIMES = np.array(_session_times())
+
+# 缓存代码索引与内存映射的交易日数
+INDEX_CACHE_DAYS = 16
+
+
+def _ts_codes(codes: pd.Series) -> np.ndarray:
+    """代码统一为 Tushare 格式 (6位代码按首位补交易所后缀)"""
+    codes = codes.astype(str)
+    bare = ~codes.str.contains('.', regex=False)
+    if bare.any():
+        codes = codes.where(~bare, pd.Series(to_ts_codes(codes.str[:6].str.zfill(6).to_numpy()), index=codes.index))
+    return codes.to_numpy(dtype='U9')
+
+
+def minute_index(time: str) -> int:
+    """时间 (HHMM / HH:MM) 对应的分钟线列号：不晚于该时间的最后一根 (午休时段取 11:30)"""
+    time = time.replace(':', '')
+    return max(0, int(np.searchsorted(MINUTE_TIMES, time, side='right')) - 1)
+
+
+# 开盘集合竞价撮合时间，此后到 09:30 的推送计入 09:30 这根
+AUCTION_TIME = '0925'
+
+
+def tick_minute_index(when: datetime) -> Optional[int]:
+    """
+    实时推送所属的分钟线列号；分钟线按结束时间标记，HH:MM:SS 的推送属于 HH:MM+1 结束的那根
+    (09:30:xx -> 09:31，13:00:xx -> 13:01)，集合竞价至 09:30 前计入 09:30，15:00:xx 仍计入 15:00，
+    午休时段取 11:30；集合竞价前与收盘后返回 None
+    """
+    hhmm = when.strftime('%H%M')
+    if hhmm < AUCTION_TIME or hhmm > MINUTE_TIMES[-1]:
+        return None
+    return minute_index(min((when + timedelta(minutes=1)).strftime('%H%M'), MINUTE_TIMES[-1]))
+
+
+class MinuteBarStore:
+    """分钟线历史库"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or _default_root()
+        self.path = os.path.join(self.root, 'minute')
+        self._cache: "OrderedDict[str, Tuple[Dict[str, int], np.ndarray]]" = OrderedDict()
+
+    def _day_dir(self, date: str) -> str:
+        return os.path.join(self.path, date)
+
+    # ==================== 读取 ====================
+
+    def dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """已有分钟线的交易日 (YYYYMMDD)"""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(d for d in os.listdir(self.path)
+                      if os.path.exists(os.path.join(self.path, d, 'bars.npy'))
+                      and (not start or d >= start) and (not end or d <= end))
+
+    def has_day(self, date: str) -> bool:
+        return os.path.exists(os.path.join(self._day_dir(date), 'bars.npy'))
+
+    def symbols(self, date: str) -> np.ndarray:
+        return np.load(os.path.join(self._day_dir(date), 'symbols.npy'))
+
+    def day(self, date: str) -> np.ndarray:
+        """某日全部股票分钟线 (股票, 241, 5)，只读内存映射"""
+        return np.load(os.path.join(self._day_dir(date), 'bars.npy'), mmap_mode='r')
+
+    def bars(self, date: str, ts_codes: Iterable[str]) -> np.ndarray:
+        """按代码取某日分钟线 (M, 241, 5)；当日无数据或代码不存在时为 NaN"""
+        codes = np.asarray(list(ts_codes), dtype='U9')
+        out = np.full((len(codes), BARS_PER_DAY, len(MINUTE_FIELDS)), np.nan, dtype=np.float32)
+        if not len(codes) or not self.has_day(date):
+            return out
+
+        symbols = self.symbols(date)
+        pos = np.minimum(np.searchsorted(symbols, codes), len(symbols) - 1)
+        found = symbols[pos] == codes
+        out[found] = self.day(date)[pos[found]]
+        return out
+
+    def _indexed_day(self, date: str) -> Tuple[Dict[str, int], Optional[np.ndarray]]:
+        """某日 (代码 -> 行号, 内存映射)，最近 INDEX_CACHE_DAYS 个交易日缓存"""
+        if date in self._cache:
+            self._cache.move_to_end(date)
+            return self._cache[date]
+        if not self.has_day(date):
+            return {}, None
+        self._cache[date] = ({code: row for row, code in enumerate(self.symbols(date).tolist())}, self.day(date))
+        if len(self._cache) > INDEX_CACHE_DAYS:
+            self._cache.popitem(last=False)
+        return self._cache[date]
+
+    def series(self, date: str, ts_code: str) -> Optional[np.ndarray]:
+        """单只股票某日分钟线 (241, 5) 只读视图 (不复制)；没有数据时返回 None"""
+        index, bars = self._indexed_day(date)
+        row = index.get(ts_code)
+        return None if row is None else bars[row]
+
+    def frame(self, date: str, ts_code: str, end_time: Optional[str] = None) -> pd.DataFrame:
+        """单只股票某日分钟线表 (time HH:MM + OHLCV)，只含有成交的分钟；end_time 截止时间 (含)"""
+        columns = ['trade_date', 'time', *MINUTE_FIELDS]
+        bars = self.series(date, ts_code)
+        if bars is None:
+            return pd.DataFrame(columns=columns)
+        end = minute_index(end_time) + 1 if end_time else BARS_PER_DAY
+        bars = np.asarray(bars[:end], dtype=np.float64)
+        valid = np.isfinite(bars[:, MINUTE_FIELDS.index('close')])
+        times = MINUTE_TIMES[:end][valid]
+        frame = pd.DataFrame(bars[valid], columns=list(MINUTE_FIELDS))
+        frame.insert(0, 'time', [f"{t[:2]}:{t[2:]}" for t in times])
+        frame.insert(0, 'trade_date', date)
+        return frame
+
+    def recent(self, ts_code: str, count: int = 30, end_date: Optional[str] = None,
+               end_time: Optional[str] = None) -> pd.DataFrame:
+        """单只股票截至 end_date end_time 的最近 count 根分钟线 (可跨交易日)"""
+        parts, total = [], 0
+        for date in reversed(self.dates(end=end_date)):
+            frame = self.frame(date, ts_code, end_time if date == end_date else None)
+            if len(frame):
+                parts.append(frame)
+                total += len(frame)
+            if total >= count:
+                break
+        if not parts:
+            return pd.DataFrame(columns=['trade_date', 'time', *MINUTE_FIELDS])
+        return pd.concat(parts[::-1], ignore_index=True).tail(count).reset_index(drop=True)
+
+    # ==================== 写入 ====================
+
+    def write_day(self, date: str, symbols: np.ndarray, bars: np.ndarray):
+        """写入 (覆盖) 某日分钟线；symbols 需与 bars 第一维对应"""
+        order = np.argsort(symbols)
+        tmp_dir = self._day_dir(date) + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, 'symbols.npy'), np.asarray(symbols, dtype='U9')[order])
+        np.save(os.path.join(tmp_dir, 'bars.npy'), np.asarray(bars, dtype=np.float32)[order])
+
+        day_dir = self._day_dir(date)
+        self._cache.pop(date, None)
+        shutil.rmtree(day_dir, ignore_errors=True)
+        os.replace(tmp_dir, day_dir)
+
+    def merge_day(self, date: str, symbols: np.ndarray, bars: np.ndarray):
+        """合并写入某日分钟线：新数据中有值的分钟覆盖原值，缺失 (NaN) 的分钟保留原值"""
+        symbols = np.asarray(symbols, dtype='U9')
+        if not self.has_day(date):
+            self.write_day(date, symbols, bars)
+            return
+
+        old_symbols = self.symbols(date)
+        merged_symbols = np.union1d(old_symbols, symbols)
+        merged = np.full((len(merged_symbols), BARS_PER_DAY, len(MINUTE_FIELDS)), np.nan, dtype=np.float32)
+        merged[np.searchsorted(merged_symbols, old_symbols)] = self.day(date)
+        rows = np.searchsorted(merged_symbols, symbols)
+        bars = np.asarray(bars, dtype=np.float32)
+        merged[rows] = np.where(np.isfinite(bars), bars, merged[rows])
+        self.write_day(date, merged_symbols, merged)
+
+    def ingest(self, frame: pd.DataFrame) -> int:
+        """
+        合并导入分钟线长表 (trade_date, ts_code, time, open, high, low, close, volume)
+        time 为 HHMM/HH:MM 或完整时间戳；同一日已有的股票被覆盖，其余保留。返回导入的交易日数
+        """
+        frame = frame.rename(columns=COLUMN_ALIASES)
+        times = frame['time'].astype(str)
+        stamp = times.str.len() > 5
+        if stamp.any():
+            times = times.where(~stamp, pd.to_datetime(times.where(stamp)).dt.strftime('%H%M'))
+        hhmm = times.str.replace(':', '').str.zfill(4).to_numpy(dtype='U4')
+        if 'trade_date' not in frame.columns:
+            frame = frame.assign(trade_date=pd.to_datetime(frame['time'].astype(str)).dt.strftime('%Y%m%d'))
+
+        minute = np.searchsorted(MINUTE_TIMES, hhmm)
+        valid = MINUTE_TIMES[np.minimum(minute, BARS_PER_DAY - 1)] == hhmm  # 丢弃交易时段外的记录
+        frame = frame.assign(trade_date=frame['trade_date'].astype(str).str.replace('-', ''),
+                             ts_code=_ts_codes(frame['ts_code']), minute=minute)[valid]
+
+        for date, day in frame.groupby('trade_date'):
+            new_symbols = np.unique(day['ts_code'].to_numpy(dtype='U9'))
+            old_symbols = self.symbols(date) if self.has_day(date) else np.array([], dtype='U9')
+            symbols = np.union1d(old_symbols, new_symbols)
+
+            bars = np.full((len(symbols), BARS_PER_DAY, len(MINUTE_FIELDS)), np.nan, dtype=np.float32)
+            if len(old_symbols):
+                bars[np.searchsorted(symbols, old_symbols)] = self.day(date)
+            rows = np.searchsorted(symbols, day['ts_code'].to_numpy(dtype='U9'))
+            bars[rows] = np.nan
+            for j, field in enumerate(MINUTE_FIELDS):
+                bars[rows, day['minute'].to_numpy(), j] = pd.to_numeric(day[field], errors='coerce').to_numpy(np.float32)
+            self.write_day(date, symbols, bars)
+        return frame['trade_date'].nunique()
+
+    def ingest_csv(self, path: str) -> int:
+        """导入分钟线CSV (trade_date, ts_code/code, time, open, high, low, close, volume)，返回交易日数"""
+        frame = pd.read_csv(path, dtype={'ts_code': str, 'code': str, 'symbol': str, 'trade_date': str,
+                                         'date': str, 'time': str})
+        return self.ingest(frame)
+
+    def ingest_snapshots(self, archive, date: str, strategy: Optional[str] = None) -> int:
+        """
+        由某日已归档的行情快照 (src.snapshot_archive) 录制分钟线：每份快照视为一次实时行情推送
+        快照稀疏时只有快照所在分钟有数据。返回使用的快照数
+        """
+        recorder = MinuteBarRecorder(self)
+        snapshots = archive.list_snapshots(date, date, strategy)
+        for _, name, time in sorted(snapshots, key=lambda item: item[2]):
+            columns = archive.load_columns(date, name, time)
+            recorder.record(to_ts_codes(columns['symbol']), columns['latest'], columns['volume'],
+                            datetime.strptime(date + time, '%Y%m%d%H%M'))
+        recorder.flush()
+        return len(snapshots)
+
+
+class MinuteBarRecorder:
+    """
+    实时行情 -> 分钟线录制：每次推送 (代码、最新价、当日累计成交量) 更新所在分钟的 OHLC 与成交量增量
+    flush 时合并写入分钟线库；中途重启后由库中当日已有成交量接续累计量，不会覆盖已写入的分钟
+    """
+
+    def __init__(self, store: Optional[MinuteBarStore] = None):
+        self.store = store or MinuteBarStore()
+        self.date: Optional[str] = None
+        self._rows: Dict[str, int] = {}
+        self._bars = np.empty((0, BARS_PER_DAY, len(MINUTE_FIELDS)), dtype=np.float32)
+        self._last_volume = np.empty(0)
+
+    def _ensure_rows(self, codes: np.ndarray) -> np.ndarray:
+        new = [code for code in dict.fromkeys(codes.tolist()) if code not in self._rows]
+        if new:
+            for code in new:
+                self._rows[code] = len(self._rows)
+            grow = np.full((len(new), BARS_PER_DAY, len(MINUTE_FIELDS)), np.nan, dtype=np.float32)
+            self._bars = np.concatenate([self._bars, grow])
+            # 库中当日已录制的成交量之和即为上次的累计成交量
+            recorded = self.store.bars(self.date, new)[:, :, MINUTE_FIELDS.index('volume')]
+            seen = np.isfinite(recorded).any(axis=1)
+            last = np.where(seen, np.nansum(recorded, axis=1), np.nan)
+            self._last_volume = np.concatenate([self._last_volume, last])
+        return np.array([self._rows[code] for code in codes.tolist()], dtype=np.int64)
+
+    def record(self, ts_codes: Iterable[str], prices: Iterable[float], volumes: Iterable[float],
+               when: Optional[datetime] = None):
+        """记录一次全市场/股票池推送；volumes 为当日累计成交量 (手)，交易时段外的推送忽略"""
+        when = when or datetime.now()
+        idx = tick_minute_index(when)
+        if idx is None:
+            return
+        date = when.strftime('%Y%m%d')
+        if self.date and date != self.date:
+            self.flush()
+        self.date = date
+
+        codes = np.asarray(list(ts_codes), dtype='U9')
+        prices = np.asarray(list(prices), dtype=np.float64)
+        volumes = np.asarray(list(volumes), dtype=np.float64)
+        valid = np.isfinite(prices) & (prices > 0)
+        codes, prices, volumes = codes[valid], prices[valid], volumes[valid]
+        rows = self._ensure_rows(codes)
+
+        bar = self._bars[rows, idx]
+        opened = np.isfinite(bar[:, 0])
+        delta = np.where(np.isfinite(self._last_volume[rows]), volumes - self._last_volume[rows], volumes)
+        bar[:, 0] = np.where(opened, bar[:, 0], prices)
+        bar[:, 1] = np.fmax(bar[:, 1], prices)
+        bar[:, 2] = np.fmin(bar[:, 2], prices)
+        bar[:, 3] = prices
+        bar[:, 4] = np.nan_to_num(bar[:, 4]) + np.maximum(delta, 0)
+        self._bars[rows, idx] = bar
+        self._last_volume[rows] = volumes
+
+    def flush(self):
+        """合并写入分钟线库并清空当日缓存"""
+        if self.date and self._rows:
+            self.store.merge_day(self.date, np.array(list(self._rows), dtype='U9'), self._bars)
+        self.date = None
+        self._rows = {}
+        self._bars = self._bars[:0]
+        self._last_volume = self._last_volume[:0]
+
+
+_store: Optional[MinuteBarStore] = None
+
+
+def get_minute_store() -> MinuteBarStore:
+    """获取全局分钟线库实例"""
+    global _store
+    if _store is None:
+        _store = MinuteBarStore()
+    return _store
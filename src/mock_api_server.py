@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+行情接口本地模拟服务 (压测用，数据来自 src.synthetic_market)
+1. GET  .../stock/cn/realtime?symbol=a,b,c   GuguData 实时行情格式；不带 symbol 时返回全市场
+   盘中推送按请求参数 tick 推进，或按服务启动后经过的时间 (tick_seconds 秒一次) 推进
+2. POST /                                    Tushare HTTP 协议 (api_name/params/fields)，支持 stock_basic / daily_basic / trade_cal
+可设置固定延迟与错误率 (返回非 100 状态码)，用于验证批量请求的重试与超时处理
+策略通过 GUGU_API_BASE / TUSHARE_API_URL 指向本服务
+"""
+
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from src.synthetic_market import SyntheticMarket
+
+logger = logging.getLogger(__name__)
+
+REALTIME_PATH = '/stock/cn/realtime'
+TUSHARE_APIS = ('stock_basic', 'daily_basic', 'trade_cal')
+
+
+def _tushare_payload(frame: pd.DataFrame) -> Dict[str, Any]:
+    """DataFrame -> Tushare 响应 (fields + items)"""
+    items = frame.astype(object).where(frame.notna(), None).values.tolist()
+    return {'code': 0, 'msg': '', 'data': {'fields': list(frame.columns), 'items': items, 'has_more': False}}
+
+
+class MockMarketServer(ThreadingHTTPServer):
+    """模拟 GuguData / Tushare 接口的 HTTP 服务"""
+
+    daemon_threads = True
+
+    def __init__(self, market: SyntheticMarket, address: Tuple[str, int] = ('127.0.0.1', 8765),
+                 tick_seconds: Optional[float] = None, latency: float = 0.0, error_rate: float = 0.0):
+        super().__init__(address, MockMarketHandler)
+        self.market = market
+        self.tick_seconds = tick_seconds
+        self.latency = latency
+        self.error_rate = error_rate
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng(market.seed)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _should_fail(self) -> bool:
+        return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def realtime(self, query: Dict[str, str]) -> Dict[str, Any]:
+        """GuguData 实时行情响应"""
+        with self._lock:
+            self.requests += 1
+            if self._should_fail():
+                self.errors += 1
+                return {'DataStatus': {'StatusCode': 500, 'StatusDescription': '模拟服务错误'}, 'Data': []}
+            if query.get('tick'):
+                self.market.advance(int(query['tick']))
+            elif self.tick_seconds:
+                self.market.advance(int((time.monotonic() - self.started) / self.tick_seconds))
+            symbols = [s for s in query.get('symbol', '').split(',') if s]
+            return self.market.gugudata_payload(symbols or None)
+
+    def tushare(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Tushare HTTP 接口响应"""
+        api_name = request.get('api_name')
+        with self._lock:
+            self.requests += 1
+            if api_name not in TUSHARE_APIS:
+                return {'code': -1, 'msg': f"模拟服务不支持接口 {api_name}", 'data': None}
+            params = dict(request.get('params') or {})
+            fields = request.get('fields') or None
+            if isinstance(fields, list):
+                fields = ','.join(fields)
+            frame = getattr(self.market, api_name)(fields=fields, **params)
+        return _tushare_payload(frame)
+
+
+class MockMarketHandler(BaseHTTPRequestHandler):
+    """请求处理 (按路径分发)"""
+
+    server: MockMarketServer
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if not parsed.path.rstrip('/').endswith(REALTIME_PATH):
+            self._send_json({'error': f"未知路径 {parsed.path}"}, status=404)
+            return
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        self._send_json(self.server.realtime(query))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json({'code': -1, 'msg': '请求不是有效的JSON', 'data': None}, status=400)
+            return
+        self._send_json(self.server.tushare(request))
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def start_server(market: SyntheticMarket, host: str = '127.0.0.1', port: int = 0,
+                 **kwargs) -> MockMarketServer:
+    """在后台线程启动模拟服务 (port=0 时自动分配端口)，返回服务实例，用完调用 shutdown()"""
+    server = MockMarketServer(market, (host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -8,6 +8,7 @@
 """
 
 import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import os
@@ -18,9 +19,17 @@ import time
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from core.email_sender import EmailSender
+from src.result_schema import RESULT_COLUMNS, conform_results, to_email_frame
+from src.results_store import STRATEGY_QUICK_KNIFE, get_results_store
+from src.quote_records import quotes_from_gugudata, to_ts_codes
+from src.snapshot_archive import SnapshotArchive, snapshots_enabled
 
 # GuguData配置
 GUGU_APPKEY = os.getenv('GUGU_APPKEY', 'SQSM4ASGQT6UN363PWA9M6256764WYBS')
+GUGU_API_BASE = os.getenv('GUGU_API_BASE', 'https://api.gugudata.com/stock/cn/realtime')
+
+# 复用 HTTP 连接 (常驻 worker 中跨多次运行保持连接)
+HTTP_SESSION = requests.Session()
 
 # v2.0策略参数
 CONFIG = {
@@ -37,7 +46,7 @@ CONFIG = {
 
 def get_gugudata_realtime(stock_codes):
     """从GuguData获取实时数据"""
-    url = "https://api.gugudata.com/stock/cn/realtime"
+    url = GUGU_API_BASE
 
     # GuguData要求代码格式：不带后缀，如 000001
     converted_codes = [code.split('.')[0] if '.' in code else code for code in stock_codes]
@@ -48,7 +57,7 @@ def get_gugudata_realtime(stock_codes):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=30)
+        response = HTTP_SESSION.get(url, params=params, timeout=30)
         if response.status_code == 200:
             data = response.json()
             status = data.get('DataStatus', {})
@@ -59,17 +68,22 @@ def get_gugudata_realtime(stock_codes):
 
     return []
 
+def warm_up():
+    """预热行情接口连接 (建立并保持 HTTP 连接，选股时免去握手)"""
+    params = {'appkey': GUGU_APPKEY, 'symbol': '000001'}
+    HTTP_SESSION.get(GUGU_API_BASE, params=params, timeout=30).raise_for_status()
+
 def get_all_stocks_realtime():
     """获取所有股票的实时数据（分批）"""
     all_data = []
 
     # GuguData一次返回所有数据，不需要分批查询特定股票
-    url = "https://api.gugudata.com/stock/cn/realtime"
+    url = GUGU_API_BASE
     params = {'appkey': GUGU_APPKEY}
 
     try:
         print("正在获取GuguData实时数据...")
-        response = requests.get(url, params=params, timeout=30)
+        response = HTTP_SESSION.get(url, params=params, timeout=30)
         if response.status_code == 200:
             data = response.json()
             status = data.get('DataStatus', {})
@@ -83,44 +97,71 @@ def get_all_stocks_realtime():
 
     return all_data
 
-def quick_knife_screening():
-    """执行快刀手策略选股（使用GuguData实时数据）"""
+def quick_knife_screening(replay_date=None, replay_time=None):
+    """
+    执行快刀手策略选股（使用GuguData实时数据）
+    指定 replay_date (YYYYMMDD) 时改为回放归档的行情快照，不请求网络
+    """
+    archive = SnapshotArchive()
 
-    test_date = datetime.now().strftime('%Y%m%d')
-    current_time = datetime.now().strftime('%H:%M')
+    if replay_date:
+        test_date = replay_date
+        current_time = archive.find(replay_date, STRATEGY_QUICK_KNIFE, replay_time)
+    else:
+        test_date = datetime.now().strftime('%Y%m%d')
+        current_time = datetime.now().strftime('%H:%M')
 
     print("=" * 60)
     print("快刀手晚进早出策略 v2.0")
-    print(f"选股时间: {test_date} {current_time}")
+    print(f"选股时间: {test_date} {current_time}" + (" (快照回放)" if replay_date else ""))
     print("=" * 60)
 
-    # 获取所有股票实时数据
-    print("\n[1/4] 获取实时数据...")
-    all_stocks = get_all_stocks_realtime()
-
-    if not all_stocks:
-        print("未获取到数据!")
-        return None
-
-    # 转换为DataFrame
-    df = pd.DataFrame(all_stocks)
-
-    # 字段映射
-    df['代码'] = df['Symbol'].apply(lambda x: x + '.SH' if x.startswith('6') else x + '.SZ')
-    df['名称'] = df['StockName']
-    df['涨幅'] = pd.to_numeric(df['ChangePercent'], errors='coerce')
-    df['现价'] = pd.to_numeric(df['Latest'], errors='coerce')
-    df['量比'] = pd.to_numeric(df['QuantityRatio'], errors='coerce')
-    df['换手率'] = pd.to_numeric(df['TurnoverRate'], errors='coerce')
-    df['成交额'] = pd.to_numeric(df['TradingAmount'], errors='coerce')
-    df['市值'] = pd.to_numeric(df['MarketCap'], errors='coerce')
-    df['最高'] = pd.to_numeric(df['High'], errors='coerce')
-    df['最低'] = pd.to_numeric(df['Low'], errors='coerce')
-    df['开盘'] = pd.to_numeric(df['Open'], errors='coerce')
+    if replay_date:
+        print("\n[1/4] 读取行情快照...")
+        quotes = archive.load(replay_date, STRATEGY_QUICK_KNIFE, current_time) if current_time else None
+        if quotes is None:
+            print(f"未找到 {replay_date} {replay_time or ''} 的行情快照!")
+            return None
+    else:
+        # 获取所有股票实时数据
+        print("\n[1/4] 获取实时数据...")
+        all_stocks = get_all_stocks_realtime()
+
+        if not all_stocks:
+            print("未获取到数据!")
+            return None
+
+        # 解析为行情结构化数组，再按列构建DataFrame (数值列保持数值类型直到输出)
+        quotes = quotes_from_gugudata(all_stocks)
+
+        # 归档行情快照，供离线回放
+        if snapshots_enabled():
+            try:
+                archive.save(quotes, STRATEGY_QUICK_KNIFE)
+            except Exception as e:
+                print(f"行情快照归档失败: {e}")
+
+    return screen_quotes(quotes)
+
+def screen_quotes(quotes):
+    """快刀手筛选 (DataFrame 阶段)：行情结构化数组 -> 按优先级排序的统一结构结果，无结果时返回 None"""
+    df = pd.DataFrame({
+        'code': to_ts_codes(quotes['symbol']),
+        'name': quotes['name'],
+        'change': quotes['change_pct'],
+        'price': quotes['latest'],
+        'volume_ratio': quotes['volume_ratio'],
+        'turnover_rate': quotes['turnover_rate'],
+        'amount': quotes['amount'],
+        'market_cap': quotes['market_cap'],
+        'high': quotes['high'],
+        'low': quotes['low'],
+        'open': quotes['open'],
+    })
 
     # 计算均价 (用于判断是否在均线上)
     # 这里用 (最高+最低+现价)/3 作为均价的近似
-    df['均价'] = (df['最高'] + df['最低'] + df['现价']) / 3
+    df['avg_price'] = (df['high'] + df['low'] + df['price']) / 3
 
     print(f"原始数据: {len(df)} 只")
 
@@ -128,24 +169,24 @@ def quick_knife_screening():
     print("\n[2/4] 应用基础筛选...")
 
     # 涨幅筛选
-    df = df[(df['涨幅'] >= CONFIG['MIN_PCT']) & (df['涨幅'] <= CONFIG['MAX_PCT'])]
+    df = df[(df['change'] >= CONFIG['MIN_PCT']) & (df['change'] <= CONFIG['MAX_PCT'])]
     print(f"涨幅{CONFIG['MIN_PCT']}%-{CONFIG['MAX_PCT']}%: {len(df)} 只")
 
     # 量比筛选
-    df = df[(df['量比'] >= CONFIG['MIN_VOLUME_RATIO']) & (df['量比'] <= CONFIG['MAX_VOLUME_RATIO'])]
+    df = df[(df['volume_ratio'] >= CONFIG['MIN_VOLUME_RATIO']) & (df['volume_ratio'] <= CONFIG['MAX_VOLUME_RATIO'])]
     print(f"量比{CONFIG['MIN_VOLUME_RATIO']}-{CONFIG['MAX_VOLUME_RATIO']}: {len(df)} 只")
 
     # 市值筛选 (GuguData的市值单位是元，需要转换)
-    df = df[df['市值'] <= CONFIG['MAX_MV']]
+    df = df[df['market_cap'] <= CONFIG['MAX_MV']]
     print(f"市值≤200亿: {len(df)} 只")
 
     # 在均线上
-    df = df[df['现价'] >= df['均价']]
+    df = df[df['price'] >= df['avg_price']]
     print(f"在均线上: {len(df)} 只")
 
     # 排除ST和科创板
-    df = df[~df['名称'].str.contains('ST', na=False)]
-    df = df[~df['代码'].str.startswith('688')]
+    df = df[~df['name'].str.contains('ST', na=False)]
+    df = df[~df['code'].str.startswith('688')]
 
     if len(df) == 0:
         print("\n没有符合条件的股票!")
@@ -154,61 +195,37 @@ def quick_knife_screening():
     # 应用v2.0优化筛选
     print("\n[3/4] 应用v2.0优化筛选...")
 
-    final_stocks = []
-    s级_count = 0
-    a级_count = 0
-    b级_count = 0
-
-    for idx, row in df.iterrows():
-        turnover = row['换手率']
-        turnover_ok = (turnover < CONFIG['TURNOVER_LOW_MAX']) or (turnover > CONFIG['TURNOVER_HIGH_MIN'])
-        turnover_avoid = CONFIG['TURNOVER_AVOID_MIN'] <= turnover <= CONFIG['TURNOVER_AVOID_MAX']
-
-        # 避开中间换手率区间
-        if turnover_avoid:
-            continue
-
-        # 确定优先级
-        priority = 'B'
-
-        # 这里无法获取近20日涨停历史，因为GuguData只提供实时数据
-        # 改用换手率和量比作为主要判断标准
-        if turnover_ok:
-            if turnover > CONFIG['TURNOVER_HIGH_MIN']:
-                priority = 'S'  # 高换手率高活跃
-                s级_count += 1
-            else:
-                priority = 'A'  # 低换手率主力控盘
-                a级_count += 1
-        else:
-            b级_count += 1
-
-        stock_info = {
-            '代码': row['代码'],
-            '名称': row['名称'],
-            '现价': f"{row['现价']:.2f}",
-            '涨幅': row['涨幅'],
-            '量比': row['量比'],
-            '换手率': turnover,
-            '市值亿': row['市值'] / 100000000,
-            '优先级': priority
-        }
-        final_stocks.append(stock_info)
-
-    # 排序：S级 > A级 > B级
-    priority_order = {'S': 0, 'A': 1, 'B': 2}
-    final_stocks.sort(key=lambda x: priority_order.get(x['优先级'], 3))
-
-    print(f"S级(高换手率>18%): {s级_count}只")
-    print(f"A级(低换手率<2.5%): {a级_count}只")
-    print(f"B级(其他): {b级_count}只")
-    print(f"总计: {len(final_stocks)}只")
-
-    return final_stocks
+    # 避开中间换手率区间
+    turnover_avoid = df['turnover_rate'].between(CONFIG['TURNOVER_AVOID_MIN'], CONFIG['TURNOVER_AVOID_MAX'])
+    df = df[~turnover_avoid].copy()
+
+    # 确定优先级
+    # 这里无法获取近20日涨停历史，因为GuguData只提供实时数据
+    # 改用换手率和量比作为主要判断标准
+    turnover = df['turnover_rate'].to_numpy()
+    tiers = [
+        turnover > CONFIG['TURNOVER_HIGH_MIN'],  # S级: 高换手率高活跃
+        turnover < CONFIG['TURNOVER_LOW_MAX'],   # A级: 低换手率主力控盘
+    ]
+    df['priority'] = np.select(tiers, ['S', 'A'], default='B')
+    df['priority_rank'] = np.select(tiers, [0, 1], default=2)
+    df['market_cap_yi'] = df['market_cap'] / 100000000
+    df['amount_yi'] = df['amount'] / 100000000
+
+    # 排序：S级 > A级 > B级 (同级保持原顺序)
+    df = df.sort_values('priority_rank', kind='stable')
+
+    tier_counts = df['priority'].value_counts()
+    print(f"S级(高换手率>18%): {tier_counts.get('S', 0)}只")
+    print(f"A级(低换手率<2.5%): {tier_counts.get('A', 0)}只")
+    print(f"B级(其他): {tier_counts.get('B', 0)}只")
+    print(f"总计: {len(df)}只")
+
+    return conform_results(df.drop(columns=['priority_rank']).reset_index(drop=True))
 
 def send_email_notification(stocks, test_date):
     """发送邮件通知"""
-    if not stocks:
+    if stocks is None or len(stocks) == 0:
         print("\n没有符合条件的股票，跳过邮件推送")
         return False
 
@@ -241,15 +258,7 @@ def send_email_notification(stocks, test_date):
 ⚠️ 风险提示: 本选股结果仅供学习参考，不构成投资建议。股市有风险，投资需谨慎。
 """
 
-            df_stocks = pd.DataFrame([{
-                '代码': s['代码'],
-                '名称': s['名称'],
-                '涨跌幅': s['涨幅'],
-                '换手率': s['换手率'],
-                '量比': s['量比'],
-                '总市值': s['市值亿'],
-                '优先级': s['优先级']
-            } for s in stocks])
+            df_stocks = to_email_frame(stocks)
 
             success = emailer.send_email(subject, message, df_stocks)
 
@@ -266,47 +275,82 @@ def send_email_notification(stocks, test_date):
 
 def main():
     """主函数"""
+    import argparse
+    parser = argparse.ArgumentParser(description='快刀手晚进早出策略 v2.0')
+    parser.add_argument('--replay', metavar='YYYYMMDD', help='回放指定日期的归档行情快照 (不请求网络、不保存结果)')
+    parser.add_argument('--time', metavar='HHMM', help='回放的快照时间，默认当日最后一份')
+    args = parser.parse_args()
+    run(args.replay, args.time)
+
+def run(replay_date=None, replay_time=None):
+    """选股、输出、保存结果并发送邮件 (main 与常驻 worker 共用)"""
     # 执行选股
-    stocks = quick_knife_screening()
+    stocks = quick_knife_screening(replay_date, replay_time)
 
     if stocks is None or len(stocks) == 0:
         print("\n未找到符合条件的股票")
         return
 
-    # 输出结果
+    print_results(stocks)
+    if replay_date:
+        return
+
+    test_date = datetime.now().strftime('%Y%m%d')
+    save_screening(stocks, test_date)
+
+    # 发送邮件
+    print("\n[4/4] 发送邮件通知...")
+    send_email_notification(stocks, test_date)
+
     print("\n" + "=" * 60)
-    print("【选股结果】")
+    print("快刀手策略执行完成!")
     print("=" * 60)
 
-    df_result = pd.DataFrame(stocks)
-    display_cols = ['代码', '名称', '现价', '涨幅', '量比', '换手率', '市值亿', '优先级']
-    print(df_result[display_cols].to_string(index=False))
+def print_results(stocks):
+    """输出选股结果表"""
+    print("\n" + "=" * 60)
+    print("【选股结果】")
+    print("=" * 60)
 
-    # 保存结果
-    test_date = datetime.now().strftime('%Y%m%d')
-    df_save = pd.DataFrame([{
-        '代码': s['代码'],
-        '名称': s['名称'],
-        '现价': s['现价'],
-        '涨幅(%)': f"{s['涨幅']:.2f}",
-        '量比': f"{s['量比']:.2f}",
-        '换手率(%)': f"{s['换手率']:.2f}",
-        '市值(亿)': f"{s['市值亿']:.1f}",
-        '优先级': s['优先级']
-    } for s in stocks])
+    display_cols = {
+        'code': '代码', 'name': '名称', 'price': '现价', 'change': '涨幅', 'volume_ratio': '量比',
+        'turnover_rate': '换手率', 'market_cap_yi': '市值亿', 'priority': '优先级'
+    }
+    df_result = stocks[list(display_cols)].rename(columns=display_cols)
+    print(df_result.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+def save_screening(stocks, test_date):
+    """保存选股结果到CSV并写入结果数据库，返回CSV路径"""
+    # 保存结果 (数值列按精度取整，不转换为字符串)
+    save_cols = {
+        'code': '代码', 'name': '名称', 'price': '现价', 'change': '涨幅(%)', 'volume_ratio': '量比',
+        'turnover_rate': '换手率(%)', 'market_cap_yi': '市值(亿)', 'priority': '优先级'
+    }
+    df_save = stocks[list(save_cols)].rename(columns=save_cols).round({
+        '现价': 2, '涨幅(%)': 2, '量比': 2, '换手率(%)': 2, '市值(亿)': 1
+    })
 
     Path('results').mkdir(exist_ok=True)
     result_file = f"results/quick_knife_v2_{test_date}.csv"
     df_save.to_csv(result_file, index=False, encoding='utf-8-sig')
     print(f"\n结果已保存到: {result_file}")
 
-    # 发送邮件
-    print("\n[4/4] 发送邮件通知...")
-    send_email_notification(stocks, test_date)
+    # 写入结果数据库
+    try:
+        records = stocks[list(RESULT_COLUMNS)].astype(object).where(stocks[list(RESULT_COLUMNS)].notna(), None)
+        run_id = get_results_store().append_result(STRATEGY_QUICK_KNIFE, {
+            'screening_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'timeframe': '14:30',
+            'strategy_version': '快刀手晚进早出策略 v2.0',
+            'strategy_params': CONFIG,
+            'total_stocks_found': len(stocks),
+            'stocks': records.to_dict('records'),
+        })
+        print(f"选股结果已写入数据库 (run_id={run_id})")
+    except Exception as e:
+        print(f"写入结果数据库失败: {e}")
 
-    print("\n" + "=" * 60)
-    print("快刀手策略执行完成!")
-    print("=" * 60)
+    return result_file
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+紧凑行情记录
+1. QUOTE_DTYPE：批量行情使用的 NumPy 结构化数组，每只股票一行定长记录
+2. Quote：单只股票接口使用的 __slots__ 记录类型
+替代每只股票 25+ 个键的字典，不再携带占位基本面数据和字符串时间戳
+"""
+
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+# 行情记录结构 (字段名, 类型)
+QUOTE_DTYPE = np.dtype([
+    ('symbol', 'U6'),           # 代码 (6位数字，如 000001)
+    ('name', 'U10'),            # 名称
+    ('latest', 'f8'),           # 现价
+    ('open', 'f8'),             # 开盘价
+    ('high', 'f8'),             # 最高价
+    ('low', 'f8'),              # 最低价
+    ('pre_close', 'f8'),        # 昨收
+    ('volume', 'f8'),           # 成交量 (手)
+    ('amount', 'f8'),           # 成交额 (元)
+    ('turnover_rate', 'f8'),    # 换手率 (%)
+    ('change_pct', 'f8'),       # 涨跌幅 (%)
+    ('volume_ratio', 'f8'),     # 量比 (接口未提供时为 NaN)
+    ('market_cap', 'f8'),       # 市值 (元，接口未提供时为 NaN)
+    ('pe', 'f4'),               # 动态市盈率 (接口未提供时为 NaN)
+    ('pb', 'f4'),               # 市净率 (接口未提供时为 NaN)
+    ('source', 'U8'),           # 数据来源 (gugudata / tushare)
+    ('fetch_ts', 'f8'),         # 获取时间 (Unix时间戳)
+])
+
+QUOTE_FIELDS = QUOTE_DTYPE.names
+
+# GuguData 字段映射 (记录字段: 接口字段候选，按顺序取第一个存在的)
+GUGUDATA_FIELDS = {
+    'latest': ('Latest',),
+    'open': ('Open',),
+    'high': ('High',),
+    'low': ('Low',),
+    'pre_close': ('LastClose', 'PreClose'),
+    'volume': ('TradingVolume',),
+    'amount': ('TradingAmount',),
+    'turnover_rate': ('TurnoverRate',),
+    'change_pct': ('ChangePercent', 'ChangePct'),
+    'volume_ratio': ('QuantityRatio',),
+    'market_cap': ('MarketCap',),
+    'pe': ('PERatioDynamic',),
+    'pb': ('PBRatio',),
+}
+
+# 基本面/衍生字段缺失时用 NaN (0 会被当作真实值，如市值为0可通过市值上限筛选)，行情字段缺失时用 0
+NAN_DEFAULT_FIELDS = ('market_cap', 'volume_ratio', 'pe', 'pb')
+
+
+def _to_float(value, default=0.0) -> float:
+    """安全转换为浮点数"""
+    try:
+        return float(value) if value is not None and value != '' else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _pick(item: Dict[str, Any], keys, default=0.0) -> float:
+    """按候选字段顺序取值"""
+    for key in keys:
+        if key in item:
+            return _to_float(item[key], default)
+    return default
+
+
+def quotes_from_gugudata(items: List[Dict[str, Any]], source: str = 'gugudata',
+                         fetch_ts: float = None) -> np.ndarray:
+    """将 GuguData 返回的 Data 列表解析为行情结构化数组"""
+    items = [item for item in items if item]
+    quotes = np.zeros(len(items), dtype=QUOTE_DTYPE)
+    if not items:
+        return quotes
+
+    quotes['symbol'] = [str(item.get('Symbol', '')) for item in items]
+    quotes['name'] = [item.get('StockName') or '' for item in items]
+    for field, keys in GUGUDATA_FIELDS.items():
+        default = np.nan if field in NAN_DEFAULT_FIELDS else 0.0
+        quotes[field] = [_pick(item, keys, default) for item in items]
+
+    quotes['source'] = source
+    quotes['fetch_ts'] = time.time() if fetch_ts is None else fetch_ts
+    return quotes
+
+
+def concat_quotes(batches: Iterable[np.ndarray]) -> np.ndarray:
+    """合并多个批次的行情数组"""
+    batches = [b for b in batches if len(b)]
+    if not batches:
+        return np.zeros(0, dtype=QUOTE_DTYPE)
+    return np.concatenate(batches)
+
+
+def to_ts_codes(symbols: np.ndarray) -> np.ndarray:
+    """6位代码转换为 Tushare 格式 (6开头为上交所，其余为深交所)"""
+    symbols = np.asarray(symbols, dtype='U6')
+    return np.where(np.char.startswith(symbols, '6'),
+                    np.char.add(symbols, '.SH'),
+                    np.char.add(symbols, '.SZ'))
+
+
+class Quote:
+    """单只股票行情记录 (与 QUOTE_DTYPE 字段一一对应)"""
+
+    __slots__ = QUOTE_FIELDS
+
+    # 旧版字典键 -> 记录字段，兼容按 stock['price'] 方式访问的调用方
+    LEGACY_KEYS = {
+        'code': 'symbol',
+        'price': 'latest',
+        'open_price': 'open',
+        'high_price': 'high',
+        'low_price': 'low',
+        'change_percent': 'change_pct',
+        'data_source': 'source',
+    }
+
+    def __init__(self, *values, **fields):
+        for field, value in zip(QUOTE_FIELDS, values):
+            setattr(self, field, value)
+        for field in QUOTE_FIELDS[len(values):]:
+            setattr(self, field, fields.get(field, '' if field in ('symbol', 'name', 'source') else 0.0))
+
+    @classmethod
+    def from_gugudata(cls, item: Dict[str, Any], source: str = 'gugudata') -> 'Quote':
+        """从单条 GuguData 数据创建"""
+        return cls.from_record(quotes_from_gugudata([item], source=source)[0])
+
+    @classmethod
+    def from_record(cls, record) -> 'Quote':
+        """从结构化数组的一行创建"""
+        return cls(*record.item())
+
+    def as_tuple(self) -> tuple:
+        """按 QUOTE_DTYPE 字段顺序返回"""
+        return tuple(getattr(self, field) for field in QUOTE_FIELDS)
+
+    @property
+    def vwap(self) -> float:
+        """成交量加权均价 (成交额为元，成交量为手)"""
+        return self.amount / (self.volume * 100) if self.volume > 0 else self.latest
+
+    @property
+    def deviation(self) -> float:
+        """现价相对均价的乖离率 (%)"""
+        vwap = self.vwap
+        return (self.latest - vwap) / vwap * 100 if vwap > 0 else 0.0
+
+    @property
+    def fetch_time(self) -> datetime:
+        """获取时间"""
+        return datetime.fromtimestamp(self.fetch_ts)
+
+    def __getitem__(self, key: str):
+        field = self.LEGACY_KEYS.get(key, key)
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        """兼容字典式读取"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典 (用于JSON输出)"""
+        data = {field: getattr(self, field) for field in QUOTE_FIELDS}
+        data['vwap'] = round(self.vwap, 2)
+        data['deviation'] = round(self.deviation, 2)
+        return data
+
+    def __repr__(self):
+        return f"Quote({self.symbol} {self.name} {self.latest:.2f} {self.change_pct:+.2f}%)"
+
+
+def quotes_to_array(quotes: Iterable[Quote]) -> np.ndarray:
+    """将 Quote 列表打包为结构化数组"""
+    return np.array([q.as_tuple() for q in quotes], dtype=QUOTE_DTYPE)
@@ -2,6 +2,7 @@
 """
 实时交易数据获取器
 优先使用GuguData API，其次使用Tushare Pro API
+单只股票返回 Quote 记录，市场快照返回 QUOTE_DTYPE 结构化数组
 """
 
 import requests
@@ -16,6 +17,7 @@ import pandas as pd
 # 添加模块路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from config import get_config
+from src.quote_records import Quote, quotes_to_array
 
 class RealtimeDataFetcher:
     """实时数据获取器 - GuguData优先，Tushare备用"""
@@ -37,7 +39,7 @@ class RealtimeDataFetcher:
     def get_gugu_data(self, symbol):
         """使用GuguData API获取实时数据"""
         try:
-            url = "https://api.gugudata.com/stock/cn/realtime"
+            url = self.config.GUGU_API_BASE
             params = {
                 'appkey': self.gugu_appkey,
                 'symbol': symbol
@@ -131,68 +133,30 @@ class RealtimeDataFetcher:
         return parsed_data
 
     def parse_stock_data(self, raw_data, stock_code, data_source):
-        """解析股票数据"""
+        """解析股票数据为 Quote 记录"""
         try:
-            # 基础价格数据
-            current = raw_data.get('Latest', 0)
-            open_px = raw_data.get('Open', 0)
-            high = raw_data.get('High', 0)
-            low = raw_data.get('Low', 0)
-            pre_close = raw_data.get('LastClose', 0)
-
-            # 成交量和金额数据
-            vol = raw_data.get('TradingVolume', 0)  # 手
-            amt = raw_data.get('TradingAmount', 0)  # 元
-            turnover_rate = raw_data.get('TurnoverRate', 0)
-
-            # 涨跌幅
-            change_pct = raw_data.get('ChangePercent', 0)
-            if change_pct == 0 and pre_close > 0:
-                pct_chg = (current - pre_close) / pre_close * 100
-            else:
-                pct_chg = change_pct
+            quote = Quote.from_gugudata(raw_data, source=data_source)
+            quote.symbol = quote.symbol or stock_code.split('.')[0]
 
             # 基础数据校验
-            if current == 0 or vol == 0 or pre_close == 0:
+            if quote.latest == 0 or quote.volume == 0 or quote.pre_close == 0:
                 return None
 
-            parsed_data = {
-                'code': stock_code,
-                'name': raw_data.get('StockName', ''),
-                'price': current,
-                'open_price': open_px,
-                'high_price': high,
-                'low_price': low,
-                'pre_close': pre_close,
-                'volume': vol,
-                'amount': amt,
-                'turnover_rate': turnover_rate,
-                'change_percent': pct_chg,
-                'data_source': data_source,
-
-                # 估算数据
-                'volume_ratio': max(1.0, vol / 50000),  # 简化量比
-                'main_inflow': amt * 0.3 if amt > 0 else 0,  # 估算主力资金
-                'main_inflow_ratio': 0.45,
-
-                # 基本面数据（模拟）
-                'pe': 25.0,
-                'pb': 3.5,
-                'roe': 12.0,
-                'debt_ratio': 45.0,
-                'market_cap': max(5000000000, current * vol * 100),  # 估算市值
-
-                'update_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
+            # 涨跌幅 (接口未提供时按昨收计算)
+            if quote.change_pct == 0:
+                quote.change_pct = (quote.latest - quote.pre_close) / quote.pre_close * 100
 
-            # 估算换手率（如果没有直接提供）
-            if turnover_rate == 0 and parsed_data['market_cap'] > 0:
-                parsed_data['turnover_rate'] = (vol * 100 / parsed_data['market_cap']) * 100
+            # 量比 (接口未提供时简化估算)
+            if not quote.volume_ratio > 0:
+                quote.volume_ratio = max(1.0, quote.volume / 50000)
 
-            # 估算行业信息
-            parsed_data['industry'] = self.estimate_industry(stock_code, parsed_data['name'])
+            # 估算市值与换手率（如果没有直接提供）
+            if not quote.market_cap > 0:
+                quote.market_cap = max(5000000000, quote.latest * quote.volume * 100)
+            if quote.turnover_rate == 0:
+                quote.turnover_rate = (quote.volume * 100 / quote.market_cap) * 100
 
-            return parsed_data
+            return quote
 
         except Exception as e:
             self.logger.error(f"解析股票数据失败: {e}")
@@ -214,7 +178,7 @@ class RealtimeDataFetcher:
             return '其他'
 
     def get_market_stocks_snapshot(self, stock_codes=None):
-        """获取市场股票快照"""
+        """获取市场股票快照，返回行情结构化数组"""
         if stock_codes is None:
             # 默认监控的股票列表
             stock_codes = [
@@ -232,7 +196,7 @@ class RealtimeDataFetcher:
             data = self.get_stock_realtime_data(stock_code)
             if data:
                 stocks_data.append(data)
-                if data.get('data_source') == 'gugudata':
+                if data.source == 'gugudata':
                     gugu_success += 1
                 else:
                     tushare_success += 1
@@ -246,7 +210,7 @@ class RealtimeDataFetcher:
         if failed > 0:
             self.logger.warning(f"有{failed}只股票数据获取失败，请检查API配置")
 
-        return stocks_data
+        return quotes_to_array(stocks_data)
 
     def check_api_status(self):
         """检查API状态"""
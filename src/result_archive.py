@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+历史结果压缩归档
+1. 将旧的单次选股结果文件 (*result*.json / .msgpack) 合并为按月或按日分区的列式文件：
+   <root>/runs_<分区>.parquet  - 每次选股一行
+   <root>/picks_<分区>.parquet - 每只入选股票一行
+2. pyarrow 可用时使用 Parquet + zstd 压缩；否则退化为 gzip 压缩的 pickle
+3. 分区仍可按时间范围查询，ResultLoader 会自动合并已压缩的历史记录
+4. 合并成功后删除原文件 (删除前同步导入结果数据库)
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.result_codec import BINARY_SUFFIX, JSON_SUFFIX, _to_builtin, glob_results, load_result
+from src.result_loader import DEFAULT_PATTERNS, RUN_COLUMNS, _is_missing, parse_result
+from src.results_store import get_results_store
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+ARCHIVE_DIR = 'archive/compacted'
+PARQUET_CODEC = 'zstd'
+MANIFEST_FILE = 'manifest.json'
+
+# 分区粒度 -> 分区键格式
+GRANULARITY_FORMATS = {'month': '%Y%m', 'day': '%Y%m%d'}
+FORMAT_SUFFIXES = {'parquet': '.parquet', 'pickle': '.pkl.gz'}
+
+
+def _encode_frame(df: pd.DataFrame):
+    """
+    Parquet 要求每列类型一致：纯字符串列保留，纯数值列转为数值，
+    其余 (列表/字典/混合类型) 编码为JSON文本，返回 (DataFrame, JSON列名列表)
+    """
+    df = df.copy()
+    json_columns = []
+    for column in df.columns:
+        if df[column].dtype != object:
+            continue
+        values = [v for v in df[column] if not _is_missing(v)]
+        if all(isinstance(v, str) for v in values):
+            continue
+        if all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in values):
+            df[column] = pd.to_numeric(df[column])
+            continue
+        df[column] = [None if _is_missing(v) else json.dumps(v, ensure_ascii=False, default=_to_builtin)
+                      for v in df[column]]
+        json_columns.append(column)
+    return df, json_columns
+
+
+def _decode_frame(df: pd.DataFrame, json_columns: Iterable[str]) -> pd.DataFrame:
+    for column in json_columns:
+        if column in df.columns:
+            df[column] = [json.loads(v) if isinstance(v, str) else None for v in df[column]]
+    return df
+
+
+def _key_range(key: str):
+    """分区键覆盖的日期范围 (YYYYMMDD)"""
+    return key.ljust(8, '0'), key.ljust(8, '9')
+
+
+class ResultArchive:
+    """历史结果列式归档"""
+
+    def __init__(self, root: str = ARCHIVE_DIR, fmt: Optional[str] = None):
+        self.root = str(root)
+        self.format = fmt or ('parquet' if PARQUET_AVAILABLE else 'pickle')
+        self.manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        self.manifest = self._load_manifest()
+
+    # ==================== 清单 ====================
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'partitions': {}}
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def partitions(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """与日期范围 (YYYYMMDD) 有交集的分区键，按时间排序"""
+        keys = []
+        for key in sorted(self.manifest['partitions']):
+            key_start, key_end = _key_range(key)
+            if (start and key_end < start) or (end and key_start > end):
+                continue
+            keys.append(key)
+        return keys
+
+    def compacted_files(self) -> List[str]:
+        """已合并进归档的原结果文件"""
+        return [file for info in self.manifest['partitions'].values() for file in info['files']]
+
+    # ==================== 分区读写 ====================
+
+    def _path(self, kind: str, key: str, fmt: str) -> str:
+        return os.path.join(self.root, f"{kind}_{key}{FORMAT_SUFFIXES[fmt]}")
+
+    def _write(self, df: pd.DataFrame, kind: str, key: str) -> List[str]:
+        path = self._path(kind, key, self.format)
+        tmp_path = path + '.tmp'
+        json_columns = []
+        if self.format == 'parquet':
+            df, json_columns = _encode_frame(df)
+            df.to_parquet(tmp_path, compression=PARQUET_CODEC, index=False)
+        else:
+            df.to_pickle(tmp_path, compression='gzip')
+        os.replace(tmp_path, path)
+        return json_columns
+
+    def _read(self, kind: str, key: str) -> pd.DataFrame:
+        info = self.manifest['partitions'][key]
+        path = self._path(kind, key, info['format'])
+        if info['format'] == 'parquet':
+            return _decode_frame(pd.read_parquet(path), info['json_columns'].get(kind, []))
+        return pd.read_pickle(path, compression='gzip')
+
+    def runs(self, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """归档的选股记录 (与 ResultLoader.runs 列一致)"""
+        return self._concat('runs', start, end, RUN_COLUMNS)
+
+    def picks(self, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """归档的入选股票明细"""
+        return self._concat('picks', start, end, [])
+
+    def _concat(self, kind, start, end, columns) -> pd.DataFrame:
+        frames = [self._read(kind, key) for key in self.partitions(start, end)]
+        frames = [df for df in frames if len(df)]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        df = pd.concat(frames, ignore_index=True)
+        if start:
+            df = df[df['trade_date'] >= start]
+        if end:
+            df = df[df['trade_date'] <= end]
+        return df.reset_index(drop=True)
+
+    # ==================== 压缩 ====================
+
+    def compact(self, files: Iterable[str], granularity: str = 'month', delete: bool = True,
+                dry_run: bool = False, index_store: bool = True) -> Dict[str, Any]:
+        """
+        将结果文件合并到分区归档，返回统计
+        无法解析的文件不处理，列在 skipped 中由调用方决定如何处置
+        """
+        key_format = GRANULARITY_FORMATS[granularity]
+        groups: Dict[str, Dict[str, list]] = {}
+        skipped = []
+        bytes_before = 0
+
+        for path in files:
+            path = os.path.normpath(path)
+            try:
+                data = load_result(path)
+                if not isinstance(data, dict):
+                    raise ValueError("不是有效的结果文件")
+                run, picks = parse_result(path, data)
+            except Exception:
+                skipped.append(path)
+                continue
+
+            group = groups.setdefault(run['run_time'].strftime(key_format), {'runs': [], 'picks': [], 'files': []})
+            group['runs'].append(run)
+            group['picks'].extend(picks)
+            group['files'].append(path)
+            bytes_before += sum(os.path.getsize(p) for p in _siblings(path))
+
+        summary = {
+            'files': sum(len(g['files']) for g in groups.values()),
+            'partitions': sorted(groups),
+            'skipped': skipped,
+            'bytes_before': bytes_before,
+            'bytes_after': 0,
+        }
+        if dry_run or not groups:
+            return summary
+
+        os.makedirs(self.root, exist_ok=True)
+        for key, group in sorted(groups.items()):
+            new_files = set(group['files'])
+            runs = pd.DataFrame(group['runs'], columns=RUN_COLUMNS)
+            picks = pd.DataFrame(group['picks'])
+
+            # 与已有分区合并 (同一文件重复压缩时以新解析的为准)
+            info = self.manifest['partitions'].get(key)
+            if info:
+                old_runs, old_picks = self._read('runs', key), self._read('picks', key)
+                runs = pd.concat([old_runs[~old_runs['file'].isin(new_files)], runs], ignore_index=True)
+                picks = pd.concat([old_picks[~old_picks['file'].isin(new_files)], picks], ignore_index=True)
+                old_format = info['format']
+            else:
+                old_format = None
+
+            runs = runs.sort_values('run_time', kind='stable').reset_index(drop=True)
+            picks = picks.sort_values(['run_time', 'rank'], kind='stable').reset_index(drop=True)
+            json_columns = {'runs': self._write(runs, 'runs', key), 'picks': self._write(picks, 'picks', key)}
+
+            if old_format and old_format != self.format:
+                for kind in ('runs', 'picks'):
+                    os.remove(self._path(kind, key, old_format))
+
+            self.manifest['partitions'][key] = {
+                'format': self.format,
+                'granularity': granularity,
+                'runs': len(runs),
+                'picks': len(picks),
+                'files': sorted(set(info['files'] if info else []) | new_files),
+                'json_columns': json_columns,
+                'bytes': sum(os.path.getsize(self._path(kind, key, self.format)) for kind in ('runs', 'picks')),
+                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            self._save_manifest()
+            summary['bytes_after'] += self.manifest['partitions'][key]['bytes']
+
+        compacted = [path for group in groups.values() for path in group['files']]
+        if index_store:
+            try:
+                # 删除原文件前保证结果数据库中已有这些记录
+                json_files = [os.path.splitext(p)[0] + JSON_SUFFIX for p in compacted]
+                get_results_store().import_legacy_json([p for p in json_files if os.path.exists(p)])
+            except Exception as e:
+                print(f"⚠️  同步结果数据库失败: {e}")
+
+        if delete:
+            for path in compacted:
+                for sibling in _siblings(path):
+                    os.remove(sibling)
+
+        return summary
+
+    def compact_older_than(self, days: int, patterns: Optional[Iterable[str]] = None,
+                           granularity: str = 'month', **kwargs) -> Dict[str, Any]:
+        """合并修改时间早于 days 天前的结果文件"""
+        cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+        files = [f for f in glob_results(list(patterns or DEFAULT_PATTERNS)) if os.path.getmtime(f) < cutoff]
+        return self.compact(files, granularity=granularity, **kwargs)
+
+
+def _siblings(path: str) -> List[str]:
+    """同一结果的JSON/二进制文件"""
+    base = os.path.splitext(path)[0]
+    return [base + suffix for suffix in (JSON_SUFFIX, BINARY_SUFFIX) if os.path.exists(base + suffix)]
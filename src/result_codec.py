@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+选股结果/行情快照序列化
+1. 二进制格式：msgpack (可选依赖)，文件头为魔数+格式版本，numpy 数组按原始字节保存
+2. JSON格式：供人工查看，numpy 标量/数组转换为原生类型 (不再被 default=str 转成字符串)
+3. 每个文件记录 schema_version；读取时兼容没有版本号的旧版 *_result_*.json 文件
+"""
+
+import glob
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# 结果数据结构版本 (旧版无版本号的JSON文件视为 0)
+SCHEMA_VERSION = 1
+
+# 二进制文件头: 魔数 + 编码格式版本
+MAGIC = b'SSRC'
+CODEC_VERSION = 1
+
+BINARY_SUFFIX = '.msgpack'
+JSON_SUFFIX = '.json'
+
+# msgpack 扩展类型
+_EXT_NDARRAY = 1
+
+
+def _to_builtin(value):
+    """numpy/日期等类型转换为JSON可序列化的原生类型"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime) else value.strftime('%Y-%m-%d')
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _msgpack_default(value):
+    """msgpack 编码钩子：数组保存为 (dtype, shape, 原始字节)，其余同JSON"""
+    if isinstance(value, np.ndarray):
+        header = json.dumps({'dtype': value.dtype.descr if value.dtype.names else value.dtype.str,
+                             'shape': value.shape}).encode('utf-8')
+        payload = np.ascontiguousarray(value).tobytes()
+        return msgpack.ExtType(_EXT_NDARRAY, len(header).to_bytes(4, 'little') + header + payload)
+    return _to_builtin(value)
+
+
+def _msgpack_ext_hook(code, data):
+    """msgpack 解码钩子"""
+    if code == _EXT_NDARRAY:
+        size = int.from_bytes(data[:4], 'little')
+        header = json.loads(data[4:4 + size].decode('utf-8'))
+        dtype = header['dtype']
+        dtype = np.dtype([tuple(field) for field in dtype]) if isinstance(dtype, list) else np.dtype(dtype)
+        return np.frombuffer(data[4 + size:], dtype=dtype).reshape(header['shape'])
+    return msgpack.ExtType(code, data)
+
+
+def _with_version(data: Dict[str, Any]) -> Dict[str, Any]:
+    """写入时补充 schema_version"""
+    if isinstance(data, dict) and 'schema_version' not in data:
+        data = {'schema_version': SCHEMA_VERSION, **data}
+    return data
+
+
+# ==================== 编解码 ====================
+
+def encode(data: Any) -> bytes:
+    """编码为二进制 (需要 msgpack)"""
+    if not MSGPACK_AVAILABLE:
+        raise RuntimeError("msgpack 未安装，无法使用二进制格式 (pip install msgpack)")
+    return MAGIC + bytes([CODEC_VERSION]) + msgpack.packb(_with_version(data), default=_msgpack_default,
+                                                          use_bin_type=True)
+
+
+def decode(raw: bytes) -> Any:
+    """解码二进制或JSON内容 (按文件头自动识别)"""
+    if raw[:len(MAGIC)] == MAGIC:
+        if not MSGPACK_AVAILABLE:
+            raise RuntimeError("msgpack 未安装，无法读取二进制结果文件 (pip install msgpack)")
+        version = raw[len(MAGIC)]
+        if version > CODEC_VERSION:
+            raise ValueError(f"不支持的编码版本: {version}")
+        data = msgpack.unpackb(raw[len(MAGIC) + 1:], ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+    else:
+        data = json.loads(raw.decode('utf-8'))
+
+    if isinstance(data, dict):
+        data.setdefault('schema_version', 0)
+    return data
+
+
+def dumps_json(data: Any, indent: int = 2) -> str:
+    """编码为JSON文本 (人工查看用)"""
+    return json.dumps(_with_version(data), ensure_ascii=False, indent=indent, default=_to_builtin)
+
+
+# ==================== 文件读写 ====================
+
+def load_result(path) -> Any:
+    """读取结果文件 (二进制或JSON，兼容无版本号的旧版JSON)"""
+    with open(path, 'rb') as f:
+        return decode(f.read())
+
+
+def export_json(data: Any, path) -> str:
+    """导出JSON文件"""
+    path = str(path)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(dumps_json(data))
+    return path
+
+
+def save_result(data: Any, path, binary: bool = None, json_export: bool = True) -> List[str]:
+    """
+    保存结果：msgpack 可用时写二进制文件，并同时导出JSON供人工查看和旧脚本读取
+    path 不含扩展名时自动添加；返回写入的文件列表
+    """
+    base = str(path)
+    if base.endswith(JSON_SUFFIX) or base.endswith(BINARY_SUFFIX):
+        base = os.path.splitext(base)[0]
+    binary = MSGPACK_AVAILABLE if binary is None else binary
+
+    written = []
+    if binary:
+        with open(base + BINARY_SUFFIX, 'wb') as f:
+            f.write(encode(data))
+        written.append(base + BINARY_SUFFIX)
+    if json_export or not binary:
+        written.append(export_json(data, base + JSON_SUFFIX))
+    return written
+
+
+def glob_results(patterns) -> List[str]:
+    """
+    按 *.json 模式查找结果文件，同时匹配同名的二进制文件
+    同一结果同时存在两种格式时只返回一个 (优先二进制)，按文件名排序
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+
+    files = {}
+    for pattern in patterns:
+        binary_pattern = pattern[:-len(JSON_SUFFIX)] + BINARY_SUFFIX if pattern.endswith(JSON_SUFFIX) else None
+        for file in glob.glob(pattern):
+            files.setdefault(os.path.splitext(file)[0], file)
+        if binary_pattern and MSGPACK_AVAILABLE:
+            for file in glob.glob(binary_pattern):
+                files[os.path.splitext(file)[0]] = file
+
+    return sorted(files.values())
+
+
+def load_results(paths: Iterable) -> List[Dict[str, Any]]:
+    """批量读取结果文件，跳过无法解析的文件"""
+    results = []
+    for path in paths:
+        try:
+            results.append(load_result(path))
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"⚠️  跳过文件 {Path(path).name}: {e}")
+    return results
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+选股结果统一加载器 (回测/分析脚本共用)
+1. manifest：记录每个结果文件的路径、修改时间、日期、策略、选股数量
+2. 每个文件只解析一次，统一为两张列式表并缓存到磁盘：
+   runs  - 每次选股一行 (时间/策略/选股类型/数量/任务统计/头信息)
+   picks - 每只入选股票一行 (股票字段取所有文件的并集)
+3. 兼容 stocks / top_stocks / task_results[].stocks 等不同结果格式
+4. 新解析的文件同步导入结果数据库 (ResultsStore) 的代码索引
+5. 已压缩归档 (ResultArchive) 的历史记录与现有文件合并查询
+"""
+
+import fnmatch
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from src.result_codec import JSON_SUFFIX, glob_results, load_result
+from src.results_store import get_results_store, strategy_from_filename
+
+# 默认扫描的结果文件
+DEFAULT_PATTERNS = [
+    "*result*.json",
+    "archive/results/*result*.json",
+]
+
+CACHE_DIR = 'results/.result_cache'
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 文件名中的时间戳格式
+FILENAME_TIME_FORMATS = [('%Y%m%d_%H%M%S', 2), ('%Y%m%d%H%M%S', 1), ('%Y%m%d', 1)]
+
+RUN_COLUMNS = ['file', 'strategy', 'run_time', 'trade_date', 'screening_type', 'count', 'tasks', 'header']
+PICK_BASE_COLUMNS = ['file', 'strategy', 'run_time', 'trade_date', 'task_name', 'rank']
+
+
+def _run_time(path: str, data: Dict[str, Any]) -> datetime:
+    """选股时间：execution_time / screening_time / 文件名时间戳 / 文件修改时间"""
+    for key in ('execution_time', 'screening_time'):
+        value = data.get(key)
+        if value:
+            try:
+                return datetime.strptime(str(value)[:19], TIME_FORMAT)
+            except ValueError:
+                pass
+
+    stem = Path(path).stem
+    for fmt, parts in FILENAME_TIME_FORMATS:
+        try:
+            return datetime.strptime('_'.join(stem.split('_')[-parts:]), fmt)
+        except ValueError:
+            continue
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def parse_result(path: str, data: Dict[str, Any]):
+    """
+    将一个结果文件统一为 (run, picks)
+    stocks / top_stocks 直接作为股票列表；task_results 合并各任务股票并标记任务名
+    """
+    run_time = _run_time(path, data)
+    tasks = []
+    stocks = []
+
+    if data.get('stocks') is not None or data.get('top_stocks') is not None:
+        stocks = [dict(s) for s in (data.get('stocks') if data.get('stocks') is not None else data['top_stocks']) or []]
+    if data.get('task_results'):
+        for task in data['task_results']:
+            task_name = task.get('name', '未知')
+            task_stocks = task.get('stocks', []) or []
+            tasks.append({'name': task_name, 'count': task.get('count', len(task_stocks))})
+            stocks.extend({**s, 'task_name': task_name} for s in task_stocks)
+
+    # 选股数量：任务统计 > results_count > total_stocks_found > 股票列表长度
+    if tasks:
+        count = sum(t['count'] for t in tasks)
+    else:
+        count = data.get('results_count', data.get('total_stocks_found', len(stocks)))
+
+    header = {k: v for k, v in data.items()
+              if k not in ('stocks', 'top_stocks', 'task_results') and not isinstance(v, (list, dict))}
+    strategy = strategy_from_filename(path)
+    trade_date = run_time.strftime('%Y%m%d')
+
+    run = {
+        'file': path,
+        'strategy': strategy,
+        'run_time': run_time,
+        'trade_date': trade_date,
+        'screening_type': data.get('screening_type'),
+        'count': int(count or 0),
+        'tasks': tasks,
+        'header': header,
+    }
+    picks = [{'file': path, 'strategy': strategy, 'run_time': run_time, 'trade_date': trade_date,
+              'task_name': s.pop('task_name', None), 'rank': rank, **s}
+             for rank, s in enumerate(stocks, 1)]
+    return run, picks
+
+
+class ResultLoader:
+    """结果文件加载器"""
+
+    def __init__(self, patterns: Optional[Iterable[str]] = None, cache_dir: str = CACHE_DIR,
+                 index_store: bool = True, include_archive: bool = True):
+        self.patterns = list(patterns or DEFAULT_PATTERNS)
+        self.cache_dir = cache_dir
+        self.index_store = index_store
+        self.include_archive = include_archive
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self.runs_path = os.path.join(cache_dir, 'runs.pkl')
+        self.picks_path = os.path.join(cache_dir, 'picks.pkl')
+
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        self.runs_df = pd.DataFrame(columns=RUN_COLUMNS)
+        self.picks_df = pd.DataFrame(columns=PICK_BASE_COLUMNS)
+        self._load_cache()
+
+    # ==================== 缓存 ====================
+
+    def _load_cache(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+            self.runs_df = pd.read_pickle(self.runs_path)
+            self.picks_df = pd.read_pickle(self.picks_path)
+        except (OSError, ValueError, EOFError, ImportError):
+            # 缓存缺失或损坏时全部重新解析
+            self.manifest = {}
+            self.runs_df = pd.DataFrame(columns=RUN_COLUMNS)
+            self.picks_df = pd.DataFrame(columns=PICK_BASE_COLUMNS)
+
+    def _save_cache(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.runs_df.to_pickle(self.runs_path)
+        self.picks_df.to_pickle(self.picks_path)
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+
+    # ==================== 扫描 ====================
+
+    def _scan(self) -> Dict[str, tuple]:
+        """当前所有结果文件及其签名 (修改时间, 大小)"""
+        files = {}
+        for file in glob_results(self.patterns):
+            try:
+                stat = os.stat(file)
+            except OSError:
+                continue
+            files[os.path.normpath(file)] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def refresh(self) -> int:
+        """增量更新：只解析新增或修改过的文件，删除已不存在的文件，返回解析的文件数"""
+        files = self._scan()
+        changed = [path for path, sig in files.items()
+                   if list(sig) != self.manifest.get(path, {}).get('signature')]
+        removed = [path for path in self.manifest if path not in files]
+
+        if not changed and not removed:
+            return 0
+
+        stale = set(changed) | set(removed)
+        runs = self.runs_df[~self.runs_df['file'].isin(stale)]
+        picks = self.picks_df[~self.picks_df['file'].isin(stale)]
+        for path in removed:
+            self.manifest.pop(path, None)
+
+        new_runs, new_picks, parsed = [], [], []
+        for path in sorted(changed):
+            try:
+                data = load_result(path)
+                if not isinstance(data, dict):
+                    raise ValueError("不是有效的结果文件")
+                run, run_picks = parse_result(path, data)
+            except Exception as e:
+                print(f"⚠️  跳过文件 {path}: {e}")
+                self.manifest[path] = {'signature': list(files[path]), 'valid': False}
+                continue
+
+            new_runs.append(run)
+            new_picks.extend(run_picks)
+            parsed.append(path)
+            self.manifest[path] = {
+                'signature': list(files[path]),
+                'valid': True,
+                'date': run['trade_date'],
+                'run_time': run['run_time'].strftime(TIME_FORMAT),
+                'strategy': run['strategy'],
+                'count': run['count'],
+            }
+
+        if new_runs:
+            runs = pd.concat([runs, pd.DataFrame(new_runs, columns=RUN_COLUMNS)], ignore_index=True)
+        if new_picks:
+            picks = pd.concat([picks, pd.DataFrame(new_picks)], ignore_index=True)
+
+        runs = runs.assign(run_time=pd.to_datetime(runs['run_time']))
+        picks = picks.assign(run_time=pd.to_datetime(picks['run_time']))
+        self.runs_df = runs.sort_values('run_time', kind='stable').reset_index(drop=True)
+        self.picks_df = picks.sort_values(['run_time', 'rank'], kind='stable').reset_index(drop=True)
+        self._save_cache()
+
+        if self.index_store and parsed:
+            try:
+                # 按JSON文件名导入，与其他入口导入的来源名保持一致
+                json_files = [os.path.splitext(p)[0] + JSON_SUFFIX for p in parsed]
+                get_results_store().import_legacy_json([p for p in json_files if os.path.exists(p)])
+            except Exception as e:
+                print(f"⚠️  同步结果数据库失败: {e}")
+
+        return len(parsed)
+
+    # ==================== 查询 ====================
+
+    def _filter(self, df: pd.DataFrame, start=None, end=None, strategies=None, files=None) -> pd.DataFrame:
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= df['run_time'] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= df['run_time'] <= pd.Timestamp(end)
+        if strategies:
+            strategies = [strategies] if isinstance(strategies, str) else list(strategies)
+            mask &= df['strategy'].isin(strategies)
+        if files is not None:
+            mask &= df['file'].isin([os.path.normpath(f) for f in files])
+        return df[mask]
+
+    def _with_archive(self, df: pd.DataFrame, kind: str, start=None, end=None) -> pd.DataFrame:
+        """合并已压缩归档中的记录 (原文件仍存在时以文件为准)"""
+        if not self.include_archive:
+            return df
+        from src.result_archive import ResultArchive
+
+        archive = ResultArchive()
+        if not archive.partitions():
+            return df
+        day = lambda value: pd.Timestamp(value).strftime('%Y%m%d') if value is not None else None
+        archived = getattr(archive, kind)(day(start), day(end))
+        archived = archived[~archived['file'].isin(set(df['file']))]
+        if not len(archived):
+            return df
+        archived = archived.assign(run_time=pd.to_datetime(archived['run_time']))
+        sort_keys = ['run_time', 'rank'] if kind == 'picks' else ['run_time']
+        return pd.concat([archived, df], ignore_index=True).sort_values(sort_keys, kind='stable')
+
+    def runs(self, start=None, end=None, strategies=None, files=None) -> pd.DataFrame:
+        """选股记录表 (按时间排序)；start/end 为 datetime 或日期字符串"""
+        self.refresh()
+        return self._filter(self._with_archive(self.runs_df, 'runs', start, end), start, end, strategies, files)
+
+    def picks(self, start=None, end=None, strategies=None, files=None) -> pd.DataFrame:
+        """入选股票明细表 (按时间、排名排序)"""
+        self.refresh()
+        return self._filter(self._with_archive(self.picks_df, 'picks', start, end), start, end, strategies, files)
+
+    def load_runs(self, start=None, end=None, strategies=None, files=None,
+                  match=None) -> List[Dict[str, Any]]:
+        """
+        以字典列表返回选股记录，每条包含 stocks (股票字典列表，缺失字段不出现)
+        match: 只保留文件名 (不含扩展名) 匹配该模式的记录，如 '*1130*result*'
+        """
+        runs = self.runs(start, end, strategies, files)
+        if match and len(runs):
+            patterns = [match] if isinstance(match, str) else list(match)
+            runs = runs[[any(fnmatch.fnmatch(Path(f).stem, p) for p in patterns) for f in runs['file']]]
+        picks = self._filter(self._with_archive(self.picks_df, 'picks', start, end),
+                             files=list(runs['file'])) if len(runs) else self.picks_df.iloc[0:0]
+
+        stock_columns = [c for c in picks.columns if c not in PICK_BASE_COLUMNS or c in ('task_name',)]
+        grouped = {file: group for file, group in picks.groupby('file', sort=False)}
+
+        results = []
+        for run in runs.to_dict('records'):
+            group = grouped.get(run['file'])
+            stocks = []
+            if group is not None:
+                for record in group[stock_columns].to_dict('records'):
+                    stocks.append({k: v for k, v in record.items() if not _is_missing(v)})
+            run['stocks'] = stocks
+            run['run_time'] = run['run_time'].to_pydatetime() if hasattr(run['run_time'], 'to_pydatetime') else run['run_time']
+            results.append(run)
+        return results
+
+
+def _is_missing(value) -> bool:
+    """列式表中不存在的字段 (NaN/None)"""
+    if value is None:
+        return True
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+_loader: Optional[ResultLoader] = None
+
+
+def get_result_loader() -> ResultLoader:
+    """获取全局结果加载器"""
+    global _loader
+    if _loader is None:
+        _loader = ResultLoader()
+    return _loader
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+选股结果统一数据结构
+主力埋伏策略与快刀手策略共用的结果列定义：
+1. 数值列全程保持数值类型，只在最终展示时格式化
+2. 下游邮件/Excel推送按列映射生成，无需逐行转换
+"""
+
+import pandas as pd
+
+# 结果列及其类型 (列名: dtype)，两个策略都输出这些列
+RESULT_COLUMNS = {
+    'code': 'object',            # 代码 (Tushare格式，如 000001.SZ)
+    'name': 'object',            # 名称
+    'price': 'float64',          # 现价 (元)
+    'change': 'float64',         # 涨跌幅 (%)
+    'turnover_rate': 'float64',  # 换手率 (%)
+    'volume_ratio': 'float64',   # 量比
+    'amount_yi': 'float64',      # 成交额 (亿元)
+    'market_cap_yi': 'float64',  # 市值 (亿元)
+    'total_score': 'float64',    # 综合评分 (快刀手策略无评分时为空)
+    'priority': 'object',        # 优先级 S/A/B (主力埋伏策略无优先级时为空)
+}
+
+# 邮件/Excel推送使用的中文列名 (与 EmailSender 的表格列一致)
+EMAIL_COLUMNS = {
+    'code': '代码',
+    'name': '名称',
+    'change': '涨跌幅',
+    'turnover_rate': '换手率',
+    'volume_ratio': '量比',
+    'market_cap_yi': '总市值',
+    'priority': '优先级',
+    'total_score': '评分',
+}
+
+# 可选列：整列为空时不输出到邮件
+OPTIONAL_EMAIL_COLUMNS = ('priority', 'total_score')
+
+
+def conform_results(df: pd.DataFrame) -> pd.DataFrame:
+    """按统一结构整理结果：补齐缺失列、统一类型，策略特有列保留在后面"""
+    df = df.copy() if df is not None else pd.DataFrame()
+
+    for column, dtype in RESULT_COLUMNS.items():
+        if column not in df.columns:
+            df[column] = None
+        if dtype == 'float64':
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+        else:
+            df[column] = df[column].astype('object')
+
+    extra_columns = [c for c in df.columns if c not in RESULT_COLUMNS]
+    return df[list(RESULT_COLUMNS) + extra_columns]
+
+
+def to_email_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """将统一结构的结果转换为邮件/Excel使用的中文列表格"""
+    if df is None or len(df) == 0:
+        return pd.DataFrame()
+
+    df = conform_results(pd.DataFrame(df))
+    columns = [c for c in EMAIL_COLUMNS
+               if c not in OPTIONAL_EMAIL_COLUMNS or df[c].notna().any()]
+
+    return df[columns].rename(columns=EMAIL_COLUMNS).reset_index(drop=True)
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+选股结果数据库 (SQLite)
+1. runs 表：每次选股一行，保存头信息(时间/策略/参数)和完整股票列表
+2. picks 表：每只入选股票一行，按日期、策略、配置、代码建立索引
+3. 兼容导入旧版 *_result_*.json 文件 (按文件名去重)
+picks 表即股票代码 -> 入选记录的倒排索引，每次写入时同步更新
+读取最新/历史/单只股票记录/重复入选统计都走索引，不再逐个扫描解析目录下的JSON文件
+4. agg_* 汇总表：每次写入时在同一事务中累加计数/求和 (按策略、交易日、周、股票)，
+   统计报告直接读取汇总值，与历史记录数量无关
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.result_codec import load_result
+
+STRATEGY_MAIN_FORCE = 'main_force_burial'
+STRATEGY_QUICK_KNIFE = 'quick_knife'
+STRATEGY_ENHANCED_1130 = 'enhanced_1130'
+STRATEGY_NOTIFIER = 'stock_results'
+
+LEGACY_RESULT_PATTERN = 'main_force_burial_result_*.json'
+
+# 旧版结果文件中评分字段的不同命名
+SCORE_KEYS = ('total_score', 'screening_score', 'score')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    strategy TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    screening_time TEXT NOT NULL,
+    config_hash TEXT,
+    config_name TEXT,
+    total_stocks INTEGER DEFAULT 0,
+    source TEXT UNIQUE,
+    header TEXT,
+    stocks TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_strategy_time ON runs(strategy, screening_time);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs(trade_date);
+
+CREATE TABLE IF NOT EXISTS picks (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    trade_date TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    config_hash TEXT,
+    code TEXT NOT NULL,
+    name TEXT,
+    rank INTEGER,
+    price REAL,
+    change REAL,
+    total_score REAL
+);
+CREATE INDEX IF NOT EXISTS idx_picks_code_date ON picks(code, trade_date);
+CREATE INDEX IF NOT EXISTS idx_picks_date_strategy ON picks(trade_date, strategy);
+CREATE INDEX IF NOT EXISTS idx_picks_config ON picks(config_hash);
+CREATE INDEX IF NOT EXISTS idx_picks_run ON picks(run_id);
+"""
+
+# 汇总表 (bucket 为空字符串表示全部历史，其余为交易日 YYYYMMDD 或周 YYYY-Www)
+AGG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agg_runs (
+    strategy TEXT NOT NULL,
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    runs INTEGER DEFAULT 0,
+    nonempty_runs INTEGER DEFAULT 0,
+    total_stocks INTEGER DEFAULT 0,
+    max_stocks INTEGER DEFAULT 0,
+    first_time TEXT,
+    last_time TEXT,
+    PRIMARY KEY (strategy, period, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS agg_stocks (
+    strategy TEXT NOT NULL,
+    code TEXT NOT NULL,
+    name TEXT,
+    count INTEGER DEFAULT 0,
+    score_count INTEGER DEFAULT 0,
+    score_sum REAL DEFAULT 0,
+    score_max REAL,
+    first_date TEXT,
+    last_date TEXT,
+    PRIMARY KEY (strategy, code)
+);
+CREATE INDEX IF NOT EXISTS idx_agg_stocks_count ON agg_stocks(strategy, count);
+"""
+
+PERIOD_ALL = 'all'
+PERIOD_DAY = 'day'
+PERIOD_WEEK = 'week'
+
+AGG_RUNS_UPSERT = """
+INSERT INTO agg_runs (strategy, period, bucket, runs, nonempty_runs, total_stocks, max_stocks, first_time, last_time)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?)
+ON CONFLICT (strategy, period, bucket) DO UPDATE SET
+    runs = runs + 1,
+    nonempty_runs = nonempty_runs + excluded.nonempty_runs,
+    total_stocks = total_stocks + excluded.total_stocks,
+    max_stocks = MAX(max_stocks, excluded.max_stocks),
+    first_time = MIN(first_time, excluded.first_time),
+    last_time = MAX(last_time, excluded.last_time)
+"""
+
+AGG_STOCKS_UPSERT = """
+INSERT INTO agg_stocks (strategy, code, name, count, score_count, score_sum, score_max, first_date, last_date)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?)
+ON CONFLICT (strategy, code) DO UPDATE SET
+    name = COALESCE(excluded.name, name),
+    count = count + 1,
+    score_count = score_count + excluded.score_count,
+    score_sum = score_sum + excluded.score_sum,
+    score_max = MAX(COALESCE(score_max, excluded.score_max), COALESCE(excluded.score_max, score_max)),
+    first_date = MIN(first_date, excluded.first_date),
+    last_date = MAX(last_date, excluded.last_date)
+"""
+
+
+def week_bucket(screening_time: str) -> str:
+    """周分桶 (与回测报告一致，%Y-W%U)"""
+    return datetime.strptime(screening_time[:10], '%Y-%m-%d').strftime('%Y-W%U')
+
+
+def _stock_code(stock: Dict[str, Any]) -> str:
+    """股票代码 (兼容中文字段名)"""
+    return str(stock.get('code', stock.get('代码', '')))
+
+
+def _stock_name(stock: Dict[str, Any]) -> Optional[str]:
+    return stock.get('name', stock.get('名称'))
+
+
+def _json_default(value):
+    """JSON序列化兜底 (numpy标量转Python类型，其余转字符串)"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _to_float(value) -> Optional[float]:
+    """安全转换为浮点数"""
+    try:
+        return float(value) if value is not None and value != '' else None
+    except (TypeError, ValueError):
+        return None
+
+
+def config_hash(params: Optional[Dict[str, Any]] = None,
+                weights: Optional[Dict[str, Any]] = None) -> str:
+    """策略参数+评分权重的短哈希，用于区分同一策略的不同配置"""
+    payload = json.dumps({'params': params or {}, 'weights': weights or {}},
+                         sort_keys=True, default=_json_default)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def _stock_score(stock: Dict[str, Any]) -> Optional[float]:
+    """取股票评分 (兼容旧版字段名)"""
+    for key in SCORE_KEYS:
+        if stock.get(key) is not None:
+            return _to_float(stock[key])
+    return None
+
+
+def _legacy_stocks(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    从旧版结果中取出股票列表 (stocks / top_stocks / task_results[].stocks)
+    task_results 中只保留任务统计，股票合并到列表中并标记任务名
+    """
+    if data.get('stocks') is not None:
+        return list(data.pop('stocks') or [])
+    if data.get('top_stocks') is not None:
+        return list(data.pop('top_stocks') or [])
+
+    stocks = []
+    if data.get('task_results'):
+        tasks = []
+        for task in data['task_results']:
+            task = dict(task)
+            for stock in task.pop('stocks', None) or []:
+                stocks.append({**stock, 'task_name': task.get('name', '未知')})
+            tasks.append(task)
+        data['task_results'] = tasks
+    return stocks
+
+
+def strategy_from_filename(path) -> str:
+    """从结果文件名推断策略 (如 enhanced_1130_result_20250101_113000.json -> enhanced_1130)"""
+    name = Path(path).name
+    return name.split('_result')[0] if '_result' in name else Path(path).stem
+
+
+def _trade_date(screening_time: str) -> str:
+    """从 'YYYY-MM-DD HH:MM:SS' 提取交易日 YYYYMMDD"""
+    return screening_time[:10].replace('-', '')
+
+
+class ResultsStore:
+    """选股结果存储"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        if db_path is None:
+            try:
+                from src.config import get_config
+                db_path = get_config().RESULTS_DB
+            except ImportError:
+                db_path = 'results/screener_results.db'
+
+        self.db_path = str(db_path)
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        if self.db_path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.executescript(SCHEMA)
+        self._init_aggregates()
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
+
+    # ==================== 写入 ====================
+
+    def append_result(self, strategy: str, result_data: Dict[str, Any],
+                      source: Optional[str] = None) -> Optional[int]:
+        """
+        追加一次选股结果，返回 run_id
+        result_data 与旧版JSON文件结构一致 (screening_time/strategy_params/scoring_weights/stocks...)
+        source 不为空时按来源去重 (重复导入同一文件直接跳过)
+        """
+        result_data = dict(result_data)
+        stocks = _legacy_stocks(result_data)
+        screening_time = (result_data.get('screening_time') or result_data.get('execution_time')
+                          or datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        result_data['screening_time'] = screening_time
+        result_data.setdefault('total_stocks_found', len(stocks))
+
+        params = result_data.get('strategy_params')
+        weights = result_data.get('scoring_weights')
+        run_hash = config_hash(params, weights) if (params or weights) else None
+        config_name = result_data.get('config_name') or next(
+            (s.get('config_name') for s in stocks if s.get('config_name')), None)
+        trade_date = _trade_date(screening_time)
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO runs '
+                '(strategy, trade_date, screening_time, config_hash, config_name, total_stocks, source, header, stocks) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (strategy, trade_date, screening_time, run_hash, config_name,
+                 int(result_data['total_stocks_found']), source,
+                 json.dumps(result_data, ensure_ascii=False, default=_json_default),
+                 json.dumps(stocks, ensure_ascii=False, default=_json_default))
+            )
+            if cursor.rowcount == 0:
+                return None
+
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                'INSERT INTO picks (run_id, trade_date, strategy, config_hash, code, name, rank, price, change, total_score) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, trade_date, strategy, run_hash, _stock_code(s), _stock_name(s), rank,
+                  _to_float(s.get('price')), _to_float(s.get('change', s.get('change_percent'))), _stock_score(s))
+                 for rank, s in enumerate(stocks, 1)]
+            )
+            self._update_aggregates(strategy, screening_time, int(result_data['total_stocks_found']),
+                                    [(_stock_code(s), _stock_name(s), _stock_score(s)) for s in stocks])
+        return run_id
+
+    # ==================== 汇总表 ====================
+
+    def _init_aggregates(self):
+        """创建汇总表；已有历史记录但汇总表为新建时全量重建一次"""
+        with self._lock, self._conn:
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'agg_runs'").fetchone()
+            self._conn.executescript(AGG_SCHEMA)
+        if not exists and self.count_runs():
+            self.rebuild_aggregates()
+
+    def _update_aggregates(self, strategy: str, screening_time: str, total_stocks: int, stocks):
+        """在写入事务中累加汇总值 (调用方持有锁和事务)"""
+        trade_date = _trade_date(screening_time)
+        nonempty = 1 if total_stocks > 0 else 0
+        self._conn.executemany(AGG_RUNS_UPSERT, [
+            (strategy, period, bucket, nonempty, total_stocks, total_stocks, screening_time, screening_time)
+            for period, bucket in ((PERIOD_ALL, ''), (PERIOD_DAY, trade_date),
+                                   (PERIOD_WEEK, week_bucket(screening_time)))
+        ])
+        self._conn.executemany(AGG_STOCKS_UPSERT, [
+            (strategy, code, name, 1 if score is not None else 0, score or 0, score, trade_date, trade_date)
+            for code, name, score in stocks if code
+        ])
+
+    def rebuild_aggregates(self):
+        """按 runs/picks 全量重建汇总表"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM agg_runs')
+            self._conn.execute('DELETE FROM agg_stocks')
+            runs = self._conn.execute('SELECT id, strategy, screening_time, total_stocks FROM runs ORDER BY id').fetchall()
+            for run in runs:
+                stocks = self._conn.execute(
+                    'SELECT code, name, total_score FROM picks WHERE run_id = ? ORDER BY rank', (run['id'],)).fetchall()
+                self._update_aggregates(run['strategy'], run['screening_time'], run['total_stocks'],
+                                        [tuple(row) for row in stocks])
+
+    def run_stats(self, strategy: Optional[str] = None, period: str = PERIOD_ALL,
+                  start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        选股次数/数量汇总 (每个策略、每个分桶一行)，附 avg_stocks 和 success_rate (选出股票的次数占比%)
+        period: all / day (bucket=YYYYMMDD) / week (bucket=YYYY-Www)；start/end 按 bucket 过滤
+        """
+        sql = 'SELECT * FROM agg_runs WHERE period = ?'
+        args: List[Any] = [period]
+        if strategy:
+            sql += ' AND strategy = ?'
+            args.append(strategy)
+        if start:
+            sql += ' AND bucket >= ?'
+            args.append(start.replace('-', '') if period == PERIOD_DAY else start)
+        if end:
+            sql += ' AND bucket <= ?'
+            args.append(end.replace('-', '') if period == PERIOD_DAY else end)
+        sql += ' ORDER BY strategy, bucket'
+
+        with self._lock:
+            rows = [dict(row) for row in self._conn.execute(sql, args)]
+        for row in rows:
+            row['avg_stocks'] = row['total_stocks'] / row['runs'] if row['runs'] else 0
+            row['success_rate'] = row['nonempty_runs'] / row['runs'] * 100 if row['runs'] else 0
+        return rows
+
+    def top_stocks(self, strategy: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """入选次数最多的股票 (不指定策略时合并所有策略)，附 avg_score"""
+        sql = ('SELECT code, MAX(name) AS name, SUM(count) AS count, SUM(score_count) AS score_count, '
+               'SUM(score_sum) AS score_sum, MAX(score_max) AS score_max, '
+               'MIN(first_date) AS first_date, MAX(last_date) AS last_date FROM agg_stocks')
+        args: List[Any] = []
+        if strategy:
+            sql += ' WHERE strategy = ?'
+            args.append(strategy)
+        sql += ' GROUP BY code ORDER BY count DESC, score_sum DESC LIMIT ?'
+        args.append(int(limit))
+
+        with self._lock:
+            rows = [dict(row) for row in self._conn.execute(sql, args)]
+        for row in rows:
+            row['avg_score'] = row['score_sum'] / row['score_count'] if row['score_count'] else None
+        return rows
+
+    def import_legacy_json(self, paths: Optional[Iterable] = None,
+                           strategy: Optional[str] = None) -> int:
+        """
+        导入旧版JSON结果文件 (默认当前目录的主力埋伏结果)，返回新导入数量
+        按文件名去重，已导入或被归档移动过的文件自动跳过；strategy 为空时按文件名推断
+        """
+        if paths is None:
+            paths = sorted(Path('.').glob(LEGACY_RESULT_PATTERN))
+
+        with self._lock:
+            known = {row[0] for row in self._conn.execute('SELECT source FROM runs WHERE source IS NOT NULL')}
+
+        imported = 0
+        for path in paths:
+            path = Path(path)
+            source = path.name
+            if source in known:
+                continue
+            try:
+                data = load_result(path)
+            except (OSError, ValueError, RuntimeError):
+                continue
+
+            if not data.get('screening_time') and not data.get('execution_time'):
+                # 旧文件缺少时间时按文件名中的时间戳补齐
+                stamp = path.stem.rsplit('_', 2)[-2:]
+                try:
+                    data['screening_time'] = datetime.strptime('_'.join(stamp), '%Y%m%d_%H%M%S').strftime('%Y-%m-%d %H:%M:%S')
+                except ValueError:
+                    data['screening_time'] = datetime.fromtimestamp(path.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+
+            if self.append_result(strategy or strategy_from_filename(path), data, source=source) is not None:
+                imported += 1
+        return imported
+
+    # ==================== 查询 ====================
+
+    def _run_to_result(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """runs 表的一行还原为旧版JSON结构"""
+        result = json.loads(row['header']) if row['header'] else {}
+        result['stocks'] = json.loads(row['stocks']) if row['stocks'] else []
+        result['run_id'] = row['id']
+        result['strategy'] = row['strategy']
+        result['trade_date'] = row['trade_date']
+        result['config_hash'] = row['config_hash']
+        result['source'] = row['source']
+        return result
+
+    def _select_runs(self, strategy: Optional[str], limit: Optional[int],
+                     start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[sqlite3.Row]:
+        sql = 'SELECT * FROM runs WHERE 1=1'
+        args: List[Any] = []
+        if strategy:
+            sql += ' AND strategy = ?'
+            args.append(strategy)
+        if start_date:
+            sql += ' AND trade_date >= ?'
+            args.append(start_date.replace('-', ''))
+        if end_date:
+            sql += ' AND trade_date <= ?'
+            args.append(end_date.replace('-', ''))
+        sql += ' ORDER BY screening_time DESC, id DESC'
+        if limit:
+            sql += ' LIMIT ?'
+            args.append(int(limit))
+
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def latest(self, strategy: Optional[str] = STRATEGY_MAIN_FORCE) -> Optional[Dict[str, Any]]:
+        """最新一次选股结果"""
+        rows = self._select_runs(strategy, 1)
+        return self._run_to_result(rows[0]) if rows else None
+
+    def history(self, strategy: Optional[str] = STRATEGY_MAIN_FORCE, limit: Optional[int] = 30,
+                start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """历史选股结果 (按时间倒序)，日期格式 YYYYMMDD 或 YYYY-MM-DD"""
+        return [self._run_to_result(row) for row in self._select_runs(strategy, limit, start_date, end_date)]
+
+    def history_headers(self, strategy: Optional[str] = STRATEGY_MAIN_FORCE,
+                        limit: Optional[int] = 30) -> List[Dict[str, Any]]:
+        """历史记录头信息 (不含股票列表，用于列表展示)"""
+        sql = ('SELECT id, strategy, trade_date, screening_time, config_hash, config_name, total_stocks, source, header '
+               'FROM runs')
+        args: List[Any] = []
+        if strategy:
+            sql += ' WHERE strategy = ?'
+            args.append(strategy)
+        sql += ' ORDER BY screening_time DESC, id DESC'
+        if limit:
+            sql += ' LIMIT ?'
+            args.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+
+        headers = []
+        for row in rows:
+            header = json.loads(row['header']) if row['header'] else {}
+            header.update(run_id=row['id'], strategy=row['strategy'], trade_date=row['trade_date'],
+                          config_hash=row['config_hash'], source=row['source'])
+            header.setdefault('total_stocks_found', row['total_stocks'])
+            headers.append(header)
+        return headers
+
+    def run_stocks(self, run_id: int) -> List[Dict[str, Any]]:
+        """某次选股的完整股票列表"""
+        with self._lock:
+            row = self._conn.execute('SELECT stocks FROM runs WHERE id = ?', (int(run_id),)).fetchone()
+        return json.loads(row['stocks']) if row and row['stocks'] else []
+
+    def appearances(self, code: str, strategy: Optional[str] = None,
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """某只股票的所有入选记录 (日期、策略、评分、排名，按时间倒序)"""
+        sql = ('SELECT p.*, r.screening_time FROM picks p JOIN runs r ON r.id = p.run_id '
+               'WHERE p.code = ?')
+        args: List[Any] = [code]
+        if strategy:
+            sql += ' AND p.strategy = ?'
+            args.append(strategy)
+        sql += ' ORDER BY r.screening_time DESC'
+        if limit:
+            sql += ' LIMIT ?'
+            args.append(int(limit))
+
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, args)]
+
+    def stock_index(self, strategy: Optional[str] = None) -> List[Dict[str, Any]]:
+        """所有入选过的股票及其最近一次入选记录 (按最近入选时间倒序)"""
+        # SQLite 聚合 MAX() 时，其余列取自最大值所在行
+        sql = ('SELECT p.code, p.name, p.run_id, p.rank, p.total_score, '
+               'MAX(r.screening_time) AS last_time, COUNT(*) AS appearances '
+               'FROM picks p JOIN runs r ON r.id = p.run_id')
+        args: List[Any] = []
+        if strategy:
+            sql += ' WHERE p.strategy = ?'
+            args.append(strategy)
+        sql += ' GROUP BY p.code ORDER BY last_time DESC'
+
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, args)]
+
+    def repeat_picks(self, min_count: int = 2, start_date: Optional[str] = None,
+                     end_date: Optional[str] = None, strategy: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        重复入选统计：每只股票的入选次数、评分和日期
+        按入选次数、平均评分倒序；日期格式 YYYYMMDD 或 YYYY-MM-DD
+        """
+        sql = ('SELECT code, MAX(name) AS name, COUNT(*) AS count, AVG(total_score) AS avg_score, '
+               'MAX(total_score) AS max_score, MIN(trade_date) AS first_date, MAX(trade_date) AS last_date, '
+               "GROUP_CONCAT(trade_date) AS dates, GROUP_CONCAT(COALESCE(total_score, '')) AS scores "
+               'FROM (SELECT * FROM picks WHERE 1=1')
+        args: List[Any] = []
+        if start_date:
+            sql += ' AND trade_date >= ?'
+            args.append(start_date.replace('-', ''))
+        if end_date:
+            sql += ' AND trade_date <= ?'
+            args.append(end_date.replace('-', ''))
+        if strategy:
+            sql += ' AND strategy = ?'
+            args.append(strategy)
+        sql += ' ORDER BY trade_date, run_id) GROUP BY code HAVING COUNT(*) >= ? ORDER BY count DESC, avg_score DESC'
+        args.append(int(min_count))
+
+        with self._lock:
+            rows = [dict(row) for row in self._conn.execute(sql, args)]
+
+        for row in rows:
+            row['dates'] = row['dates'].split(',') if row['dates'] else []
+            row['scores'] = [float(v) for v in row['scores'].split(',') if v] if row['scores'] else []
+        return rows
+
+    def picks(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+              strategy: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按日期区间查询入选股票明细"""
+        sql = 'SELECT p.*, r.screening_time FROM picks p JOIN runs r ON r.id = p.run_id WHERE 1=1'
+        args: List[Any] = []
+        if start_date:
+            sql += ' AND p.trade_date >= ?'
+            args.append(start_date.replace('-', ''))
+        if end_date:
+            sql += ' AND p.trade_date <= ?'
+            args.append(end_date.replace('-', ''))
+        if strategy:
+            sql += ' AND p.strategy = ?'
+            args.append(strategy)
+        sql += ' ORDER BY r.screening_time, p.rank'
+
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, args)]
+
+    def count_runs(self, strategy: Optional[str] = None) -> int:
+        """选股记录数"""
+        sql, args = 'SELECT COUNT(*) FROM runs', []
+        if strategy:
+            sql += ' WHERE strategy = ?'
+            args.append(strategy)
+        with self._lock:
+            return self._conn.execute(sql, args).fetchone()[0]
+
+
+_store: Optional[ResultsStore] = None
+
+
+def get_results_store() -> ResultsStore:
+    """获取全局结果存储实例"""
+    global _store
+    if _store is None:
+        _store = ResultsStore()
+    return _store
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+选股后台任务队列 (Web应用进程内共享)
+1. 选股在后台线程中执行，不阻塞 Streamlit 脚本线程
+2. 相同配置 (配置名+参数+权重哈希) 的请求合并为同一个任务，多个用户/标签页共享进度
+3. 完成的结果按配置哈希缓存 cache_ttl 秒，重复点击直接返回
+"""
+
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from src.results_store import config_hash
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+STATUS_LABELS = {
+    STATUS_QUEUED: '排队中',
+    STATUS_RUNNING: '执行中',
+    STATUS_DONE: '已完成',
+    STATUS_FAILED: '失败',
+}
+
+
+class ScreeningJob:
+    """一次后台选股任务"""
+
+    def __init__(self, key: str, config: Dict[str, Any]):
+        self.key = key
+        self.config = config
+        self.config_name = config.get('name', '默认配置')
+        self.status = STATUS_QUEUED
+        self.progress = 0.0
+        self.message = '等待执行...'
+        self.results: Optional[List[Dict[str, Any]]] = None
+        self.result_file: Optional[str] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.requests = 1
+
+    @property
+    def active(self) -> bool:
+        return self.status in (STATUS_QUEUED, STATUS_RUNNING)
+
+    def update_progress(self, progress: float, message: str):
+        """进度回调 (在后台线程中调用)"""
+        self.progress = max(self.progress, min(float(progress), 1.0))
+        self.message = message
+
+    def elapsed(self) -> float:
+        """已执行/总执行秒数"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def finished_time(self) -> str:
+        return datetime.fromtimestamp(self.finished_at).strftime('%H:%M:%S') if self.finished_at else ''
+
+
+class ScreeningJobQueue:
+    """选股任务队列"""
+
+    def __init__(self, max_workers: int = 1, cache_ttl: int = 600):
+        self.cache_ttl = cache_ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='screening')
+        self.jobs: Dict[str, ScreeningJob] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def job_key(config: Dict[str, Any]) -> str:
+        # 结果会标注配置名 (config_name) 并保存，参数相同但名称不同的配置不能共用任务
+        return f"{config.get('name', '默认配置')}:{config_hash(config.get('params'), config.get('weights'))}"
+
+    def _fresh(self, job: ScreeningJob) -> bool:
+        """任务进行中，或已成功完成且未过缓存期"""
+        if job.active:
+            return True
+        return job.status == STATUS_DONE and time.time() - job.finished_at < self.cache_ttl
+
+    def submit(self, config: Dict[str, Any],
+               runner: Callable[[Dict[str, Any], Callable[[float, str], None]], Any],
+               force: bool = False) -> ScreeningJob:
+        """
+        提交选股任务；相同配置的任务进行中或结果仍在缓存期内时直接返回该任务
+        runner(config, progress_callback) 返回 (results, result_file)，results 为 None 表示失败
+        force: 忽略已缓存的结果重新执行 (进行中的任务仍然复用)
+        """
+        key = self.job_key(config)
+        with self.lock:
+            job = self.jobs.get(key)
+            if job and (job.active or (not force and self._fresh(job))):
+                job.requests += 1
+                return job
+
+            job = ScreeningJob(key, config)
+            self.jobs[key] = job
+        self.executor.submit(self._run, job, runner)
+        return job
+
+    def _run(self, job: ScreeningJob, runner):
+        job.status = STATUS_RUNNING
+        job.started_at = time.time()
+        job.update_progress(0.0, '开始执行...')
+        try:
+            results, result_file = runner(job.config, job.update_progress)
+            if results is None:
+                job.error = str(result_file)
+                job.status = STATUS_FAILED
+            else:
+                job.results = results
+                job.result_file = result_file
+                job.status = STATUS_DONE
+                job.update_progress(1.0, f'选股完成，选出 {len(results)} 只股票')
+        except Exception as e:
+            job.error = f"{e}\n{traceback.format_exc()}"
+            job.status = STATUS_FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, key: Optional[str]) -> Optional[ScreeningJob]:
+        return self.jobs.get(key) if key else None
+
+    def cached(self, config: Dict[str, Any]) -> Optional[ScreeningJob]:
+        """该配置进行中或仍在缓存期内的任务"""
+        job = self.jobs.get(self.job_key(config))
+        return job if job and self._fresh(job) else None
+
+    def active_jobs(self) -> List[ScreeningJob]:
+        return [job for job in self.jobs.values() if job.active]
+
+
+_queue: Optional[ScreeningJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_screening_jobs() -> ScreeningJobQueue:
+    """获取进程内共享的选股任务队列"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ScreeningJobQueue()
+    return _queue
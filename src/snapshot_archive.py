@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+行情快照归档 (用于离线回放)
+1. 每次选股使用的全市场/股票池行情 (QUOTE_DTYPE 结构化数组) 按列保存
+   目录结构: <root>/<YYYYMMDD>/<strategy>_<HHMM>/<字段>.npy + meta.json
+2. 读取时按列内存映射 (mmap，load_columns)，回放数百个交易日无需解析JSON或请求网络；
+   load 组装为结构化数组时会复制全部列
+3. 历史快照可压缩为单个 snapshot.npz 节省空间 (读取时解压，不再映射)
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.quote_records import QUOTE_DTYPE, QUOTE_FIELDS
+
+META_FILE = 'meta.json'
+COMPRESSED_FILE = 'snapshot.npz'
+
+
+def _default_root() -> str:
+    try:
+        from src.config import get_config
+        return get_config().SNAPSHOT_DIR
+    except ImportError:
+        return 'results/snapshots'
+
+
+def snapshots_enabled() -> bool:
+    """是否归档实时行情快照"""
+    try:
+        from src.config import get_config
+        return get_config().SNAPSHOT_ENABLED
+    except ImportError:
+        return True
+
+
+class SnapshotArchive:
+    """行情快照归档"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or _default_root()
+
+    def _snapshot_dir(self, date: str, strategy: str, time: str) -> str:
+        return os.path.join(self.root, date, f"{strategy}_{time}")
+
+    # ==================== 写入 ====================
+
+    def save(self, quotes: np.ndarray, strategy: str, when: Optional[datetime] = None,
+             meta: Optional[Dict[str, Any]] = None, compress: bool = False) -> str:
+        """保存一份行情快照，返回快照目录"""
+        when = when or datetime.now()
+        path = self._snapshot_dir(when.strftime('%Y%m%d'), strategy, when.strftime('%H%M'))
+        os.makedirs(path, exist_ok=True)
+
+        quotes = np.asarray(quotes, dtype=QUOTE_DTYPE)
+        if compress:
+            np.savez_compressed(os.path.join(path, COMPRESSED_FILE),
+                                **{field: quotes[field] for field in QUOTE_FIELDS})
+        else:
+            for field in QUOTE_FIELDS:
+                np.save(os.path.join(path, f"{field}.npy"), np.ascontiguousarray(quotes[field]))
+
+        info = {
+            'strategy': strategy,
+            'captured_at': when.strftime('%Y-%m-%d %H:%M:%S'),
+            'count': int(len(quotes)),
+            'dtype': [list(item) for item in QUOTE_DTYPE.descr],
+            'compressed': compress,
+            **(meta or {}),
+        }
+        with open(os.path.join(path, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False, indent=2, default=str)
+        return path
+
+    def compress(self, date: str) -> int:
+        """将某日的未压缩快照合并压缩为 npz，返回处理的快照数"""
+        count = 0
+        for _, strategy, time in self.list_snapshots(date, date):
+            path = self._snapshot_dir(date, strategy, time)
+            if os.path.exists(os.path.join(path, COMPRESSED_FILE)):
+                continue
+
+            columns = self.load_columns(date, strategy, time, mmap=False)
+            np.savez_compressed(os.path.join(path, COMPRESSED_FILE), **columns)
+            for field in QUOTE_FIELDS:
+                os.remove(os.path.join(path, f"{field}.npy"))
+
+            meta = self.meta(date, strategy, time)
+            meta['compressed'] = True
+            with open(os.path.join(path, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+            count += 1
+        return count
+
+    def remove(self, date: str):
+        """删除某日全部快照"""
+        shutil.rmtree(os.path.join(self.root, date), ignore_errors=True)
+
+    # ==================== 读取 ====================
+
+    def list_snapshots(self, start: Optional[str] = None, end: Optional[str] = None,
+                       strategy: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """已归档的快照 (日期, 策略, 时间)，按时间排序；日期格式 YYYYMMDD"""
+        if not os.path.isdir(self.root):
+            return []
+
+        snapshots = []
+        for date in sorted(os.listdir(self.root)):
+            if (start and date < start) or (end and date > end):
+                continue
+            day_dir = os.path.join(self.root, date)
+            if not os.path.isdir(day_dir):
+                continue
+            for name in sorted(os.listdir(day_dir)):
+                name_strategy, _, time = name.rpartition('_')
+                if strategy and name_strategy != strategy:
+                    continue
+                if os.path.exists(os.path.join(day_dir, name, META_FILE)):
+                    snapshots.append((date, name_strategy, time))
+        return snapshots
+
+    def find(self, date: str, strategy: str, time: Optional[str] = None) -> Optional[str]:
+        """查找快照时间 (未指定时取当日最后一份)"""
+        times = [t for _, _, t in self.list_snapshots(date, date, strategy)]
+        if time is not None:
+            time = time.replace(':', '')
+            return time if time in times else None
+        return times[-1] if times else None
+
+    def meta(self, date: str, strategy: str, time: str) -> Dict[str, Any]:
+        """快照元数据"""
+        with open(os.path.join(self._snapshot_dir(date, strategy, time), META_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_columns(self, date: str, strategy: str, time: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+        """按列读取快照 (未压缩时为只读内存映射)"""
+        path = self._snapshot_dir(date, strategy, time)
+        compressed = os.path.join(path, COMPRESSED_FILE)
+        if os.path.exists(compressed):
+            with np.load(compressed) as data:
+                return {field: data[field] for field in QUOTE_FIELDS}
+
+        return {field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode='r' if mmap else None)
+                for field in QUOTE_FIELDS}
+
+    def load(self, date: str, strategy: str, time: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        读取快照为行情结构化数组；不存在时返回 None
+        会把各列完整复制到新数组 (不再是内存映射)，供需要整表行情的回放使用；
+        只用到部分字段时请用 load_columns，按列映射、只读取用到的数据
+        """
+        time = self.find(date, strategy, time)
+        if time is None:
+            return None
+
+        columns = self.load_columns(date, strategy, time)
+        quotes = np.empty(len(columns['symbol']), dtype=QUOTE_DTYPE)
+        for field, values in columns.items():
+            quotes[field] = values
+        return quotes
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+目录大小台账
+1. 记录每个目录的修改时间、直属文件总大小/数量和子目录列表
+2. 统计时只 stat 目录本身；目录修改时间未变且记录未过期时直接使用台账，
+   只有新增/删除过文件的目录才重新 stat 其中的文件，避免每次 rglob 全量遍历
+3. 文件追加写入不会改变目录修改时间，因此记录超过 max_age_hours 后也会重新统计
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class SizeLedger:
+    """目录大小台账"""
+
+    def __init__(self, root, ledger_path=None, max_age_hours: float = 6):
+        self.root = Path(root)
+        self.ledger_path = Path(ledger_path) if ledger_path else self.root / 'logs' / '.size_ledger.json'
+        self.max_age = max_age_hours * 3600
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self.rescanned = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.ledger_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('dirs', {})
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.ledger_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'dirs': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.ledger_path)
+
+    def _scan_dir(self, path: str, mtime_ns: int) -> Dict[str, Any]:
+        """重新统计一个目录的直属文件"""
+        size = files = 0
+        subdirs = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.is_file(follow_symlinks=False):
+                        size += entry.stat(follow_symlinks=False).st_size
+                        files += 1
+                except OSError:
+                    continue
+        self.rescanned += 1
+        return {'mtime_ns': mtime_ns, 'size': size, 'files': files, 'subdirs': subdirs, 'checked': time.time()}
+
+    def usage(self, directory) -> Tuple[int, int]:
+        """目录总大小 (字节) 和文件数"""
+        directory = Path(directory)
+        if not directory.is_dir():
+            return 0, 0
+
+        now = time.time()
+        total_size = total_files = 0
+        visited = set()
+        stack = [str(directory)]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+
+            key = os.path.relpath(path, self.root)
+            entry = self.entries.get(key)
+            if entry is None or entry['mtime_ns'] != mtime_ns or now - entry['checked'] > self.max_age:
+                try:
+                    entry = self._scan_dir(path, mtime_ns)
+                except OSError:
+                    continue
+                self.entries[key] = entry
+
+            visited.add(key)
+            total_size += entry['size']
+            total_files += entry['files']
+            stack.extend(os.path.join(path, name) for name in entry['subdirs'])
+
+        # 删除该目录下已不存在的子目录记录
+        for key in [k for k in self._keys_under(directory) if k not in visited]:
+            del self.entries[key]
+
+        return total_size, total_files
+
+    def invalidate(self, directory: Optional[str] = None):
+        """清除台账记录 (不指定目录时全部清除)，下次统计时重新扫描"""
+        if directory is None:
+            self.entries = {}
+            return
+        for key in self._keys_under(directory):
+            del self.entries[key]
+
+    def _keys_under(self, directory):
+        prefix = os.path.relpath(directory, self.root)
+        if prefix == '.':
+            return list(self.entries)
+        return [k for k in self.entries if k == prefix or k.startswith(prefix + os.sep)]
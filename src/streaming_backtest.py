@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+分钟线流式回测 (核外计算，多年全市场分钟线无需整体载入内存)
+1. 逐交易日读取分钟线库 (内存映射)，只取基础池内的股票，按内存上限切分为股票块，
+   块内计算入场时刻特征：开盘至入场时刻的最高/最低价、累计成交量，
+   成交额按分钟收盘价×成交量估算，换手率按前一交易日流通股本 (circ_mv / close) 计算
+2. 基础池、筛选条件与评分与日线回测一致 (src.burial_signals)，每日按评分取 TOP N
+3. 入选记录按内存上限攒批交给 ExitSimulator，只读取入选股票 T 至 T+N 日的分钟线计算各卖出规则收益
+4. 统计按交易日增量累加 (RunningExitStats)，逐笔明细可选择保留或追加写入CSV
+驻留内存的分钟线与中间数组不超过 memory_limit_mb (不含操作系统页缓存)
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.backtest_engine import BurialBacktest, max_drawdown
+from src.burial_signals import COMPONENT_NAMES, MIN_TOTAL_SCORE, burial_features, burial_mask, score_components, total_score
+from src.exit_simulator import CLOSE, DEFAULT_RULES, HIGH, LOW, OPEN, RULE_TIME, ExitSimulator
+from src.history_store import INDEX_CODE, DailyHistoryStore
+from src.minute_store import BARS_PER_DAY, MINUTE_FIELDS, MinuteBarStore, minute_index
+
+VOLUME = MINUTE_FIELDS.index('volume')
+
+# 单只股票计算入场特征的内存估算 (分钟线 float64 副本与约 16 个同形状中间数组)
+ENTRY_BYTES_PER_SYMBOL = BARS_PER_DAY * len(MINUTE_FIELDS) * 8 * 4
+# 单笔卖出模拟每个交易日的内存估算 (ExitSimulator 路径数组与约 16 个同形状中间数组)
+EXIT_BYTES_PER_PICK_DAY = BARS_PER_DAY * 8 * 16
+
+PICK_COLUMNS = ['trade_date', 'ts_code', 'name', 'rank', 'entry_time', 'entry_price', 'total_score',
+                'pct_chg', 'deviation', 'turnover_rate', 'amount_yi', *COMPONENT_NAMES]
+
+
+class RunningExitStats:
+    """各卖出规则收益的增量统计 (笔数、胜率、均值、标准差、极值与逐日等权净值)"""
+
+    def __init__(self, rule_names: Sequence[str]):
+        self.rules = list(rule_names)
+        size = len(self.rules)
+        self.trades = np.zeros(size, dtype=np.int64)
+        self.wins = np.zeros(size, dtype=np.int64)
+        self.total = np.zeros(size)
+        self.total_sq = np.zeros(size)
+        self.best = np.full(size, -np.inf)
+        self.worst = np.full(size, np.inf)
+        self.daily: Dict[str, np.ndarray] = {}
+
+    def update(self, trade_dates: np.ndarray, returns: np.ndarray):
+        """累加一批入选的收益 (笔数×规则，缺失为 NaN)；同一交易日的入选需在同一批内"""
+        finite = np.isfinite(returns)
+        values = np.where(finite, returns, 0.0)
+        self.trades += finite.sum(axis=0)
+        self.wins += (values > 0).sum(axis=0)
+        self.total += values.sum(axis=0)
+        self.total_sq += (values ** 2).sum(axis=0)
+        self.best = np.fmax(self.best, np.where(finite, returns, -np.inf).max(axis=0, initial=-np.inf))
+        self.worst = np.fmin(self.worst, np.where(finite, returns, np.inf).min(axis=0, initial=np.inf))
+
+        for date in np.unique(trade_dates):
+            day = returns[trade_dates == date]
+            counts = np.isfinite(day).sum(axis=0)
+            with np.errstate(invalid='ignore'):
+                self.daily[date] = np.where(counts > 0, np.nansum(day, axis=0) / np.maximum(counts, 1), np.nan)
+
+    def daily_returns(self) -> pd.DataFrame:
+        """逐日等权收益 (交易日×规则，%)"""
+        dates = sorted(self.daily)
+        return pd.DataFrame([self.daily[d] for d in dates], index=pd.Index(dates, name='trade_date'),
+                            columns=self.rules)
+
+    def summary(self) -> pd.DataFrame:
+        trades = np.maximum(self.trades, 1)
+        mean = self.total / trades
+        daily = self.daily_returns().fillna(0) / 100
+        equity = (1 + daily).cumprod()
+        has = self.trades > 0
+        return pd.DataFrame({
+            'trades': self.trades,
+            'win_rate': np.where(has, self.wins / trades * 100, np.nan),
+            'avg_return': np.where(has, mean, np.nan),
+            'std_return': np.where(has, np.sqrt(np.maximum(self.total_sq / trades - mean ** 2, 0)), np.nan),
+            'max_return': np.where(has, self.best, np.nan),
+            'min_return': np.where(has, self.worst, np.nan),
+            'cumulative_return': [(equity[r].iloc[-1] - 1) * 100 if len(equity) else 0.0 for r in self.rules],
+            'max_drawdown': [max_drawdown(equity[r].to_numpy()) for r in self.rules],
+        }, index=pd.Index(self.rules, name='rule'))
+
+
+class StreamResult:
+    """流式回测结果：stats 为增量统计，picks 为逐笔明细 (keep_picks=False 时为空)"""
+
+    def __init__(self, stats: RunningExitStats, picks: pd.DataFrame, days: int, entry_time: str):
+        self.stats = stats
+        self.picks = picks
+        self.days = days
+        self.entry_time = entry_time
+
+    def summary(self) -> pd.DataFrame:
+        return self.stats.summary()
+
+
+class MinuteStreamBacktest:
+    """基于分钟线的主力埋伏策略流式回测"""
+
+    def __init__(self, params: Mapping[str, Any], weights, history: Optional[DailyHistoryStore] = None,
+                 minutes: Optional[MinuteBarStore] = None, rules: Optional[List[Dict[str, Any]]] = None,
+                 top_n: int = 10, min_score: float = MIN_TOTAL_SCORE, memory_limit_mb: float = 1024):
+        self.history = history or DailyHistoryStore()
+        self.minutes = minutes or MinuteBarStore()
+        # 复用日线回测的基础池与参数
+        self.backtest = BurialBacktest(params, weights, self.history, top_n=top_n, min_score=min_score)
+        self.rules = rules or DEFAULT_RULES
+        self.top_n = top_n
+        self.min_score = min_score
+        self.memory_limit = int(memory_limit_mb * 1024 * 1024)
+
+        hold_days = max(r['day'] if r['kind'] == RULE_TIME else r['max_days'] for r in self.rules)
+        self.block_size = max(1, self.memory_limit // ENTRY_BYTES_PER_SYMBOL)
+        self.exit_batch = max(self.top_n, self.memory_limit // (EXIT_BYTES_PER_PICK_DAY * (hold_days + 1)))
+        self.simulator = ExitSimulator(self.minutes, self.history.dates, chunk_size=self.exit_batch)
+
+    # ==================== 入场 ====================
+
+    def _index_change(self, date: str, row: int, idx: int) -> float:
+        """入场时刻大盘涨跌幅 (分钟线库中没有指数时为 NaN，不做大盘风控)"""
+        bars = self.minutes.bars(date, [INDEX_CODE])[0, :idx + 1, CLOSE]
+        finite = bars[np.isfinite(bars)]
+        pre_close = self.history.index_field('pre_close')[row]
+        if not len(finite) or not pre_close > 0:
+            return np.nan
+        return float((finite[-1] / pre_close - 1) * 100)
+
+    def _block_features(self, bars: np.ndarray, cols: np.ndarray, row: int) -> Dict[str, np.ndarray]:
+        """股票块 (M, 入场前分钟数, 5) -> 入场时刻特征"""
+        bars = bars.astype(np.float64)
+        close = bars[:, :, CLOSE]
+        n, length = close.shape
+        bar = np.arange(length)
+        last = np.maximum.accumulate(np.where(np.isfinite(close), bar, 0), axis=1)[:, -1]
+        latest = close[np.arange(n), last]
+        volume = np.nansum(bars[:, :, VOLUME], axis=1)
+        amount = np.nansum(close * bars[:, :, VOLUME], axis=1) * 100
+
+        h = self.history
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 前一交易日流通股本 (股) = 流通市值(万元) × 10000 / 收盘价
+            shares = np.asarray(h.field('circ_mv')[row - 1, cols], dtype=np.float64) * 10000 \
+                / np.asarray(h.field('close')[row - 1, cols], dtype=np.float64)
+            turnover = volume * 100 / shares * 100
+        return burial_features(latest, bars[:, 0, OPEN], np.fmax.reduce(bars[:, :, HIGH], axis=1),
+                               np.fmin.reduce(bars[:, :, LOW], axis=1), h.field('pre_close')[row, cols],
+                               volume, amount, turnover)
+
+    def day_picks(self, row: int, entry_time: str) -> pd.DataFrame:
+        """某交易日 entry_time 入场的 TOP N 入选 (按股票块计算，内存不超过上限)"""
+        h = self.history
+        date = h.dates[row]
+        if not self.minutes.has_day(date):
+            return pd.DataFrame(columns=PICK_COLUMNS)
+
+        idx = minute_index(entry_time)
+        symbols = self.minutes.symbols(date)
+        cols = h.column_index(symbols)
+        pool = self.backtest._pool_mask(row, row + 1)[0]
+        rows = np.flatnonzero((cols >= 0) & pool[np.maximum(cols, 0)])
+        index_change = self._index_change(date, row, idx)
+        if index_change < self.backtest.params['INDEX_RISK_THR']:
+            return pd.DataFrame(columns=PICK_COLUMNS)
+
+        day = self.minutes.day(date)
+        parts = []
+        for lo in range(0, len(rows), self.block_size):
+            block = rows[lo:lo + self.block_size]
+            # 内存映射按行号读取，只载入该块股票入场前的分钟线
+            features = self._block_features(day[block, :idx + 1], cols[block], row)
+            mask = burial_mask(features, self.backtest.params)
+            if not mask.any():
+                continue
+            components = score_components(features)[mask]
+            scores = total_score(components, self.backtest.weights)
+            keep = scores >= self.min_score
+            parts.append({'col': cols[block][mask][keep], 'components': components[keep], 'score': scores[keep],
+                          **{name: features[name][mask][keep]
+                             for name in ('latest', 'pct_chg', 'deviation', 'turnover_rate', 'amount_yi')}})
+        if not parts:
+            return pd.DataFrame(columns=PICK_COLUMNS)
+
+        merged = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+        # 同分按代码顺序 (与日线回测一致)
+        order = np.argsort(-merged['score'], kind='stable')[:self.top_n]
+        picks = pd.DataFrame({
+            'trade_date': date,
+            'ts_code': h.symbols[merged['col'][order]],
+            'name': h.names[merged['col'][order]],
+            'rank': np.arange(1, len(order) + 1),
+            'entry_time': entry_time,
+            'entry_price': merged['latest'][order],
+            'total_score': merged['score'][order],
+            'pct_chg': merged['pct_chg'][order],
+            'deviation': merged['deviation'][order],
+            'turnover_rate': merged['turnover_rate'][order],
+            'amount_yi': merged['amount_yi'][order],
+        })
+        for j, name in enumerate(COMPONENT_NAMES):
+            picks[name] = merged['components'][order, j]
+        return picks
+
+    # ==================== 回测 ====================
+
+    def run(self, start: Optional[str] = None, end: Optional[str] = None, entry_time: str = '1130',
+            keep_picks: bool = True, output: Optional[str] = None,
+            progress: Optional[Callable[[str, int, int], None]] = None) -> StreamResult:
+        """
+        逐交易日流式回测 [start, end]；入选攒够 exit_batch 笔后统一模拟卖出并累加统计
+        output 不为空时逐批追加写入逐笔收益CSV
+        """
+        entry_time = entry_time.replace(':', '')
+        rows = self.backtest._rows(start, end)
+        stats = RunningExitStats([rule['name'] for rule in self.rules])
+        kept: List[pd.DataFrame] = []
+        if output and os.path.exists(output):
+            os.remove(output)
+
+        pending: List[pd.DataFrame] = []
+        pending_count = 0
+
+        def flush():
+            nonlocal pending, pending_count
+            if not pending_count:
+                return
+            batch = pd.concat(pending, ignore_index=True)
+            result = self.simulator.simulate(batch, self.rules)
+            stats.update(batch['trade_date'].to_numpy(), result.returns.to_numpy())
+            detail = pd.concat([batch, result.returns], axis=1)
+            if keep_picks:
+                kept.append(detail)
+            if output:
+                detail.to_csv(output, mode='a', header=not os.path.exists(output), index=False,
+                              encoding='utf-8-sig')
+            pending, pending_count = [], 0
+
+        for i, row in enumerate(rows):
+            picks = self.day_picks(row, entry_time)
+            if len(picks):
+                pending.append(picks)
+                pending_count += len(picks)
+            if pending_count >= self.exit_batch:
+                flush()
+            if progress:
+                progress(self.history.dates[row], i + 1, len(rows))
+        flush()
+
+        names = [rule['name'] for rule in self.rules]
+        picks = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame(columns=PICK_COLUMNS + names)
+        return StreamResult(stats, picks, len(rows), entry_time)
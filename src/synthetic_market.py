@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+合成A股行情 (压测/基准用，结果只由随机种子决定)
+1. 股票池：板块构成 (沪主板/科创板/深主板/创业板/北交所)、ST 比例、股价与流通市值为对数正态分布
+2. 日行情：大盘因子 + 厚尾个股收益，按板块涨跌停限制截断，含一定比例的涨停/跌停；
+   换手率、量比随市值与涨跌幅放大
+3. 盘中：每只股票从开盘到收盘的价格为布朗桥路径，成交量按U型分布累计，可按任意推送次数逐笔推进
+输出 GuguData 实时行情 (Data 列表/完整响应)、行情结构化数组，以及 Tushare 形式的 stock_basic / daily_basic / trade_cal
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.minute_store import BARS_PER_DAY, MINUTE_TIMES
+from src.quote_records import QUOTE_DTYPE
+
+# 板块: (代码区间, 占比, 涨跌幅限制 %, Tushare market)
+# 代码按区间顺序分配：前面为真实代码段，股票数超过真实规模时继续使用后面的扩展区间
+BOARDS = {
+    'sh_main': (((600000, 602000), (603000, 604000), (605000, 606000), (606000, 688000)), 0.31, 10.0, '主板'),
+    'star': (((688000, 690000), (690000, 700000)), 0.11, 20.0, '科创板'),
+    'sz_main': (((1, 4000), (4000, 200000)), 0.28, 10.0, '主板'),
+    'chinext': (((300000, 302000), (302000, 400000)), 0.25, 20.0, '创业板'),
+    'bse': (((830000, 840000), (870000, 874000), (430000, 440000), (840000, 870000)), 0.05, 30.0, '北交所'),
+}
+ST_RATIO = 0.03
+ST_LIMIT = 5.0
+LIMIT_UP_RATIO = 0.02
+LIMIT_DOWN_RATIO = 0.005
+
+# 默认每日推送次数 (与分钟线根数一致)；更高频的推送可指定更大的 ticks
+DEFAULT_TICKS = BARS_PER_DAY
+DEFAULT_TRADE_DATE = '20240102'
+
+INDUSTRIES = ('电子', '计算机', '医药生物', '机械设备', '化工', '电力设备', '汽车', '食品饮料',
+              '银行', '有色金属', '通信', '传媒', '建筑装饰', '公用事业', '交通运输', '房地产')
+AREAS = ('广东', '浙江', '江苏', '上海', '北京', '山东', '四川', '福建', '湖北', '安徽')
+
+GUGUDATA_OK = {'StatusCode': 100, 'StatusDescription': '请求成功'}
+
+
+def _weekdays(start: str, count: int) -> List[str]:
+    day = datetime.strptime(start, '%Y%m%d')
+    days = []
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.strftime('%Y%m%d'))
+        day += timedelta(days=1)
+    return days
+
+
+def _select(frame: pd.DataFrame, fields: Optional[str]) -> pd.DataFrame:
+    """按 Tushare 的 fields 参数 ('a,b,c') 选择列"""
+    if not fields:
+        return frame
+    return frame[[f.strip() for f in fields.split(',') if f.strip() in frame.columns]]
+
+
+class SyntheticMarket:
+    """合成行情：一个股票池，按交易日与盘中推送逐步推进"""
+
+    def __init__(self, symbols: int = 5000, seed: int = 0, trade_date: str = DEFAULT_TRADE_DATE,
+                 ticks: int = DEFAULT_TICKS):
+        self.n = int(symbols)
+        self.seed = seed
+        self.ticks = max(2, int(ticks))
+        self.universe = self._build_universe()
+        self.day_index = 0
+        self.trade_date = trade_date
+        self._start_day(self.universe['pre_close'].to_numpy())
+
+    # ==================== 股票池 ====================
+
+    def _build_universe(self) -> pd.DataFrame:
+        rng = np.random.default_rng([self.seed, 0])
+        names = list(BOARDS)
+        board = rng.choice(len(names), size=self.n, p=[BOARDS[b][1] for b in names])
+
+        symbols = np.empty(self.n, dtype='U6')
+        for b, name in enumerate(names):
+            idx = np.flatnonzero(board == b)
+            codes = np.concatenate([np.arange(lo, hi) for lo, hi in BOARDS[name][0]])
+            if len(idx) > len(codes):
+                raise ValueError(f"股票数超过 {name} 板块可分配的代码数 ({len(codes)})")
+            symbols[idx] = np.char.zfill(codes[:len(idx)].astype('U6'), 6)
+        suffix = np.where(np.char.startswith(symbols, '6'), '.SH',
+                          np.where(board == names.index('bse'), '.BJ', '.SZ'))
+
+        st = rng.random(self.n) < ST_RATIO
+        limit = np.array([BOARDS[names[b]][2] for b in board])
+        limit = np.where(st & (limit == 10.0), ST_LIMIT, limit)
+
+        circ_mv = np.clip(rng.lognormal(np.log(5e9), 1.1, self.n), 3e8, 2e12)  # 元
+        list_days = rng.integers(200, 9000, self.n)
+        return pd.DataFrame({
+            'ts_code': np.char.add(symbols, suffix),
+            'symbol': symbols,
+            'name': [f"{'*ST' if s else ''}合成{i:05d}" for i, s in enumerate(st)],
+            'area': rng.choice(AREAS, self.n),
+            'industry': rng.choice(INDUSTRIES, self.n),
+            'market': [BOARDS[names[b]][3] for b in board],
+            'list_date': [(datetime(2024, 1, 1) - timedelta(days=int(d))).strftime('%Y%m%d') for d in list_days],
+            'board': [names[b] for b in board],
+            'is_st': st,
+            'limit_pct': limit,
+            'pre_close': np.round(np.clip(rng.lognormal(np.log(11), 0.75, self.n), 1.5, 1500), 2),
+            'circ_mv': circ_mv,
+            'total_mv': circ_mv * rng.uniform(1.0, 1.8, self.n),
+            'pe': np.round(rng.lognormal(np.log(30), 0.7, self.n), 2),
+            'pb': np.round(rng.lognormal(np.log(2.5), 0.6, self.n), 2),
+        })
+
+    # ==================== 日行情 ====================
+
+    def _start_day(self, pre_close: np.ndarray):
+        """生成当日收盘目标与盘中路径的初始状态"""
+        rng = np.random.default_rng([self.seed, 1, self.day_index])
+        u = self.universe
+        n, limit = self.n, u['limit_pct'].to_numpy()
+        small = (u['circ_mv'].to_numpy() / 5e9) ** -0.2
+
+        market = rng.normal(0.05, 1.0)
+        change = 0.9 * market + rng.standard_t(3, n) * 1.6
+        draw = rng.random(n)
+        change = np.where(draw < LIMIT_UP_RATIO, limit, change)
+        change = np.where((draw >= LIMIT_UP_RATIO) & (draw < LIMIT_UP_RATIO + LIMIT_DOWN_RATIO), -limit, change)
+        change = np.clip(change, -limit, limit)
+
+        self.pre_close = np.asarray(pre_close, dtype=np.float64)
+        self.limit_up = np.round(self.pre_close * (1 + limit / 100), 2)
+        self.limit_down = np.round(self.pre_close * (1 - limit / 100), 2)
+        self.close = np.clip(np.round(self.pre_close * (1 + change / 100), 2), self.limit_down, self.limit_up)
+        gap = np.clip(rng.normal(change * 0.25, 0.8, n), -limit, limit)
+        self.open = np.clip(np.round(self.pre_close * (1 + gap / 100), 2), self.limit_down, self.limit_up)
+
+        self.turnover = np.round(np.clip(rng.lognormal(np.log(2.2), 0.8, n) * small * (1 + np.abs(change) / 4),
+                                         0.05, 60), 2)
+        self.volume_ratio = np.round(rng.lognormal(0, 0.35, n) * (1 + np.abs(change) / 10), 2)
+        self.amount = u['circ_mv'].to_numpy() * self.turnover / 100
+        self.volatility = rng.uniform(0.004, 0.02, n)  # 盘中波动 (相对昨收)
+
+        self._path_rng = np.random.default_rng([self.seed, 2, self.day_index])
+        self.tick = 0
+        self._bridge = np.zeros(n)
+        self.latest = self.open.copy()
+        self.high = self.open.copy()
+        self.low = self.open.copy()
+
+    def next_day(self) -> str:
+        """进入下一个交易日 (昨收为上一日收盘)，返回交易日"""
+        self.day_index += 1
+        self.trade_date = _weekdays(self.trade_date, 2)[1]
+        ratio = self.close / self.pre_close
+        self.universe['circ_mv'] *= ratio
+        self.universe['total_mv'] *= ratio
+        self._start_day(self.close)
+        return self.trade_date
+
+    # ==================== 盘中推进 ====================
+
+    def _volume_fraction(self, tick: int) -> float:
+        """U型成交量分布下截至第 tick 次推送的累计成交占比"""
+        t = np.linspace(0, 1, self.ticks)
+        weights = 1 + 3 * (2 * t - 1) ** 2
+        return float(weights[:tick + 1].sum() / weights.sum())
+
+    def advance(self, tick: Optional[int] = None) -> int:
+        """推进到第 tick 次推送 (默认下一次，不能后退)，返回当前推送序号"""
+        target = min(self.ticks - 1, self.tick + 1 if tick is None else int(tick))
+        while self.tick < target:
+            remaining = self.ticks - 1 - self.tick
+            # 布朗桥：终点固定为 0，开盘与收盘价格与日行情一致
+            step = self._path_rng.standard_normal(self.n) * np.sqrt((remaining - 1) / remaining)
+            self._bridge += -self._bridge / remaining + step * self.volatility / np.sqrt(self.ticks)
+            self.tick += 1
+            f = self.tick / (self.ticks - 1)
+            price = self.open + (self.close - self.open) * f + self.pre_close * self._bridge
+            self.latest = np.clip(np.round(price, 2), self.limit_down, self.limit_up)
+            self.high = np.maximum(self.high, self.latest)
+            self.low = np.minimum(self.low, self.latest)
+        return self.tick
+
+    def session_time(self) -> datetime:
+        """当前推送对应的交易时间 (按推送序号均匀分布在 241 根分钟线上)"""
+        minute = MINUTE_TIMES[round(self.tick / (self.ticks - 1) * (BARS_PER_DAY - 1))]
+        return datetime.strptime(self.trade_date + minute, '%Y%m%d%H%M')
+
+    def session(self) -> Iterator[np.ndarray]:
+        """从当前推送逐次推进到收盘，每次产出行情结构化数组"""
+        yield self.quotes()
+        while self.tick < self.ticks - 1:
+            self.advance()
+            yield self.quotes()
+
+    def close_out(self) -> np.ndarray:
+        """推进到收盘并返回收盘行情"""
+        self.advance(self.ticks - 1)
+        return self.quotes()
+
+    # ==================== 输出 ====================
+
+    def _snapshot(self) -> Dict[str, np.ndarray]:
+        fraction = self._volume_fraction(self.tick)
+        amount = self.amount * fraction
+        vwap = np.clip((self.high + self.low + 2 * self.latest) / 4, self.low, self.high)
+        return {
+            'latest': self.latest, 'open': self.open, 'high': self.high, 'low': self.low,
+            'pre_close': self.pre_close, 'amount': np.round(amount, 2),
+            'volume': np.round(amount / np.maximum(vwap, 0.01) / 100),
+            'turnover_rate': np.round(self.turnover * fraction, 2),
+            'change_pct': np.round((self.latest - self.pre_close) / self.pre_close * 100, 2),
+            'volume_ratio': self.volume_ratio,
+            'market_cap': np.round(self.universe['total_mv'].to_numpy() * self.latest / self.pre_close, 2),
+        }
+
+    def _rows(self, symbols: Optional[Sequence[str]]) -> np.ndarray:
+        if symbols is None:
+            return np.arange(self.n)
+        codes = self.universe['symbol'].to_numpy()
+        order = np.argsort(codes)
+        wanted = np.asarray([str(s).split('.')[0] for s in symbols], dtype='U6')
+        pos = np.minimum(np.searchsorted(codes, wanted, sorter=order), self.n - 1)
+        rows = order[pos]
+        return rows[codes[rows] == wanted]
+
+    def quotes(self, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """当前推送的行情结构化数组 (QUOTE_DTYPE)"""
+        rows = self._rows(symbols)
+        snap = self._snapshot()
+        quotes = np.zeros(len(rows), dtype=QUOTE_DTYPE)
+        quotes['symbol'] = self.universe['symbol'].to_numpy()[rows]
+        quotes['name'] = self.universe['name'].to_numpy()[rows]
+        for field, values in snap.items():
+            quotes[field] = values[rows]
+        quotes['pe'] = self.universe['pe'].to_numpy()[rows]
+        quotes['pb'] = self.universe['pb'].to_numpy()[rows]
+        quotes['source'] = 'synthetic'
+        quotes['fetch_ts'] = self.session_time().timestamp()
+        return quotes
+
+    def gugudata_items(self, symbols: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """当前推送的 GuguData 实时行情 Data 列表"""
+        rows = self._rows(symbols)
+        snap = self._snapshot()
+        u = self.universe
+        columns = {
+            'Symbol': u['symbol'].to_numpy()[rows].tolist(),
+            'StockName': u['name'].to_numpy()[rows].tolist(),
+            'Latest': snap['latest'][rows].tolist(),
+            'Open': snap['open'][rows].tolist(),
+            'High': snap['high'][rows].tolist(),
+            'Low': snap['low'][rows].tolist(),
+            'LastClose': snap['pre_close'][rows].tolist(),
+            'TradingVolume': snap['volume'][rows].tolist(),
+            'TradingAmount': snap['amount'][rows].tolist(),
+            'TurnoverRate': snap['turnover_rate'][rows].tolist(),
+            'ChangePercent': snap['change_pct'][rows].tolist(),
+            'QuantityRatio': snap['volume_ratio'][rows].tolist(),
+            'MarketCap': snap['market_cap'][rows].tolist(),
+            'PERatioDynamic': u['pe'].to_numpy()[rows].tolist(),
+            'PBRatio': u['pb'].to_numpy()[rows].tolist(),
+        }
+        keys = list(columns)
+        return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+    def gugudata_payload(self, symbols: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """完整的 GuguData 实时行情响应"""
+        data = self.gugudata_items(symbols)
+        return {'DataStatus': {**GUGUDATA_OK, 'DataTotalCount': len(data)}, 'Data': data}
+
+    def stock_basic(self, fields: Optional[str] = None, **_) -> pd.DataFrame:
+        """Tushare stock_basic 形式的股票列表"""
+        columns = ['ts_code', 'symbol', 'name', 'area', 'industry', 'market', 'list_date']
+        return _select(self.universe[columns].reset_index(drop=True), fields)
+
+    def daily_basic(self, trade_date: Optional[str] = None, fields: Optional[str] = None, **_) -> pd.DataFrame:
+        """Tushare daily_basic 形式的当日指标 (市值单位万元，与 Tushare 一致)"""
+        ratio = self.close / self.pre_close
+        frame = pd.DataFrame({
+            'ts_code': self.universe['ts_code'],
+            'trade_date': trade_date or self.trade_date,
+            'close': self.close,
+            'turnover_rate': self.turnover,
+            'turnover_rate_f': np.round(self.turnover * 1.3, 2),
+            'volume_ratio': self.volume_ratio,
+            'pe': self.universe['pe'],
+            'pb': self.universe['pb'],
+            'total_mv': np.round(self.universe['total_mv'].to_numpy() * ratio / 10000, 2),
+            'circ_mv': np.round(self.universe['circ_mv'].to_numpy() * ratio / 10000, 2),
+        })
+        return _select(frame, fields)
+
+    def trade_cal(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                  fields: Optional[str] = None, **_) -> pd.DataFrame:
+        """Tushare trade_cal 形式的交易日历 (工作日均为交易日)"""
+        start = start_date or self.trade_date
+        end = end_date or self.trade_date
+        days = pd.date_range(start, end, freq='D')
+        frame = pd.DataFrame({'exchange': 'SSE', 'cal_date': days.strftime('%Y%m%d'),
+                              'is_open': (days.weekday < 5).astype(int)})
+        return _select(frame[frame['is_open'] == 1].reset_index(drop=True), fields)
+
+    def summary(self) -> Dict[str, Any]:
+        """当前行情的分布概览 (核对合成数据是否合理)"""
+        snap = self._snapshot()
+        at_limit_up = np.isclose(self.latest, self.limit_up)
+        at_limit_down = np.isclose(self.latest, self.limit_down)
+        return {
+            'trade_date': self.trade_date, 'tick': self.tick, 'symbols': self.n,
+            'boards': self.universe['board'].value_counts().to_dict(),
+            'st': int(self.universe['is_st'].sum()),
+            'limit_up': int(at_limit_up.sum()), 'limit_down': int(at_limit_down.sum()),
+            'median_price': float(np.median(self.latest)),
+            'median_turnover': float(np.median(snap['turnover_rate'])),
+            'median_change': float(np.median(snap['change_pct'])),
+            'median_circ_mv_yi': float(self.universe['circ_mv'].median() / 1e8),
+        }
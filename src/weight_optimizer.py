@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+主力埋伏策略评分权重优化
+1. 候选股六项评分与远期收益预先计算一次 (BurialBacktest.candidates)，权重只影响排序
+2. 候选按交易日填充为 (交易日, 候选, 6) 数组，成千上万组权重通过一次矩阵乘法同时评分，
+   每组权重每日取 TOP N 统计收益
+3. 搜索方式：随机 (Dirichlet)、网格 (按步长枚举全部组合)、坐标搜索 (两两转移权重)
+4. 滚动前推 (walk-forward)：训练窗口内搜索，紧接的测试窗口样本外验证
+5. 结果导出为 strategy_configs.json 格式 (权重为整数，总和100，与 Web 配置页一致)
+"""
+
+import itertools
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.burial_signals import COMPONENT_NAMES, MIN_TOTAL_SCORE, config_params, total_score, weight_vector
+
+OBJECTIVES = ('avg_return', 'win_rate', 'sharpe', 'cumulative_return')
+SEARCH_METHODS = ('random', 'grid', 'coordinate')
+
+# 单批评分数组元素上限 (交易日×候选×权重组)，控制内存占用
+BATCH_ELEMENTS = 20_000_000
+
+
+def random_weights(n: int, step: int = 5, seed: Optional[int] = None) -> np.ndarray:
+    """随机权重 (整数，步长 step，总和100)，在单纯形上近似均匀分布"""
+    rng = np.random.default_rng(seed)
+    probs = rng.dirichlet(np.ones(len(COMPONENT_NAMES)), size=n)
+    units = np.array([rng.multinomial(100 // step, p) for p in probs])
+    return units * step
+
+
+def grid_weights(step: int = 10) -> np.ndarray:
+    """网格枚举全部权重组合 (整数，步长 step，总和100)；步长10为3003组，步长5为53130组"""
+    units = 100 // step
+    k = len(COMPONENT_NAMES)
+    grid = []
+    # 隔板法：在 units+k-1 个位置中选 k-1 个隔板
+    for bars in itertools.combinations(range(units + k - 1), k - 1):
+        edges = np.array((-1,) + bars + (units + k - 1,))
+        grid.append(np.diff(edges) - 1)
+    return np.array(grid) * step
+
+
+def weights_dict(vector) -> Dict[str, int]:
+    """权重向量 -> scoring_weights 字典"""
+    return {name: int(round(value)) for name, value in zip(COMPONENT_NAMES, vector)}
+
+
+class WeightOptimizer:
+    """评分权重优化器"""
+
+    def __init__(self, candidates: pd.DataFrame, exit_name: str = 'T+1_close', top_n: int = 10,
+                 min_score: float = MIN_TOTAL_SCORE, objective: str = 'avg_return', min_trades: int = 30):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"未知的优化目标: {objective} (可选: {', '.join(OBJECTIVES)})")
+        self.exit_name = exit_name
+        self.top_n = top_n
+        self.min_score = min_score
+        self.objective = objective
+        self.min_trades = min_trades
+
+        # 与回测引擎一致：先在全部候选中排序取 TOP N，出场收益缺失的入选股只是不计入统计，不让出名额
+        candidates = candidates.sort_values('trade_date', kind='stable')
+        candidates = candidates[self._undominated(candidates, top_n)]
+        self.dates = candidates['trade_date'].unique()
+        day = np.searchsorted(self.dates, candidates['trade_date'].to_numpy())
+        slot = candidates.groupby('trade_date').cumcount().to_numpy()
+        width = int(slot.max()) + 1 if len(slot) else 0
+
+        # 按交易日填充：components (D, L, 6)，returns (D, L)，空位评分为 -inf
+        self.components = np.zeros((len(self.dates), width, len(COMPONENT_NAMES)))
+        self.returns = np.full((len(self.dates), width), np.nan)
+        self.filled = np.zeros((len(self.dates), width), dtype=bool)
+        self.components[day, slot] = candidates[list(COMPONENT_NAMES)].to_numpy(dtype=np.float64)
+        self.returns[day, slot] = candidates[exit_name].to_numpy(dtype=np.float64)
+        self.filled[day, slot] = True
+
+    @staticmethod
+    def _undominated(candidates: pd.DataFrame, top_n: int) -> np.ndarray:
+        """
+        剔除不可能进入 TOP N 的候选：当日有不少于 top_n 只排在它之前 (同分按列顺序) 的股票六项评分全部不低于它时，
+        任何非负权重下它都排在这些股票之后；剔除后评估结果不变，数组规模大幅缩小
+        """
+        keep = np.ones(len(candidates), dtype=bool)
+        comps = candidates[list(COMPONENT_NAMES)].to_numpy(dtype=np.float64)
+        bounds = np.flatnonzero(np.r_[True, candidates['trade_date'].to_numpy()[1:] != candidates['trade_date'].to_numpy()[:-1]])
+        for lo, hi in zip(bounds, np.r_[bounds[1:], len(candidates)]):
+            if hi - lo <= top_n:
+                continue
+            c = comps[lo:hi]
+            ge = (c[:, None, :] >= c[None, :, :]).all(axis=-1)
+            # 排在后面的股票即使某项更高，该项权重为0时同分，仍按列顺序排在它之后
+            earlier = np.tri(hi - lo, k=-1, dtype=bool).T
+            keep[lo:hi] = (ge & earlier).sum(axis=0) < top_n
+        return keep
+
+    # ==================== 评估 ====================
+
+    def _evaluate_batch(self, weights: np.ndarray, days: slice) -> Dict[str, np.ndarray]:
+        comps = self.components[days]
+        filled = self.filled[days]
+        returns = self.returns[days]
+
+        # (D, K, L)：候选放在最后一维，按行取 TOP N 时内存连续；总分与回测引擎同一算式
+        scores = total_score(comps, weights).transpose(0, 2, 1)
+        scores = np.where(filled[:, None, :] & (scores >= self.min_score), scores, -np.inf)
+        returns = np.broadcast_to(returns[:, None, :], scores.shape)
+
+        # 同分按列顺序 (回测引擎 lexsort 的稳定排序)，取 TOP N
+        top = min(self.top_n, scores.shape[-1])
+        idx = np.argsort(-scores, axis=-1, kind='stable')[..., :top]
+        top_scores = np.take_along_axis(scores, idx, axis=-1)
+        top_returns = np.take_along_axis(returns, idx, axis=-1)
+
+        # 入选但出场收益缺失 (如停牌、无分钟线) 的不计入统计
+        picked = np.isfinite(top_scores) & np.isfinite(top_returns)
+        picked_returns = np.where(picked, top_returns, 0.0)
+        counts = picked.sum(axis=-1)                                       # (D, K)
+        trades = counts.sum(axis=0)
+        wins = (picked & (top_returns > 0)).sum(axis=(0, 2))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily = np.where(counts > 0, picked_returns.sum(axis=-1) / counts, 0.0)  # 每日等权收益
+            avg_return = picked_returns.sum(axis=(0, 2)) / trades
+            win_rate = wins / trades * 100
+            active = (counts > 0).sum(axis=0)
+            daily_mean = daily.sum(axis=0) / active
+            daily_std = np.sqrt(((daily - daily_mean) ** 2 * (counts > 0)).sum(axis=0) / active)
+            sharpe = np.where(daily_std > 0, daily_mean / daily_std * np.sqrt(250), 0.0)
+        cumulative = (np.prod(1 + daily / 100, axis=0) - 1) * 100
+
+        return {
+            'trades': trades,
+            'avg_return': np.nan_to_num(avg_return),
+            'win_rate': np.nan_to_num(win_rate),
+            'sharpe': np.nan_to_num(sharpe),
+            'cumulative_return': cumulative,
+        }
+
+    def evaluate(self, weights, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        批量评估权重组 (K, 6)，区间 [start, end] 按交易日；返回每组权重的统计
+        样本不足 min_trades 笔的权重组目标值记为 -inf
+        """
+        weights = np.atleast_2d(weight_vector(weights) if isinstance(weights, Mapping)
+                                else np.asarray(weights, dtype=np.float64))
+        days = slice(0 if start is None else int(np.searchsorted(self.dates, start, side='left')),
+                     len(self.dates) if end is None else int(np.searchsorted(self.dates, end, side='right')))
+
+        n_days = days.stop - days.start
+        batch = max(1, BATCH_ELEMENTS // max(1, n_days * self.components.shape[1]))
+        parts = [self._evaluate_batch(weights[i:i + batch], days) for i in range(0, len(weights), batch)]
+
+        stats = pd.DataFrame(weights, columns=list(COMPONENT_NAMES))
+        for key in ('trades', 'avg_return', 'win_rate', 'sharpe', 'cumulative_return'):
+            stats[key] = np.concatenate([part[key] for part in parts]) if parts else []
+        stats['objective'] = np.where(stats['trades'] >= self.min_trades, stats[self.objective], -np.inf)
+        return stats
+
+    # ==================== 搜索 ====================
+
+    def search(self, method: str = 'random', start: Optional[str] = None, end: Optional[str] = None,
+               n: int = 5000, step: int = 5, seed: Optional[int] = None,
+               initial: Optional[Mapping[str, float]] = None, rounds: int = 20) -> pd.DataFrame:
+        """在 [start, end] 上搜索权重，返回按目标值降序的评估结果"""
+        if method == 'random':
+            stats = self.evaluate(random_weights(n, step, seed), start, end)
+        elif method == 'grid':
+            stats = self.evaluate(grid_weights(step), start, end)
+        elif method == 'coordinate':
+            stats = self.coordinate_search(initial, start, end, step, rounds)
+        else:
+            raise ValueError(f"未知的搜索方式: {method} (可选: {', '.join(SEARCH_METHODS)})")
+        return stats.sort_values('objective', ascending=False, kind='stable').reset_index(drop=True)
+
+    def coordinate_search(self, initial: Optional[Mapping[str, float]] = None, start: Optional[str] = None,
+                          end: Optional[str] = None, step: int = 5, rounds: int = 20) -> pd.DataFrame:
+        """
+        坐标搜索：每轮同时评估把 step 权重从一项转移到另一项的全部相邻组合，取最优；
+        没有改进时步长减半，步长为1仍无改进则停止。返回所有评估过的权重组
+        """
+        current = weight_vector(initial) if initial else np.full(len(COMPONENT_NAMES), 100 / len(COMPONENT_NAMES))
+        current = np.round(current)
+        current[np.argmax(current)] += 100 - current.sum()
+        best = self.evaluate(current, start, end)
+        history = [best]
+        best_value = best['objective'].iloc[0]
+
+        k = len(COMPONENT_NAMES)
+        pairs = [(i, j) for i in range(k) for j in range(k) if i != j]
+        for _ in range(rounds):
+            neighbors = []
+            for i, j in pairs:
+                if current[i] >= step:
+                    moved = current.copy()
+                    moved[i] -= step
+                    moved[j] += step
+                    neighbors.append(moved)
+            stats = self.evaluate(np.array(neighbors), start, end)
+            history.append(stats)
+            top = stats['objective'].idxmax()
+            if stats['objective'].iloc[top] > best_value:
+                best_value = stats['objective'].iloc[top]
+                current = np.array(neighbors[top])
+            elif step > 1:
+                step = max(1, step // 2)
+            else:
+                break
+        return pd.concat(history, ignore_index=True).drop_duplicates(subset=list(COMPONENT_NAMES))
+
+    def walk_forward(self, train_days: int = 120, test_days: int = 20, method: str = 'random',
+                     **search_kwargs) -> pd.DataFrame:
+        """
+        滚动前推验证：每个窗口用前 train_days 个交易日搜索最优权重，在随后 test_days 个交易日评估
+        返回每个窗口的最优权重与样本内/样本外统计
+        """
+        folds = []
+        for lo in range(0, len(self.dates) - train_days, test_days):
+            train = (self.dates[lo], self.dates[lo + train_days - 1])
+            test_end = min(lo + train_days + test_days, len(self.dates)) - 1
+            test = (self.dates[lo + train_days], self.dates[test_end])
+
+            best = self.search(method, *train, **search_kwargs).iloc[0]
+            vector = best[list(COMPONENT_NAMES)].to_numpy(dtype=np.float64)
+            outcome = self.evaluate(vector, *test).iloc[0]
+            folds.append({
+                'train_start': train[0], 'train_end': train[1],
+                'test_start': test[0], 'test_end': test[1],
+                **weights_dict(vector),
+                'train_objective': best['objective'],
+                'test_objective': outcome['objective'],
+                'test_trades': int(outcome['trades']),
+                'test_avg_return': outcome['avg_return'],
+                'test_win_rate': outcome['win_rate'],
+            })
+        return pd.DataFrame(folds)
+
+
+# ==================== 导出 ====================
+
+def to_strategy_config(weights, name: str, description: str = '',
+                       params: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """生成 strategy_configs.json 配置项 (params 为策略参数，市值单位万元)"""
+    vector = weight_vector(weights) if isinstance(weights, Mapping) else np.asarray(weights, dtype=np.float64)
+    config = {
+        'name': name,
+        'description': description or f"权重优化 {datetime.now().strftime('%Y-%m-%d')}",
+        'weights': weights_dict(vector),
+    }
+    if params:
+        config['params'] = config_params(params)
+    return config
+
+
+def save_strategy_config(config: Dict[str, Any], path: str = 'strategy_configs.json'):
+    """写入 (或覆盖同名) 策略配置，Web 应用配置页可直接加载"""
+    configs = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            configs = json.load(f)
+    configs[config['name']] = config
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(configs, f, ensure_ascii=False, indent=2)
@@ -381,34 +381,60 @@ except ImportError as e:
     CONFIG_AVAILABLE = False
     st.error(f"⚠️ 模块导入失败: {e}")
 
+from src.results_store import STRATEGY_MAIN_FORCE, get_results_store
+from src.screening_jobs import STATUS_DONE, STATUS_FAILED, STATUS_LABELS, get_screening_jobs
+
 # ==================== 辅助函数 ====================
+def file_signature(path):
+    """文件签名 (修改时间+大小)，作为缓存键，文件变化时缓存自动失效"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def results_signature():
+    """结果数据的签名：数据库文件(含WAL日志) + 当前目录 (新增旧版JSON文件时目录修改时间变化)"""
+    db_path = get_results_store().db_path
+    return (file_signature(db_path), file_signature(db_path + '-wal'), file_signature('.'))
+
+def get_store():
+    """获取结果数据库 (导入目录下尚未入库的旧版JSON结果)"""
+    store = get_results_store()
+    store.import_legacy_json()
+    return store
+
+@st.cache_data(show_spinner=False)
+def _cached_latest_result(signature):
+    return get_store().latest(STRATEGY_MAIN_FORCE)
+
+@st.cache_data(show_spinner=False)
+def _cached_result_headers(signature, limit):
+    return get_store().history_headers(STRATEGY_MAIN_FORCE, limit=limit)
+
+@st.cache_data(show_spinner=False, max_entries=200)
+def load_run_stocks(run_id):
+    """加载某次选股的股票列表 (每次选股结果写入后不再变化，按 run_id 缓存)"""
+    return get_results_store().run_stocks(run_id)
+
+@st.cache_data(show_spinner=False)
+def _cached_stock_index(signature):
+    return get_store().stock_index(STRATEGY_MAIN_FORCE)
+
+@st.cache_data(show_spinner=False)
+def _cached_appearances(signature, code):
+    return get_store().appearances(code, STRATEGY_MAIN_FORCE)
+
 def load_latest_result():
     """加载最新的选股结果"""
-    result_files = []
-    for file in os.listdir('.'):
-        if file.startswith('main_force_burial_result_') and file.endswith('.json'):
-            result_files.append(file)
-
-    if result_files:
-        latest = max(result_files)
-        with open(latest, 'r', encoding='utf-8') as f:
-            return json.load(f), latest
+    latest = _cached_latest_result(results_signature())
+    if latest:
+        return latest, latest.get('source') or f"run #{latest['run_id']}"
     return None, None
 
 def get_all_results():
-    """获取所有历史结果"""
-    results = []
-    for file in sorted(os.listdir('.'), reverse=True):
-        if file.startswith('main_force_burial_result_') and file.endswith('.json'):
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    results.append(data)
-            except:
-                continue
-            if len(results) >= 30:  # 最多显示30条历史
-                break
-    return results
+    """获取所有历史结果的头信息 (不含股票列表，需要时用 load_run_stocks 加载)"""
+    return _cached_result_headers(results_signature(), 30)  # 最多显示30条历史
 
 def run_stock_screening():
     """执行选股策略"""
@@ -426,21 +452,26 @@ def run_stock_screening():
 # ==================== 自定义配置管理 ====================
 CONFIG_FILE = "strategy_configs.json"
 
-def load_custom_configs():
-    """从文件加载自定义配置"""
+@st.cache_data(show_spinner=False)
+def _cached_custom_configs(signature):
     try:
-        if os.path.exists(CONFIG_FILE):
+        if signature is not None:
             with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
                 return json.load(f)
     except:
         pass
     return {}
 
+def load_custom_configs():
+    """从文件加载自定义配置 (文件未变化时使用缓存)"""
+    return _cached_custom_configs(file_signature(CONFIG_FILE))
+
 def save_custom_configs(configs):
     """保存自定义配置到文件"""
     try:
         with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
             json.dump(configs, f, ensure_ascii=False, indent=2)
+        _cached_custom_configs.clear()
         return True
     except Exception as e:
         st.error(f"保存失败: {e}")
@@ -852,54 +883,66 @@ def show_history():
     # 历史列表
     st.subheader("📅 历史记录列表")
 
-    for result in results[:20]:
-        with st.expander(f"📅 {result.get('screening_time', '')} - 选出{result.get('total_stocks_found', 0)}只股票"):
-            stocks = result.get('stocks', [])
-            if stocks:
-                # 显示前5只
-                for stock in stocks[:5]:
-                    st.write(f"**{stock['name']}** ({stock['code']}) - {stock['price']:.2f}元 {stock['change']:+.2f}% - 评分: {round(stock['total_score'], 1)}")
+    # 列表只用头信息；股票明细只加载选中的一条记录 (st.expander 折叠时其内容同样会执行)
+    recent = {result['run_id']: result for result in results[:20]}
+    run_id = st.selectbox(
+        "选择记录查看详情",
+        list(recent.keys()),
+        format_func=lambda key: (f"📅 {recent[key].get('screening_time', '')} - "
+                                 f"选出{recent[key].get('total_stocks_found', 0)}只股票"),
+        key='history_run'
+    )
+
+    stocks = load_run_stocks(run_id) if run_id is not None else []
+    if stocks:
+        # 显示前5只
+        for stock in stocks[:5]:
+            st.write(f"**{stock['name']}** ({stock['code']}) - {stock['price']:.2f}元 {stock['change']:+.2f}% - 评分: {round(stock['total_score'], 1)}")
 
 # ==================== 股票分析页面 ====================
 def show_stock_analysis():
     """股票分析页面"""
     st.markdown("# 🔍 股票详情分析")
 
-    # 获取所有历史结果中的股票
-    all_stocks = {}
-    results = get_all_results()
-
-    for result in results:
-        for stock in result.get('stocks', []):
-            code = stock['code']
-            if code not in all_stocks:
-                all_stocks[code] = stock
+    # 入选过的股票索引 (每只股票取最近一次入选记录)
+    signature = results_signature()
+    stock_index = {item['code']: item for item in _cached_stock_index(signature)}
 
-    if not all_stocks:
+    if not stock_index:
         st.warning("暂无股票数据")
         return
 
+    def load_stock(code):
+        """加载股票最近一次入选时的完整数据"""
+        item = stock_index.get(code)
+        if not item:
+            return None
+        stocks = load_run_stocks(item['run_id'])
+        rank = item['rank'] or 0
+        return stocks[rank - 1] if 0 < rank <= len(stocks) else None
+
     # 股票选择
     col1, col2 = st.columns([2, 1])
 
     with col1:
-        stock_options = [f"{s['code']} - {s['name']}" for s in all_stocks.values()]
+        stock_options = [f"{s['code']} - {s['name']}" for s in stock_index.values()]
         selected = st.selectbox("选择股票", stock_options)
 
     with col2:
         if selected:
             code = selected.split(' - ')[0]
-            stock_data = all_stocks.get(code)
+            stock_data = load_stock(code)
 
             if stock_data:
                 st.metric("现价", f"{stock_data['price']:.2f}元")
                 st.metric("涨幅", f"{stock_data['change']:+.2f}%")
                 st.metric("评分", f"{round(stock_data['total_score'], 1)}")
+                st.metric("入选次数", f"{stock_index[code]['appearances']}次")
 
     # 详细分析
     if selected:
         code = selected.split(' - ')[0]
-        stock_data = all_stocks.get(code)
+        stock_data = load_stock(code)
 
         if stock_data:
             st.markdown("---")
@@ -931,6 +974,14 @@ def show_stock_analysis():
                 st.write(f"- **价格位置**: {stock_data.get('price_position', 0)*100:.1f}%")
                 st.write(f"- **振幅**: {stock_data.get('amplitude', 0):.2f}%")
 
+            # 历次入选记录
+            appearances = _cached_appearances(signature, code)
+            if len(appearances) > 1:
+                st.markdown("### 历次入选记录")
+                df_appear = pd.DataFrame(appearances)[['screening_time', 'rank', 'price', 'change', 'total_score']]
+                df_appear.columns = ['选股时间', '排名', '价格', '涨幅(%)', '评分']
+                st.dataframe(df_appear.round(2), use_container_width=True, hide_index=True)
+
 # ==================== 策略配置页面 ====================
 def show_strategy_config():
     """策略配置页面"""
@@ -1153,47 +1204,22 @@ def show_manual_screening():
     预计执行时间：1-3分钟
     """)
 
-    # 执行按钮
+    # 执行按钮 (后台执行，相同配置的请求共享同一任务和缓存结果)
+    jobs = get_screening_jobs()
+    cached_job = jobs.cached(config)
     col1, col2, col3 = st.columns(3)
     with col2:
-        if st.button("🚀 开始选股", type="primary", use_container_width=True):
-            st.markdown("### ⏳ 正在执行选股...")
-
-            progress_bar = st.progress(0)
-            status_text = st.empty()
+        start = st.button("🚀 开始选股", type="primary", use_container_width=True)
+        rerun = (cached_job is not None and cached_job.status == STATUS_DONE
+                 and st.button("🔄 重新选股", use_container_width=True))
 
-            # 执行选股
-            try:
-                status_text.text("📊 正在获取基础股票池...")
-                progress_bar.progress(20)
+    if start or rerun:
+        job = jobs.submit(config, run_stock_screening_with_config, force=bool(rerun))
+        st.session_state.screening_job = job.key
 
-                results, result_file = run_stock_screening_with_config(config)
-                progress_bar.progress(50)
-
-                if results is not None:
-                    status_text.text("✅ 选股完成！")
-                    progress_bar.progress(100)
-
-                    st.success(f"成功选出 {len(results)} 只候选股票")
-
-                    # 显示结果
-                    st.markdown("---")
-                    st.subheader("📈 选股结果 TOP 10")
-
-                    for i, stock in enumerate(results[:10], 1):
-                        score = stock['total_score']
-                        score_color = "🟢" if score >= 75 else "🟡" if score >= 70 else "🔴"
-                        st.markdown(f"{score_color} **{i}. {stock['name']}** ({stock['code']}) - 评分: {round(score, 1)}")
-
-                else:
-                    status_text.text(f"❌ 执行失败: {result_file}")
-                    progress_bar.progress(0)
-                    st.error(result_file)
-
-            except Exception as e:
-                st.error(f"执行出错: {e}")
-                import traceback
-                st.error(traceback.format_exc())
+    job = jobs.get(st.session_state.get('screening_job'))
+    if job:
+        show_screening_job(job)
 
     st.markdown("---")
 
@@ -1208,14 +1234,45 @@ def show_manual_screening():
     else:
         st.warning("暂无执行记录")
 
-def run_stock_screening_with_config(config):
-    """使用指定配置执行选股策略"""
+    # 任务执行中：页面渲染完成后每秒刷新一次进度
+    if job and job.active:
+        time.sleep(1)
+        st.rerun()
+
+def show_screening_job(job):
+    """显示后台选股任务的进度或结果"""
+    if job.active:
+        st.markdown(f"### ⏳ 正在执行选股 ({job.config_name})...")
+        st.progress(int(job.progress * 100))
+        st.text(f"{STATUS_LABELS[job.status]}: {job.message} (已用时 {job.elapsed():.0f} 秒)")
+        if job.requests > 1:
+            st.caption(f"相同配置的 {job.requests} 次请求共享此任务")
+    elif job.status == STATUS_FAILED:
+        st.error(f"❌ 执行失败: {job.error}")
+    else:
+        results = job.results or []
+        st.success(f"成功选出 {len(results)} 只候选股票 "
+                   f"(完成于 {job.finished_time()}，耗时 {job.elapsed():.0f} 秒)")
+
+        if results:
+            # 显示结果
+            st.markdown("---")
+            st.subheader("📈 选股结果 TOP 10")
+
+            for i, stock in enumerate(results[:10], 1):
+                score = stock['total_score']
+                score_color = "🟢" if score >= 75 else "🟡" if score >= 70 else "🔴"
+                st.markdown(f"{score_color} **{i}. {stock['name']}** ({stock['code']}) - 评分: {round(score, 1)}")
+
+def run_stock_screening_with_config(config, progress_callback=None):
+    """使用指定配置执行选股策略 (progress_callback(进度, 说明) 接收执行进度)"""
     if not CONFIG_AVAILABLE:
         return None, "配置模块未正确加载"
 
     try:
         # 创建策略实例
         strategy = MainForceBurialStrategy()
+        strategy.progress_callback = progress_callback
 
         # 应用自定义配置参数
         if 'params' in config:
@@ -1241,6 +1298,7 @@ def run_stock_screening_with_config(config):
             for stock in results:
                 stock['config_name'] = config.get('name', '默认配置')
 
+        strategy.report_progress(0.95, "保存结果...")
         result_file = strategy.save_results()
 
         return results, result_file